@@ -10,6 +10,20 @@ try:
     from openpyxl import load_workbook
 except ImportError:
     load_workbook = None
+from stockage_semaine import (open_workbook, save_workbook, read_excel_sheets, iter_workbook_rows,
+                              week_transaction, get_week_generation, export_week_to_excel,
+                              recover_week_transaction, current_week_transaction)
+from ecriture_matrix import MatrixPatchWriter
+from schema_colonnes import MATRIX_SCHEMA, SCHOOL_SCHEMA, resolve_columns, resolve_column_indexes
+from index_horaires import clean_horaire_name, find_horaire_sheet
+from index_classes import get_class_index
+from index_eleves import StudentNameIndex
+from filtres_eleves import StudentFilterEngine, format_date_jour_mois
+from index_recherche import NgramIndex
+from recherche_differee import DebouncedSearch
+from tableau_virtuel import VirtualTable
+from sauvegarde_differee import (WriteBehindSaver, ETAT_SAUVEGARDE, ETAT_NON_SAUVEGARDE,
+                                 ETAT_EN_COURS, ETAT_ERREUR)
 
 class AppPedagogique(ctk.CTk):
     def __init__(self, file_path=None):
@@ -61,6 +75,9 @@ class AppPedagogique(ctk.CTk):
 
         # 2. On charge et on crée tout le contenu
         self.load_data()
+        self.matrix_writer = MatrixPatchWriter(self.file_path, self.df)
+        self.saver = WriteBehindSaver(self.write_matrix_snapshot)
+        self.save_status_job = None
         self.setup_styles()
         self.create_widgets()
         self.refresh_table(preserve_selection=False)
@@ -69,6 +86,7 @@ class AppPedagogique(ctk.CTk):
         self.matrix_last_modified = None
         self.matrix_watch_job = None
         self.start_matrix_watch()
+        self.update_save_status()
 
         # 4. EN DERNIER : On force le plein écran
         # On utilise after(200, ...) pour laisser un micro-délai au rendu graphique
@@ -82,24 +100,13 @@ class AppPedagogique(ctk.CTk):
             messagebox.showerror("Fichier matrix introuvable", error_msg)
             sys.exit()
 
+        # Terminer une éventuelle transaction interrompue avant de lire les fichiers
+        recover_week_transaction(os.path.dirname(self.file_path))
+
         try:
             self.df = self.safe_read_excel(self.file_path)
-            # Normalisation des colonnes
-            self.cols_map = {
-                "Ecole": self.find_column(["ecole", "école", "school"]),
-                "Classe": self.find_column(["classe", "class", "groupe"]),
-                "Stagiaire": self.find_column(["stagiaire", "nom", "élève"]),
-                "Âge": self.find_column(["âge", "age"]),
-                "Cours 2": self.find_column(["Cours 2"]),
-                "Niveau": self.find_column(["niveau"]),
-                "Classe CI": self.find_column(["classe ci", "classe_ci"]),
-                "Prof": self.find_column(["prof", "professeur", "enseignant"]),
-                "Prof CI": self.find_column(["prof ci", "prof_ci", "professeur ci"]),
-                "Départ": self.find_column(["cours 1 du", "départ", "depart"]),
-                "Arrivée": self.find_column(["cours 1 au", "arrivée", "arrivee"]),
-                "Départ CI": self.find_column(["cours 2 du", "départ ci", "depart ci"]),
-                "Arrivée CI": self.find_column(["cours 2 au", "arrivée ci", "arrivee ci"])
-            }
+            # Normalisation des colonnes (schéma partagé avec fenetre_principale.py)
+            self.cols_map = self.resolve_cols_map()
             if not self.cols_map["Stagiaire"]:
                 raise ValueError("Impossible de trouver la colonne 'Stagiaire'.")
             
@@ -138,24 +145,45 @@ class AppPedagogique(ctk.CTk):
             if not self.cols_map["Arrivée CI"]:
                 self.df["Arrivée CI"] = None
                 self.cols_map["Arrivée CI"] = "Arrivée CI"
+
+            self.rebuild_student_index()
         except Exception as e:
             error_msg = f"Erreur lors de l'ouverture du fichier :\n{e}"
             print(f"ERREUR: {error_msg}")
             messagebox.showerror("Erreur de lecture", error_msg)
             sys.exit()
 
-    def find_column(self, keywords):
-        for col in self.df.columns:
-            if any(k in str(col).lower() for k in keywords): return col
-        return None
+    def rebuild_student_index(self, added_labels=None, removed_labels=None):
+        """
+        Reconstruit l'index nom d'élève → lignes et les colonnes d'affichage du tableau (chargement, ajout ou suppression d'élèves).
+
+        L'index de recherche des noms est construit au chargement, puis seulement mis à jour
+        pour les lignes ajoutées (added_labels) ou supprimées (removed_labels).
+        """
+        self.student_index = StudentNameIndex.from_dataframe(self.df, self.cols_map["Stagiaire"])
+        stagiaire_col = self.cols_map["Stagiaire"]
+        if added_labels is None and removed_labels is None:
+            self.name_search_index = NgramIndex.from_items(self.df.index, self.df[stagiaire_col].tolist())
+        else:
+            for label in removed_labels or ():
+                self.name_search_index.remove(label)
+            for label in added_labels or ():
+                self.name_search_index.add(label, self.df.at[label, stagiaire_col])
+        self.filter_engine = StudentFilterEngine(self.df, self.cols_map, self.name_search_index)
+
+    def resolve_cols_map(self):
+        """Associe chaque rôle de colonne du schéma matrix à une colonne du DataFrame (résolution mémorisée)."""
+        cols_map = resolve_columns(self.df.columns, MATRIX_SCHEMA)
+        cols_map.pop("Horaire", None)  # Désactivé
+        return cols_map
 
     def safe_read_excel(self, file_path, sheet_name=None):
         """Lit un fichier Excel de manière sécurisée avec gestion d'erreur."""
         try:
             if sheet_name:
-                return pd.read_excel(file_path, sheet_name=sheet_name)
+                return read_excel_sheets(file_path, sheet_name=sheet_name)
             else:
-                return pd.read_excel(file_path)
+                return read_excel_sheets(file_path)
         except Exception as e:
             error_msg = f"Erreur lors de la lecture du fichier Excel {file_path}: {str(e)}"
             print(f"❌ {error_msg}")
@@ -170,7 +198,7 @@ class AppPedagogique(ctk.CTk):
             raise Exception("openpyxl n'est pas disponible")
 
         try:
-            return load_workbook(file_path)
+            return open_workbook(file_path)
         except Exception as e:
             error_msg = f"Erreur lors du chargement du workbook {file_path}: {str(e)}"
             print(f"❌ {error_msg}")
@@ -178,52 +206,7 @@ class AppPedagogique(ctk.CTk):
 
     def format_date_jour_mois(self, date_str):
         """Formate une date pour afficher seulement le jour et le mois (JJ/MM)."""
-        if not date_str or pd.isna(date_str) or str(date_str).strip() == "":
-            return ""
-
-        try:
-            # Convertir en string et nettoyer
-            date_clean = str(date_str).strip()
-
-            # Si c'est déjà au format JJ/MM, le retourner tel quel
-            if len(date_clean) == 5 and date_clean[2] == '/':
-                return date_clean
-
-            # Essayer de parser différentes formes de dates
-            from datetime import datetime
-            import re
-
-            # Chercher un pattern JJ/MM/YYYY ou JJ/MM/YYYY HH:MM:SS
-            match = re.search(r'(\d{1,2})/(\d{1,2})(?:/\d{4})?(?:\s+\d{1,2}:\d{1,2}(?::\d{1,2})?)?', date_clean)
-            if match:
-                jour = match.group(1).zfill(2)
-                mois = match.group(2).zfill(2)
-                return f"{jour}/{mois}"
-
-            # Essayer de parser avec datetime
-            # Essayer différents formats courants
-            formats_to_try = [
-                '%d/%m/%Y %H:%M:%S',
-                '%d/%m/%Y %H:%M',
-                '%d/%m/%Y',
-                '%Y-%m-%d %H:%M:%S',
-                '%Y-%m-%d',
-                '%m/%d/%Y %H:%M:%S',
-                '%m/%d/%Y'
-            ]
-
-            for fmt in formats_to_try:
-                try:
-                    parsed_date = datetime.strptime(date_clean, fmt)
-                    return parsed_date.strftime('%d/%m')
-                except ValueError:
-                    continue
-
-            # Si rien ne marche, retourner la valeur originale nettoyée
-            return date_clean
-
-        except Exception:
-            return str(date_str).strip()
+        return format_date_jour_mois(date_str)
 
     def get_available_weeks(self):
         """Génère la liste des semaines disponibles pour l'import."""
@@ -471,8 +454,12 @@ class AppPedagogique(ctk.CTk):
                         imported_data.append(imported_info)
                         count += 1
 
-            # Sauvegarder le fichier matrix
-            self.df.to_excel(self.file_path, index=False)
+            # Colonnes d'affichage des élèves mis à jour
+            if count:
+                self.filter_engine.rebuild()
+
+            # Sauvegarder le fichier matrix (en arrière-plan)
+            self.schedule_matrix_save()
 
             # Vérifier et créer les classes manquantes dans les fichiers Excel des écoles
             # Désactivé car la colonne Horaire a été supprimée
@@ -523,10 +510,11 @@ class AppPedagogique(ctk.CTk):
         for data in imported_data:
             nom = data["nom"]
             # Récupérer les données actuelles de l'élève dans le dataframe
-            student_row = self.df[self.df[self.cols_map["Stagiaire"]] == nom]
+            student_row = self.df.loc[self.student_index.labels(nom)]
             if not student_row.empty:
                 ecole = student_row[self.cols_map["Ecole"]].values[0] if self.cols_map["Ecole"] and pd.notna(student_row[self.cols_map["Ecole"]].values[0]) else None
                 # horaire = student_row[self.cols_map["Horaire"]].values[0] if self.cols_map["Horaire"] and pd.notna(student_row[self.cols_map["Horaire"]].values[0]) else None  # Désactivé
+                horaire = None  # Colonne Horaire supprimée : aucune classe ne peut être créée
                 classe = student_row[self.cols_map["Classe"]].values[0] if self.cols_map["Classe"] and pd.notna(student_row[self.cols_map["Classe"]].values[0]) else None
                 niveau = student_row[self.cols_map["Niveau"]].values[0] if self.cols_map["Niveau"] and pd.notna(student_row[self.cols_map["Niveau"]].values[0]) else None
 
@@ -580,40 +568,24 @@ class AppPedagogique(ctk.CTk):
                 sheet_modified = False
 
                 for horaire, classes in horaires.items():
-                    # Nettoyer le nom d'horaire pour la recherche
-                    horaire_clean = self.clean_horaire_name(horaire)
-
-                    # Trouver la feuille correspondant à l'horaire
-                    target_sheet = None
-                    for sheet_name in wb.sheetnames:
-                        sheet_clean = self.clean_horaire_name(sheet_name)
-                        if sheet_clean == horaire_clean or horaire_clean in sheet_clean or sheet_clean in horaire_clean:
-                            target_sheet = wb[sheet_name]
-                            break
+                    # Trouver la feuille correspondant à l'horaire (index des feuilles du classeur)
+                    target_sheet = find_horaire_sheet(wb, horaire)
 
                     if not target_sheet:
                         print(f"⚠️ Feuille horaire '{horaire}' non trouvée dans {excel_filename}")
                         continue
 
+                    # Index des classes de la feuille (une seule lecture pour toutes les classes)
+                    class_index = get_class_index(target_sheet)
+
                     # Vérifier chaque classe
                     for classe_nom, eleves in classes.items():
                         # Chercher si la classe existe déjà
-                        classe_exists = False
-                        classe_row = None
-
-                        for row_idx in range(2, target_sheet.max_row + 1):
-                            cell_value = str(target_sheet.cell(row=row_idx, column=1).value or '').strip()
-                            if cell_value == classe_nom:
-                                classe_exists = True
-                                classe_row = row_idx
-                                break
+                        classe_exists = class_index.find_row(classe_nom) is not None
 
                         if not classe_exists:
-                            # Trouver la première ligne vide pour ajouter la classe
-                            new_row = target_sheet.max_row + 1
-
-                            # Ajouter la classe (colonne 1)
-                            target_sheet.cell(row=new_row, column=1, value=classe_nom)
+                            # Ajouter la classe à la fin de la feuille (colonne 1)
+                            new_row = class_index.append_class(classe_nom)
 
                             # Ajouter les élèves dans les colonnes appropriées
                             eleves_text = ', '.join([eleve['nom'] for eleve in eleves])
@@ -631,11 +603,14 @@ class AppPedagogique(ctk.CTk):
                             print(f"ℹ️ Classe '{classe_nom}' existe déjà dans {excel_filename}")
 
                 if sheet_modified:
-                    wb.save(excel_path)
+                    save_workbook(wb, excel_path)
                     wb.close()
 
             except Exception as e:
                 print(f"❌ Erreur lors de la création des classes dans {excel_filename}: {e}")
+                # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+                if current_week_transaction(excel_path) is not None:
+                    raise
 
         if classes_created > 0:
             print(f"✅ {classes_created} classe(s) créée(s) automatiquement")
@@ -741,53 +716,8 @@ class AppPedagogique(ctk.CTk):
 
     def find_columns_for_df(self, df):
         """Trouve les colonnes nécessaires dans un DataFrame."""
-        cols_map = {}
-        cols_map["Stagiaire"] = self.find_column_in_df(df, ["stagiaire", "nom", "name", "élève"])
-        cols_map["Niveau"] = self.find_column_in_df(df, ["niveau", "level", "niveau actuel"])
-        cols_map["Ecole"] = self.find_column_in_df(df, ["ecole", "école", "school"])
-        # cols_map["Horaire"] = self.find_column_in_df(df, ["horaire", "horaire", "time", "schedule"])  # Désactivé
-        cols_map["Classe"] = self.find_column_in_df(df, ["classe", "class", "groupe"])
-        return cols_map
-
-    def find_column_in_df(self, df, keywords):
-        """Trouve une colonne dans un DataFrame selon des mots-clés."""
-        # D'abord chercher une correspondance exacte
-        for col in df.columns:
-            col_lower = str(col).lower().strip()
-            if col_lower in keywords:
-                return col
-
-        # Ensuite chercher une correspondance partielle (mais plus stricte)
-        for col in df.columns:
-            col_lower = str(col).lower().strip()
-            for k in keywords:
-                if k in col_lower and len(k) > 2:  # Éviter les faux positifs avec des mots courts
-                    return col
-        return None
-
-    def clean_horaire_name(self, sheet_name):
-        """Nettoie le nom de la feuille pour extraire le nom d'horaire de manière cohérente."""
-        # Cette fonction doit être identique à celle utilisée dans fenetre_principale.py et Assignation des Niveaux.py
-        sheet_lower = sheet_name.lower()
-        type_intervenant = "animateur" if "animateur" in sheet_lower else "professeur"
-
-        # Liste complète des mots à supprimer (avec variations)
-        words_to_remove = [
-            "animateur", "Animateur", "anim", "Anim",
-            "professeur", "Professeur", "prof", "Prof",
-            "Rôle", "rôle", "role", "Role"
-        ]
-
-        # Nettoyer le nom en supprimant tous les mots-clés d'intervenants
-        horaire = sheet_name
-        for word in words_to_remove:
-            horaire = horaire.replace(word, "")
-
-        # Nettoyer les espaces multiples et supprimer les espaces au début/fin
-        horaire = " ".join(horaire.split()).strip()
-
-        # Si le résultat est vide, utiliser le nom original
-        return horaire or sheet_name
+        cols_map = resolve_columns(df.columns, MATRIX_SCHEMA)
+        return {role: cols_map[role] for role in ("Stagiaire", "Niveau", "Ecole", "Classe")}
 
     def setup_styles(self):
         self.style = tb.Style(theme="flatly")
@@ -934,7 +864,9 @@ class AppPedagogique(ctk.CTk):
 
         # Barre de recherche (colonne 0)
         self.search_var = ctk.StringVar()
-        self.search_var.trace_add("write", lambda *args: self.refresh_table(preserve_selection=False))
+        # Frappes regroupées : le tableau n'est reconstruit qu'après une courte pause de saisie
+        self.search_controller = DebouncedSearch(self, self.search_var,
+                                                 lambda request: self.refresh_table(preserve_selection=False))
         search_entry = ctk.CTkEntry(
             search_stats_frame,
             placeholder_text="Rechercher un nom...",
@@ -975,6 +907,7 @@ class AppPedagogique(ctk.CTk):
         stats_inner_frame.grid_columnconfigure(5, weight=1)  # 🔍 Filtrés
         stats_inner_frame.grid_columnconfigure(6, weight=0)  # Séparateur
         stats_inner_frame.grid_columnconfigure(7, weight=1)  # 🖱️ Sélectionnés
+        stats_inner_frame.grid_columnconfigure(8, weight=0)  # 💾 État de la sauvegarde
 
         self.stats_total_label = ctk.CTkLabel(
             stats_inner_frame,
@@ -1045,6 +978,15 @@ class AppPedagogique(ctk.CTk):
         )
         self.stats_selected_label.grid(row=0, column=7, sticky="w")
 
+        # État de la sauvegarde du fichier matrix (non sauvegardé / en cours / sauvegardé)
+        self.save_status_label = ctk.CTkLabel(
+            stats_inner_frame,
+            text="💾 Sauvegardé",
+            font=("Segoe UI", 11),
+            text_color="#64748b"
+        )
+        self.save_status_label.grid(row=0, column=8, sticky="e", padx=(8, 0))
+
         # Boutons d'ajout et suppression d'élèves
         actions_frame = ctk.CTkFrame(stats_frame, fg_color="transparent")
         actions_frame.grid(row=0, column=1, sticky="e")
@@ -1129,8 +1071,15 @@ class AppPedagogique(ctk.CTk):
         # Style pour le séparateur vertical
         self.style.configure("Separator.Treeview", background="#d1d5db", relief="solid")
 
-        # Binding pour mettre à jour les compteurs quand la sélection change
-        self.tree.bind('<<TreeviewSelect>>', lambda e: self.update_counters())
+        # Lignes identifiées par l'étiquette du DataFrame (mise à jour par différence) ;
+        # au-delà de quelques milliers d'élèves, seules les lignes visibles sont créées.
+        # Le compteur de sélection est mis à jour à chaque changement de sélection.
+        self.student_table = VirtualTable(
+            self.tree, self.scrollbar,
+            fetch_rows=lambda labels: [(label, values, (niv,)) for label, values, niv in self.filter_engine.rows_for(labels)],
+            row_height=self.style.lookup("Treeview", "rowheight") or 45,
+            on_selection_change=self.update_selection_counter
+        )
 
         # Variables pour le système de sélection par glisser
         self.drag_zone = None
@@ -1327,14 +1276,16 @@ class AppPedagogique(ctk.CTk):
             nom = self.tree.item(item, 'values')[0]
             niveau_value = level
 
-            if nom in self.df[self.cols_map["Stagiaire"]].values:
-                self.df.loc[self.df[self.cols_map["Stagiaire"]] == nom, self.cols_map["Niveau"]] = niveau_value
-                self.df.to_excel(self.file_path, index=False)
+            labels = self.student_index.labels(nom)
+            if labels:
+                self.df.loc[labels, self.cols_map["Niveau"]] = niveau_value
+                self.filter_engine.update_rows(labels)
+                self.schedule_matrix_save()
 
             self.refresh_table(preserve_selection=False)
             self.update_counters()  # Mise à jour des statistiques du haut
 
-        self.show_save_notification(complete_assignment)
+        complete_assignment()
 
     def show_level_popup(self, item, x, y):
         """Affiche une fenêtre popup avec tous les niveaux."""
@@ -1399,70 +1350,6 @@ class AppPedagogique(ctk.CTk):
         self.level_popup.protocol("WM_DELETE_WINDOW", lambda: self.close_level_popup())
 
 
-    def show_save_notification(self, callback):
-        """Affiche une fenêtre de notification de sauvegarde moderne."""
-        # Créer la fenêtre moderne
-        save_popup = ctk.CTkToplevel(self)
-        save_popup.title("")
-        save_popup.geometry("280x100")
-        save_popup.resizable(False, False)
-
-        # Centrer la fenêtre
-        save_popup.geometry("+{}+{}".format(
-            self.winfo_rootx() + self.winfo_width()//2 - 140,
-            self.winfo_rooty() + self.winfo_height()//2 - 50
-        ))
-
-        # Configuration moderne
-        save_popup.attributes("-topmost", True)
-        save_popup.overrideredirect(True)  # Pas de barre de titre
-
-        # Frame principal avec coins arrondis
-        main_frame = ctk.CTkFrame(
-            save_popup,
-            fg_color="#ffffff",
-            bg_color="transparent",
-            corner_radius=15,
-            border_width=2,
-            border_color="#e1e5e9"
-        )
-        main_frame.pack(fill="both", expand=True, padx=2, pady=2)
-
-        # Frame intérieur pour le contenu
-        content_frame = ctk.CTkFrame(
-            main_frame,
-            fg_color="#f8fafc",
-            corner_radius=10
-        )
-        content_frame.pack(fill="both", expand=True, padx=8, pady=8)
-
-        # Icône et texte
-        icon_label = ctk.CTkLabel(
-            content_frame,
-            text="⏳",
-            font=("Segoe UI", 24),
-            text_color="#3b82f6"
-        )
-        icon_label.pack(pady=(10, 5))
-
-        text_label = ctk.CTkLabel(
-            content_frame,
-            text="Sauvegarde en cours...",
-            font=("Segoe UI", 13, "bold"),
-            text_color="#1e293b"
-        )
-        text_label.pack(pady=(0, 10))
-
-        # Programmer la disparition après 200ms et l'exécution du callback
-        def complete_with_notification():
-            save_popup.destroy()
-            callback()
-
-        self.after(500, complete_with_notification)
-
-        return save_popup
-
-
     def create_filter_section(self, parent, title, filter_dict, colors=None):
         """Crée une section de filtres avec des boutons toggle stylisés."""
         # Conteneur de section
@@ -1741,143 +1628,141 @@ class AppPedagogique(ctk.CTk):
         self.refresh_table(preserve_selection=False)
 
     def refresh_table(self, preserve_selection=False):
-        # Sauvegarder la sélection si demandé
-        selected_names = []
-        if preserve_selection:
-            selected_items = self.tree.selection()
-            for item in selected_items:
-                nom = self.tree.item(item)['values'][0]
-                selected_names.append(nom)
-
-        for item in self.tree.get_children(): self.tree.delete(item)
-
-        # Filtres actifs
-        active_levels = [n for n, v in self.filter_levels.items() if v.get()]
-        active_ages = [self.AGES[label] for label, v in self.filter_ages.items() if v.get()]
-        ci_avec = self.filter_ci["Avec CI"].get()
-        ci_sans = self.filter_ci["Sans CI"].get()
-        no_level_filter = self.filter_no_level.get()
-        search_term = self.search_var.get().lower()
-
-        # Trier les élèves par ordre alphabétique
-        df_sorted = self.df.sort_values(by=self.cols_map["Stagiaire"])
-
-        for _, row in df_sorted.iterrows():
-            classe = str(row[self.cols_map["Classe"]]) if self.cols_map["Classe"] and pd.notna(row[self.cols_map["Classe"]]) else ""
-            prof = str(row[self.cols_map["Prof"]]) if self.cols_map["Prof"] and pd.notna(row[self.cols_map["Prof"]]) else ""
-            arrivee = self.format_date_jour_mois(row[self.cols_map["Arrivée"]]) if self.cols_map["Arrivée"] and pd.notna(row[self.cols_map["Arrivée"]]) else ""
-            depart = self.format_date_jour_mois(row[self.cols_map["Départ"]]) if self.cols_map["Départ"] and pd.notna(row[self.cols_map["Départ"]]) else ""
-            # Nouvelle logique : CI = "OUI" si "Cours 2 Du" n'est pas vide
-            ci_val = "OUI" if self.cols_map["Départ CI"] and pd.notna(row[self.cols_map["Départ CI"]]) and str(row[self.cols_map["Départ CI"]]).strip() != "" else ""
-            classe_ci = str(row[self.cols_map["Classe CI"]]) if self.cols_map["Classe CI"] and pd.notna(row[self.cols_map["Classe CI"]]) else ""
-            prof_ci = str(row[self.cols_map["Prof CI"]]) if self.cols_map["Prof CI"] and pd.notna(row[self.cols_map["Prof CI"]]) else ""
-            arrivee_ci = self.format_date_jour_mois(row[self.cols_map["Arrivée CI"]]) if self.cols_map["Arrivée CI"] and pd.notna(row[self.cols_map["Arrivée CI"]]) else ""
-            depart_ci = self.format_date_jour_mois(row[self.cols_map["Départ CI"]]) if self.cols_map["Départ CI"] and pd.notna(row[self.cols_map["Départ CI"]]) else ""
-            nom = str(row[self.cols_map["Stagiaire"]])
-            niv = str(row[self.cols_map["Niveau"]]) if pd.notna(row[self.cols_map["Niveau"]]) else ""
-            age = row[self.cols_map["Âge"]]
-
-            # Logique de filtrage
-            if search_term not in nom.lower(): continue
-            if active_levels and niv not in active_levels: continue
-            if active_ages:
-                if not pd.notna(age) or not any(low <= age <= high for low, high in active_ages): continue
-            if (ci_avec or ci_sans) and not ((ci_avec and ci_val == "OUI") or (ci_sans and (ci_val == "NON" or ci_val == ""))): continue
-            if no_level_filter and niv: continue  # Si filtre "sans niveau" actif, exclure les élèves qui ont un niveau
-
-            self.tree.insert("", "end", values=(nom, niv, age, classe, prof, arrivee, depart, "", ci_val, classe_ci, prof_ci, depart_ci, arrivee_ci), tags=(niv,))
+        """
+        Met à jour le tableau selon les filtres actifs, par différence avec les lignes affichées.
 
-        self.update_counters()
+        Les lignes conservées gardent leur sélection et la position de défilement ;
+        sans preserve_selection, la sélection est vidée comme avant.
+        """
+        if not preserve_selection:
+            self.student_table.clear_selection()
 
-        # Restaurer la sélection si demandé
-        if preserve_selection and selected_names:
-            def restore_selection():
-                items_to_select = []
-                for item in self.tree.get_children():
-                    item_name = self.tree.item(item)['values'][0]
-                    if item_name in selected_names:
-                        items_to_select.append(item)
+        # Un seul masque pour tous les filtres actifs, lignes déjà triées par nom
+        mask = self.filter_engine.mask(**self.get_active_filters())
+        self.student_table.set_rows(self.filter_engine.labels(mask))
 
-                if items_to_select:
-                    self.tree.selection_set(items_to_select)
+        # Compteurs mis en cache avec le masque : rien à recalculer quand seule la sélection change
+        self.table_counts = self.filter_engine.counts(mask)
+        self.update_counters()
 
-            # Différer légèrement la restauration
-            self.after(10, restore_selection)
+    def get_selected_names(self):
+        """Noms des élèves sélectionnés, y compris ceux hors de la partie visible du tableau."""
+        return self.filter_engine.names(self.student_table.selected_keys())
 
     def assign_level(self, level):
-        selected = self.tree.selection()
-        if not selected: return
+        noms = self.get_selected_names()
+        if not noms: return
 
         # Fonction de callback pour la sauvegarde
         def complete_assignment():
-            for item in selected:
-                nom = self.tree.item(item)['values'][0]
-                self.df.loc[self.df[self.cols_map["Stagiaire"]] == nom, self.cols_map["Niveau"]] = level
-            self.df.to_excel(self.file_path, index=False)
+            # Une seule mise à jour pour tous les élèves sélectionnés (index des noms)
+            labels = self.student_index.labels_for(noms)
+            self.df.loc[labels, self.cols_map["Niveau"]] = level
+            self.filter_engine.update_rows(labels)
+            self.schedule_matrix_save()
 
             # Rafraîchir le tableau en préservant la sélection
             self.refresh_table(preserve_selection=True)
 
-        # Afficher la notification moderne
-        self.show_save_notification(complete_assignment)
+        # La sauvegarde se fait en arrière-plan (voir schedule_matrix_save)
+        complete_assignment()
 
     def update_counters(self):
-        total = len(self.df)
-        done = self.df[self.cols_map["Niveau"]].replace("", None).dropna().count()
-        unassigned = total - done
+        """Affiche les compteurs calculés au dernier rafraîchissement du tableau."""
+        counts = self.table_counts
+        self.stats_total_label.configure(text=f"👤 {counts['total']}")
+        self.stats_assigned_label.configure(text=f"✅ {counts['assigned']}")
+        self.stats_unassigned_label.configure(text=f"❌ {counts['unassigned']}")
+        self.stats_filtered_label.configure(text=f"🔍 {counts['filtered']}")
+        self.update_selection_counter()
+
+    def update_selection_counter(self):
+        """Met à jour le seul compteur des élèves sélectionnés (appelé à chaque changement de sélection)."""
+        selected_count = self.student_table.selected_count if hasattr(self, 'student_table') else 0
+        self.stats_selected_label.configure(text=f"🖱️ {selected_count}")
 
-        # Calcul du nombre d'élèves selon les filtres actifs
-        filtered_count = self.get_filtered_count()
+    def get_active_filters(self):
+        """Filtres actifs du tableau, sous la forme attendue par StudentFilterEngine.mask()."""
+        return {
+            'search': self.search_var.get(),
+            'levels': [n for n, v in self.filter_levels.items() if v.get()],
+            'ages': [self.AGES[label] for label, v in self.filter_ages.items() if v.get()],
+            'ci_avec': self.filter_ci["Avec CI"].get(),
+            'ci_sans': self.filter_ci["Sans CI"].get(),
+            'no_level': self.filter_no_level.get(),
+        }
 
-        # Calcul du nombre d'élèves sélectionnés
-        selected_count = len(self.tree.selection()) if hasattr(self, 'tree') else 0
+    def get_matrix_version(self):
+        """Version du fichier matrix : compteur de la base SQLite si activée, sinon date de modification."""
+        version = get_week_generation(os.path.dirname(self.file_path))
+        if version is None:
+            version = os.path.getmtime(self.file_path)
+        return version
+
+    def write_matrix_snapshot(self, df):
+        """Écrit une copie du DataFrame (appelée dans le thread de sauvegarde) et retourne la nouvelle version."""
+        # Seules les cellules modifiées depuis la dernière écriture sont réécrites
+        self.matrix_writer.write(df)
+        return self.get_matrix_version()
+
+    def schedule_matrix_save(self):
+        """Marque le DataFrame comme modifié : il sera écrit en arrière-plan après un court délai."""
+        self.saver.mark_dirty(self.df)
+        self.update_save_status()
+
+    def save_matrix_in_transaction(self, update_school_files):
+        """
+        Écrit le matrix et les fichiers des écoles dans une seule transaction.
+
+        Chaque fichier est chargé et sauvegardé une seule fois ; en cas d'erreur, aucun
+        fichier n'est modifié et les données sont rechargées depuis le disque.
+        """
+        try:
+            # Une sauvegarde en arrière-plan ne doit pas écrire après la transaction
+            if not self.saver.flush():
+                raise IOError(f"sauvegarde en attente impossible ({self.saver.last_error})")
 
-        self.stats_total_label.configure(text=f"👤 {total}")
-        self.stats_assigned_label.configure(text=f"✅ {done}")
-        self.stats_unassigned_label.configure(text=f"❌ {unassigned}")
-        self.stats_filtered_label.configure(text=f"🔍 {filtered_count}")
-        self.stats_selected_label.configure(text=f"🖱️ {selected_count}")
+            with week_transaction(os.path.dirname(self.file_path)):
+                self.matrix_writer.write(self.df)
+                update_school_files()
+        except Exception as e:
+            print(f"❌ Erreur lors de l'enregistrement des modifications: {e}")
+            messagebox.showerror("Erreur de sauvegarde",
+                                 f"Les modifications n'ont pas pu être enregistrées :\n{e}")
+            self.reload_matrix_data()
+            return False
+
+        self.saver.mark_saved(self.get_matrix_version())
+        self.update_save_status()
+        return True
+
+    def update_save_status(self):
+        """Affiche l'état de la sauvegarde et se reprogramme tant qu'une écriture est en attente."""
+        if self.save_status_job:
+            self.after_cancel(self.save_status_job)
+            self.save_status_job = None
+
+        state = self.saver.state
+        texts = {
+            ETAT_NON_SAUVEGARDE: ("✏️ Non sauvegardé", "#d97706"),
+            ETAT_EN_COURS: ("⏳ Sauvegarde...", "#2563eb"),
+            ETAT_SAUVEGARDE: ("💾 Sauvegardé", "#64748b"),
+            ETAT_ERREUR: ("⚠️ Erreur de sauvegarde", "#dc2626"),
+        }
+        text, color = texts[state]
+        if hasattr(self, 'save_status_label'):
+            self.save_status_label.configure(text=text, text_color=color)
 
-    def get_filtered_count(self):
-        """Calcule le nombre d'élèves selon les filtres actifs."""
-        # Récupérer les filtres actifs (même logique que refresh_table)
-        active_levels = [n for n, v in self.filter_levels.items() if v.get()]
-        active_ages = [self.AGES[label] for label, v in self.filter_ages.items() if v.get()]
-        ci_avec = self.filter_ci["Avec CI"].get()
-        ci_sans = self.filter_ci["Sans CI"].get()
-        no_level_filter = self.filter_no_level.get()
-        search_term = self.search_var.get().lower()
-
-        # Trier les élèves par ordre alphabétique
-        df_sorted = self.df.sort_values(by=self.cols_map["Stagiaire"])
-
-        count = 0
-        for _, row in df_sorted.iterrows():
-            classe = str(row[self.cols_map["Classe"]]) if self.cols_map["Classe"] and pd.notna(row[self.cols_map["Classe"]]) else ""
-            prof = str(row[self.cols_map["Prof"]]) if self.cols_map["Prof"] and pd.notna(row[self.cols_map["Prof"]]) else ""
-            arrivee = self.format_date_jour_mois(row[self.cols_map["Arrivée"]]) if self.cols_map["Arrivée"] and pd.notna(row[self.cols_map["Arrivée"]]) else ""
-            depart = self.format_date_jour_mois(row[self.cols_map["Départ"]]) if self.cols_map["Départ"] and pd.notna(row[self.cols_map["Départ"]]) else ""
-            # Nouvelle logique : CI = "OUI" si "Cours 2 Du" n'est pas vide
-            ci_val = "OUI" if self.cols_map["Départ CI"] and pd.notna(row[self.cols_map["Départ CI"]]) and str(row[self.cols_map["Départ CI"]]).strip() != "" else ""
-            classe_ci = str(row[self.cols_map["Classe CI"]]) if self.cols_map["Classe CI"] and pd.notna(row[self.cols_map["Classe CI"]]) else ""
-            prof_ci = str(row[self.cols_map["Prof CI"]]) if self.cols_map["Prof CI"] and pd.notna(row[self.cols_map["Prof CI"]]) else ""
-            arrivee_ci = self.format_date_jour_mois(row[self.cols_map["Arrivée CI"]]) if self.cols_map["Arrivée CI"] and pd.notna(row[self.cols_map["Arrivée CI"]]) else ""
-            depart_ci = self.format_date_jour_mois(row[self.cols_map["Départ CI"]]) if self.cols_map["Départ CI"] and pd.notna(row[self.cols_map["Départ CI"]]) else ""
-            nom = str(row[self.cols_map["Stagiaire"]])
-            niv = str(row[self.cols_map["Niveau"]]) if pd.notna(row[self.cols_map["Niveau"]]) else ""
-            age = row[self.cols_map["Âge"]]
-
-            # Appliquer les mêmes filtres que dans refresh_table
-            if search_term not in nom.lower(): continue
-            if active_levels and niv not in active_levels: continue
-            if active_ages:
-                if not pd.notna(age) or not any(low <= age <= high for low, high in active_ages): continue
-            if (ci_avec or ci_sans) and not ((ci_avec and ci_val == "OUI") or (ci_sans and (ci_val == "NON" or ci_val == ""))): continue
-            if no_level_filter and niv: continue  # Si filtre "sans niveau" actif, exclure les élèves qui ont un niveau
-
-            count += 1
-
-        return count
+        if state != ETAT_SAUVEGARDE:
+            self.save_status_job = self.after(200, self.update_save_status)
+
+    def reload_matrix_data(self):
+        """Recharge le DataFrame depuis le fichier matrix (modifications externes ou transaction annulée)."""
+        self.df = self.safe_read_excel(self.file_path)
+        # Re-normaliser les colonnes au cas où la structure a changé
+        self.cols_map = self.resolve_cols_map()
+        self.rebuild_student_index()
+        self.matrix_writer.reset(self.df)
 
     def start_matrix_watch(self):
         """Démarre la surveillance du fichier matrix."""
@@ -1891,35 +1776,25 @@ class AppPedagogique(ctk.CTk):
 
         try:
             # Obtenir le timestamp de dernière modification
-            current_mtime = os.path.getmtime(self.file_path)
+            # (ou le compteur de modifications de la base SQLite si elle est activée)
+            current_mtime = self.get_matrix_version()
 
             # Vérifier si le fichier a été modifié
-            if self.matrix_last_modified is not None:
-                if current_mtime > self.matrix_last_modified:
+            if self.saver.has_pending_changes():
+                # Des modifications locales ne sont pas encore écrites : ne pas les écraser
+                pass
+            elif self.matrix_last_modified is not None:
+                if current_mtime == self.saver.last_result:
+                    # Modification provenant de notre propre sauvegarde : rien à recharger
+                    self.matrix_last_modified = current_mtime
+                elif current_mtime > self.matrix_last_modified:
                     # Le fichier a été modifié, rafraîchir l'affichage
                     print(f"✅ Détection d'une modification du fichier matrix.xlsx - Rafraîchissement automatique en cours...")
                     self.matrix_last_modified = current_mtime
 
                     # Recharger les données depuis le fichier
                     try:
-                        self.df = self.safe_read_excel(self.file_path)
-                        # Re-normaliser les colonnes au cas où la structure a changé
-                        self.cols_map = {
-                            "Ecole": self.find_column(["ecole", "école", "school"]),
-                            # "Horaire": self.find_column(["horaire", "horaire", "time", "schedule"]),  # Désactivé
-                            "Classe": self.find_column(["classe", "class", "groupe"]),
-                            "Stagiaire": self.find_column(["stagiaire", "nom", "élève"]),
-                            "Âge": self.find_column(["âge", "age"]),
-                            "Cours 2": self.find_column(["cours 2", "intensif", "ci"]),
-                            "Niveau": self.find_column(["niveau"]),
-                            "Classe CI": self.find_column(["classe ci", "classe_ci"]),
-                            "Prof": self.find_column(["prof", "professeur", "enseignant"]),
-                            "Prof CI": self.find_column(["prof ci", "prof_ci", "professeur ci"]),
-                            "Départ": self.find_column(["cours 1 du", "départ", "depart"]),
-                            "Arrivée": self.find_column(["cours 1 au", "arrivée", "arrivee"]),
-                            "Départ CI": self.find_column(["cours 2 du", "départ ci", "depart ci"]),
-                            "Arrivée CI": self.find_column(["cours 2 au", "arrivée ci", "arrivee ci"])
-                        }
+                        self.reload_matrix_data()
                         
                         # Rafraîchir le tableau et les compteurs
                         self.refresh_table(preserve_selection=False)
@@ -1946,6 +1821,25 @@ class AppPedagogique(ctk.CTk):
     def on_quit(self):
         """Gère la fermeture propre de l'application."""
         self.stop_matrix_watch()
+
+        # Écrire les modifications en attente (attend la fin d'une sauvegarde en cours)
+        while not self.saver.close():
+            retry = messagebox.askretrycancel(
+                "Sauvegarde impossible",
+                "Le fichier matrix n'a pas pu être sauvegardé "
+                f"({self.saver.last_error}).\n\n"
+                "Fermez le fichier s'il est ouvert dans Excel puis réessayez.\n"
+                "Annuler quitte sans sauvegarder les dernières modifications."
+            )
+            if not retry:
+                break
+
+        # Régénérer les fichiers Excel depuis la base SQLite (si elle est activée)
+        try:
+            export_week_to_excel(os.path.dirname(self.file_path))
+        except Exception as e:
+            print(f"❌ Erreur lors de l'export Excel de la semaine: {e}")
+
         self.quit()
 
     def show_classes_context_menu(self, event):
@@ -1959,17 +1853,11 @@ class AppPedagogique(ctk.CTk):
                 pass
             self.current_context_menu = None
 
-        # Récupérer les élèves sélectionnés
-        selected_items = self.tree.selection()
-        if not selected_items:
+        # Récupérer les noms des élèves sélectionnés (y compris hors de la partie visible)
+        student_names = self.get_selected_names()
+        if not student_names:
             return
 
-        # Récupérer tous les noms des élèves sélectionnés
-        student_names = []
-        for item in selected_items:
-            student_name = self.tree.item(item)['values'][0]  # Le nom est dans la première colonne
-            student_names.append(student_name)
-
         # Récupérer les coordonnées de la souris
         x = event.x_root
         y = 10  # Position près du haut de l'écran
@@ -2216,48 +2104,24 @@ class AppPedagogique(ctk.CTk):
                 return
 
             try:
-                # Lire toutes les feuilles du fichier
-                xl_file = pd.ExcelFile(excel_path)
-                sheet_names = xl_file.sheet_names
-
-                for sheet_name in sheet_names:
+                # Lecture seule ligne par ligne (tuples de valeurs, cache partagé : une seule lecture tant que le fichier ne change pas)
+                for sheet_name, headers, rows in iter_workbook_rows(excel_path):
                     try:
-                        df = self.safe_read_excel(excel_path, sheet_name=sheet_name)
-
-                        if df.empty:
-                            # La feuille est vide mais on garde l'horaire
-                            sheet_lower = sheet_name.lower()
-                            type_intervenant = "animateur" if "animateur" in sheet_lower else "professeur"
-                            horaire = self.clean_horaire_name(sheet_name)
-
-                            result[school_key].append({
-                                'horaire': horaire or sheet_name,
-                                'intervenant': "",
-                                'type_intervenant': type_intervenant,
-                                'classes': []
-                            })
-                            continue
-
-                        # Analyser et nettoyer le nom de la feuille
+                        # Analyser et nettoyer le nom de la feuille (feuille vide : l'horaire est quand même gardé)
                         sheet_lower = sheet_name.lower()
                         type_intervenant = "animateur" if "animateur" in sheet_lower else "professeur"
-                        horaire = self.clean_horaire_name(sheet_name)
+                        horaire = clean_horaire_name(sheet_name)
 
-                        # Chercher les colonnes de classes
-                        classe_cols = []
-                        for col in df.columns:
-                            col_lower = str(col).lower()
-                            if any(keyword in col_lower for keyword in ['classe', 'groupe', 'section']):
-                                classe_cols.append(col)
+                        # Colonne des classes (schéma partagé des feuilles d'écoles)
+                        classe_col = resolve_column_indexes(headers, SCHOOL_SCHEMA)["Classe"]
 
                         classes_info = []
-                        for _, row in df.iterrows():
+                        for row in rows:
                             classe_nom = None
-                            for col in classe_cols:
-                                val = str(row.get(col, '')).strip()
+                            if classe_col is not None and classe_col < len(row) and row[classe_col] is not None:
+                                val = str(row[classe_col]).strip()
                                 if val and val.lower() not in ['', 'nan', 'none']:
                                     classe_nom = val
-                                    break
 
                             if classe_nom:
                                 classes_info.append({
@@ -2473,41 +2337,23 @@ class AppPedagogique(ctk.CTk):
             return ""
 
         try:
-            # Lire toutes les feuilles du fichier
-            xl_file = pd.ExcelFile(excel_path)
-            sheet_names = xl_file.sheet_names
-
-            for sheet_name in sheet_names:
+            # Lecture seule ligne par ligne (tuples de valeurs, cache partagé : une seule lecture tant que le fichier ne change pas)
+            for sheet_name, headers, rows in iter_workbook_rows(excel_path):
                 try:
-                    df_sheet = self.safe_read_excel(excel_path, sheet_name=sheet_name)
-
-                    if df_sheet.empty:
+                    # Colonnes de la classe et du professeur (schéma partagé des feuilles d'écoles)
+                    columns = resolve_column_indexes(headers, SCHOOL_SCHEMA)
+                    classe_col = columns["Classe"]
+                    prof_col = columns["Intervenant"]
+                    if classe_col is None:
                         continue
 
-                    # Chercher les colonnes de classes et de professeurs
-                    classe_cols = []
-                    prof_cols = []
-
-                    for col in df_sheet.columns:
-                        col_lower = str(col).lower()
-                        if any(keyword in col_lower for keyword in ['classe', 'groupe', 'section']):
-                            classe_cols.append(col)
-                        if any(keyword in col_lower for keyword in ['prof', 'professeur', 'enseignant', 'intervenant']):
-                            prof_cols.append(col)
-
                     # Chercher la classe dans cette feuille
-                    for _, row in df_sheet.iterrows():
-                        classe_trouvee = None
-                        for col in classe_cols:
-                            val = str(row.get(col, '')).strip()
-                            if val and val.lower() not in ['', 'nan', 'none'] and val == classe_nom:
-                                classe_trouvee = val
-                                break
-
-                        if classe_trouvee:
+                    for row in rows:
+                        val = str(row[classe_col] if classe_col < len(row) and row[classe_col] is not None else '').strip()
+                        if val and val.lower() not in ['', 'nan', 'none'] and val == classe_nom:
                             # Chercher le professeur dans la même ligne
-                            for col in prof_cols:
-                                prof_val = str(row.get(col, '')).strip()
+                            if prof_col is not None and prof_col < len(row):
+                                prof_val = str(row[prof_col] if row[prof_col] is not None else '').strip()
                                 if prof_val and prof_val.lower() not in ['', 'nan', 'none']:
                                     return prof_val
 
@@ -2557,64 +2403,68 @@ class AppPedagogique(ctk.CTk):
 
         # Fonction de callback pour la sauvegarde
         def complete_assignment():
-            assigned_count = 0
             old_assignments = {}  # Pour stocker les anciennes assignations
 
-            # Traiter chaque élève sélectionné
-            for student_name in student_names:
-                if student_name in self.df[self.cols_map["Stagiaire"]].values:
-                    mask = self.df[self.cols_map["Stagiaire"]] == student_name
-                    
-                    # Récupérer les anciennes valeurs AVANT de les modifier
-                    old_ecole = self.df.loc[mask, self.cols_map["Ecole"]].values[0] if self.cols_map["Ecole"] else None
-                    # old_horaire = self.df.loc[mask, self.cols_map["Horaire"]].values[0] if self.cols_map["Horaire"] else None  # Désactivé
-                    old_classe = self.df.loc[mask, self.cols_map["Classe"]].values[0] if self.cols_map["Classe"] else None
-
-                    # Stocker l'ancienne assignation si elle existe
-                    if pd.notna(old_ecole) and pd.notna(old_classe) and str(old_ecole).strip() and str(old_classe).strip():
-                        old_assignments[student_name] = {
-                            'ecole': str(old_ecole).strip(),
-                            # 'horaire': str(old_horaire).strip() if pd.notna(old_horaire) else '',  # Désactivé
-                            'classe': str(old_classe).strip()
-                        }
-
-                    # Assigner les nouvelles valeurs (convertir les colonnes au bon type si nécessaire)
-                    if self.cols_map["Ecole"]:
-                        col_name = self.cols_map["Ecole"]
-                        if self.df[col_name].dtype == 'float64':
-                            self.df[col_name] = self.df[col_name].astype('object')
-                        self.df.loc[mask, col_name] = school_name
-                    # if self.cols_map["Horaire"]:  # Désactivé
-                    #     col_name = self.cols_map["Horaire"]
-                    #     if self.df[col_name].dtype == 'float64':
-                    #         self.df[col_name] = self.df[col_name].astype('object')
-                    #     self.df.loc[mask, col_name] = horaire
-                    if self.cols_map["Classe"]:
-                        col_name = self.cols_map["Classe"]
-                        if self.df[col_name].dtype == 'float64':
-                            self.df[col_name] = self.df[col_name].astype('object')
-                        self.df.loc[mask, col_name] = classe_nom
-
-                    # Mettre à jour le professeur si on l'a trouvé
-                    if self.cols_map["Prof"] and professor_name:
-                        col_name = self.cols_map["Prof"]
-                        if self.df[col_name].dtype == 'float64':
-                            self.df[col_name] = self.df[col_name].astype('object')
-                        self.df.loc[mask, col_name] = professor_name
-
-                    assigned_count += 1
-
-            # Sauvegarder le fichier matrix
-            self.df.to_excel(self.file_path, index=False)
-            prof_info = f", prof {professor_name}" if professor_name else ""
-            print(f"💾 Assignation sauvegardée : {assigned_count} élève(s) assigné(s) à l'école {school_name}, classe {classe_nom}{prof_info}")
-
-            # Retirer les élèves de leurs anciennes classes (si elles existent)
-            if old_assignments:
-                self.remove_students_from_old_classes(old_assignments, school_file_mapping)
-
-            # Ajouter les élèves dans la nouvelle classe
-            self.update_school_excel_file(school_key, school_file_mapping, horaire, classe_nom, student_names)
+            # Lignes de chaque élève sélectionné (index des noms : pas de parcours de la colonne)
+            student_labels = {name: self.student_index.labels(name) for name in student_names}
+            student_labels = {name: labels for name, labels in student_labels.items() if labels}
+            all_labels = self.student_index.labels_for(student_labels)
+            assigned_count = len(student_labels)
+
+            # Récupérer les anciennes valeurs AVANT de les modifier (première ligne de chaque élève)
+            for student_name, labels in student_labels.items():
+                old_ecole = self.df.at[labels[0], self.cols_map["Ecole"]] if self.cols_map["Ecole"] else None
+                # old_horaire = self.df.at[labels[0], self.cols_map["Horaire"]] if self.cols_map["Horaire"] else None  # Désactivé
+                old_classe = self.df.at[labels[0], self.cols_map["Classe"]] if self.cols_map["Classe"] else None
+
+                # Stocker l'ancienne assignation si elle existe
+                if pd.notna(old_ecole) and pd.notna(old_classe) and str(old_ecole).strip() and str(old_classe).strip():
+                    old_assignments[student_name] = {
+                        'ecole': str(old_ecole).strip(),
+                        # 'horaire': str(old_horaire).strip() if pd.notna(old_horaire) else '',  # Désactivé
+                        'classe': str(old_classe).strip()
+                    }
+
+            # Assigner les nouvelles valeurs en une seule mise à jour par colonne
+            # (convertir les colonnes au bon type si nécessaire)
+            if all_labels:
+                if self.cols_map["Ecole"]:
+                    col_name = self.cols_map["Ecole"]
+                    if self.df[col_name].dtype == 'float64':
+                        self.df[col_name] = self.df[col_name].astype('object')
+                    self.df.loc[all_labels, col_name] = school_name
+                # if self.cols_map["Horaire"]:  # Désactivé
+                #     col_name = self.cols_map["Horaire"]
+                #     if self.df[col_name].dtype == 'float64':
+                #         self.df[col_name] = self.df[col_name].astype('object')
+                #     self.df.loc[all_labels, col_name] = horaire
+                if self.cols_map["Classe"]:
+                    col_name = self.cols_map["Classe"]
+                    if self.df[col_name].dtype == 'float64':
+                        self.df[col_name] = self.df[col_name].astype('object')
+                    self.df.loc[all_labels, col_name] = classe_nom
+
+                # Mettre à jour le professeur si on l'a trouvé
+                if self.cols_map["Prof"] and professor_name:
+                    col_name = self.cols_map["Prof"]
+                    if self.df[col_name].dtype == 'float64':
+                        self.df[col_name] = self.df[col_name].astype('object')
+                    self.df.loc[all_labels, col_name] = professor_name
+
+                self.filter_engine.update_rows(all_labels)
+
+            def update_school_files():
+                # Retirer les élèves de leurs anciennes classes (si elles existent)
+                if old_assignments:
+                    self.remove_students_from_old_classes(old_assignments, school_file_mapping)
+
+                # Ajouter les élèves dans la nouvelle classe
+                self.update_school_excel_file(school_key, school_file_mapping, horaire, classe_nom, student_names)
+
+            # Matrix et fichiers des écoles : un chargement et une sauvegarde par fichier, tout ou rien
+            if self.save_matrix_in_transaction(update_school_files):
+                prof_info = f", prof {professor_name}" if professor_name else ""
+                print(f"💾 Assignation sauvegardée : {assigned_count} élève(s) assigné(s) à l'école {school_name}, classe {classe_nom}{prof_info}")
 
             # Rafraîchir l'affichage
             self.refresh_table(preserve_selection=False)
@@ -2653,44 +2503,47 @@ class AppPedagogique(ctk.CTk):
 
         # Fonction de callback pour la sauvegarde
         def complete_unassignment():
-            unassigned_count = 0
             old_assignments = {}  # Pour stocker les anciennes assignations
 
-            # Traiter chaque élève sélectionné
-            for student_name in student_names:
-                if student_name in self.df[self.cols_map["Stagiaire"]].values:
-                    mask = self.df[self.cols_map["Stagiaire"]] == student_name
-                    
-                    # Récupérer les anciennes valeurs AVANT de les supprimer
-                    old_ecole = self.df.loc[mask, self.cols_map["Ecole"]].values[0] if self.cols_map["Ecole"] else None
-                    # old_horaire = self.df.loc[mask, self.cols_map["Horaire"]].values[0] if self.cols_map["Horaire"] else None  # Désactivé
-                    old_classe = self.df.loc[mask, self.cols_map["Classe"]].values[0] if self.cols_map["Classe"] else None
-
-                    # Stocker l'ancienne assignation si elle existe
-                    if pd.notna(old_ecole) and pd.notna(old_classe) and str(old_ecole).strip() and str(old_classe).strip():
-                        old_assignments[student_name] = {
-                            'ecole': str(old_ecole).strip(),
-                            # 'horaire': str(old_horaire).strip() if pd.notna(old_horaire) else '',  # Désactivé
-                            'classe': str(old_classe).strip()
-                        }
-
-                    # Supprimer les assignations (mettre à None)
-                    if self.cols_map["Ecole"]:
-                        self.df.loc[mask, self.cols_map["Ecole"]] = None
-                    # if self.cols_map["Horaire"]:  # Désactivé
-                    #     self.df.loc[mask, self.cols_map["Horaire"]] = None
-                    if self.cols_map["Classe"]:
-                        self.df.loc[mask, self.cols_map["Classe"]] = None
-
-                    unassigned_count += 1
-
-            # Sauvegarder le fichier matrix
-            self.df.to_excel(self.file_path, index=False)
-            print(f"🗑️  Dé-assignation sauvegardée : {unassigned_count} élève(s) retiré(s) de leur classe")
-
-            # Retirer les élèves des fichiers Excel des écoles
-            if old_assignments:
-                self.remove_students_from_old_classes(old_assignments, school_file_mapping)
+            # Lignes de chaque élève sélectionné (index des noms : pas de parcours de la colonne)
+            student_labels = {name: self.student_index.labels(name) for name in student_names}
+            student_labels = {name: labels for name, labels in student_labels.items() if labels}
+            all_labels = self.student_index.labels_for(student_labels)
+            unassigned_count = len(student_labels)
+
+            # Récupérer les anciennes valeurs AVANT de les supprimer (première ligne de chaque élève)
+            for student_name, labels in student_labels.items():
+                old_ecole = self.df.at[labels[0], self.cols_map["Ecole"]] if self.cols_map["Ecole"] else None
+                # old_horaire = self.df.at[labels[0], self.cols_map["Horaire"]] if self.cols_map["Horaire"] else None  # Désactivé
+                old_classe = self.df.at[labels[0], self.cols_map["Classe"]] if self.cols_map["Classe"] else None
+
+                # Stocker l'ancienne assignation si elle existe
+                if pd.notna(old_ecole) and pd.notna(old_classe) and str(old_ecole).strip() and str(old_classe).strip():
+                    old_assignments[student_name] = {
+                        'ecole': str(old_ecole).strip(),
+                        # 'horaire': str(old_horaire).strip() if pd.notna(old_horaire) else '',  # Désactivé
+                        'classe': str(old_classe).strip()
+                    }
+
+            # Supprimer les assignations (mettre à None) en une seule mise à jour par colonne
+            if all_labels:
+                if self.cols_map["Ecole"]:
+                    self.df.loc[all_labels, self.cols_map["Ecole"]] = None
+                # if self.cols_map["Horaire"]:  # Désactivé
+                #     self.df.loc[all_labels, self.cols_map["Horaire"]] = None
+                if self.cols_map["Classe"]:
+                    self.df.loc[all_labels, self.cols_map["Classe"]] = None
+
+                self.filter_engine.update_rows(all_labels)
+
+            def update_school_files():
+                # Retirer les élèves des fichiers Excel des écoles
+                if old_assignments:
+                    self.remove_students_from_old_classes(old_assignments, school_file_mapping)
+
+            # Matrix et fichiers des écoles : un chargement et une sauvegarde par fichier, tout ou rien
+            if self.save_matrix_in_transaction(update_school_files):
+                print(f"🗑️  Dé-assignation sauvegardée : {unassigned_count} élève(s) retiré(s) de leur classe")
 
             # Rafraîchir l'affichage
             self.refresh_table(preserve_selection=False)
@@ -2766,12 +2619,7 @@ class AppPedagogique(ctk.CTk):
                         sheet = wb[sheet_name]
 
                         # Chercher la ligne correspondant à la classe (colonne 1 : "Nom de la classe")
-                        classe_row = None
-                        for row_idx in range(2, sheet.max_row + 1):  # Commencer à la ligne 2 (après header)
-                            cell_value = str(sheet.cell(row=row_idx, column=1).value or '').strip()
-                            if cell_value == old_classe:
-                                classe_row = row_idx
-                                break
+                        classe_row = get_class_index(sheet).find_row(old_classe)
 
                         if classe_row:
                             # Colonne des élèves (généralement colonne 5)
@@ -2802,7 +2650,7 @@ class AppPedagogique(ctk.CTk):
                         print(f"ℹ️ Élève {student_name} non trouvé dans {excel_filename} pour la classe {old_classe}")
                 
                 # Sauvegarder le fichier
-                wb.save(excel_path)
+                save_workbook(wb, excel_path)
                 wb.close()
                 print(f"✅ Fichier {excel_filename} mis à jour (élèves retirés des anciennes classes)")
                 
@@ -2810,6 +2658,9 @@ class AppPedagogique(ctk.CTk):
                 print(f"❌ Erreur lors de la suppression dans {excel_filename}: {e}")
                 import traceback
                 traceback.print_exc()
+                # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+                if current_week_transaction(excel_path) is not None:
+                    raise
 
     def update_school_excel_file(self, school_key, school_file_mapping, horaire, classe_nom, student_names):
         """Met à jour le fichier Excel de l'école avec les élèves assignés."""
@@ -2833,45 +2684,21 @@ class AppPedagogique(ctk.CTk):
 
         try:
             # Ouvrir le fichier Excel
-            wb = load_workbook(excel_path)
+            wb = open_workbook(excel_path)
 
             # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                # Nettoyer le nom de la feuille pour la comparaison
-                sheet_normalized = self.clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-
-                # Comparaison flexible : vérifier si l'horaire contient des chiffres similaires
-                # Par exemple : "8h15 - 10h15" doit matcher "8h15 à 10h15 Professeur"
-                import re
-                # Extraire les chiffres de l'horaire
-                horaire_numbers = re.findall(r'\d+', horaire_normalized)
-                sheet_numbers = re.findall(r'\d+', sheet_normalized)
-                
-                # Si les chiffres correspondent ou si les noms sont similaires
-                if (sheet_normalized == horaire_normalized or 
-                    horaire_normalized in sheet_normalized or 
-                    sheet_normalized in horaire_normalized or
-                    (horaire_numbers and sheet_numbers and horaire_numbers == sheet_numbers)):
-                    target_sheet = wb[sheet_name]
-                    print(f"✅ Feuille trouvée : '{sheet_name}' pour horaire '{horaire}'")
-                    break
+            # Comparaison flexible : "8h15 - 10h15" trouve "8h15 à 10h15 Professeur" (voir index_horaires.py)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if target_sheet is None:
                 print(f"⚠️ Feuille horaire '{horaire}' non trouvée dans {excel_filename}")
                 print(f"   Feuilles disponibles : {wb.sheetnames}")
-                print(f"   Horaire recherché normalisé : '{horaire_normalized}'")
                 wb.close()
                 return
+            print(f"✅ Feuille trouvée : '{target_sheet.title}' pour horaire '{horaire}'")
 
             # Chercher la ligne correspondant à la classe (colonne 1 : "Nom de la classe")
-            classe_row = None
-            for row_idx in range(2, target_sheet.max_row + 1):  # Commencer à la ligne 2 (après header)
-                cell_value = str(target_sheet.cell(row=row_idx, column=1).value or '').strip()
-                if cell_value == classe_nom:
-                    classe_row = row_idx
-                    break
+            classe_row = get_class_index(target_sheet).find_row(classe_nom)
 
             if classe_row is None:
                 print(f"⚠️ Classe '{classe_nom}' non trouvée dans la feuille '{target_sheet.title}'")
@@ -2907,7 +2734,7 @@ class AppPedagogique(ctk.CTk):
                 target_sheet.cell(row=classe_row, column=eleves_col, value=eleves_text)
 
                 # Sauvegarder le fichier
-                wb.save(excel_path)
+                save_workbook(wb, excel_path)
                 print(f"✅ Fichier {excel_filename} mis à jour : {len(new_eleves)} élève(s) ajouté(s) à la classe {classe_nom}")
             else:
                 print(f"ℹ️ Élève(s) déjà présent(s) dans la classe {classe_nom}")
@@ -2918,6 +2745,9 @@ class AppPedagogique(ctk.CTk):
             print(f"❌ Erreur lors de la mise à jour du fichier {excel_filename}: {e}")
             import traceback
             traceback.print_exc()
+            # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+            if current_week_transaction(excel_path) is not None:
+                raise
 
     def open_add_student_dialog(self):
         """Ouvre une fenêtre pour ajouter un nouvel élève."""
@@ -3360,27 +3190,30 @@ class AppPedagogique(ctk.CTk):
             if self.cols_map["Classe"]:
                 new_row[self.cols_map["Classe"]] = classe
 
-            # Ajouter au DataFrame
-            self.df = pd.concat([self.df, pd.DataFrame([new_row])], ignore_index=True)
-
-            # Sauvegarder
-            self.df.to_excel(self.file_path, index=False)
+            # Ajouter au DataFrame (nouvelle étiquette d'index : les lignes existantes gardent la leur)
+            new_label = self.df.index.max() + 1 if len(self.df) else 0
+            self.df = pd.concat([self.df, pd.DataFrame([new_row], index=[new_label])])
+            self.rebuild_student_index(added_labels=[new_label])
 
-            # Créer la classe si elle n'existe pas
-            if classe and horaire:
-                school_key = self.get_school_key_from_display_name(school)
-                if school_key:
-                    self.create_missing_classes_from_import([{
-                        'nom': name,
-                        'donnees': [f"École: {school}", f"Horaire: {horaire}", f"Classe: {classe}"]
-                    }])
+            # Créer la classe si elle n'existe pas : matrix et fichier de l'école dans une seule transaction
+            school_key = self.get_school_key_from_display_name(school) if classe and horaire else None
+            if school_key:
+                saved = self.save_matrix_in_transaction(lambda: self.create_missing_classes_from_import([{
+                    'nom': name,
+                    'donnees': [f"École: {school}", f"Horaire: {horaire}", f"Classe: {classe}"]
+                }]))
+            else:
+                # Matrix seul : sauvegarde en arrière-plan
+                self.schedule_matrix_save()
+                saved = True
 
             # Rafraîchir l'affichage
             self.refresh_table(preserve_selection=False)
             self.update_counters()
 
             dialog.destroy()
-            messagebox.showinfo("Succès", f"Élève {name} ajouté avec succès!")
+            if saved:
+                messagebox.showinfo("Succès", f"Élève {name} ajouté avec succès!")
 
         # Bouton sauvegarder
         save_btn = ctk.CTkButton(
@@ -3478,9 +3311,9 @@ class AppPedagogique(ctk.CTk):
         # Variable pour stocker les élèves filtrés
         current_students = []
 
-        # Fonction de recherche
-        def search_students(*args):
-            search_term = search_var.get().lower().strip()
+        # Fonction de recherche (colonnes d'affichage du tableau, ordre alphabétique)
+        def search_students(request):
+            search_term = request.term.lower().strip()
 
             # Vider les résultats précédents
             for widget in results_frame.winfo_children():
@@ -3492,34 +3325,28 @@ class AppPedagogique(ctk.CTk):
 
             # Chercher les élèves correspondants (maximum 6)
             current_students.clear()
-            count = 0
-            for _, row in self.df.iterrows():
-                if count >= 6:  # Limiter à 6 élèves maximum
-                    break
-                nom = str(row[self.cols_map["Stagiaire"]]).lower()
-                if search_term in nom:
-                    student_data = {
-                        'nom': str(row[self.cols_map["Stagiaire"]]),
-                        'age': row[self.cols_map["Âge"]],
-                        'niveau': str(row[self.cols_map["Niveau"]]) if pd.notna(row[self.cols_map["Niveau"]]) else "",
-                        'classe': str(row[self.cols_map["Classe"]]) if self.cols_map["Classe"] and pd.notna(row[self.cols_map["Classe"]]) else "",
-                        'prof': str(row[self.cols_map["Prof"]]) if self.cols_map["Prof"] and pd.notna(row[self.cols_map["Prof"]]) else "",
-                        'arrivee': self.format_date_jour_mois(row[self.cols_map["Arrivée"]]) if self.cols_map["Arrivée"] and pd.notna(row[self.cols_map["Arrivée"]]) else "",
-                        'depart': self.format_date_jour_mois(row[self.cols_map["Départ"]]) if self.cols_map["Départ"] and pd.notna(row[self.cols_map["Départ"]]) else "",
-                        'ci': "OUI" if self.cols_map["Départ CI"] and pd.notna(row[self.cols_map["Départ CI"]]) and str(row[self.cols_map["Départ CI"]]).strip() != "" else "",
-                        'classe_ci': str(row[self.cols_map["Classe CI"]]) if self.cols_map["Classe CI"] and pd.notna(row[self.cols_map["Classe CI"]]) else "",
-                        'prof_ci': str(row[self.cols_map["Prof CI"]]) if self.cols_map["Prof CI"] and pd.notna(row[self.cols_map["Prof CI"]]) else "",
-                        'arr_ci': self.format_date_jour_mois(row[self.cols_map["Départ CI"]]) if self.cols_map["Départ CI"] and pd.notna(row[self.cols_map["Départ CI"]]) else "",
-                        'dep_ci': self.format_date_jour_mois(row[self.cols_map["Arrivée CI"]]) if self.cols_map["Arrivée CI"] and pd.notna(row[self.cols_map["Arrivée CI"]]) else ""
-                    }
-                    current_students.append(student_data)
-                    count += 1
+            mask = self.filter_engine.mask(search=search_term)
+            for values in self.filter_engine.records(mask, limit=6):
+                current_students.append({
+                    'nom': values['nom'],
+                    'age': values['age'],
+                    'niveau': values['niveau'],
+                    'classe': values['classe'],
+                    'prof': values['prof'],
+                    'arrivee': values['arrivee'],
+                    'depart': values['depart'],
+                    'ci': values['ci'],
+                    'classe_ci': values['classe_ci'],
+                    'prof_ci': values['prof_ci'],
+                    'arr_ci': values['depart_ci'],
+                    'dep_ci': values['arrivee_ci']
+                })
 
             # Afficher les résultats
             display_students(current_students)
 
-        # Lier la recherche
-        search_var.trace_add("write", search_students)
+        # Lier la recherche (frappes regroupées)
+        student_search = DebouncedSearch(dialog, search_var, search_students)
 
         # Fonction d'affichage des élèves
         def display_students(students):
@@ -3761,12 +3588,17 @@ class AppPedagogique(ctk.CTk):
                         student_info = self.get_student_info_for_excel_removal(s_name)
 
                         # Supprimer de la base matrix
-                        self.df = self.df[self.df[self.cols_map["Stagiaire"]] != s_name]
-                        self.df.to_excel(self.file_path, index=False)
+                        removed_labels = self.student_index.labels(s_name)
+                        self.df = self.df.drop(index=removed_labels)
+                        self.rebuild_student_index(removed_labels=removed_labels)
 
                         # Supprimer des fichiers Excel des écoles si nécessaire
+                        # (matrix et fichiers des écoles dans une seule transaction)
                         if student_info:
-                            self.remove_student_from_excel_files_with_info(student_info)
+                            self.save_matrix_in_transaction(
+                                lambda: self.remove_student_from_excel_files_with_info(student_info))
+                        else:
+                            self.schedule_matrix_save()
 
                         # Rafraîchir l'affichage principal
                         self.refresh_table(preserve_selection=False)
@@ -3813,13 +3645,14 @@ class AppPedagogique(ctk.CTk):
 
         # Lier la fermeture
         def on_closing():
+            student_search.close()
             dialog.destroy()
 
         dialog.protocol("WM_DELETE_WINDOW", on_closing)
 
     def get_student_info_for_excel_removal(self, student_name):
         """Récupère les informations d'un élève avant sa suppression pour mettre à jour les fichiers Excel."""
-        student_row = self.df[self.df[self.cols_map["Stagiaire"]] == student_name]
+        student_row = self.df.loc[self.student_index.labels(student_name)]
         if student_row.empty:
             return None
 
@@ -3878,28 +3711,17 @@ class AppPedagogique(ctk.CTk):
             return
 
         try:
-            wb = load_workbook(excel_path)
+            wb = open_workbook(excel_path)
 
             # Chercher la feuille horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_clean = self.clean_horaire_name(sheet_name)
-                horaire_clean = str(horaire).strip()
-                if sheet_clean == horaire_clean or horaire_clean in sheet_clean:
-                    target_sheet = wb[sheet_name]
-                    break
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if not target_sheet:
                 wb.close()
                 return
 
             # Chercher la classe
-            classe_row = None
-            for row_idx in range(2, target_sheet.max_row + 1):
-                cell_value = str(target_sheet.cell(row=row_idx, column=1).value or '').strip()
-                if cell_value == str(classe).strip():
-                    classe_row = row_idx
-                    break
+            classe_row = get_class_index(target_sheet).find_row(classe)
 
             if not classe_row:
                 wb.close()
@@ -3926,13 +3748,16 @@ class AppPedagogique(ctk.CTk):
                         target_sheet.cell(row=classe_row, column=eleves_col, value='')
                         target_sheet.cell(row=classe_row, column=4, value='')  # Colonne niveau
 
-                    wb.save(excel_path)
+                    save_workbook(wb, excel_path)
                     print(f"✅ Élève {student_name} retiré de {excel_filename} (horaire: {horaire}, classe: {classe})")
 
             wb.close()
 
         except Exception as e:
             print(f"❌ Erreur lors de la suppression de {student_name} dans {excel_filename}: {e}")
+            # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+            if current_week_transaction(excel_path) is not None:
+                raise
 
     def remove_student_from_excel_files(self, student_name):
         """Supprime un élève des fichiers Excel des écoles (méthode dépréciée - utilise remove_student_from_excel_files_with_info)."""
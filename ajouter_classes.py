@@ -2,8 +2,9 @@ import customtkinter as ctk
 import pandas as pd
 import os
 from tkinter import messagebox
-from openpyxl import load_workbook
 from openpyxl.utils.dataframe import dataframe_to_rows
+from stockage_semaine import open_workbook, save_workbook, read_excel_sheets
+from index_horaires import find_horaire_sheet_name
 
 def open_add_class_dialog(horaire, school_key, display_name, school_color, week_folder, refresh_callback=None):
     NIVEAUX = ["A0", "A0/A0+", "Pré-A1", "Pré-A1/A1", "A1", "A1.2", "A1.2/A2",
@@ -107,23 +108,16 @@ def open_add_class_dialog(horaire, school_key, display_name, school_color, week_
         file_path = os.path.join(week_folder, filename)
 
         try:
-            wb = load_workbook(file_path)
+            wb = open_workbook(file_path)
             original_order = wb.sheetnames.copy()
 
-            def clean(text):
-                t = str(text).lower()
-                for w in ["professeur", "prof", "animateur", "anim", "Animateur", "Rôle", "rôle", "role"]:
-                    t = t.replace(w, "")
-                return t.replace(" ", "").strip()
-
-            target = clean(horaire)
-            sheet = next((s for s in original_order if clean(s) == target or s == horaire), None)
+            sheet = horaire if horaire in original_order else find_horaire_sheet_name(wb, horaire)
 
             if not sheet:
                 error_label.configure(text="⚠️ Horaire introuvable")
                 return
 
-            df = pd.read_excel(file_path, sheet_name=sheet)
+            df = read_excel_sheets(file_path, sheet_name=sheet)
 
             new_row = {}
             for col in df.columns:
@@ -143,7 +137,7 @@ def open_add_class_dialog(horaire, school_key, display_name, school_color, week_
                 ws.append(r)
 
             wb._sheets.sort(key=lambda x: original_order.index(x.title))
-            wb.save(file_path)
+            save_workbook(wb, file_path)
             wb.close()
 
 
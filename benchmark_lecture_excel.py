@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Compare les moteurs de lecture Excel installés (calamine, openpyxl) sur des
+fichiers matrix et d'écoles générés, de taille croissante.
+
+Utilisation :
+    python benchmark_lecture_excel.py                 # tailles par défaut
+    python benchmark_lecture_excel.py --tailles 1000 20000 --repetitions 5
+    python benchmark_lecture_excel.py --enregistrer   # mémorise le moteur le plus rapide
+
+Avec --enregistrer, le moteur le plus rapide est écrit dans la préférence
+"moteur_excel" de user_preferences.json : toutes les lectures de l'application
+l'utiliseront (voir cache_excel.get_excel_engine()).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from openpyxl import Workbook
+
+import cache_excel
+from cache_excel import get_available_engines, read_excel_file, read_workbook_values
+
+NIVEAUX = ["A1", "A2", "B1", "B2", "C1"]
+ECOLES = ["A", "B", "C/CS", "C/CI", "Morning", "Premium/CS", "Premium/CI"]
+HORAIRES = ["08h15 à 10h15 Prof", "10h30 à 11h30 Animateur", "9h à 12h20 Prof", "14h à 16h Animateur"]
+
+
+def generate_matrix_file(file_path, nb_rows, seed=0):
+    """Génère un matrix.xlsx de nb_rows élèves (mêmes colonnes que l'application)."""
+    rng = random.Random(seed)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(["stagiaire", "Niveau", "Ecole", "Horaire", "Classe", "Age", "Date de début", "Date de fin",
+               "Nationalité", "Cours intensif"])
+    for i in range(nb_rows):
+        assigned = rng.random() < 0.7
+        ws.append([
+            f"Nom{i} Prénom{i}",
+            rng.choice(NIVEAUX) if rng.random() < 0.9 else None,
+            rng.choice(ECOLES) if assigned else None,
+            rng.choice(HORAIRES) if assigned else None,
+            f"Classe {rng.randint(1, 40)}" if assigned else None,
+            rng.randint(8, 18),
+            "01/07/2025",
+            "15/07/2025",
+            rng.choice(["FR", "ES", "IT", "DE"]),
+            "CI" if rng.random() < 0.2 else None,
+        ])
+    wb.save(file_path)
+
+
+def generate_school_file(file_path, nb_classes, seed=0):
+    """Génère un fichier d'école : une feuille par horaire, nb_classes classes par feuille."""
+    rng = random.Random(seed)
+    wb = Workbook()
+    wb.remove(wb.active)
+    for horaire in HORAIRES:
+        ws = wb.create_sheet(horaire)
+        ws.append(["Nom de la classe", "Niveau", "Intervenant", "Rôle", "Liste des élèves"])
+        for n in range(nb_classes):
+            eleves = ", ".join(f"Nom{rng.randint(0, 10 * nb_classes)} Prénom" for _ in range(rng.randint(0, 15)))
+            ws.append([f"Classe {n + 1}", rng.choice(NIVEAUX), f"Prof {n % 12}", "", eleves])
+    wb.save(file_path)
+
+
+def time_function(func, repetitions):
+    """Retourne le meilleur temps (en secondes) sur plusieurs exécutions."""
+    best = None
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmark(tailles, repetitions):
+    """
+    Mesure chaque moteur sur des fichiers générés.
+
+    Returns:
+        list de dicts {'fichier', 'taille', 'lecture', 'moteur', 'secondes'}
+    """
+    engines = get_available_engines()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for taille in tailles:
+            matrix_path = os.path.join(tmp, f"matrix_{taille}.xlsx")
+            school_path = os.path.join(tmp, f"ecole_{taille}.xlsx")
+            generate_matrix_file(matrix_path, taille)
+            # Environ une classe pour 10 élèves, répartie sur les feuilles d'horaires
+            generate_school_file(school_path, max(1, taille // (10 * len(HORAIRES))))
+
+            for fichier, path in (("matrix", matrix_path), ("ecole", school_path)):
+                for engine in engines:
+                    for lecture, func in (
+                        ("DataFrame", lambda: read_excel_file(path, sheet_name=None, engine=engine)),
+                        ("valeurs", lambda: read_workbook_values(path, engine=engine)),
+                    ):
+                        results.append({
+                            'fichier': fichier,
+                            'taille': taille,
+                            'lecture': lecture,
+                            'moteur': engine,
+                            'secondes': time_function(func, repetitions),
+                        })
+    return results
+
+
+def fastest_engine(results):
+    """Moteur dont le temps total est le plus faible sur l'ensemble des mesures."""
+    totals = {}
+    for result in results:
+        totals[result['moteur']] = totals.get(result['moteur'], 0.0) + result['secondes']
+    return min(totals, key=totals.get) if totals else None
+
+
+def save_engine_preference(engine, preferences_file=None):
+    """Écrit la préférence "moteur_excel" sans toucher aux autres préférences."""
+    preferences_file = preferences_file or cache_excel.PREFERENCES_FILE
+    preferences = {}
+    if os.path.exists(preferences_file):
+        try:
+            with open(preferences_file, "r", encoding="utf-8") as f:
+                preferences = json.load(f)
+        except (OSError, ValueError):
+            preferences = {}
+    preferences["moteur_excel"] = engine
+    with open(preferences_file, "w", encoding="utf-8") as f:
+        json.dump(preferences, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les moteurs de lecture Excel installés.")
+    parser.add_argument("--tailles", type=int, nargs="+", default=[500, 2000, 10000],
+                        help="Nombre d'élèves des fichiers générés")
+    parser.add_argument("--repetitions", type=int, default=3, help="Nombre de mesures par cas (meilleur temps)")
+    parser.add_argument("--enregistrer", action="store_true",
+                        help="Enregistre le moteur le plus rapide dans user_preferences.json")
+    args = parser.parse_args()
+
+    engines = get_available_engines()
+    if not engines:
+        print("❌ Aucun moteur de lecture Excel disponible (installer openpyxl)")
+        return 1
+    print(f"Moteurs disponibles : {', '.join(engines)}")
+    if "calamine" not in engines:
+        print("ℹ️ Installer python-calamine pour comparer avec le moteur calamine")
+
+    results = run_benchmark(args.tailles, args.repetitions)
+
+    print(f"\n{'Fichier':<8} {'Taille':>8} {'Lecture':<10} {'Moteur':<10} {'Temps (ms)':>11}")
+    for result in results:
+        print(f"{result['fichier']:<8} {result['taille']:>8} {result['lecture']:<10} "
+              f"{result['moteur']:<10} {result['secondes'] * 1000:>11.1f}")
+
+    best = fastest_engine(results)
+    print(f"\nMoteur le plus rapide : {best}")
+    if args.enregistrer:
+        save_engine_preference(best)
+        print(f"✅ Préférence 'moteur_excel' enregistrée : {best}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
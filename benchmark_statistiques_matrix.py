@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Compare le calcul par colonnes des assignations du matrix (statistiques_matrix.py)
+à l'ancien parcours ligne par ligne (df.iterrows()), sur des matrix générés.
+
+Utilisation :
+    python benchmark_statistiques_matrix.py                      # 1 000, 10 000 et 50 000 élèves
+    python benchmark_statistiques_matrix.py --tailles 5000 --repetitions 5
+
+Les deux calculs doivent donner exactement le même résultat : le script s'arrête
+avec une erreur dans le cas contraire.
+"""
+import argparse
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from benchmark_lecture_excel import generate_matrix_file, time_function
+from statistiques_matrix import compute_matrix_assignments, empty_matrix_assignments
+
+
+def compute_matrix_assignments_iterrows(df):
+    """
+    Ancienne implémentation, conservée comme référence : corps de analyze_matrix_assignments()
+    de fenetre_principale.py avant le calcul par colonnes (détection des colonnes avec
+    should_exclude_column() puis parcours df.iterrows()), sans la lecture du fichier.
+    """
+    # Trouver les colonnes nécessaires
+    stagiaire_col = None
+    niveau_col = None
+    ecole_col = None
+    classe_col = None
+    horaire_col = None
+
+    # Fonction helper pour vérifier si une colonne doit être exclue
+    def should_exclude_column(col_name):
+        col_lower = str(col_name).lower()
+        # Exclure les colonnes spécifiques aux cours (Cours 1, Cours 2, etc.)
+        if any(f'cours {i}' in col_lower for i in range(1, 10)):
+            return True
+        # Exclure les colonnes avec des suffixes numériques (.1, .2, etc.)
+        if any(col_lower.endswith(f'.{i}') for i in range(1, 10)):
+            return True
+        # Exclure les colonnes d'arrivée/départ spécifiques
+        if 'arrivée' in col_lower or 'départ' in col_lower:
+            return True
+        return False
+
+    for col in df.columns:
+        if should_exclude_column(col):
+            continue
+
+        col_lower = str(col).lower()
+        if 'stagiaire' in col_lower or 'nom' in col_lower or 'élève' in col_lower or 'eleve' in col_lower:
+            if not stagiaire_col:  # Prendre la première trouvée
+                stagiaire_col = col
+        elif ('niveau' in col_lower or 'level' in col_lower) and not any(char.isdigit() for char in col):
+            if not niveau_col:  # Éviter les duplications comme "Niveau.1"
+                niveau_col = col
+        elif 'ecole' in col_lower or 'école' in col_lower or 'school' in col_lower:
+            if not ecole_col:  # Prendre la première école générale
+                ecole_col = col
+        elif 'classe' in col_lower or 'class' in col_lower or 'groupe' in col_lower:
+            if not classe_col:  # Prendre la première classe générale
+                classe_col = col
+        elif 'horaire' in col_lower or 'horaire' in col_lower or 'heure' in col_lower or 'time' in col_lower:
+            if not horaire_col and 'arrivée' not in col_lower and 'départ' not in col_lower:
+                horaire_col = col
+
+    if not stagiaire_col:
+        return empty_matrix_assignments()
+
+    total_eleves = len(df)
+    sans_classe = 0
+    sans_niveau = 0
+    avec_classe = 0
+    par_niveau = {}
+    eleves_assignes = []
+
+    for _, row in df.iterrows():
+        nom = str(row.get(stagiaire_col, '')).strip() if stagiaire_col else ''
+        niveau = str(row.get(niveau_col, '')).strip() if niveau_col else ''
+        ecole = str(row.get(ecole_col, '')).strip() if ecole_col else ''
+        classe = str(row.get(classe_col, '')).strip() if classe_col else ''
+        horaire = str(row.get(horaire_col, '')).strip() if horaire_col else ''
+
+        # Vérifier si l'élève a toutes les informations nécessaires pour être assigné
+        if nom and nom.lower() not in ['', 'nan', 'none'] and ecole and classe and horaire:
+            eleves_assignes.append({
+                'nom': nom,
+                'niveau': niveau,
+                'ecole': ecole,
+                'classe': classe,
+                'horaire': horaire
+            })
+
+        # Statistiques des classes
+        if not classe or classe.lower() in ['', 'nan', 'none']:
+            sans_classe += 1
+        else:
+            avec_classe += 1
+
+        # Statistiques des niveaux
+        if not niveau or niveau.lower() in ['', 'nan', 'none']:
+            sans_niveau += 1
+        else:
+            if niveau in par_niveau:
+                par_niveau[niveau] += 1
+            else:
+                par_niveau[niveau] = 1
+
+    return {
+        'eleves_assignes': eleves_assignes,
+        'total_eleves': total_eleves,
+        'sans_classe': sans_classe,
+        'sans_niveau': sans_niveau,
+        'avec_classe': avec_classe,
+        'par_niveau': par_niveau
+    }
+
+
+def run_benchmark(tailles, repetitions):
+    """
+    Mesure les deux calculs sur des matrix générés (lus une fois, hors mesure).
+
+    Returns:
+        list de dicts {'taille', 'iterrows', 'colonnes'} (temps en secondes)
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for taille in tailles:
+            matrix_path = os.path.join(tmp, f"matrix_{taille}.xlsx")
+            generate_matrix_file(matrix_path, taille)
+            df = pd.read_excel(matrix_path)
+
+            if compute_matrix_assignments(df) != compute_matrix_assignments_iterrows(df):
+                raise AssertionError(f"Résultats différents pour {taille} élèves")
+
+            results.append({
+                'taille': taille,
+                'iterrows': time_function(lambda: compute_matrix_assignments_iterrows(df), repetitions),
+                'colonnes': time_function(lambda: compute_matrix_assignments(df), repetitions),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les calculs des assignations du matrix.")
+    parser.add_argument("--tailles", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="Nombre d'élèves des matrix générés")
+    parser.add_argument("--repetitions", type=int, default=3, help="Nombre de mesures par cas (meilleur temps)")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.tailles, args.repetitions)
+
+    print(f"{'Taille':>8} {'iterrows (ms)':>14} {'colonnes (ms)':>14} {'Gain':>7}")
+    for result in results:
+        print(f"{result['taille']:>8} {result['iterrows'] * 1000:>14.1f} {result['colonnes'] * 1000:>14.1f} "
+              f"{result['iterrows'] / result['colonnes']:>6.1f}x")
+    print("\n✅ Résultats identiques pour toutes les tailles")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,521 @@
+"""
+Cache partagé des classeurs Excel déjà lus.
+
+Chaque fichier est identifié par (chemin, date de modification, taille) : tant que
+le fichier n'a pas changé sur le disque, une relecture coûte un simple accès au
+dictionnaire au lieu d'une décompression zip et d'une analyse XML.
+Le cache est borné en mémoire (éviction LRU) et doit être invalidé explicitement
+par les chemins d'écriture (voir save_workbook() et save_dataframe()).
+
+Toutes les lectures passent par read_excel_file() et read_workbook_values(), qui
+utilisent le moteur le plus rapide installé (calamine si python-calamine est
+présent, sinon openpyxl). Le moteur peut être imposé avec la préférence
+"moteur_excel" de user_preferences.json (voir benchmark_lecture_excel.py).
+
+Le fichier matrix.xlsx est en plus conservé sur le disque dans un fichier
+compagnon binaire (.matrix.xlsx.cache.pkl), identifié par l'empreinte du contenu
+du fichier Excel, le moteur de lecture et la version de pandas : au démarrage
+d'un autre processus, la lecture ne demande plus d'analyser le xlsx tant que son
+contenu n'a pas changé. Le dossier de la semaine peut être partagé : le fichier
+compagnon est signé (HMAC) avec une clé propre à l'utilisateur, conservée hors de
+ce dossier, et n'est désérialisé que si la signature est valide.
+"""
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+try:
+    from openpyxl import load_workbook
+except ImportError:
+    load_workbook = None
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+# Taille maximale approximative du cache (en octets)
+MAX_CACHE_BYTES = 128 * 1024 * 1024
+
+# Coût mémoire estimé d'une cellule (objet Python + référence dans le tuple)
+_CELL_OVERHEAD_BYTES = 56
+
+# Moteurs de lecture, du plus rapide au plus lent
+MOTEURS_EXCEL = ("calamine", "openpyxl")
+PREFERENCES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "user_preferences.json")
+
+_engine_override = None
+_engine_preference = (None, None)  # (signature du fichier de préférences, moteur choisi)
+
+# Fichiers dont les DataFrames sont conservés dans un fichier compagnon sur le disque
+SIDECAR_FILES = {"matrix.xlsx"}
+SIDECAR_SUFFIX = ".cache.pkl"
+_SIDECAR_VERSION = 2
+_SIDECAR_MAGIC = b"CEXL"
+# Clé de signature des fichiers compagnons (propre à l'utilisateur, hors des dossiers partagés)
+SIDECAR_KEY_FILE = os.path.join(os.path.expanduser("~"), ".cache_excel.key")
+_sidecar_key = None
+
+# {(chemin, type_entree, cle): (signature, valeur, taille_estimee)}
+_cache = OrderedDict()
+_cache_bytes = 0
+_lock = threading.RLock()
+
+
+class CachedCell:
+    """Cellule en lecture seule (même interface que openpyxl : .value)."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class CachedSheet:
+    """Copie en lecture seule des valeurs d'une feuille Excel."""
+
+    def __init__(self, title, rows):
+        self.title = title
+        self._rows = rows
+        self.max_row = len(rows)
+        self.max_column = max((len(row) for row in rows), default=0)
+
+    def cell(self, row, column):
+        """Retourne la cellule (indices commençant à 1, comme openpyxl)."""
+        if 1 <= row <= self.max_row:
+            values = self._rows[row - 1]
+            if 1 <= column <= len(values):
+                return CachedCell(values[column - 1])
+        return CachedCell(None)
+
+    def iter_rows(self, min_row=1, max_row=None, values_only=True):
+        """Parcourt les lignes sous forme de tuples de valeurs."""
+        last_row = self.max_row if max_row is None else min(max_row, self.max_row)
+        for row_idx in range(max(min_row, 1) - 1, last_row):
+            yield self._rows[row_idx]
+
+
+class CachedWorkbook:
+    """Copie en lecture seule d'un classeur : sheetnames et accès wb[nom]."""
+
+    def __init__(self, sheets):
+        self._sheets = sheets
+        self.sheetnames = list(sheets.keys())
+
+    def __getitem__(self, sheet_name):
+        return self._sheets[sheet_name]
+
+    def __contains__(self, sheet_name):
+        return sheet_name in self._sheets
+
+    @property
+    def active(self):
+        return self._sheets[self.sheetnames[0]] if self.sheetnames else None
+
+    def close(self):
+        """Compatibilité avec openpyxl (rien à libérer)."""
+        pass
+
+
+def get_file_signature(file_path):
+    """Retourne (mtime_ns, taille) du fichier, ou None s'il n'existe pas."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _get_entry(key, signature):
+    """Retourne la valeur en cache si elle correspond toujours au fichier."""
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] != signature:
+            _remove_key(key)
+            return None
+        _cache.move_to_end(key)
+        return entry[1]
+
+
+def _store_entry(key, signature, value, size):
+    """Ajoute une valeur au cache puis évince les plus anciennes si nécessaire."""
+    global _cache_bytes
+    with _lock:
+        _remove_key(key)
+        if size > MAX_CACHE_BYTES:
+            return
+        _cache[key] = (signature, value, size)
+        _cache_bytes += size
+        while _cache_bytes > MAX_CACHE_BYTES and _cache:
+            oldest_key = next(iter(_cache))
+            _remove_key(oldest_key)
+
+
+def _remove_key(key):
+    global _cache_bytes
+    entry = _cache.pop(key, None)
+    if entry is not None:
+        _cache_bytes -= entry[2]
+
+
+def _normalize_path(file_path):
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def get_available_engines():
+    """Retourne les moteurs de lecture installés, du plus rapide au plus lent."""
+    engines = []
+    if python_calamine is not None:
+        engines.append("calamine")
+    if load_workbook is not None:
+        engines.append("openpyxl")
+    return engines
+
+
+def _read_engine_preference():
+    """Lit la préférence "moteur_excel" (relue seulement si le fichier change)."""
+    global _engine_preference
+    signature = get_file_signature(PREFERENCES_FILE)
+    if signature != _engine_preference[0]:
+        engine = None
+        try:
+            with open(PREFERENCES_FILE, "r", encoding="utf-8") as f:
+                engine = json.load(f).get("moteur_excel")
+        except (OSError, ValueError, AttributeError):
+            pass
+        _engine_preference = (signature, engine)
+    return _engine_preference[1]
+
+
+def get_excel_engine():
+    """
+    Retourne le moteur de lecture à utiliser.
+
+    Ordre de priorité : set_excel_engine(), préférence "moteur_excel", puis le
+    moteur le plus rapide installé. Un moteur demandé mais absent est ignoré.
+    """
+    available = get_available_engines()
+    for engine in (_engine_override, _read_engine_preference()):
+        if engine in available:
+            return engine
+    return available[0] if available else None
+
+
+def set_excel_engine(engine):
+    """Impose un moteur de lecture pour ce processus (None = choix automatique) et vide le cache."""
+    global _engine_override
+    if engine is not None and engine not in get_available_engines():
+        raise ValueError(f"Moteur Excel non disponible : {engine}")
+    _engine_override = engine
+    invalidate_excel_cache()
+
+
+def _calamine_value(value):
+    """Convertit une valeur calamine pour qu'elle soit identique à celle lue par openpyxl."""
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return datetime.datetime(value.year, value.month, value.day)
+    return value
+
+
+def _read_values_calamine(file_path):
+    workbook = python_calamine.CalamineWorkbook.from_path(file_path)
+    try:
+        sheets = {}
+        for sheet_name in workbook.sheet_names:
+            rows = workbook.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False)
+            sheets[sheet_name] = [tuple(_calamine_value(v) for v in values) for values in rows]
+        return sheets
+    finally:
+        if hasattr(workbook, "close"):
+            workbook.close()
+
+
+def _read_values_openpyxl(file_path):
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        return {sheet_name: [tuple(values) for values in wb[sheet_name].iter_rows(values_only=True)]
+                for sheet_name in wb.sheetnames}
+    finally:
+        wb.close()
+
+
+def read_workbook_values(file_path, engine=None):
+    """
+    Lit les valeurs de toutes les feuilles d'un classeur (sans cache).
+
+    Args:
+        file_path (str): Chemin du fichier Excel
+        engine (str): Moteur à utiliser (par défaut : get_excel_engine())
+
+    Returns:
+        dict {nom_feuille: liste de tuples de valeurs}, dans l'ordre du classeur
+    """
+    engine = engine or get_excel_engine()
+    if engine is None:
+        raise ImportError("openpyxl n'est pas disponible")
+    if engine == "calamine":
+        try:
+            return _read_values_calamine(file_path)
+        except Exception as e:
+            if load_workbook is None:
+                raise
+            print(f"Erreur de lecture avec calamine, utilisation d'openpyxl pour {file_path}: {e}")
+    return _read_values_openpyxl(file_path)
+
+
+def read_excel_file(file_path, sheet_name=0, engine=None):
+    """
+    Point d'entrée unique de pd.read_excel() (sans cache), avec le moteur choisi.
+
+    Returns:
+        DataFrame, ou dict {nom_feuille: DataFrame} si sheet_name est None
+    """
+    if pd is None:
+        raise ImportError("pandas n'est pas disponible")
+    engine = engine or get_excel_engine()
+    if engine == "calamine":
+        try:
+            return pd.read_excel(file_path, sheet_name=sheet_name, engine="calamine")
+        except (ImportError, ValueError) as e:
+            # Version de pandas sans moteur calamine, ou fichier non pris en charge
+            if load_workbook is None:
+                raise
+            print(f"Erreur de lecture avec calamine, utilisation d'openpyxl pour {file_path}: {e}")
+    return pd.read_excel(file_path, sheet_name=sheet_name, engine="openpyxl")
+
+
+def _parse_workbook(file_path):
+    """Lit toutes les feuilles d'un classeur avec le moteur de lecture choisi."""
+    sheets = {}
+    size = 0
+    for sheet_name, rows in read_workbook_values(file_path).items():
+        for values in rows:
+            size += _CELL_OVERHEAD_BYTES * len(values)
+            size += sum(len(v) for v in values if isinstance(v, str))
+
+        # Uniformiser la largeur des lignes (les dimensions peuvent être absentes)
+        width = max((len(row) for row in rows), default=0)
+        rows = [row + (None,) * (width - len(row)) if len(row) < width else row for row in rows]
+
+        # Supprimer les lignes vides en fin de feuille (comme max_row d'openpyxl sur un fichier propre)
+        while rows and all(v is None for v in rows[-1]):
+            rows.pop()
+
+        sheets[sheet_name] = CachedSheet(sheet_name, rows)
+    return CachedWorkbook(sheets), size
+
+
+def load_workbook_cached(file_path):
+    """
+    Retourne une copie en lecture seule du classeur (valeurs uniquement).
+
+    À utiliser uniquement pour les lectures : pour modifier un fichier, ouvrir
+    le classeur avec load_workbook() puis sauvegarder avec save_workbook().
+    """
+    if get_excel_engine() is None:
+        raise ImportError("openpyxl n'est pas disponible")
+
+    signature = get_file_signature(file_path)
+    if signature is None:
+        raise FileNotFoundError(file_path)
+
+    key = (_normalize_path(file_path), "workbook", None)
+    wb = _get_entry(key, signature)
+    if wb is None:
+        wb, size = _parse_workbook(file_path)
+        _store_entry(key, signature, wb, size)
+    return wb
+
+
+def get_content_hash(file_path):
+    """Empreinte (blake2b) du contenu d'un fichier."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_sidecar_path(file_path):
+    """Chemin du fichier compagnon : .matrix.xlsx.cache.pkl à côté de matrix.xlsx."""
+    folder, filename = os.path.split(os.path.abspath(file_path))
+    return os.path.join(folder, f".{filename}{SIDECAR_SUFFIX}")
+
+
+def _get_sidecar_key():
+    """Clé HMAC des fichiers compagnons (créée au premier usage, lisible par l'utilisateur seul)."""
+    global _sidecar_key
+    if _sidecar_key is None:
+        try:
+            with open(SIDECAR_KEY_FILE, "rb") as f:
+                key = f.read()
+        except FileNotFoundError:
+            key = b""
+        if len(key) < 32:
+            key = os.urandom(32)
+            try:
+                fd = os.open(SIDECAR_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(key)
+            except OSError as e:
+                # Clé limitée à ce processus : les fichiers compagnons ne seront pas réutilisés ailleurs
+                print(f"Impossible d'enregistrer la clé du cache {SIDECAR_KEY_FILE}: {e}")
+        _sidecar_key = key
+    return _sidecar_key
+
+
+def _sidecar_header(content_hash, engine):
+    """En-tête identifiant le contenu mis en cache : fichier Excel, moteur et version de pandas."""
+    return {"version": _SIDECAR_VERSION, "hash": content_hash, "engine": engine,
+            "pandas": getattr(pd, "__version__", None)}
+
+
+def _load_sidecar(sidecar_path, expected_header):
+    """
+    Retourne les feuilles du fichier compagnon, ou None s'il ne correspond pas.
+
+    Format : MAGIC | HMAC-SHA256 (32 octets) | longueur de l'en-tête (4 octets) | en-tête JSON | pickle.
+    Le pickle n'est chargé qu'après vérification de la signature et de l'en-tête.
+    """
+    with open(sidecar_path, "rb") as f:
+        data = f.read()
+    if not data.startswith(_SIDECAR_MAGIC):
+        return None
+    offset = len(_SIDECAR_MAGIC)
+    signature, body = data[offset:offset + 32], data[offset + 32:]
+    expected = hmac.new(_get_sidecar_key(), body, hashlib.sha256).digest()
+    if not hmac.compare_digest(signature, expected):
+        print(f"Fichier cache ignoré ({sidecar_path}): signature invalide")
+        return None
+    header_length = int.from_bytes(body[:4], "big")
+    header = json.loads(body[4:4 + header_length].decode("utf-8"))
+    if header != expected_header:
+        return None
+    return pickle.loads(body[4 + header_length:])
+
+
+def _dump_sidecar(file, header, sheets):
+    """Écrit le fichier compagnon signé (voir _load_sidecar())."""
+    header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+    body = (len(header_bytes).to_bytes(4, "big") + header_bytes
+            + pickle.dumps(sheets, protocol=pickle.HIGHEST_PROTOCOL))
+    file.write(_SIDECAR_MAGIC + hmac.new(_get_sidecar_key(), body, hashlib.sha256).digest() + body)
+
+
+def _read_sheets_with_sidecar(file_path):
+    """
+    Lit toutes les feuilles via le fichier compagnon s'il correspond au contenu
+    actuel du fichier Excel ; sinon lit le xlsx et régénère le fichier compagnon.
+    """
+    engine = get_excel_engine()
+    header = _sidecar_header(get_content_hash(file_path), engine)
+    sidecar_path = get_sidecar_path(file_path)
+
+    try:
+        sheets = _load_sidecar(sidecar_path, header)
+        if sheets is not None:
+            return sheets
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Fichier cache ignoré ({sidecar_path}): {e}")
+
+    sheets = read_excel_file(file_path, sheet_name=None, engine=engine)
+
+    # Écriture atomique : un autre processus ne lit jamais un fichier compagnon incomplet
+    temp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            _dump_sidecar(f, header, sheets)
+        os.replace(temp_path, sidecar_path)
+    except OSError as e:
+        print(f"Impossible d'écrire le fichier cache {sidecar_path}: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+    return sheets
+
+
+def read_excel_cached(file_path, sheet_name=0):
+    """
+    Équivalent de pd.read_excel() avec cache.
+
+    Args:
+        file_path (str): Chemin du fichier Excel
+        sheet_name: Nom ou index de la feuille, ou None pour toutes les feuilles
+
+    Returns:
+        DataFrame (copie modifiable), ou dict {nom_feuille: DataFrame} si sheet_name est None
+    """
+    if pd is None:
+        raise ImportError("pandas n'est pas disponible")
+
+    signature = get_file_signature(file_path)
+    if signature is None:
+        raise FileNotFoundError(file_path)
+
+    # Toutes les feuilles sont lues en une fois : une seule décompression par fichier
+    key = (_normalize_path(file_path), "dataframes", None)
+    sheets = _get_entry(key, signature)
+    if sheets is None:
+        if os.path.basename(file_path).lower() in SIDECAR_FILES:
+            sheets = _read_sheets_with_sidecar(file_path)
+        else:
+            sheets = read_excel_file(file_path, sheet_name=None)
+        size = sum(int(df.memory_usage(deep=True).sum()) for df in sheets.values())
+        _store_entry(key, signature, sheets, size)
+
+    if sheet_name is None:
+        return {name: df.copy() for name, df in sheets.items()}
+    if isinstance(sheet_name, int):
+        sheet_name = list(sheets.keys())[sheet_name]
+    return sheets[sheet_name].copy()
+
+
+def get_sheet_names_cached(file_path):
+    """Retourne la liste des feuilles d'un classeur (équivalent de pd.ExcelFile().sheet_names)."""
+    return list(load_workbook_cached(file_path).sheetnames)
+
+
+def invalidate_excel_cache(file_path=None):
+    """Supprime du cache les entrées d'un fichier (ou tout le cache si file_path est None)."""
+    global _cache_bytes
+    with _lock:
+        if file_path is None:
+            _cache.clear()
+            _cache_bytes = 0
+            return
+        normalized = _normalize_path(file_path)
+        for key in [k for k in _cache if k[0] == normalized]:
+            _remove_key(key)
+
+
+def save_workbook(wb, file_path):
+    """Sauvegarde un classeur openpyxl et invalide le cache correspondant."""
+    try:
+        wb.save(file_path)
+    finally:
+        invalidate_excel_cache(file_path)
+
+
+def save_dataframe(df, file_path, **kwargs):
+    """Écrit un DataFrame dans un fichier Excel et invalide le cache correspondant."""
+    try:
+        df.to_excel(file_path, **kwargs)
+    finally:
+        invalidate_excel_cache(file_path)
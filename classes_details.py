@@ -5,6 +5,14 @@ try:
     from openpyxl import load_workbook
 except ImportError:
     load_workbook = None
+from stockage_semaine import (open_workbook, open_workbook_readonly, save_workbook, iter_workbook_rows,
+                              load_personnel_data, save_personnel_data, week_transaction,
+                              current_week_transaction)
+from ecriture_matrix import apply_matrix_cell_patches
+from schema_colonnes import MATRIX_SCHEMA, SCHOOL_SCHEMA, resolve_column_indexes
+from index_horaires import clean_horaire_name, find_horaire_sheet
+from index_classes import get_class_index
+from index_eleves import get_sheet_student_index
 
 def load_personnel_lists(week_folder):
     """
@@ -123,11 +131,22 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             if class_label_ref:
                 class_label_ref.configure(text=nouveau_nom)
 
-            # Mettre à jour le fichier Excel de l'école
-            update_school_excel_file_class_name(week_folder, school_name, horaire, ancien_nom, nouveau_nom)
+            # École, matrix et personnel.json dans une seule transaction (tout ou rien)
+            try:
+                with week_transaction(week_folder):
+                    # Mettre à jour le fichier Excel de l'école
+                    update_school_excel_file_class_name(week_folder, school_name, horaire, ancien_nom, nouveau_nom)
 
-            # Mettre à jour personnel.json
-            update_personnel_json_class_name(week_folder, ancien_nom, nouveau_nom)
+                    # Mettre à jour personnel.json
+                    update_personnel_json_class_name(week_folder, ancien_nom, nouveau_nom)
+            except Exception as e:
+                print(f"Erreur lors de l'enregistrement des modifications (aucun fichier modifié): {e}")
+                # Transaction annulée : revenir à l'ancien nom
+                classe_info['nom_classe'] = ancien_nom
+                if class_label_ref:
+                    class_label_ref.configure(text=ancien_nom)
+                messagebox.showerror("Erreur", f"Le nom de la classe n'a pas pu être modifié (aucun fichier modifié) :\n{e}")
+                return
 
             # Afficher un message de confirmation
             messagebox.showinfo("Modification réussie", f"Le nom de la classe a été changé de '{ancien_nom}' à '{nouveau_nom}' et personnel.json a été mis à jour.")
@@ -246,50 +265,22 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return "Non Spécifié"
 
         try:
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_normalized = clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
-
-            if not target_sheet:
+            # Chercher la feuille de l'horaire et la ligne de la classe (lecture seule, index mémorisés)
+            target_sheet = find_horaire_sheet(open_workbook_readonly(excel_path), horaire)
+            if target_sheet is None:
                 return "Non Spécifié"
-
-            # Chercher la ligne de la classe
-            classe_row = None
-            for row_idx in range(2, target_sheet.max_row + 1):
-                if str(target_sheet.cell(row=row_idx, column=1).value or '').strip() == classe_nom:
-                    classe_row = row_idx
-                    break
-
-            if not classe_row:
+            class_index = get_class_index(target_sheet)
+            classe_row = class_index.find_row(classe_nom)
+            if classe_row is None:
                 return "Non Spécifié"
 
-            # Chercher la colonne animateur
-            animateur_col = None
-            for col_idx in range(1, target_sheet.max_column + 1):
-                header_value = str(target_sheet.cell(row=1, column=col_idx).value or '').lower()
-                # Chercher spécifiquement "animateur", "anim", "Animateur" ou "Rôle" mais pas "intervenant" ou "prof"
-                if (('animateur' in header_value or 'anim' in header_value or 'Animateur' in header_value or 'rôle' in header_value or 'role' in header_value) and
-                    'intervenant' not in header_value and 'prof' not in header_value):
-                    animateur_col = col_idx
-                    break
+            # Colonne animateur ("Rôle", schéma partagé des feuilles d'écoles), colonne 4 par défaut
+            animateur_col = class_index.column("Rôle") or 4
 
-            # Si pas trouvé, utiliser la colonne 4 par défaut (comme dans update_school_excel_file_animateur)
-            if animateur_col is None:
-                animateur_col = 4
-
-            # Récupérer l'animateur de la classe
             animateur_value = str(target_sheet.cell(row=classe_row, column=animateur_col).value or '').strip()
             if animateur_value and animateur_value not in ['', 'nan', 'none', 'Non spécifié']:
                 return animateur_value
-            else:
-                return "Non Spécifié"
+            return "Non Spécifié"
 
         except Exception as e:
             print(f"Erreur lors de la récupération de l'animateur de la classe {classe_nom}: {e}")
@@ -321,57 +312,24 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return []
 
         try:
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_normalized = clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
-
-            if not target_sheet:
+            # Chercher la feuille de l'horaire et la ligne de la classe (lecture seule, index mémorisés)
+            target_sheet = find_horaire_sheet(open_workbook_readonly(excel_path), horaire)
+            if target_sheet is None:
                 return []
-
-            # Chercher la ligne de la classe
-            classe_row = None
-            for row_idx in range(2, target_sheet.max_row + 1):
-                if str(target_sheet.cell(row=row_idx, column=1).value or '').strip() == classe_nom:
-                    classe_row = row_idx
-                    break
-
-            if not classe_row:
+            class_index = get_class_index(target_sheet)
+            classe_row = class_index.find_row(classe_nom)
+            if classe_row is None:
                 return []
 
-            # Récupérer les élèves de cette classe
-            eleves_classe = []
-            eleves_col = None
-
-            # Trouver la colonne des élèves (priorité à "liste des élèves")
-            # 1ère priorité : colonne contenant "liste" ET "élèves"
-            for col_idx in range(1, target_sheet.max_column + 1):
-                cell_value = str(target_sheet.cell(row=1, column=col_idx).value or '').lower()
-                if 'liste' in cell_value and ('élèves' in cell_value or 'eleves' in cell_value):
-                    eleves_col = col_idx
-                    break
-
-            # 2ème priorité : colonne contenant juste "élèves" ou "eleves"
-            if eleves_col is None:
-                for col_idx in range(1, target_sheet.max_column + 1):
-                    cell_value = str(target_sheet.cell(row=1, column=col_idx).value or '').lower()
-                    if ('élèves' in cell_value or 'eleves' in cell_value) and 'liste' not in cell_value:
-                        eleves_col = col_idx
-                        break
+            # Trouver la colonne des élèves (schéma partagé des feuilles d'écoles)
+            eleves_col = class_index.column("Liste des élèves")
 
-            # Récupérer les élèves de la classe
-            if eleves_col:
+            eleves_classe = []
+            if eleves_col is not None:
                 eleves_value = str(target_sheet.cell(row=classe_row, column=eleves_col).value or '').strip()
                 if eleves_value and eleves_value not in ['', 'nan', 'none']:
                     # Diviser par virgule et nettoyer
                     eleves_classe = [nom.strip() for nom in eleves_value.split(',') if nom.strip()]
-
             return eleves_classe
 
         except Exception as e:
@@ -389,56 +347,38 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(matrix_path)
-            ws = wb.active
+            # Lecture depuis le cache : seules les cellules modifiées seront écrites
+            ws = open_workbook_readonly(matrix_path).active
+            patches = {}
 
-            # Identifier les colonnes importantes
-            stagiaire_col = None
-            classe_col = None
-
-            for col in range(1, ws.max_column + 1):
-                col_name = str(ws.cell(row=1, column=col).value or '').strip()
-                col_name_lower = col_name.lower()
-
-                if 'stagiaire' in col_name_lower or 'nom' in col_name_lower or 'élève' in col_name_lower or 'eleve' in col_name_lower:
-                    stagiaire_col = col
-                elif ('classe' in col_name_lower or 'class' in col_name_lower) and not any(exclure in col_name_lower for exclure in ['cours 1', 'cours 2', 'cours 3', 'cours 4', '.1', '.2', 'arrivée', 'départ']):
-                    classe_col = col
+            # Identifier les colonnes importantes (schéma partagé du matrix, indices à partir de 1)
+            headers = next(ws.iter_rows(max_row=1, values_only=True), ())
+            columns = resolve_column_indexes(headers, MATRIX_SCHEMA)
+            stagiaire_col = columns["Stagiaire"] + 1 if columns["Stagiaire"] is not None else None
+            classe_col = columns["Classe"] + 1 if columns["Classe"] is not None else None
 
             if not stagiaire_col or not classe_col:
                 print("ERREUR: Colonnes stagiaire ou classe non trouvées dans matrix.xlsx")
                 return
 
-            # Normaliser les noms d'élèves à mettre à jour
-            eleves_normalises = {eleve.lower().strip() for eleve in student_names}
-
-            # Parcourir toutes les lignes pour trouver les élèves à mettre à jour
-            updated_count = 0
-
-            for row_idx in range(2, ws.max_row + 1):
-                eleve_nom_brut = str(ws.cell(row=row_idx, column=stagiaire_col).value or '').strip()
-                eleve_nom_normalise = eleve_nom_brut.lower().strip()
-
-                # Chercher une correspondance
-                correspondance_trouvee = False
-                for eleve_cible in eleves_normalises:
-                    if eleve_cible in eleve_nom_normalise or eleve_nom_normalise in eleve_cible:
-                        correspondance_trouvee = True
-                        break
-
-                if correspondance_trouvee:
-                    # Mettre à jour le nom de la classe
-                    ws.cell(row=row_idx, column=classe_col, value=nouveau_nom_classe)
-                    updated_count += 1
+            # Lignes des élèves à mettre à jour (index des noms, recherche partielle pour les noms absents)
+            rows = get_sheet_student_index(ws, stagiaire_col).labels_matching(student_names)
+            for row_idx in rows:
+                # Mettre à jour le nom de la classe
+                patches[(row_idx, classe_col)] = nouveau_nom_classe
+            updated_count = len(rows)
 
-            # Sauvegarder le fichier matrix
-            wb.save(matrix_path)
+            # Écrire uniquement les cellules modifiées (une seule sauvegarde, mise en forme conservée)
+            apply_matrix_cell_patches(matrix_path, patches, ws.title)
 
             if updated_count > 0:
                 print(f"Mise à jour matrix.xlsx: {updated_count} élève(s) assigné(s) à la classe '{nouveau_nom_classe}'")
 
         except Exception as e:
             print(f"Erreur lors de la mise à jour de matrix.xlsx: {e}")
+            # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+            if current_week_transaction(matrix_path) is not None:
+                raise
 
     def update_school_excel_file_class_name(week_folder, school_name, horaire, ancien_nom, nouveau_nom):
         """Met à jour le nom d'une classe dans le fichier Excel de l'école."""
@@ -469,29 +409,23 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
         eleves_classe = get_students_from_class_excel(week_folder, school_name, horaire, ancien_nom)
 
         try:
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_normalized = clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
+            wb = open_workbook(excel_path)
+
+            # Chercher la feuille correspondant à l'horaire (index des feuilles du classeur)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if not target_sheet:
                 return
 
             # Chercher la ligne de l'ancienne classe et mettre à jour le nom
-            for row_idx in range(2, target_sheet.max_row + 1):
-                if str(target_sheet.cell(row=row_idx, column=1).value or '').strip() == ancien_nom:
-                    target_sheet.cell(row=row_idx, column=1, value=nouveau_nom)
-                    wb.save(excel_path)
-                    break
+            if get_class_index(target_sheet).rename_class(ancien_nom, nouveau_nom) is not None:
+                save_workbook(wb, excel_path)
 
         except Exception as e:
             print(f"Erreur lors de la mise à jour du nom de classe dans {excel_filename}: {e}")
+            # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+            if current_week_transaction(excel_path) is not None:
+                raise
 
         # Mettre à jour matrix.xlsx pour tous les élèves de cette classe
         if eleves_classe:
@@ -523,36 +457,23 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_normalized = clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
+            wb = open_workbook(excel_path)
+
+            # Chercher la feuille correspondant à l'horaire (index des feuilles du classeur)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if not target_sheet:
                 return
 
-            # Chercher la ligne de la classe et mettre à jour la colonne niveau
-            for row_idx in range(2, target_sheet.max_row + 1):
-                if str(target_sheet.cell(row=row_idx, column=1).value or '').strip() == classe_nom:
-                    # Chercher la colonne niveau par nom d'en-tête
-                    niveau_col = None
-                    for col_idx in range(1, target_sheet.max_column + 1):
-                        header_value = str(target_sheet.cell(row=1, column=col_idx).value or '').strip()
-                        if 'niveau' in header_value.lower() or 'level' in header_value.lower():
-                            niveau_col = col_idx
-                            break
+            # Chercher la ligne de la classe et la colonne niveau (index de la feuille)
+            class_index = get_class_index(target_sheet)
+            classe_row = class_index.find_row(classe_nom)
+            niveau_col = class_index.column("Niveau")
 
-                    # Si on trouve la colonne niveau, la mettre à jour
-                    if niveau_col:
-                        target_sheet.cell(row=row_idx, column=niveau_col, value=nouveau_niveau)
-                        wb.save(excel_path)
-                    break
+            # Si on trouve la classe et la colonne niveau, la mettre à jour
+            if classe_row is not None and niveau_col:
+                target_sheet.cell(row=classe_row, column=niveau_col, value=nouveau_niveau)
+                save_workbook(wb, excel_path)
 
         except Exception as e:
             print(f"Erreur lors de la mise à jour du niveau dans {excel_filename}: {e}")
@@ -583,31 +504,22 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_normalized = clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
+            wb = open_workbook(excel_path)
+
+            # Chercher la feuille correspondant à l'horaire (index des feuilles du classeur)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if not target_sheet:
                 return
 
-            # Chercher la ligne de la classe et mettre à jour la colonne intervenant (colonne 2 ou 3 selon le format)
-            for row_idx in range(2, target_sheet.max_row + 1):
-                if str(target_sheet.cell(row=row_idx, column=1).value or '').strip() == classe_nom:
-                    # Essayer de trouver la colonne intervenant (généralement colonne 2 ou 3)
-                    for col_idx in [2, 3]:
-                        header_value = str(target_sheet.cell(row=1, column=col_idx).value or '').lower()
-                        if ('intervenant' in header_value or 'prof' in header_value or 'animateur' in header_value or
-                            'Animateur' in header_value or 'rôle' in header_value or 'role' in header_value):
-                            target_sheet.cell(row=row_idx, column=col_idx, value=nouvel_intervenant)
-                            wb.save(excel_path)
-                            return
+            # Chercher la ligne de la classe et la colonne intervenant (index de la feuille)
+            class_index = get_class_index(target_sheet)
+            classe_row = class_index.find_row(classe_nom)
+            intervenant_col = class_index.column("Intervenant")
+
+            if classe_row is not None and intervenant_col:
+                target_sheet.cell(row=classe_row, column=intervenant_col, value=nouvel_intervenant)
+                save_workbook(wb, excel_path)
 
         except Exception as e:
             print(f"Erreur lors de la mise à jour de l'intervenant dans {excel_filename}: {e}")
@@ -638,39 +550,23 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_normalized = clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
+            wb = open_workbook(excel_path)
+
+            # Chercher la feuille correspondant à l'horaire (index des feuilles du classeur)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if not target_sheet:
                 return
 
-            # Chercher la ligne de la classe
-            classe_row = None
-            for row_idx in range(2, target_sheet.max_row + 1):
-                if str(target_sheet.cell(row=row_idx, column=1).value or '').strip() == classe_nom:
-                    classe_row = row_idx
-                    break
+            # Chercher la ligne de la classe (index de la feuille)
+            class_index = get_class_index(target_sheet)
+            classe_row = class_index.find_row(classe_nom)
 
             if not classe_row:
                 return
 
-            # Chercher la colonne animateur (différente de la colonne intervenant/professeur)
-            animateur_col = None
-            for col_idx in range(1, target_sheet.max_column + 1):
-                header_value = str(target_sheet.cell(row=1, column=col_idx).value or '').lower()
-                # Chercher spécifiquement "animateur", "anim", "Animateur" ou "Rôle" mais pas "intervenant" ou "prof"
-                if (('animateur' in header_value or 'anim' in header_value or 'Animateur' in header_value or 'rôle' in header_value or 'role' in header_value) and
-                    'intervenant' not in header_value and 'prof' not in header_value):
-                    animateur_col = col_idx
-                    break
+            # Colonne animateur ("Rôle", différente de la colonne intervenant/professeur)
+            animateur_col = class_index.column("Rôle")
 
             # Si pas trouvé, essayer de trouver une colonne vide ou créer une logique pour la colonne 4
             if animateur_col is None:
@@ -679,7 +575,7 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
 
             # Mettre à jour la colonne animateur
             target_sheet.cell(row=classe_row, column=animateur_col, value=nouvel_animateur)
-            wb.save(excel_path)
+            save_workbook(wb, excel_path)
             print(f"Animateur '{nouvel_animateur}' assigné à la classe '{classe_nom}' dans {excel_filename}")
 
         except Exception as e:
@@ -817,21 +713,15 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(matrix_path)
-            ws = wb.active
+            # Lecture depuis le cache : seules les cellules modifiées seront écrites
+            ws = open_workbook_readonly(matrix_path).active
+            patches = {}
 
-            # Identifier les colonnes importantes
-            stagiaire_col = None
-            prof_col = None
-
-            for col in range(1, ws.max_column + 1):
-                col_name = str(ws.cell(row=1, column=col).value or '').strip()
-                col_name_lower = col_name.lower()
-
-                if 'stagiaire' in col_name_lower or 'nom' in col_name_lower or 'élève' in col_name_lower or 'eleve' in col_name_lower:
-                    stagiaire_col = col
-                elif 'prof' in col_name_lower and not any(exclure in col_name_lower for exclure in ['cours 1', 'cours 2', 'arrivée', 'départ']):
-                    prof_col = col
+            # Identifier les colonnes importantes (schéma partagé du matrix, indices à partir de 1)
+            headers = next(ws.iter_rows(max_row=1, values_only=True), ())
+            columns = resolve_column_indexes(headers, MATRIX_SCHEMA)
+            stagiaire_col = columns["Stagiaire"] + 1 if columns["Stagiaire"] is not None else None
+            prof_col = columns["Prof"] + 1 if columns["Prof"] is not None else None
 
             if not stagiaire_col:
                 print("ERREUR: Aucune colonne stagiaire trouvée dans matrix.xlsx")
@@ -841,24 +731,15 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
                 print("ERREUR: Aucune colonne prof trouvée dans matrix.xlsx")
                 return
 
-            # Normaliser les noms d'élèves à mettre à jour
-            eleves_normalises = {eleve.lower().strip() for eleve in eleves_classe}
-
-            # Parcourir toutes les lignes pour trouver les élèves à mettre à jour
-            updated_count = 0
-
-            for row_idx in range(2, ws.max_row + 1):
-                eleve_nom_brut = str(ws.cell(row=row_idx, column=stagiaire_col).value or '').strip()
-                eleve_nom_normalise = eleve_nom_brut.lower().strip()
-
-                # Chercher une correspondance
-                if any(eleve_nom_normalise in eleve_cible or eleve_cible in eleve_nom_normalise for eleve_cible in eleves_normalises):
-                    # Mettre à jour le professeur
-                    ws.cell(row=row_idx, column=prof_col, value=nouveau_prof)
-                    updated_count += 1
+            # Lignes des élèves à mettre à jour (index des noms, recherche partielle pour les noms absents)
+            rows = get_sheet_student_index(ws, stagiaire_col).labels_matching(eleves_classe)
+            for row_idx in rows:
+                # Mettre à jour le professeur
+                patches[(row_idx, prof_col)] = nouveau_prof
+            updated_count = len(rows)
 
-            # Sauvegarder le fichier matrix
-            wb.save(matrix_path)
+            # Écrire uniquement les cellules modifiées (une seule sauvegarde, mise en forme conservée)
+            apply_matrix_cell_patches(matrix_path, patches, ws.title)
 
             if updated_count > 0:
                 print(f"Matrix.xlsx (semaine {week_num}) mis à jour: {updated_count} élève(s) de la classe '{classe_nom}' assigné(s) au prof '{nouveau_prof}'")
@@ -873,14 +754,10 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
         if not week_folder:
             return
 
-        personnel_path = os.path.join(week_folder, "personnel.json")
-
-        if not os.path.exists(personnel_path):
-            return
-
         try:
-            with open(personnel_path, 'r', encoding='utf-8') as f:
-                personnel_data = json.load(f)
+            personnel_data = load_personnel_data(week_folder)
+            if personnel_data is None:
+                return
 
             # Mettre à jour le nom de classe dans tous les professeurs
             for intervenant in personnel_data.get("professeurs", []):
@@ -897,11 +774,13 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
                         intervenant["classes"].append(nouveau_nom_classe)
 
             # Sauvegarder les modifications
-            with open(personnel_path, 'w', encoding='utf-8') as f:
-                json.dump(personnel_data, f, indent=4, ensure_ascii=False)
+            save_personnel_data(week_folder, personnel_data)
 
         except Exception as e:
             print(f"Erreur lors de la mise à jour du nom de classe dans personnel.json: {e}")
+            # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+            if current_week_transaction(os.path.join(week_folder, "personnel.json")) is not None:
+                raise
 
     def refresh_main_dashboard(week_folder):
         """Rafraîchit le dashboard des classes dans fenetre_principale.py avec un message de chargement."""
@@ -994,30 +873,6 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
 
         return loading_popup
 
-    def clean_horaire_name(sheet_name):
-        """Nettoie le nom de la feuille pour extraire le nom d'horaire de manière cohérente."""
-        # Cette fonction doit être identique à celle utilisée dans fenetre_principale.py et Assignation des Niveaux.py
-        sheet_lower = sheet_name.lower()
-        type_intervenant = "animateur" if "animateur" in sheet_lower else "professeur"
-
-        # Liste complète des mots à supprimer (avec variations)
-        words_to_remove = [
-            "animateur", "Animateur", "anim", "Anim",
-            "professeur", "Professeur", "prof", "Prof",
-            "Rôle", "rôle", "role", "Role"
-        ]
-
-        # Nettoyer le nom en supprimant tous les mots-clés d'intervenants
-        horaire = sheet_name
-        for word in words_to_remove:
-            horaire = horaire.replace(word, "")
-
-        # Nettoyer les espaces multiples et supprimer les espaces au début/fin
-        horaire = " ".join(horaire.split()).strip()
-
-        # Si le résultat est vide, utiliser le nom original
-        return horaire or sheet_name
-
     # === 1. HEADER (BLANC) ===
     header_bar = ctk.CTkFrame(detail_window, fg_color="white", height=80, corner_radius=0)
     header_bar.pack(fill="x", side="top", padx=0, pady=0)
@@ -1337,6 +1192,7 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
                     })
 
             # Supprimer les élèves sélectionnés (dans l'ordre inverse pour éviter les décalages d'indices)
+            eleves_avant = list(eleves)
             for idx in sorted(selected_students, reverse=True):
                 if idx < len(eleves):
                     eleves.pop(idx)
@@ -1350,12 +1206,24 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             # Mettre à jour l'affichage de la grille des élèves
             refresh_student_grid()
 
-            # Mettre à jour matrix.xlsx pour les élèves supprimés
-            if eleves_a_supprimer:
-                update_matrix_after_student_removal(week_folder, eleves_a_supprimer)
+            # Matrix et fichier de l'école dans une seule transaction (tout ou rien)
+            try:
+                with week_transaction(week_folder):
+                    # Mettre à jour matrix.xlsx pour les élèves supprimés
+                    if eleves_a_supprimer:
+                        update_matrix_after_student_removal(week_folder, eleves_a_supprimer)
 
-            # Mettre à jour le fichier Excel de l'école (supprimer la classe si elle devient vide)
-            update_school_excel_after_student_removal(week_folder, school_name, horaire, classe_info.get('nom_classe', ''), len(eleves))
+                    # Mettre à jour le fichier Excel de l'école (supprimer la classe si elle devient vide)
+                    update_school_excel_after_student_removal(week_folder, school_name, horaire, classe_info.get('nom_classe', ''), len(eleves))
+            except Exception as e:
+                print(f"Erreur lors de l'enregistrement des modifications (aucun fichier modifié): {e}")
+                # Transaction annulée : réafficher les élèves de la classe
+                eleves[:] = eleves_avant
+                classe_info['nb_eleves'] = len(eleves)
+                refresh_student_grid()
+                confirm_popup.destroy()
+                _show_message("error", "Erreur", f"Les élèves n'ont pas pu être supprimés (aucun fichier modifié) :\n{e}")
+                return
 
             # Rafraîchir le dashboard principal
             if refresh_callback:
@@ -1400,33 +1268,17 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_normalized = clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
+            wb = open_workbook(excel_path)
+
+            # Chercher la feuille correspondant à l'horaire (index des feuilles du classeur)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if not target_sheet:
                 return
 
             # Chercher si la classe existe déjà dans cette feuille
-            classe_row = None
-            classe_col = None
-
-            for row_idx in range(2, target_sheet.max_row + 1):
-                for col_idx in range(1, target_sheet.max_column + 1):
-                    cell_value = str(target_sheet.cell(row=row_idx, column=col_idx).value or '').strip()
-                    if cell_value == new_class_name:
-                        classe_row = row_idx
-                        classe_col = col_idx
-                        break
-                if classe_row:
-                    break
+            class_index = get_class_index(target_sheet)
+            classe_row = class_index.find_row(new_class_name)
 
             # Chercher la colonne des élèves
             eleves_col = None
@@ -1469,8 +1321,8 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
                         break
 
                 if new_row:
-                    # Ajouter la nouvelle classe
-                    target_sheet.cell(row=new_row, column=1, value=new_class_name)  # Colonne 1 pour le nom de classe
+                    # Ajouter la nouvelle classe (colonne 1 pour le nom de classe)
+                    class_index.set_class(new_row, new_class_name)
 
                     # Ajouter les élèves
                     eleves_noms = [eleve['nom'] for eleve in eleves_list if eleve['nom']]
@@ -1478,7 +1330,7 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
                     target_sheet.cell(row=new_row, column=eleves_col, value=eleves_text)
 
             # Sauvegarder le fichier
-            wb.save(excel_path)
+            save_workbook(wb, excel_path)
             print(f"Classe '{new_class_name}' créée/mise à jour dans {excel_filename}")
 
         except Exception as e:
@@ -1497,8 +1349,9 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(matrix_path)
-            ws = wb.active
+            # Lecture depuis le cache : seules les cellules modifiées seront écrites
+            ws = open_workbook_readonly(matrix_path).active
+            patches = {}
 
             # Identifier les colonnes importantes
             stagiaire_col = None
@@ -1546,22 +1399,25 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
                 if eleve_info:
                     # Mettre à jour l'école, l'horaire et la classe pour cet élève
                     for col in ecoles_cols:
-                        ws.cell(row=row_idx, column=col, value=school_name)
+                        patches[(row_idx, col)] = school_name
                     for col in horaires_cols:
-                        ws.cell(row=row_idx, column=col, value=horaire)
+                        patches[(row_idx, col)] = horaire
                     for col in classes_cols:
-                        ws.cell(row=row_idx, column=col, value=new_class_name)
+                        patches[(row_idx, col)] = new_class_name
 
                     updated_count += 1
 
-            # Sauvegarder le fichier matrix
-            wb.save(matrix_path)
+            # Écrire uniquement les cellules modifiées (une seule sauvegarde, mise en forme conservée)
+            apply_matrix_cell_patches(matrix_path, patches, ws.title)
 
             if updated_count > 0:
                 print(f"Matrix.xlsx mis à jour: {updated_count} élève(s) assigné(s) à la classe '{new_class_name}'")
 
         except Exception as e:
             print(f"Erreur lors de la mise à jour de matrix.xlsx: {e}")
+            # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+            if current_week_transaction(matrix_path) is not None:
+                raise
 
     def _show_message(msg_type, title, message):
         """Affiche un message d'information, d'avertissement ou d'erreur."""
@@ -1704,11 +1560,6 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
 
     def _analyze_school_classes_for_students(week_folder):
         """Analyse les fichiers Excel d'écoles pour les élèves."""
-        try:
-            import pandas as pd
-        except ImportError:
-            return {}
-
         result = {
             'ecole_a': [],
             'ecole_b': [],
@@ -1736,41 +1587,22 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
                 return
 
             try:
-                # Lire toutes les feuilles du fichier
-                xl_file = pd.ExcelFile(excel_path)
-                sheet_names = xl_file.sheet_names
-
-                for sheet_name in sheet_names:
+                # Lecture seule ligne par ligne (tuples de valeurs, cache partagé : une seule lecture tant que le fichier ne change pas)
+                for sheet_name, headers, rows in iter_workbook_rows(excel_path):
                     try:
-                        df = pd.read_excel(excel_path, sheet_name=sheet_name)
-
-                        if df.empty:
-                            # La feuille est vide mais on garde l'horaire
-                            horaire = clean_horaire_name(sheet_name)
-                            result[school_key].append({
-                                'horaire': horaire or sheet_name,
-                                'classes': []
-                            })
-                            continue
-
-                        # Analyser et nettoyer le nom de la feuille
+                        # Analyser et nettoyer le nom de la feuille (feuille vide : l'horaire est quand même gardé)
                         horaire = clean_horaire_name(sheet_name)
 
-                        # Chercher les colonnes de classes
-                        classe_cols = []
-                        for col in df.columns:
-                            col_lower = str(col).lower()
-                            if any(keyword in col_lower for keyword in ['classe', 'groupe', 'section']):
-                                classe_cols.append(col)
+                        # Colonne des classes (schéma partagé des feuilles d'écoles)
+                        classe_col = resolve_column_indexes(headers, SCHOOL_SCHEMA)["Classe"]
 
                         classes_info = []
-                        for _, row in df.iterrows():
+                        for row in rows:
                             classe_nom = None
-                            for col in classe_cols:
-                                val = str(row.get(col, '')).strip()
+                            if classe_col is not None and classe_col < len(row) and row[classe_col] is not None:
+                                val = str(row[classe_col]).strip()
                                 if val and val.lower() not in ['', 'nan', 'none']:
                                     classe_nom = val
-                                    break
 
                             if classe_nom:
                                 classes_info.append({
@@ -1993,6 +1825,7 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
         ancienne_classe_nom = classe_info['nom_classe']  # classe_info de la fonction parente = ancienne classe
 
         # Supprimer les élèves de l'ancienne classe
+        eleves_avant = list(eleves)
         for idx in sorted(selected_students, reverse=True):
             if idx < len(eleves):
                 eleves.pop(idx)
@@ -2000,15 +1833,28 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
         # Mettre à jour le nombre d'élèves dans l'ancienne classe (variable de la fonction parente)
         classe_info['nb_eleves'] = len(eleves)  # classe_info de la fonction parente
 
-        # Retirer les élèves de l'ancienne classe dans le fichier Excel de l'école
-        # Utilise school_name et horaire de la fonction parente (ancienne classe)
-        _remove_students_from_old_class(week_folder, school_name, horaire, ancienne_classe_nom, eleves_a_assigner)
+        # Écoles et matrix dans une seule transaction : chaque fichier est chargé et
+        # sauvegardé une seule fois, et tous les fichiers sont écrits ou aucun
+        try:
+            with week_transaction(week_folder):
+                # Retirer les élèves de l'ancienne classe dans le fichier Excel de l'école
+                # Utilise school_name et horaire de la fonction parente (ancienne classe)
+                _remove_students_from_old_class(week_folder, school_name, horaire, ancienne_classe_nom, eleves_a_assigner)
 
-        # Ajouter les élèves à la nouvelle classe dans le fichier Excel de l'école
-        _add_students_to_existing_class(week_folder, new_school_name, new_horaire, new_classe_nom, eleves_a_assigner)
+                # Ajouter les élèves à la nouvelle classe dans le fichier Excel de l'école
+                _add_students_to_existing_class(week_folder, new_school_name, new_horaire, new_classe_nom, eleves_a_assigner)
 
-        # Mettre à jour matrix.xlsx pour assigner ces élèves à la nouvelle classe
-        _update_matrix_for_students_assignment(week_folder, eleves_a_assigner, new_school_name, new_horaire, new_classe_nom)
+                # Mettre à jour matrix.xlsx pour assigner ces élèves à la nouvelle classe
+                _update_matrix_for_students_assignment(week_folder, eleves_a_assigner, new_school_name, new_horaire, new_classe_nom)
+        except Exception as e:
+            print(f"Erreur lors de l'enregistrement des modifications (aucun fichier modifié): {e}")
+            # Transaction annulée : les élèves restent dans l'ancienne classe
+            eleves[:] = eleves_avant
+            classe_info['nb_eleves'] = len(eleves)
+            selected_students.clear()
+            refresh_student_grid()
+            _show_message("error", "Erreur", f"Les élèves n'ont pas pu être assignés (aucun fichier modifié) :\n{e}")
+            return
 
         # Vider la sélection
         selected_students.clear()
@@ -2050,33 +1896,17 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_normalized = clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
+            wb = open_workbook(excel_path)
+
+            # Chercher la feuille correspondant à l'horaire (index des feuilles du classeur)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if not target_sheet:
                 return
 
             # Chercher la ligne de la classe
-            classe_row = None
-            classe_col = None
-
-            for row_idx in range(2, target_sheet.max_row + 1):
-                for col_idx in range(1, target_sheet.max_column + 1):
-                    cell_value = str(target_sheet.cell(row=row_idx, column=col_idx).value or '').strip()
-                    if cell_value == classe_nom:
-                        classe_row = row_idx
-                        classe_col = col_idx
-                        break
-                if classe_row:
-                    break
+            class_index = get_class_index(target_sheet)
+            classe_row = class_index.find_row(classe_nom)
 
             if not classe_row:
                 return
@@ -2122,10 +1952,13 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
                 target_sheet.cell(row=classe_row, column=eleves_col, value='')
 
             # Sauvegarder le fichier
-            wb.save(excel_path)
+            save_workbook(wb, excel_path)
 
         except Exception as e:
             print(f"Erreur lors du retrait d'élèves de la classe dans {excel_filename}: {e}")
+            # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+            if current_week_transaction(excel_path) is not None:
+                raise
 
     def _add_students_to_existing_class(week_folder, school_name, horaire, classe_nom, eleves_list):
         """Ajoute des élèves à une classe existante dans le fichier Excel de l'école."""
@@ -2153,33 +1986,17 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_normalized = clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
+            wb = open_workbook(excel_path)
+
+            # Chercher la feuille correspondant à l'horaire (index des feuilles du classeur)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if not target_sheet:
                 return
 
             # Chercher la ligne de la classe
-            classe_row = None
-            classe_col = None
-
-            for row_idx in range(2, target_sheet.max_row + 1):
-                for col_idx in range(1, target_sheet.max_column + 1):
-                    cell_value = str(target_sheet.cell(row=row_idx, column=col_idx).value or '').strip()
-                    if cell_value == classe_nom:
-                        classe_row = row_idx
-                        classe_col = col_idx
-                        break
-                if classe_row:
-                    break
+            class_index = get_class_index(target_sheet)
+            classe_row = class_index.find_row(classe_nom)
 
             if not classe_row:
                 return
@@ -2219,11 +2036,14 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             target_sheet.cell(row=classe_row, column=eleves_col, value=updated_eleves_text)
 
             # Sauvegarder le fichier
-            wb.save(excel_path)
+            save_workbook(wb, excel_path)
             print(f"Élèves ajoutés à la classe '{classe_nom}' dans {excel_filename}")
 
         except Exception as e:
             print(f"Erreur lors de l'ajout d'élèves à la classe dans {excel_filename}: {e}")
+            # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+            if current_week_transaction(excel_path) is not None:
+                raise
 
     def _update_matrix_for_students_assignment(week_folder, eleves_list, school_name, horaire, classe_nom):
         """Met à jour matrix.xlsx pour assigner les élèves à une nouvelle classe."""
@@ -2236,8 +2056,9 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(matrix_path)
-            ws = wb.active
+            # Lecture depuis le cache : seules les cellules modifiées seront écrites
+            ws = open_workbook_readonly(matrix_path).active
+            patches = {}
 
             # Identifier les colonnes importantes
             stagiaire_col = None
@@ -2285,22 +2106,25 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
                 if eleve_info:
                     # Mettre à jour l'école, l'horaire et la classe pour cet élève
                     for col in ecoles_cols:
-                        ws.cell(row=row_idx, column=col, value=school_name)
+                        patches[(row_idx, col)] = school_name
                     for col in horaires_cols:
-                        ws.cell(row=row_idx, column=col, value=horaire)
+                        patches[(row_idx, col)] = horaire
                     for col in classes_cols:
-                        ws.cell(row=row_idx, column=col, value=classe_nom)
+                        patches[(row_idx, col)] = classe_nom
 
                     updated_count += 1
 
-            # Sauvegarder le fichier matrix
-            wb.save(matrix_path)
+            # Écrire uniquement les cellules modifiées (une seule sauvegarde, mise en forme conservée)
+            apply_matrix_cell_patches(matrix_path, patches, ws.title)
 
             if updated_count > 0:
                 print(f"Matrix.xlsx mis à jour: {updated_count} élève(s) assigné(s) à la classe '{classe_nom}'")
 
         except Exception as e:
             print(f"Erreur lors de la mise à jour de matrix.xlsx: {e}")
+            # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+            if current_week_transaction(matrix_path) is not None:
+                raise
 
     def assign_students_to_new_class():
         """Assigne les élèves sélectionnés à une classe existante via un menu d'assignation."""
@@ -2420,8 +2244,9 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(matrix_path)
-            ws = wb.active
+            # Lecture depuis le cache : seules les cellules modifiées seront écrites
+            ws = open_workbook_readonly(matrix_path).active
+            patches = {}
 
             # Identifier les colonnes importantes
             stagiaire_col = None
@@ -2463,20 +2288,21 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
                     for col in colonnes_assignation:
                         old_value = ws.cell(row=row_idx, column=col).value
                         if old_value is not None:
-                            # Utiliser la syntaxe correcte pour modifier la cellule
-                            cell = ws.cell(row=row_idx, column=col)
-                            cell.value = None
+                            patches[(row_idx, col)] = None
 
                     updated_count += 1
 
-            # Sauvegarder le fichier matrix
-            wb.save(matrix_path)
+            # Écrire uniquement les cellules modifiées (une seule sauvegarde, mise en forme conservée)
+            apply_matrix_cell_patches(matrix_path, patches, ws.title)
 
             if updated_count > 0:
                 print(f"Matrix.xlsx mis à jour: {updated_count} élève(s) désassigné(s)")
 
         except Exception as e:
             print(f"ERREUR lors de la mise à jour du matrix: {e}")
+            # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+            if current_week_transaction(matrix_path) is not None:
+                raise
 
     def update_school_excel_after_student_removal(week_folder, school_name, horaire, classe_nom, nouveaux_nb_eleves):
         """
@@ -2507,33 +2333,17 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
             return
 
         try:
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_normalized = clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
+            wb = open_workbook(excel_path)
+
+            # Chercher la feuille correspondant à l'horaire (index des feuilles du classeur)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if not target_sheet:
                 return
 
             # Chercher la ligne de la classe
-            classe_row = None
-            classe_col = None
-
-            for row_idx in range(2, target_sheet.max_row + 1):
-                for col_idx in range(1, target_sheet.max_column + 1):
-                    cell_value = str(target_sheet.cell(row=row_idx, column=col_idx).value or '').strip()
-                    if cell_value == classe_nom:
-                        classe_row = row_idx
-                        classe_col = col_idx
-                        break
-                if classe_row:
-                    break
+            class_index = get_class_index(target_sheet)
+            classe_row = class_index.find_row(classe_nom)
 
             if not classe_row:
                 return
@@ -2569,12 +2379,15 @@ def open_classe_details(classe_info, horaire, intervenant, type_intervenant, sch
                 target_sheet.cell(row=classe_row, column=eleves_col, value='')
 
             # Sauvegarder le fichier
-            wb.save(excel_path)
+            save_workbook(wb, excel_path)
 
             print(f"Fichier {excel_filename} mis à jour: classe '{classe_nom}' contient maintenant {nouveaux_nb_eleves} élève(s)")
 
         except Exception as e:
             print(f"ERREUR lors de la mise à jour de {excel_filename}: {e}")
+            # Dans une transaction, l'erreur doit annuler l'écriture de tous les fichiers
+            if current_week_transaction(excel_path) is not None:
+                raise
 
     # === 3. FOOTER (EXTÉRIEUR DE LA FRAME GRISE) ===
     # Directement sur le fond blanc de detail_window
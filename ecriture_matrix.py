@@ -0,0 +1,214 @@
+"""
+Écriture cellule par cellule du fichier matrix.xlsx.
+
+Au lieu de réécrire tout le fichier avec df.to_excel() (ce qui détruit la mise en
+forme, les largeurs de colonnes et les autres feuilles), on applique uniquement
+les cellules modifiées au classeur existant, en une seule sauvegarde.
+"""
+import os
+import threading
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+from cache_excel import get_file_signature
+from stockage_semaine import (open_workbook, save_workbook, write_matrix_dataframe, get_week_generation,
+                              current_week_transaction)
+
+
+def _to_excel_value(value):
+    """Convertit une valeur pandas/numpy en valeur acceptée par openpyxl."""
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        return value
+    if hasattr(value, "to_pydatetime"):
+        return value.to_pydatetime()
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        return value.item()
+    return value
+
+
+def _header_matches(header, column):
+    """Vérifie qu'un en-tête Excel correspond à la colonne lue par pandas."""
+    if header is None:
+        return str(column).startswith("Unnamed:")
+    text = str(header)
+    column = str(column)
+    # pandas renomme les doublons en "Nom.1", "Nom.2"...
+    return column == text or (column.startswith(text + ".") and column[len(text) + 1:].isdigit())
+
+
+def apply_matrix_cell_patches(matrix_path, patches, sheet_name=None):
+    """
+    Applique des modifications de cellules au fichier matrix en une seule sauvegarde.
+
+    Args:
+        matrix_path (str): Chemin du fichier matrix.xlsx
+        patches (dict): {(ligne, colonne): valeur}, indices commençant à 1
+        sheet_name (str): Feuille à modifier (feuille active par défaut)
+
+    Returns:
+        int: Nombre de cellules écrites (0 = fichier non réécrit)
+    """
+    if not patches:
+        return 0
+
+    wb = open_workbook(matrix_path)
+    ws = wb[sheet_name] if sheet_name and sheet_name in wb.sheetnames else wb.active
+    for (row_idx, col_idx), value in patches.items():
+        ws.cell(row=row_idx, column=col_idx, value=_to_excel_value(value))
+    save_workbook(wb, matrix_path)
+    return len(patches)
+
+
+def diff_matrix_dataframes(old_df, new_df):
+    """
+    Calcule les opérations permettant de passer de old_df (contenu du fichier) à new_df.
+
+    Les lignes sont identifiées par leur étiquette d'index : la ligne Excel d'une
+    étiquette est sa position dans old_df + 2 (ligne 1 = en-têtes).
+
+    Returns:
+        (patches, deleted_rows, appended_rows) ou None si une réécriture complète est nécessaire.
+        patches : {(position, position_colonne): valeur}, positions commençant à 0
+        deleted_rows : positions (dans old_df) des lignes supprimées
+        appended_rows : listes de valeurs des nouvelles lignes, dans l'ordre
+    """
+    if list(old_df.columns) != list(new_df.columns):
+        return None
+    if not old_df.index.is_unique or not new_df.index.is_unique:
+        return None
+
+    old_positions = {label: pos for pos, label in enumerate(old_df.index)}
+    kept_labels = [label for label in new_df.index if label in old_positions]
+    added_labels = [label for label in new_df.index if label not in old_positions]
+
+    # Les lignes conservées doivent garder leur ordre et les nouvelles être en fin de tableau
+    kept_old_positions = [old_positions[label] for label in kept_labels]
+    if kept_old_positions != sorted(kept_old_positions):
+        return None
+    if added_labels and list(new_df.index[len(kept_labels):]) != added_labels:
+        return None
+
+    kept = set(kept_labels)
+    deleted_rows = [pos for label, pos in old_positions.items() if label not in kept]
+
+    patches = {}
+    if kept_labels:
+        old_values = old_df.loc[kept_labels].to_numpy(dtype=object)
+        new_values = new_df.loc[kept_labels].to_numpy(dtype=object)
+        same = (old_values == new_values) | (pd.isna(old_values) & pd.isna(new_values))
+        for row_pos, col_pos in zip(*(~same).nonzero()):
+            patches[(kept_old_positions[row_pos], int(col_pos))] = new_values[row_pos, col_pos]
+
+    appended_rows = new_df.loc[added_labels].to_numpy(dtype=object).tolist() if added_labels else []
+    return patches, deleted_rows, appended_rows
+
+
+class MatrixPatchWriter:
+    """
+    Écrit le DataFrame de matrix en ne modifiant que les cellules qui ont changé.
+
+    Garde en mémoire la dernière version écrite (ou lue) du fichier pour calculer
+    les différences. Si la structure n'est pas compatible (colonnes différentes,
+    fichier modifié par ailleurs...), une réécriture complète est faite.
+    """
+
+    def __init__(self, matrix_path, df=None):
+        self.matrix_path = matrix_path
+        self._lock = threading.Lock()
+        self._baseline = None
+        self._signature = None
+        if df is not None:
+            self.reset(df)
+
+    def reset(self, df):
+        """Mémorise le contenu actuel du fichier (après chargement ou rechargement)."""
+        with self._lock:
+            self._baseline = df.copy()
+            self._signature = get_file_signature(self.matrix_path)
+
+    def write(self, df):
+        """Écrit df dans le fichier matrix. Retourne le nombre de cellules écrites (-1 = réécriture complète)."""
+        with self._lock:
+            written = self._write_locked(df)
+            self._baseline = df.copy()
+
+            transaction = current_week_transaction(self.matrix_path)
+            if transaction is None:
+                self._signature = get_file_signature(self.matrix_path)
+            else:
+                # Le fichier ne sera écrit qu'au commit de la transaction
+                transaction.on_commit(self._record_signature)
+                transaction.on_rollback(self._forget_baseline)
+            return written
+
+    def _record_signature(self):
+        with self._lock:
+            self._signature = get_file_signature(self.matrix_path)
+
+    def _forget_baseline(self):
+        """Transaction annulée : la prochaine écriture sera complète."""
+        with self._lock:
+            self._baseline = None
+
+    def _write_locked(self, df):
+        week_folder = os.path.dirname(os.path.abspath(self.matrix_path))
+        operations = None
+        # Base SQLite : elle fait foi, la mise en forme est conservée à l'export
+        if self._baseline is not None and get_week_generation(week_folder) is None:
+            if get_file_signature(self.matrix_path) == self._signature:
+                operations = diff_matrix_dataframes(self._baseline, df)
+
+        if operations is None:
+            write_matrix_dataframe(df, self.matrix_path, index=False)
+            return -1
+
+        patches, deleted_rows, appended_rows = operations
+        if not patches and not deleted_rows and not appended_rows:
+            return 0
+
+        wb = open_workbook(self.matrix_path)
+        ws = wb.worksheets[0]  # Feuille lue par pd.read_excel()
+
+        # Vérifier que les en-têtes correspondent toujours aux colonnes du DataFrame
+        columns = list(df.columns)
+        missing_columns = []
+        for col_pos, column in enumerate(columns):
+            header = ws.cell(row=1, column=col_pos + 1).value
+            if header is None and not str(column).startswith("Unnamed:"):
+                # Colonne ajoutée au chargement (ex : 'Niveau') : l'écrire entièrement
+                missing_columns.append(col_pos)
+            elif not _header_matches(header, column):
+                write_matrix_dataframe(df, self.matrix_path, index=False)
+                return -1
+
+        for col_pos in missing_columns:
+            ws.cell(row=1, column=col_pos + 1, value=str(columns[col_pos]))
+            values = self._baseline[columns[col_pos]].tolist()
+            for row_pos, value in enumerate(values):
+                if (row_pos, col_pos) not in patches and _to_excel_value(value) is not None:
+                    patches[(row_pos, col_pos)] = value
+
+        # 1) Cellules modifiées (positions d'origine)
+        for (row_pos, col_pos), value in patches.items():
+            ws.cell(row=row_pos + 2, column=col_pos + 1, value=_to_excel_value(value))
+
+        # 2) Lignes supprimées (de bas en haut pour garder les positions valides)
+        for row_pos in sorted(deleted_rows, reverse=True):
+            ws.delete_rows(row_pos + 2)
+
+        # 3) Nouvelles lignes, juste après la dernière ligne de données
+        first_new_row = len(self._baseline) - len(deleted_rows) + 2
+        for offset, values in enumerate(appended_rows):
+            for col_pos, value in enumerate(values):
+                ws.cell(row=first_new_row + offset, column=col_pos + 1, value=_to_excel_value(value))
+
+        save_workbook(wb, self.matrix_path)
+        return len(patches) + len(deleted_rows) + sum(len(values) for values in appended_rows)
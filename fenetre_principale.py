@@ -18,9 +18,23 @@ except ImportError:
     pd = None
 import json
 import math
+import re
 from classes_details import open_classe_details
 from ajouter_classes import open_add_class_dialog
 from fenetre_prof import PersonnelManager
+from cache_excel import invalidate_excel_cache
+from stockage_semaine import (open_workbook, save_workbook, read_excel_sheets,
+                              iter_workbook_rows, reload_from_excel, get_week_generation,
+                              export_week_to_excel, recover_week_transaction)
+from schema_colonnes import MATRIX_SCHEMA, SCHOOL_SCHEMA, resolve_columns, resolve_column_indexes
+from index_horaires import clean_horaire_name, find_horaire_sheet
+from index_classes import get_class_index
+from statistiques_matrix import compute_matrix_assignments, empty_matrix_assignments
+from recherche_differee import DebouncedSearch
+from index_recherche import NgramIndex
+from tableau_de_bord import ClassesDashboard
+from taches_fond import BackgroundPipeline
+from synchro_ecoles import SchoolFileSync
 
 # Variables globales pour les compteurs du header
 total_counter_label = None
@@ -30,6 +44,9 @@ without_level_counter_label = None
 # Variable globale pour mémoriser la position de scroll du dashboard par semaine
 dashboard_scroll_positions = {}  # {week_number: scroll_position}
 
+# Synchronisation matrix → fichiers des écoles (mémorise ce qui est déjà à jour)
+school_files_sync = SchoolFileSync()
+
 # Système de sauvegarde des préférences utilisateur
 PREFERENCES_FILE = os.path.join(os.path.dirname(__file__), "user_preferences.json")
 
@@ -123,24 +140,13 @@ def show_students_without_assignment(assignment_type):
         return
 
     try:
-        df = pd.read_excel(matrix_path)
-
-        # Trouver les colonnes nécessaires
-        stagiaire_col = None
-        niveau_col = None
-        classe_col = None
+        df = read_excel_sheets(matrix_path)
 
-        for col in df.columns:
-            col_lower = str(col).lower()
-            if 'stagiaire' in col_lower or 'nom' in col_lower or 'élève' in col_lower or 'eleve' in col_lower:
-                if not stagiaire_col:
-                    stagiaire_col = col
-            elif ('niveau' in col_lower or 'level' in col_lower) and not any(char.isdigit() for char in col):
-                if not niveau_col:
-                    niveau_col = col
-            elif 'classe' in col_lower or 'class' in col_lower or 'groupe' in col_lower:
-                if not classe_col:
-                    classe_col = col
+        # Trouver les colonnes nécessaires (schéma partagé du matrix)
+        columns = resolve_columns(df.columns, MATRIX_SCHEMA)
+        stagiaire_col = columns["Stagiaire"]
+        niveau_col = columns["Niveau"]
+        classe_col = columns["Classe"]
 
         if not stagiaire_col:
             import tkinter.messagebox as messagebox
@@ -239,35 +245,38 @@ def show_students_without_assignment(assignment_type):
 
         # Variables pour les éléments dynamiques
         student_labels = []
+        # Index de recherche (sans distinction d'accents ni de casse), construit une fois
+        student_search_index = NgramIndex.from_items(range(len(students_without_assignment)),
+                                                     students_without_assignment)
+
+        def add_student_label(student):
+            # Créer les labels simples comme dans l'ancien code
+            student_label = ctk.CTkLabel(
+                scrollable_frame,
+                text=f"{student}",
+                font=("Segoe UI", 12),
+                text_color="#1E293B",
+                anchor="w"
+            )
+            student_label.pack(fill="x", padx=15, pady=3)
+            student_labels.append(student_label)
 
-        def update_student_list(*args):
+        def update_student_list(request):
             # Effacer les anciens labels
             for label in student_labels:
                 label.destroy()
             student_labels.clear()
 
-            # Filtrer les élèves selon la recherche
-            search_text = search_var.get().lower().strip()
-            filtered_students = [
-                student for student in students_without_assignment
-                if search_text in student.lower()
-            ]
-
-            # Créer les labels simples comme dans l'ancien code
-            for student in filtered_students:
-                student_label = ctk.CTkLabel(
-                    scrollable_frame,
-                    text=f"{student}",
-                    font=("Segoe UI", 12),
-                    text_color="#1E293B",
-                    anchor="w"
-                )
-                student_label.pack(fill="x", padx=15, pady=3)
-                student_labels.append(student_label)
+            # Filtrer les élèves selon la recherche (index de n-grammes, ordre alphabétique conservé)
+            positions = sorted(student_search_index.search(request.term))
+            filtered_students = [students_without_assignment[position] for position in positions]
 
             # Mettre à jour le compteur dans le header
             counter_label.configure(text=f"{len(filtered_students)} élève(s) trouvé(s)")
 
+            # Labels créés par morceaux, interrompus si une nouvelle saisie arrive
+            student_search.run_in_chunks(request, filtered_students, add_student_label)
+
         # === FOOTER (comme dans classes_details.py) ===
         footer_area = ctk.CTkFrame(popup, fg_color="white", height=70)
         footer_area.pack(fill="x", side="bottom")
@@ -287,11 +296,11 @@ def show_students_without_assignment(assignment_type):
         )
         close_button.pack(side="right", padx=30)
 
-        # Lier la fonction de mise à jour à la variable de recherche
-        search_var.trace_add("write", update_student_list)
+        # Lier la fonction de mise à jour à la variable de recherche (frappes regroupées)
+        student_search = DebouncedSearch(popup, search_var, update_student_list)
 
         # Afficher initialement tous les élèves
-        update_student_list()
+        student_search.flush()
 
         # Focus sur le champ de recherche
         search_entry.focus()
@@ -386,95 +395,92 @@ def restore_dashboard_scroll_position(scrollable_frame, week_number=None):
         pass  # Erreur silencieuse lors de la restauration
 
 
-def get_students_info_from_matrix(matrix_path, student_names):
+def build_students_lookup_from_matrix(matrix_path):
     """
-    Récupère les informations complètes des élèves depuis matrix.xlsx
+    Construit la table de correspondance des élèves d'une semaine en une seule lecture de matrix.xlsx
 
     Args:
         matrix_path (str): Chemin vers matrix.xlsx
-        student_names (list): Liste des noms d'élèves à rechercher
 
     Returns:
-        dict: {nom_eleve: {'niveau': str, 'age': str, 'ci': bool}}
+        dict: {nom_normalise: {'niveau': str, 'age': str, 'ci': bool}}
     """
-    if pd is None or not os.path.exists(matrix_path) or not student_names:
-        # Retourner des valeurs par défaut
-        return {name: {'niveau': '', 'age': 'N/A', 'ci': False} for name in student_names}
+    if pd is None or not os.path.exists(matrix_path):
+        return {}
 
     try:
-        df = pd.read_excel(matrix_path)
+        df = read_excel_sheets(matrix_path)
 
-        # Normaliser les noms d'élèves pour la recherche
-        student_names_normalized = {name.lower().strip(): name for name in student_names}
+        # Trouver les colonnes nécessaires (schéma partagé du matrix)
+        columns = resolve_columns(df.columns, MATRIX_SCHEMA)
+        stagiaire_col = columns["Stagiaire"]
+        niveau_col = columns["Niveau"]
+        age_col = columns["Âge"]
+        ci_col = columns["Cours 2"]
 
-        # Trouver les colonnes nécessaires
-        stagiaire_col = None
-        niveau_col = None
-        age_col = None
-        ci_col = None
+        if not stagiaire_col:
+            return {}
+
+        # Extraire les colonnes une seule fois (bien plus rapide que iterrows)
+        noms = [str(val).strip().lower() for val in df[stagiaire_col].tolist()]
+        niveaux = [str(val).strip() for val in df[niveau_col].tolist()] if niveau_col else [''] * len(df)
+        ages = [str(val).strip() for val in df[age_col].tolist()] if age_col else ['N/A'] * len(df)
+        ci_values = [str(val).strip().lower() for val in df[ci_col].tolist()] if ci_col else [''] * len(df)
+
+        ci_keywords = ['oui', 'yes', 'true', '1', 'ci', 'intensif', 'cours intensif']
+
+        # En cas de doublon, la dernière ligne l'emporte (comme l'ancien parcours ligne par ligne)
+        students_lookup = {}
+        for nom, niveau, age, ci_val in zip(noms, niveaux, ages, ci_values):
+            students_lookup[nom] = {
+                'niveau': niveau,
+                'age': age,
+                'ci': any(keyword in ci_val for keyword in ci_keywords)
+            }
 
-        
+        return students_lookup
 
-        for col in df.columns:
-            col_lower = str(col).lower()
-            if 'stagiaire' in col_lower or 'nom' in col_lower or 'élève' in col_lower or 'eleve' in col_lower:
-                if not stagiaire_col:
-                    stagiaire_col = col
-            elif ('niveau' in col_lower or 'level' in col_lower) and not any(char.isdigit() for char in col):
-                if not niveau_col:
-                    niveau_col = col
-            elif 'age' in col_lower or 'âge' in col_lower:
-                if not age_col:
-                    age_col = col
-            elif 'ci' in col_lower or 'cours intensif' in col_lower or 'intensif' in col_lower or col_lower == 'cours 2':
-                if not ci_col:
-                    ci_col = col
-                    
+    except Exception as e:
+        print(f"Erreur lors de la construction de la table des élèves depuis matrix: {e}")
+        return {}
 
-        if not stagiaire_col:
-            return {name: {'niveau': '', 'age': 'N/A', 'ci': False} for name in student_names}
 
-        # Créer un dictionnaire des informations des élèves
-        students_info = {}
+def get_students_info_from_matrix(matrix_path, student_names, students_lookup=None):
+    """
+    Récupère les informations complètes des élèves depuis matrix.xlsx
 
-        for _, row in df.iterrows():
-            nom_brut = str(row.get(stagiaire_col, '')).strip()
-            nom_normalized = nom_brut.lower().strip()
-
-            # Chercher si ce nom correspond à un élève recherché
-            original_name = None
-            for search_name_norm, search_name_orig in student_names_normalized.items():
-                if search_name_norm in nom_normalized or nom_normalized in search_name_norm:
-                    original_name = search_name_orig
-                    break
+    Args:
+        matrix_path (str): Chemin vers matrix.xlsx
+        student_names (list): Liste des noms d'élèves à rechercher
+        students_lookup (dict, optional): Table déjà construite par build_students_lookup_from_matrix().
+            Si absente, matrix.xlsx est relu.
 
-            if original_name:
-                # Récupérer les informations
-                niveau = str(row.get(niveau_col, '')).strip() if niveau_col else ''
-                age = str(row.get(age_col, '')).strip() if age_col else 'N/A'
+    Returns:
+        dict: {nom_eleve: {'niveau': str, 'age': str, 'ci': bool}}
+    """
+    if not student_names:
+        return {}
 
-                # Déterminer si CI
-                ci = False
-                if ci_col:
-                    ci_val = str(row.get(ci_col, '')).strip().lower()
-                    ci = any(keyword in ci_val for keyword in ['oui', 'yes', 'true', '1', 'ci', 'intensif', 'cours intensif'])
-                    
-                students_info[original_name] = {
-                    'niveau': niveau,
-                    'age': age,
-                    'ci': ci
-                }
+    if students_lookup is None:
+        students_lookup = build_students_lookup_from_matrix(matrix_path)
 
-        # Pour les élèves non trouvés, utiliser des valeurs par défaut
-        for name in student_names:
-            if name not in students_info:
-                students_info[name] = {'niveau': '', 'age': 'N/A', 'ci': False}
+    students_info = {}
 
-        return students_info
+    for name in student_names:
+        name_normalized = name.lower().strip()
 
-    except Exception as e:
-        print(f"Erreur lors de la récupération des informations élèves depuis matrix: {e}")
-        return {name: {'niveau': '', 'age': 'N/A', 'ci': False} for name in student_names}
+        # Correspondance exacte : simple accès au dictionnaire
+        info = students_lookup.get(name_normalized)
+
+        # Sinon, correspondance partielle (noms tronqués ou complétés dans les fichiers d'écoles)
+        if info is None:
+            for nom_normalized, candidate in students_lookup.items():
+                if name_normalized in nom_normalized or nom_normalized in name_normalized:
+                    info = candidate
+
+        students_info[name] = dict(info) if info else {'niveau': '', 'age': 'N/A', 'ci': False}
+
+    return students_info
 
 
 def analyze_school_classes(week_folder):
@@ -504,7 +510,8 @@ def analyze_school_classes(week_folder):
             'nom_classe': str,
             'nb_eleves': int,
             'niveau': str,
-            'eleves': list of dicts with 'nom', 'niveau', 'age', 'ci'
+            'eleves': list of dicts with 'nom', 'niveau', 'age', 'ci',
+            'animateur': str  # écoles A et B seulement (colonne "Rôle")
         }
     """
     result = {
@@ -532,114 +539,70 @@ def analyze_school_classes(week_folder):
     }
 
     # Fonction helper pour analyser un fichier Excel d'école
-    def analyze_school_file(excel_path, school_key):
+    def analyze_school_file(excel_path, school_key, students_lookup):
         if not os.path.exists(excel_path):
             return
 
-        try:
-            # Lire toutes les feuilles du fichier
-            xl_file = pd.ExcelFile(excel_path)
-            sheet_names = xl_file.sheet_names
+        def cell_text(row, idx):
+            if idx >= len(row) or row[idx] is None:
+                return ''
+            return str(row[idx]).strip()
 
-            for sheet_name in sheet_names:
+        try:
+            # Lecture seule ligne par ligne (tuples de valeurs, cache partagé : une seule lecture tant que le fichier ne change pas)
+            for sheet_name, headers, rows in iter_workbook_rows(excel_path):
                 try:
-                    df = pd.read_excel(excel_path, sheet_name=sheet_name)
-
-                    if df.empty:
-                        # La feuille est vide (pas de données) mais on veut quand même afficher l'horaire
-                        sheet_lower = sheet_name.lower()
-                        type_intervenant = "animateur" if "animateur" in sheet_lower else "professeur"
-                        horaire = clean_horaire_name(sheet_name)
-                        
-                        result[school_key].append({
-                            'horaire': horaire or sheet_name,
-                            'intervenant': "Non spécifié",
-                            'type_intervenant': type_intervenant,
-                            'classes': []
-                        })
-                        continue  # On skip le reste du traitement pour cette feuille
-
                     # Analyser le nom de la feuille pour déterminer le type d'intervenant et l'horaire
                     sheet_lower = sheet_name.lower()
                     type_intervenant = "animateur" if "animateur" in sheet_lower else "professeur"
                     horaire = clean_horaire_name(sheet_name)
 
-                    # Chercher la colonne d'intervenant
-                    intervenant_col = None
-                    for col in df.columns:
-                        col_lower = str(col).lower()
-                        if any(keyword in col_lower for keyword in ['intervenant', 'professeur', 'animateur', 'enseignant']):
-                            intervenant_col = col
-                            break
-
-                    # Chercher les colonnes de classes, d'élèves, de niveau et de liste d'élèves
-                    classe_cols = []
-                    eleve_cols = []
-                    niveau_cols = []
-                    liste_eleves_cols = []
-
-                    for col in df.columns:
-                        col_lower = str(col).lower()
-
-                        # Vérifier d'abord les colonnes de liste d'élèves (plus spécifique)
-                        if 'liste' in col_lower or 'élèves' in col_lower or 'eleves' in col_lower or 'noms' in col_lower:
-                            liste_eleves_cols.append(col)
-                        elif any(keyword in col_lower for keyword in ['classe', 'groupe', 'section']):
-                            classe_cols.append(col)
-                        elif any(keyword in col_lower for keyword in ['élève', 'eleve', 'effectif', 'nombre']):
-                            # Éviter les colonnes qui contiennent "liste des élèves"
-                            if not ('liste' in col_lower):
-                                eleve_cols.append(col)
-                        elif any(keyword in col_lower for keyword in ['niveau', 'level']):
-                            niveau_cols.append(col)
-
-                    # Extraire les intervenants et classes
+                    # Colonnes d'intervenant, de classe, de niveau et de liste d'élèves (schéma partagé des feuilles d'écoles)
+                    columns = resolve_column_indexes(headers, SCHOOL_SCHEMA)
+                    intervenant_col = columns["Intervenant"]
+                    classe_col = columns["Classe"]
+                    niveau_col = columns["Niveau"]
+                    liste_eleves_col = columns["Liste des élèves"]
+                    # Animateur des classes des écoles A et B (colonne "Rôle", 4e colonne par défaut)
+                    animateur_col = None
+                    if school_key in ('ecole_a', 'ecole_b'):
+                        animateur_col = columns["Rôle"] if columns["Rôle"] is not None else 3
+
+                    # Extraire les intervenants (dans l'ordre d'apparition) et les classes
                     intervenants = []
-                    if intervenant_col:
-                        intervenants = df[intervenant_col].dropna().unique().tolist()
-
                     classes_info = []
-                    for _, row in df.iterrows():
+                    for row in rows:
                         classe_nom = None
-                        nb_eleves = 0
                         niveau = ""
                         eleves_list = []
                         intervenant_classe = "Non spécifié"  # Intervenant spécifique à la classe
 
                         # Chercher le nom de la classe
-                        for col in classe_cols:
-                            val = str(row.get(col, '')).strip()
+                        if classe_col is not None:
+                            val = cell_text(row, classe_col)
                             if val and val.lower() not in ['', 'nan', 'none']:
                                 classe_nom = val
-                                break
 
                         # Chercher l'intervenant pour cette classe spécifique
-                        if intervenant_col:
-                            intervenant_val = str(row.get(intervenant_col, '')).strip()
+                        if intervenant_col is not None:
+                            raw_intervenant = row[intervenant_col] if intervenant_col < len(row) else None
+                            if raw_intervenant is not None and raw_intervenant != '' and raw_intervenant not in intervenants:
+                                intervenants.append(raw_intervenant)
+                            intervenant_val = cell_text(row, intervenant_col)
                             if intervenant_val and intervenant_val.lower() not in ['', 'nan', 'none']:
                                 intervenant_classe = intervenant_val
 
-                        # Chercher le nombre d'élèves
-                        for col in eleve_cols:
-                            val = row.get(col, 0)
-                            if pd.notna(val) and isinstance(val, (int, float)):
-                                nb_eleves = int(val)
-                                break
-
                         # Chercher le niveau
-                        for col in niveau_cols:
-                            val = str(row.get(col, '')).strip()
+                        if niveau_col is not None:
+                            val = cell_text(row, niveau_col)
                             if val and val.lower() not in ['', 'nan', 'none']:
                                 niveau = val
-                                break
 
                         # Chercher la liste des élèves
-                        for col in liste_eleves_cols:
-                            val = str(row.get(col, '')).strip()
+                        if liste_eleves_col is not None:
+                            val = cell_text(row, liste_eleves_col)
                             if val and val.lower() not in ['', 'nan', 'none', 'liste des élèves...']:
                                 # Parser la liste des élèves (séparés par des virgules, points-virgules, ou retours à la ligne)
-                                import re
-                                # Diviser par virgules, points-virgules, ou nouvelles lignes
                                 eleves_raw = re.split(r'[;,|\n\r]+', val)
                                 student_names = []
                                 for eleve_nom in eleves_raw:
@@ -647,9 +610,8 @@ def analyze_school_classes(week_folder):
                                     if eleve_nom and eleve_nom.lower() not in ['', 'nan', 'none']:
                                         student_names.append(eleve_nom)
 
-                                # Récupérer les informations complètes des élèves depuis matrix.xlsx
-                                matrix_path = os.path.join(week_folder, "matrix.xlsx")
-                                students_info = get_students_info_from_matrix(matrix_path, student_names)
+                                # Récupérer les informations complètes des élèves (table construite une seule fois)
+                                students_info = get_students_info_from_matrix(matrix_path, student_names, students_lookup)
 
                                 # Construire la liste des élèves avec leurs vraies informations
                                 for eleve_nom in student_names:
@@ -660,18 +622,23 @@ def analyze_school_classes(week_folder):
                                         'age': info['age'],
                                         'ci': info['ci']
                                     })
-                                break
 
                         if classe_nom:
-                            classes_info.append({
+                            classe_info = {
                                 'nom_classe': classe_nom,
                                 'nb_eleves': len(eleves_list),  # Utiliser le nombre réel d'élèves parsés
                                 'niveau': niveau,
                                 'eleves': eleves_list,
                                 'intervenant': intervenant_classe  # Ajouter l'intervenant spécifique à la classe
-                            })
-
-                    # Créer l'entrée pour cette feuille/horaire                    
+                            }
+                            if animateur_col is not None:
+                                animateur = cell_text(row, animateur_col)
+                                if not animateur or animateur in ['nan', 'none']:
+                                    animateur = "Non spécifié"
+                                classe_info['animateur'] = animateur
+                            classes_info.append(classe_info)
+
+                    # Créer l'entrée pour cette feuille/horaire (feuille vide : l'horaire est quand même affiché)
                     result[school_key].append({
                             'horaire': horaire or sheet_name,
                             'intervenant': intervenants[0] if intervenants else "Non spécifié",
@@ -688,12 +655,16 @@ def analyze_school_classes(week_folder):
 
     # Analyser tous les fichiers Excel du dossier semaine
     if os.path.exists(week_folder):
+        # Une seule lecture de matrix.xlsx pour toute l'analyse de la semaine
+        matrix_path = os.path.join(week_folder, "matrix.xlsx")
+        students_lookup = build_students_lookup_from_matrix(matrix_path)
+
         for filename in os.listdir(week_folder):
             if filename.lower().endswith('.xlsx') and filename.lower() != 'matrix.xlsx':
                 file_path = os.path.join(week_folder, filename)
                 school_key = file_to_school_mapping.get(filename)
                 if school_key:
-                    analyze_school_file(file_path, school_key)
+                    analyze_school_file(file_path, school_key, students_lookup)
 
     return result
 
@@ -713,128 +684,15 @@ def analyze_matrix_assignments(matrix_path):
         }
     """
     if pd is None or not os.path.exists(matrix_path):
-        return {
-            'eleves_assignes': [],
-            'total_eleves': 0,
-            'sans_classe': 0,
-            'sans_niveau': 0,
-            'avec_classe': 0,
-            'par_niveau': {}
-        }
+        return empty_matrix_assignments()
 
     try:
-        df = pd.read_excel(matrix_path)
-
-        # Trouver les colonnes nécessaires
-        stagiaire_col = None
-        niveau_col = None
-        ecole_col = None
-        classe_col = None
-        horaire_col = None
-
-        # Fonction helper pour vérifier si une colonne doit être exclue
-        def should_exclude_column(col_name):
-            col_lower = str(col_name).lower()
-            # Exclure les colonnes spécifiques aux cours (Cours 1, Cours 2, etc.)
-            if any(f'cours {i}' in col_lower for i in range(1, 10)):
-                return True
-            # Exclure les colonnes avec des suffixes numériques (.1, .2, etc.)
-            if any(col_lower.endswith(f'.{i}') for i in range(1, 10)):
-                return True
-            # Exclure les colonnes d'arrivée/départ spécifiques
-            if 'arrivée' in col_lower or 'départ' in col_lower:
-                return True
-            return False
-
-        for col in df.columns:
-            if should_exclude_column(col):
-                continue
-
-            col_lower = str(col).lower()
-            if 'stagiaire' in col_lower or 'nom' in col_lower or 'élève' in col_lower or 'eleve' in col_lower:
-                if not stagiaire_col:  # Prendre la première trouvée
-                    stagiaire_col = col
-            elif ('niveau' in col_lower or 'level' in col_lower) and not any(char.isdigit() for char in col):
-                if not niveau_col:  # Éviter les duplications comme "Niveau.1"
-                    niveau_col = col
-            elif 'ecole' in col_lower or 'école' in col_lower or 'school' in col_lower:
-                if not ecole_col:  # Prendre la première école générale
-                    ecole_col = col
-            elif 'classe' in col_lower or 'class' in col_lower or 'groupe' in col_lower:
-                if not classe_col:  # Prendre la première classe générale
-                    classe_col = col
-            elif 'horaire' in col_lower or 'horaire' in col_lower or 'heure' in col_lower or 'time' in col_lower:
-                if not horaire_col and 'arrivée' not in col_lower and 'départ' not in col_lower:
-                    horaire_col = col
-
-        if not stagiaire_col:
-            return {
-                'eleves_assignes': [],
-                'total_eleves': 0,
-                'sans_classe': 0,
-                'sans_niveau': 0,
-                'avec_classe': 0,
-                'par_niveau': {}
-            }
-
-        total_eleves = len(df)
-        sans_classe = 0
-        sans_niveau = 0
-        avec_classe = 0
-        par_niveau = {}
-        eleves_assignes = []
-
-        for _, row in df.iterrows():
-            nom = str(row.get(stagiaire_col, '')).strip() if stagiaire_col else ''
-            niveau = str(row.get(niveau_col, '')).strip() if niveau_col else ''
-            ecole = str(row.get(ecole_col, '')).strip() if ecole_col else ''
-            classe = str(row.get(classe_col, '')).strip() if classe_col else ''
-            horaire = str(row.get(horaire_col, '')).strip() if horaire_col else ''
-
-            # Vérifier si l'élève a toutes les informations nécessaires pour être assigné
-            if nom and nom.lower() not in ['', 'nan', 'none'] and ecole and classe and horaire:
-                eleves_assignes.append({
-                    'nom': nom,
-                    'niveau': niveau,
-                    'ecole': ecole,
-                    'classe': classe,
-                    'horaire': horaire
-                })
-
-            # Statistiques des classes
-            if not classe or classe.lower() in ['', 'nan', 'none']:
-                sans_classe += 1
-            else:
-                avec_classe += 1
-
-            # Statistiques des niveaux
-            if not niveau or niveau.lower() in ['', 'nan', 'none']:
-                sans_niveau += 1
-            else:
-                if niveau in par_niveau:
-                    par_niveau[niveau] += 1
-                else:
-                    par_niveau[niveau] = 1
-
-        return {
-            'eleves_assignes': eleves_assignes,
-            'total_eleves': total_eleves,
-            'sans_classe': sans_classe,
-            'sans_niveau': sans_niveau,
-            'avec_classe': avec_classe,
-            'par_niveau': par_niveau
-        }
+        # Calcul par colonnes (masques et value_counts), voir statistiques_matrix.py
+        return compute_matrix_assignments(read_excel_sheets(matrix_path))
 
     except Exception as e:
         print(f"Erreur lors de l'analyse des assignations matrix: {e}")
-        return {
-            'eleves_assignes': [],
-            'total_eleves': 0,
-            'sans_classe': 0,
-            'sans_niveau': 0,
-            'avec_classe': 0,
-            'par_niveau': {}
-        }
+        return empty_matrix_assignments()
 
 
 def analyze_matrix_file(matrix_path):
@@ -894,7 +752,7 @@ def clear_all_school_files(matrix_path):
 
         try:
             # Ouvrir le fichier Excel
-            wb = load_workbook(excel_path)
+            wb = open_workbook(excel_path)
 
             # Pour chaque feuille du fichier
             for sheet_name in wb.sheetnames:
@@ -915,197 +773,58 @@ def clear_all_school_files(matrix_path):
                         rows_to_delete.append(row_idx)
 
                 # Supprimer les lignes en commençant par la fin pour éviter les décalages d'indices
+                # (via l'index des classes de la feuille, qui reste à jour)
+                class_index = get_class_index(sheet)
                 for row_idx in reversed(rows_to_delete):
-                    sheet.delete_rows(row_idx)
+                    class_index.delete_rows(row_idx)
 
             # Sauvegarder le fichier
-            wb.save(excel_path)
+            save_workbook(wb, excel_path)
             print(f"Fichier {excel_filename} vide avec succes")
 
         except Exception as e:
             print(f"Erreur lors du vidage de {excel_filename}: {e}")
 
 
-def update_school_files_with_assignments(week_folder, matrix_assignments):
+def update_school_files_with_assignments(week_folder, matrix_assignments, source=None):
     """
     Met à jour les fichiers Excel des écoles avec les élèves assignés depuis matrix.xlsx
 
+    Seuls les fichiers dont les affectations ou le contenu ont changé depuis la dernière
+    synchronisation sont ouverts, et enregistrés seulement si une feuille a changé
+    (synchro_ecoles.py).
+
     Args:
         week_folder (str): Chemin du dossier de la semaine
         matrix_assignments (dict): Résultat de analyze_matrix_assignments()
+        source (tuple): Signature de la semaine prise avant la lecture du matrix
+            (SchoolFileSync.source_signature)
+
+    Returns:
+        list: fichiers d'écoles enregistrés
     """
     if load_workbook is None:
         print("openpyxl n'est pas disponible, impossible de mettre à jour les fichiers Excel")
-        return
-
-    # Mapping des écoles vers les fichiers Excel
-    school_file_mapping = {
-        'A': 'ecole_a.xlsx',
-        'B': 'ecole_b.xlsx',
-        'C/CS': 'ECOLE_C_cours_standard.xlsx',
-        'C/CI': 'ECOLE_C_cours_intensif.xlsx',
-        'Morning': 'MORNING.xlsx',
-        'Premium/CS': 'ECOLE_PREMIUM_cours_standard.xlsx',
-        'Premium/CI': 'ECOLE_PREMIUM_cours_intensifs.xlsx'
-    }
-
-    # Grouper les élèves par école, horaire et classe
-    assignments_by_school = {}
-    for eleve in matrix_assignments['eleves_assignes']:
-        ecole = eleve['ecole']
-        horaire = eleve['horaire']
-        classe = eleve['classe']
-        nom = eleve['nom']
-
-        if ecole not in assignments_by_school:
-            assignments_by_school[ecole] = {}
-
-        if horaire not in assignments_by_school[ecole]:
-            assignments_by_school[ecole][horaire] = {}
-
-        if classe not in assignments_by_school[ecole][horaire]:
-            assignments_by_school[ecole][horaire][classe] = []
-
-        assignments_by_school[ecole][horaire][classe].append(nom)
-
-    # Pour chaque école, mettre à jour le fichier Excel correspondant
-    for ecole_key, horaires_data in assignments_by_school.items():
-        if ecole_key not in school_file_mapping:
-            continue
-
-        excel_filename = school_file_mapping[ecole_key]
-        excel_path = os.path.join(week_folder, excel_filename)
-
-        if not os.path.exists(excel_path):
-            continue
+        return []
 
-        try:
-            wb = load_workbook(excel_path)
-
-            # Pour chaque horaire/feuille dans cette école
-            for horaire, classes_data in horaires_data.items():
-                # Chercher la feuille correspondant à cet horaire
-                target_sheet = None
-                for sheet_name in wb.sheetnames:
-                    # Normaliser les noms pour la comparaison
-                    sheet_normalized = sheet_name.lower().replace('animateur', '').replace('professeur', '').strip()
-                    horaire_normalized = horaire.lower().strip()
-
-                    if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                        target_sheet = wb[sheet_name]
-                        break
-
-                if target_sheet is None:
-                    print(f"Feuille horaire '{horaire}' non trouvée dans {excel_filename}")
-                    continue
-
-                # Pour chaque classe dans cet horaire, trouver la colonne appropriée et y ajouter les élèves
-                for classe_nom, eleves in classes_data.items():
-                    # Chercher la ligne correspondant à cette classe
-                    classe_row = None
-                    classe_col = None
-
-                    # Chercher la ligne de cette classe
-                    for row_idx in range(2, target_sheet.max_row + 1):  # Commencer à la ligne 2 (après header)
-                        for col_idx in range(1, target_sheet.max_column + 1):
-                            cell_value = str(target_sheet.cell(row=row_idx, column=col_idx).value or '').strip()
-                            if cell_value == classe_nom:
-                                classe_row = row_idx
-                                classe_col = col_idx
-                                break
-                        if classe_row:
-                            break
+    return school_files_sync.sync(week_folder, matrix_assignments, source)
 
-                    if classe_row is None:
-                        continue
 
-                    # Chercher une colonne appropriée pour les élèves (liste des élèves ou élèves)
-                    eleves_col = None
-
-                    # D'abord chercher "liste des élèves" ou "liste élèves"
-                    for col_idx in range(1, target_sheet.max_column + 1):
-                        cell_value = str(target_sheet.cell(row=1, column=col_idx).value or '').lower()
-                        if ('liste' in cell_value and ('élèves' in cell_value or 'eleves' in cell_value)) or \
-                           ('élèves' in cell_value or 'eleves' in cell_value):
-                            eleves_col = col_idx
-                            break
-
-                    # Si pas trouvé, chercher "noms" ou "stagiaire"
-                    if eleves_col is None:
-                        for col_idx in range(1, target_sheet.max_column + 1):
-                            cell_value = str(target_sheet.cell(row=1, column=col_idx).value or '').lower()
-                            if 'nom' in cell_value or 'stagiaire' in cell_value:
-                                eleves_col = col_idx
-                                break
-
-                    # Si toujours pas trouvé, utiliser la colonne à droite de la classe
-                    if eleves_col is None and classe_col:
-                        eleves_col = classe_col + 1
-                        # S'assurer que cette colonne existe
-                        if eleves_col > target_sheet.max_column:
-                            continue
-
-                    if eleves_col is None:
-                        print(f"Aucune colonne appropriée trouvée pour les élèves dans {excel_filename} - {horaire}")
-                        continue
-
-                    # Ajouter les élèves dans la cellule appropriée (sans doublons)
-                    current_value = str(target_sheet.cell(row=classe_row, column=eleves_col).value or '').strip()
-
-                    # Récupérer la liste actuelle des élèves
-                    existing_eleves = []
-                    if current_value and current_value not in ['', 'nan', 'none']:
-                        existing_eleves = [e.strip() for e in current_value.split(',') if e.strip()]
-
-                    # Ajouter seulement les élèves qui ne sont pas déjà présents (éviter les doublons)
-                    new_eleves = []
-                    for eleve in eleves:
-                        if eleve not in existing_eleves:
-                            new_eleves.append(eleve)
-
-                    # Si il y a de nouveaux élèves à ajouter
-                    if new_eleves:
-                        if existing_eleves:
-                            all_eleves = existing_eleves + new_eleves
-                        else:
-                            all_eleves = new_eleves
-
-                        # Trier les élèves par ordre alphabétique pour une meilleure présentation
-                        all_eleves_sorted = sorted(all_eleves)
-                        eleves_text = ', '.join(all_eleves_sorted)
-
-                        target_sheet.cell(row=classe_row, column=eleves_col, value=eleves_text)
-
-            # Sauvegarder le fichier
-            wb.save(excel_path)
-
-        except Exception as e:
-            print(f"Erreur lors de la mise à jour de {excel_filename}: {e}")
-
-
-def clean_horaire_name(sheet_name):
-    """Nettoie le nom de la feuille pour extraire le nom d'horaire de manière cohérente."""
-    # Cette fonction doit être identique à celle utilisée dans fenetre_principale.py et Assignation des Niveaux.py
-    sheet_lower = sheet_name.lower()
-    type_intervenant = "animateur" if "animateur" in sheet_lower else "professeur"
-
-    # Liste complète des mots à supprimer (avec variations)
-    words_to_remove = [
-        "animateur", "Animateur", "anim", "Anim",
-        "professeur", "Professeur", "prof", "Prof",
-        "Rôle", "rôle", "role", "Role"
-    ]
-
-    # Nettoyer le nom en supprimant tous les mots-clés d'intervenants
-    horaire = sheet_name
-    for word in words_to_remove:
-        horaire = horaire.replace(word, "")
+def sync_school_files(week_folder):
+    """
+    Synchronise les fichiers des écoles avec matrix.xlsx si l'un d'eux a changé.
 
-    # Nettoyer les espaces multiples et supprimer les espaces au début/fin
-    horaire = " ".join(horaire.split()).strip()
+    Returns:
+        list: fichiers d'écoles enregistrés (vide si tout était déjà à jour)
+    """
+    # Signature prise avant la lecture du matrix : une réécriture par un autre processus
+    # pendant la synchronisation sera vue au prochain appel
+    source = school_files_sync.source_signature(week_folder)
+    if school_files_sync.is_up_to_date(week_folder, source):
+        return []
+    matrix_path = os.path.join(week_folder, "matrix.xlsx")
+    return update_school_files_with_assignments(week_folder, analyze_matrix_assignments(matrix_path), source)
 
-    # Si le résultat est vide, utiliser le nom original
-    return horaire or sheet_name
 
 def show_loading_window(parent_app):
     """Affiche une fenêtre de chargement style moderne (Corrigé)."""
@@ -1379,7 +1098,7 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
             ws.cell(row=header_row, column=insert_at + 5, value="Prof CI")
             
 
-            wb.save(matrix_path)
+            save_workbook(wb, matrix_path)
             return True
         except Exception as e:
             messagebox.showerror(
@@ -1824,12 +1543,16 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
                     # Copie du fichier choisi vers le dossier de la semaine (écrase l'ancien si présent)
                     print("Copie du fichier...")  # Debug
                     shutil.copy2(file_path, dest_path)
+                    invalidate_excel_cache(dest_path)
 
                     # Ajoute les colonnes 'Niveau', 'Ecole', 'Horaire', 'Classe' après la colonne 'stagiaire'
                     print("Ajout des colonnes...")  # Debug
                     success = _augment_matrix_file(dest_path)
                     print(f"Succès de l'ajout des colonnes: {success}")  # Debug
 
+                    # Réimporter le nouveau matrix dans la base SQLite (si elle est activée)
+                    reload_from_excel(dest_path)
+
                     if success:
                         # Vider tous les fichiers Excel des écoles (supprimer toutes les classes)
                         print("Vidage des fichiers écoles...")  # Debug
@@ -1906,6 +1629,9 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
                 return
 
             try:
+                # Régénérer le fichier Excel depuis la base SQLite avant de l'ouvrir
+                export_week_to_excel(os.path.dirname(matrix_path))
+
                 # Sur Windows, ouvre avec l'application associée (Excel, LibreOffice, etc.)
                 os.startfile(matrix_path)
             except Exception as e:
@@ -2088,153 +1814,66 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
 
         # Autres actions (placeholder)
 
-    def calculate_optimal_layout(total_items, min_per_row=2, max_per_row=4):
-        """
-        Calcule la disposition optimale pour un nombre d'items.
-        
-        Args:
-            total_items: Nombre total d'items à afficher
-            min_per_row: Nombre minimum d'items par ligne
-            max_per_row: Nombre maximum d'items par ligne
-        
-        Returns:
-            Nombre d'items par ligne optimal
+    def dashboard_week_number(week_folder):
+        """Numéro de semaine d'un dossier 'semaine_N' (None si le nom ne correspond pas)."""
+        week_folder_name = os.path.basename(week_folder or "")
+        if week_folder_name.startswith('semaine_'):
+            return week_folder_name.split('_')[-1]
+        return None
+
+    def describe_classe_card(context):
+        """Intervenants affichés sur une carte de classe (prof / animateur pour les écoles A et B)."""
+        intervenant_classe = context['intervenant']
+        if context['school_name'] in ["A", "B"]:
+            # Animateur lu avec les classes (analyze_school_classes) : aucune lecture Excel ici
+            animateur = context['classe_info'].get('animateur', "Non spécifié")
+            return f"👨‍🏫 {intervenant_classe} / 🎭 {animateur}"
+        # Pour les autres écoles, afficher seulement l'intervenant normal
+        return f"👨‍🏫 {intervenant_classe}"
+
+    def get_classes_dashboard(parent_frame):
         """
-        if total_items <= min_per_row:
-            return total_items
-        elif total_items <= max_per_row:
-            return min_per_row
-        else:
-            # Calculer pour avoir des lignes équilibrées
-            rows = (total_items + max_per_row - 1) // max_per_row
-            return min((total_items + rows - 1) // rows, max_per_row)
-
-    def get_animateur_from_excel(week_folder, school_name, horaire, classe_nom):
-        """Récupère l'animateur actuel assigné à une classe depuis le fichier Excel de l'école."""
-        if not load_workbook or not week_folder:
-            return "Non spécifié"
-
-        # Mapping des écoles vers les fichiers Excel
-        school_file_mapping = {
-            'A': 'ecole_a.xlsx',
-            'B': 'ecole_b.xlsx',
-            'C/CS': 'ECOLE_C_cours_standard.xlsx',
-            'C/CI': 'ECOLE_C_cours_intensif.xlsx',
-            'Morning': 'MORNING.xlsx',
-            'Premium/CS': 'ECOLE_PREMIUM_cours_standard.xlsx',
-            'Premium/CI': 'ECOLE_PREMIUM_cours_intensifs.xlsx'
-        }
-
-        if school_name not in school_file_mapping:
-            return "Non spécifié"
-
-        excel_filename = school_file_mapping[school_name]
-        excel_path = os.path.join(week_folder, excel_filename)
-
-        if not os.path.exists(excel_path):
-            return "Non spécifié"
-
-        try:
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                sheet_normalized = clean_horaire_name(sheet_name).lower().strip()
-                horaire_normalized = horaire.lower().strip()
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
-
-            if not target_sheet:
-                return "Non spécifié"
-
-            # Chercher la ligne de la classe
-            classe_row = None
-            for row_idx in range(2, target_sheet.max_row + 1):
-                if str(target_sheet.cell(row=row_idx, column=1).value or '').strip() == classe_nom:
-                    classe_row = row_idx
-                    break
+        Tableau de bord des classes de parent_frame, créé au premier affichage seulement.
 
-            if not classe_row:
-                return "Non spécifié"
-
-            # Chercher la colonne animateur
-            animateur_col = None
-            for col_idx in range(1, target_sheet.max_column + 1):
-                header_value = str(target_sheet.cell(row=1, column=col_idx).value or '').lower()
-                # Chercher spécifiquement "animateur", "anim", "Animateur" ou "Rôle" mais pas "intervenant" ou "prof"
-                if (('animateur' in header_value or 'anim' in header_value or 'Animateur' in header_value or 'rôle' in header_value or 'role' in header_value) and
-                    'intervenant' not in header_value and 'prof' not in header_value):
-                    animateur_col = col_idx
-                    break
-
-            # Si pas trouvé, utiliser la colonne 4 par défaut
-            if animateur_col is None:
-                animateur_col = 4
-
-            # Récupérer l'animateur de la classe
-            animateur_value = str(target_sheet.cell(row=classe_row, column=animateur_col).value or '').strip()
-            if animateur_value and animateur_value not in ['', 'nan', 'none', 'Non spécifié']:
-                return animateur_value
-            else:
-                return "Non spécifié"
-
-        except Exception as e:
-            print(f"Erreur lors de la récupération de l'animateur de la classe {classe_nom}: {e}")
-            return "Non spécifié"
-
-    def create_classes_dashboard(parent_frame, school_data, week_folder):
-        """
-        Crée une interface moderne pour afficher les classes avec disposition dynamique.
-        Affiche toujours les cadres des écoles et horaires, même sans classes.
-
-        Met également à jour les fichiers Excel des écoles avec les élèves assignés depuis matrix.xlsx
+        Ses widgets sont ensuite réutilisés d'un rafraîchissement à l'autre (tableau_de_bord.py).
         """
-
-        # 1) Ouvrir le fichier matrix.xlsx et analyser les assignations des élèves
-        matrix_path = os.path.join(week_folder, "matrix.xlsx")
-        matrix_assignments = analyze_matrix_assignments(matrix_path)
-
-        # 2) Afficher seulement les élèves complètement assignés (école + horaire + classe)
-        # (Affichage supprimé pour nettoyer la console)
-
-        # 3) Mettre à jour les fichiers Excel des écoles avec les élèves assignés
-        update_school_files_with_assignments(week_folder, matrix_assignments)
+        dashboard = getattr(parent_frame, 'classes_dashboard', None)
+        if dashboard is not None and dashboard.exists():
+            return dashboard
 
         # Nettoyer le contenu existant
         for widget in parent_frame.winfo_children():
             widget.destroy()
-        
-        # Désactiver temporairement les mises à jour automatiques pour créer tous les widgets d'un coup
-        # On réactivera les mises à jour à la fin
 
-        # Configuration du layout principal
-        parent_frame.grid_columnconfigure(0, weight=1)
-        parent_frame.grid_rowconfigure(0, weight=1)
+        def refresh_dashboard(week_folder):
+            create_classes_dashboard(parent_frame, analyze_school_classes(week_folder), week_folder)
 
-        # Frame principal avec scroll
-        main_scrollable = ctk.CTkScrollableFrame(
+        def on_add_class(context):
+            week_folder = context['week_folder']
+            open_add_class_dialog(
+                context['horaire'], context['school_key'], context['school_name'], context['school_color'], week_folder,
+                refresh_callback=lambda: refresh_dashboard(week_folder)
+            )
+
+        def on_delete_all(context):
+            confirm_delete_all_classes_from_horaire(context['horaire'], context['school_name'], context['week_folder'])
+
+        dashboard = ClassesDashboard(
             parent_frame,
-            fg_color="#f8fafc",
-            corner_radius=0
+            on_class_click=open_classe_card,
+            on_class_menu=show_classe_card_menu,
+            on_add_class=on_add_class,
+            on_delete_all=on_delete_all,
+            describe_class=describe_classe_card
         )
-        main_scrollable.grid(row=0, column=0, sticky="nsew", padx=10, pady=5)
-        main_scrollable.grid_columnconfigure(0, weight=1)
+        parent_frame.classes_dashboard = dashboard
+        main_scrollable = dashboard.main_scrollable
 
         # Attacher un event listener pour détecter les changements de scroll
         def on_scroll_change(event=None):
-            # Essayer de déterminer le numéro de semaine depuis le week_folder
-            week_number = None
-            try:
-                import os
-                week_folder_name = os.path.basename(week_folder)
-                if week_folder_name.startswith('semaine_'):
-                    week_number = week_folder_name.split('_')[-1]
-            except:
-                pass
-
-            save_dashboard_scroll_position(main_scrollable, week_number)
+            save_dashboard_scroll_position(main_scrollable, dashboard_week_number(dashboard.week_folder))
+            # Construire les écoles encore en attente qui deviennent visibles
+            dashboard.materialize_visible()
 
         # Utiliser after pour attacher l'event listener après que le widget soit complètement créé
         def attach_scroll_listener():
@@ -2252,467 +1891,54 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
                     # Events sur le scrollable frame aussi
                     main_scrollable.bind("<Configure>", lambda e: on_scroll_change(e))
                     main_scrollable.bind("<MouseWheel>", lambda e: on_scroll_change(e))
-
-                    pass  # Listeners attachés silencieusement
-                else:
-                    pass  # Pas de canvas, rien à faire
             except Exception as e:
                 pass  # Erreur silencieuse lors de l'attachement
 
         parent_frame.after(100, attach_scroll_listener)
+        return dashboard
 
-        current_row = 0
-
-        # Mapping des écoles
-        school_mapping = {
-            'A': ('ecole_a', 'A', '#3b82f6', '#eff6ff'),
-            'B': ('ecole_b', 'B', '#10b981', '#f0fdf4'),
-            'C/CS': ('ecole_c_cs', 'C/CS', '#f59e0b', '#fffbeb'),
-            'C/CI': ('ecole_c_ci', 'C/CI', '#8b5cf6', '#f3e8ff'),
-            'Morning': ('ecole_morning', 'Morning', '#ef4444', '#fef2f2'),
-            'Premium/CS': ('ecole_premium_cs', 'Premium/CS', '#06b6d4', '#ecfeff'),
-            'Premium/CI': ('ecole_premium_ci', 'Premium/CI', '#f97316', '#fff7ed')
-        }
-
-        for school_name, (school_key, display_name, school_color, school_bg) in school_mapping.items():
-            school_info = school_data.get(school_key, [])
-
-
-            # Vérifier si l'école est activée dans les filtres
-            if not school_filters[school_name].get():
-                continue
-
-            # Section pour l'école - affichée même sans données
-            school_frame = ctk.CTkFrame(
-                main_scrollable,
-                fg_color="white",
-                corner_radius=10,
-                border_width=2,
-                border_color=school_color
-            )
-            school_frame.grid(row=current_row, column=0, sticky="ew", pady=(4, 4), padx=5)
-            school_frame.grid_columnconfigure(0, weight=1)
-            school_frame.grid_rowconfigure(1, weight=1)
-
-            # En-tête de l'école
-            school_header = ctk.CTkFrame(
-                school_frame,
-                fg_color=school_bg,
-                corner_radius=10
-            )
-            school_header.grid(row=0, column=0, sticky="ew", padx=10, pady=(2, 2))
-            school_header.grid_columnconfigure(1, weight=1)
-
-            school_icon = ctk.CTkLabel(
-                school_header,
-                text="🏫",
-                font=("Arial", 16),
-                text_color=school_color
-            )
-            school_icon.grid(row=0, column=0, padx=(3, 5), pady=1)
-
-            school_title = ctk.CTkLabel(
-                school_header,
-                text=f"École {display_name}",
-                font=("Arial", 14, "bold"),
-                text_color=school_color
-            )
-            school_title.grid(row=0, column=1, sticky="w", pady=1)
-
-            # Statistiques
-            stats_frame = ctk.CTkFrame(school_header, fg_color="transparent")
-            stats_frame.grid(row=0, column=2, sticky="e", padx=(10, 5))
-
-            total_eleves = sum(len(horaire.get('classes', [])) for horaire in school_info)
-            total_classes = sum(len(horaire.get('classes', [])) for horaire in school_info)
-
-            stats_label = ctk.CTkLabel(
-                stats_frame,
-                text=f"👥 {total_eleves} élèves • 📚 {total_classes} classes",
-                font=("Arial", 11),
-                text_color=school_color
-            )
-            stats_label.pack()
-
-            # Boutons d'action
-            buttons_frame = ctk.CTkFrame(school_header, fg_color="transparent")
-            buttons_frame.grid(row=0, column=3, sticky="e", padx=(5, 0))
-
-            def soften_color(color, factor=0.6):
-                if color.startswith('#'):
-                    r = int(color[1:3], 16)
-                    g = int(color[3:5], 16)
-                    b = int(color[5:7], 16)
-                    r = int(r + (255 - r) * (1 - factor))
-                    g = int(g + (255 - g) * (1 - factor))
-                    b = int(b + (255 - b) * (1 - factor))
-                    return f"#{r:02x}{g:02x}{b:02x}"
-                return color
-
-            # Créer les boutons
-            button_configs = [
-                ("👨‍🏫 Profs", lambda sn=school_name: None),
-                ("🎭 Anims", lambda sn=school_name: None),
-                ("👥 Élèves", lambda sn=school_name: None),
-                ("📄 Listes", lambda sn=school_name: None)
-            ]
-
-            for text, command in button_configs:
-                btn = ctk.CTkButton(
-                    buttons_frame,
-                    text=text,
-                    font=("Arial", 9, "bold"),
-                    height=24,
-                    width=70,
-                    fg_color=soften_color(school_color, 0.5),
-                    hover_color=soften_color(school_color, 0.3),
-                    text_color="white",
-                    command=command
-                )
-                btn.pack(side="left", padx=(0, 2))
-
-            # Conteneur pour les horaires - TOUJOURS AFFICHÉ
-            horaires_container = ctk.CTkFrame(
-                school_frame,
-                fg_color="transparent"
-            )
-            horaires_container.grid(row=1, column=0, sticky="nsew", padx=10, pady=(2, 10))
-
-            # Si aucune donnée d'horaire pour cette école
-            if not school_info or len(school_info) == 0:
-                no_horaires_label = ctk.CTkLabel(
-                    horaires_container,
-                    text="📅 Aucun horaire configuré pour cette école",
-                    font=("Arial", 11, "italic"),
-                    text_color="#9ca3af"
-                )
-                no_horaires_label.pack(pady=20)
-            
-            # Calculer le nombre optimal d'horaires par ligne
-            total_horaires = len(school_info) if school_info else 0
-            if total_horaires > 0:
-                horaires_per_row = calculate_optimal_layout(total_horaires, min_per_row=2, max_per_row=3)
-
-                # Configurer les colonnes dynamiquement
-                for col in range(horaires_per_row):
-                    horaires_container.grid_columnconfigure(col, weight=1)
-
-                horaire_row = 0
-                horaire_col = 0
-
-                # Fonction pour extraire l'heure de début
-                def extract_start_hour(horaire_str):
-                    """Extrait l'heure de début pour le tri (ex: '8h15-9h15' -> 8.25)"""
-                    try:
-                        # Extraire la partie avant le '-'
-                        start = horaire_str.split('-')[0].strip()
-                        # Séparer heures et minutes
-                        if 'h' in start:
-                            parts = start.split('h')
-                            hours = int(parts[0])
-                            minutes = int(parts[1]) if len(parts) > 1 and parts[1] else 0
-                            return hours + minutes / 60.0
-                        return 0
-                    except:
-                        return 0
-
-                # Trier les horaires par heure de début
-                sorted_school_info = sorted(school_info, key=lambda x: extract_start_hour(x.get('horaire', '')))
-
-                # Pour chaque horaire de cette école
-                for horaire_info in sorted_school_info:
-                    horaire = horaire_info.get('horaire', 'Horaire inconnu')
-                    intervenant = horaire_info.get('intervenant', 'Non spécifié')
-                    type_intervenant = horaire_info.get('type_intervenant', 'professeur')
-                    classes = horaire_info.get('classes', [])
-
-                    # Frame pour cet horaire - TOUJOURS AFFICHÉ
-                    horaire_frame = ctk.CTkFrame(
-                        horaires_container,
-                        fg_color="#f8fafc",
-                        corner_radius=8,
-                        border_width=1,
-                        border_color="#e5e7eb"
-                    )
-                    horaire_frame.grid(
-                        row=horaire_row, 
-                        column=horaire_col, 
-                        sticky="nsew", 
-                        padx=(0, 5) if horaire_col < horaires_per_row - 1 else 0, 
-                        pady=(0, 5)
-                    )
-                    horaire_frame.grid_columnconfigure(0, weight=1)
-
-                    # En-tête de l'horaire
-                    horaire_header = ctk.CTkFrame(
-                        horaire_frame,
-                        fg_color="white",
-                        corner_radius=8
-                    )
-                    horaire_header.grid(row=0, column=0, sticky="ew", padx=8, pady=(8, 5))
-                    horaire_header.grid_columnconfigure(1, weight=1)
-
-                    # Icône selon le type d'intervenant
-                    intervenant_icon = "👨‍🏫" if type_intervenant == "professeur" else "🎭"
-                    icon_label = ctk.CTkLabel(
-                        horaire_header,
-                        text=intervenant_icon,
-                        font=("Arial", 14),
-                        text_color=school_color
-                    )
-                    icon_label.grid(row=0, column=0, padx=(5, 8), pady=5)
-
-                    # Informations de l'horaire
-                    horaire_text = f"Horaire : {horaire}"
-                    horaire_label = ctk.CTkLabel(
-                        horaire_header,
-                        text=horaire_text,
-                        font=("Arial", 11, "bold"),
-                        text_color="#374151",
-                        anchor="w"
-                    )
-                    horaire_label.grid(row=0, column=1, sticky="w", pady=5)
-
-                    # Conteneur pour les boutons d'action (ajouter/supprimer)
-                    action_buttons_frame = ctk.CTkFrame(horaire_header, fg_color="transparent")
-                    action_buttons_frame.grid(row=0, column=2, padx=(10, 5), pady=5)
-
-                    # Bouton pour ajouter une classe
-                    add_class_btn = ctk.CTkButton(
-                        action_buttons_frame,
-                        text="➕",
-                        font=("Arial", 10),
-                        width=15,
-                        height=15,
-                        fg_color=soften_color(school_color, 0.5),
-                        hover_color=soften_color(school_color, 0.3),
-                        text_color="white",
-                        corner_radius=12,
-                        command=lambda h=horaire, sk=school_key, dn=display_name, sc=school_color: open_add_class_dialog(
-                            h, sk, dn, sc, week_folder,
-                            refresh_callback=lambda: create_classes_dashboard(parent_frame, analyze_school_classes(week_folder), week_folder)
-                        )
-                    )
-                    add_class_btn.pack(side="left", padx=(0, 3))
-
-                    # Bouton pour supprimer toutes les classes de l'horaire
-                    delete_all_btn = ctk.CTkButton(
-                        action_buttons_frame,
-                        text="➖",
-                        font=("Arial", 10),
-                        width=15,
-                        height=15,
-                        fg_color=soften_color(school_color, 0.5),
-                        hover_color=soften_color(school_color, 0.3),
-                        text_color="white",
-                        corner_radius=12,
-                        command=lambda h=horaire, sn=display_name: confirm_delete_all_classes_from_horaire(h, sn, week_folder)
-                    )
-                    delete_all_btn.pack(side="left")
-
-                    # Classes de cet horaire
-                    if classes:
-                        classes_container = ctk.CTkFrame(
-                            horaire_frame,
-                            fg_color="transparent"
-                        )
-                        classes_container.grid(row=1, column=0, sticky="nsew", padx=8, pady=(0, 8))
-
-                        # Calculer le nombre optimal de classes par ligne
-                        total_classes = len(classes)
-                        classes_per_row = calculate_optimal_layout(total_classes, min_per_row=2, max_per_row=4)
-
-                        # Configurer les colonnes dynamiquement
-                        for col in range(classes_per_row):
-                            classes_container.grid_columnconfigure(col, weight=1)
-
-                        classe_row = 0
-                        classe_col = 0
-
-                        # Créer des cartes pour chaque classe
-                        for classe_info in classes:
-                            classe_nom = classe_info.get('nom_classe', 'Classe inconnue')
-                            nb_eleves = classe_info.get('nb_eleves', 0)
-                            niveau = classe_info.get('niveau', '')
-                            eleves = classe_info.get('eleves', [])
-                            intervenant_classe = classe_info.get('intervenant', 'Non spécifié')  # Intervenant spécifique à la classe
-
-                            # Frame de la classe - TAILLE FIXE UNIFORME
-                            classe_card = ctk.CTkFrame(
-                                classes_container,
-                                fg_color="white",
-                                corner_radius=6,
-                                border_width=1,
-                                border_color="#e5e7eb",
-                                width=160,
-                                height=110
-                            )
-                            classe_card.grid(
-                                row=classe_row,
-                                column=classe_col,
-                                padx=(0, 5) if classe_col < classes_per_row - 1 else 0,
-                                pady=(0, 5),
-                                sticky="nsew"
-                            )
-                            classe_card.grid_propagate(False)
-
-                            # Fonction pour gérer l'effet hover
-                            def on_enter(event, frame=classe_card, color=school_bg):
-                                """Change la couleur de fond au survol"""
-                                frame.configure(fg_color=color)
-
-                            def on_leave(event, frame=classe_card):
-                                """Restaure la couleur de fond d'origine"""
-                                frame.configure(fg_color="white")
-
-                            # Lier les événements de survol
-                            classe_card.bind("<Enter>", on_enter)
-                            classe_card.bind("<Leave>", on_leave)
-
-                            # IMPORTANT : Propager les événements aux widgets enfants
-                            def bind_hover_to_children(widget, enter_func, leave_func):
-                                """Applique les événements hover à tous les enfants"""
-                                widget.bind("<Enter>", enter_func)
-                                widget.bind("<Leave>", leave_func)
-                                for child in widget.winfo_children():
-                                    bind_hover_to_children(child, enter_func, leave_func)
-
-                            # Nom de la classe
-                            classe_name_label = ctk.CTkLabel(
-                                classe_card,
-                                text=classe_nom,
-                                font=("Arial", 11, "bold"),
-                                text_color="#374151"
-                            )
-                            classe_name_label.pack(padx=8, pady=(5, 2))
-
-                            # Niveau et intervenant
-                            if niveau:
-                                # Pour les écoles A et B, afficher prof et animateur
-                                if display_name in ["A", "B"]:
-                                    # Récupérer l'animateur depuis Excel
-                                    animateur = get_animateur_from_excel(week_folder, display_name, horaire, classe_nom)
-                                    intervenant_text = f"👨‍🏫 {intervenant_classe} / 🎭 {animateur}"
-                                else:
-                                    # Pour les autres écoles, afficher seulement l'intervenant normal
-                                    intervenant_text = f"👨‍🏫 {intervenant_classe}"
-
-                                niveau_classe_label = ctk.CTkLabel(
-                                    classe_card,
-                                    text=f"📚 {niveau}\n{intervenant_text}",
-                                    font=("Arial", 9),
-                                    text_color="#6b7280"
-                                )
-                                niveau_classe_label.pack(padx=8, pady=(0, 3))
-
-                            # Nombre d'élèves avec indicateur circulaire
-                            eleves_frame = ctk.CTkFrame(
-                                classe_card,
-                                fg_color="transparent"
-                            )
-                            eleves_frame.pack(padx=8, pady=(0, 5))
-
-                            circle_frame = ctk.CTkFrame(
-                                eleves_frame,
-                                fg_color=school_color,
-                                corner_radius=12,
-                                width=24,
-                                height=24
-                            )
-                            circle_frame.pack(side="left")
-                            circle_frame.pack_propagate(False)
-
-                            eleves_count_label = ctk.CTkLabel(
-                                circle_frame,
-                                text=str(nb_eleves),
-                                font=("Arial", 10, "bold"),
-                                text_color="white"
-                            )
-                            eleves_count_label.pack(expand=True)
-
-                            eleves_text_label = ctk.CTkLabel(
-                                eleves_frame,
-                                text="élèves" if nb_eleves > 1 else "élève",
-                                font=("Arial", 9),
-                                text_color="#6b7280"
-                            )
-                            eleves_text_label.pack(side="left", padx=(5, 0))
-
-                            # Appliquer l'effet hover à tous les enfants après leur création
-                            bind_hover_to_children(classe_card, on_enter, on_leave)
-
-                            # Ajouter un curseur pointeur pour indiquer que c'est cliquable
-                            classe_card.configure(cursor="hand2")
-
-                            # Rendre la carte cliquable
-                            setup_classe_card_click(classe_card, classe_info, horaire, intervenant_classe, type_intervenant, school_color, display_name, week_folder)
-
-                            # Gestion de la disposition
-                            classe_col += 1
-                            if classe_col >= classes_per_row:
-                                classe_col = 0
-                                classe_row += 1
-                    else:
-                        # Message si pas de classes pour cet horaire
-                        no_classes_label = ctk.CTkLabel(
-                            horaire_frame,
-                            text="👥 Aucune classe pour cet horaire",
-                            font=("Arial", 10, "italic"),
-                            text_color="#9ca3af"
-                        )
-                        no_classes_label.grid(row=1, column=0, padx=10, pady=15)
+    def create_classes_dashboard(parent_frame, school_data, week_folder):
+        """
+        Affiche les classes avec disposition dynamique.
+        Affiche toujours les cadres des écoles et horaires, même sans classes.
 
-                    # Gestion de la disposition des horaires
-                    horaire_col += 1
-                    if horaire_col >= horaires_per_row:
-                        horaire_col = 0
-                        horaire_row += 1
+        Met d'abord à jour les fichiers Excel des écoles avec les élèves assignés depuis
+        matrix.xlsx, seulement si matrix.xlsx ou un fichier d'école a changé depuis la
+        dernière synchronisation.
+        """
+        # 1) Synchroniser les fichiers des écoles (aucune écriture s'ils sont à jour)
+        if sync_school_files(week_folder):
+            # Des fichiers ont été écrits : relire les données des écoles
+            school_data = analyze_school_classes(week_folder)
 
-            current_row += 1
+        # 2) Afficher (sans lecture ni écriture de fichiers)
+        render_classes_dashboard(parent_frame, school_data, week_folder)
 
-        # Message si aucune école n'est affichée (toutes filtrées)
-        if current_row == 0:
-            no_data_frame = ctk.CTkFrame(
-                main_scrollable,
-                fg_color="white",
-                corner_radius=15,
-                border_width=2,
-                border_color="#e5e7eb"
-            )
-            no_data_frame.grid(row=0, column=0, sticky="ew", pady=20, padx=10)
+    def render_classes_dashboard(parent_frame, school_data, week_folder):
+        """
+        Affiche les classes d'une semaine déjà analysée (travail sur les widgets seulement).
 
-            no_data_label = ctk.CTkLabel(
-                no_data_frame,
-                text="🔍 Aucune école sélectionnée\n\nActivez au moins un filtre d'école pour afficher les données.",
-                font=("Arial", 13),
-                text_color="#6b7280",
-                justify="center"
-            )
-            no_data_label.pack(pady=30, padx=20)
-        
-        # Forcer une mise à jour complète à la fin pour afficher tous les widgets d'un coup
-        parent_frame.update_idletasks()
+        Les widgets du tableau de bord sont créés au premier affichage puis reconfigurés avec
+        les nouvelles données à chaque appel, au lieu d'être détruits et recréés. Les écoles
+        hors de la zone visible sont affichées progressivement (tableau_de_bord.py).
+        """
+        # Reconfigurer le tableau de bord (écoles cochées dans les filtres seulement) :
+        # les écoles visibles à la position de scroll sauvegardée d'abord, les autres ensuite
+        dashboard = get_classes_dashboard(parent_frame)
+        visible_schools = [school_name for school_name, var in school_filters.items() if var.get()]
+        week_number = dashboard_week_number(week_folder)
+        dashboard.render(school_data, visible_schools, week_folder,
+                         scroll_fraction=dashboard_scroll_positions.get(week_number, 0.0) if week_number else 0.0)
 
         # Restaurer la position de scroll sauvegardée
         def delayed_scroll_restore():
             try:
-                # Essayer de déterminer le numéro de semaine depuis le week_folder
-                week_number = None
-                try:
-                    import os
-                    week_folder_name = os.path.basename(week_folder)
-                    if week_folder_name.startswith('semaine_'):
-                        week_number = week_folder_name.split('_')[-1]
-                except:
-                    pass
-
-                restore_dashboard_scroll_position(main_scrollable, week_number)
+                restore_dashboard_scroll_position(dashboard.main_scrollable, week_number)
             except Exception as e:
                 print(f"[ERROR] Erreur restauration scroll: {str(e)[:50]}")
 
         parent_frame.after(200, delayed_scroll_restore)
 
-
     def clear_personnel_classes(week_folder):
         """
         Remet à zéro les classes assignées de tous les intervenants dans personnel.json.
@@ -2834,18 +2060,10 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
 
         try:
             # Ouvrir le fichier Excel
-            wb = load_workbook(excel_path)
-            target_sheet = None
-
-            # Chercher la feuille correspondant à l'horaire
-            for sheet_name in wb.sheetnames:
-                # Normaliser les noms pour la comparaison
-                sheet_normalized = sheet_name.lower().replace('animateur', '').replace('professeur', '').strip()
-                horaire_normalized = horaire.lower().strip()
+            wb = open_workbook(excel_path)
 
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
+            # Chercher la feuille correspondant à l'horaire (index des feuilles du classeur)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if target_sheet is None:
                 raise ValueError(f"Feuille horaire '{horaire}' non trouvée dans {excel_filename}")
@@ -2892,7 +2110,7 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
             matrix_path = os.path.join(week_folder, 'matrix.xlsx')
             if os.path.exists(matrix_path):
                 try:
-                    matrix_wb = load_workbook(matrix_path)
+                    matrix_wb = open_workbook(matrix_path)
                     matrix_sheet = matrix_wb.active  # Sheet1
 
                     # Pour chaque élève dans la liste, trouver sa ligne dans matrix.xlsx et supprimer Ecole, Horaire, Classe
@@ -2910,7 +2128,7 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
                                 break  # Passer au prochain élève une fois trouvé
 
                         # Sauvegarder le fichier matrix.xlsx
-                        matrix_wb.save(matrix_path)
+                        save_workbook(matrix_wb, matrix_path)
 
                 except Exception as e:
                     print(f"Erreur lors de la mise à jour de matrix.xlsx: {e}")
@@ -2918,11 +2136,13 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
                 print(f"Fichier matrix.xlsx non trouvé dans {week_folder}")
 
             # Supprimer les lignes en commençant par la fin pour éviter les décalages d'indices
+            # (via l'index des classes de la feuille, qui reste à jour)
+            class_index = get_class_index(target_sheet)
             for row_idx in reversed(rows_to_delete):
-                target_sheet.delete_rows(row_idx)
+                class_index.delete_rows(row_idx)
 
             # Sauvegarder le fichier
-            wb.save(excel_path)
+            save_workbook(wb, excel_path)
 
             # Mettre à jour personnel.json pour retirer les classes supprimées
             if classes_to_remove:
@@ -2976,40 +2196,17 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
 
         try:
             # Ouvrir le fichier Excel
-            wb = load_workbook(excel_path)
-            target_sheet = None
-
-            # Chercher la feuille correspondant à l'horaire
-            for sheet_name in wb.sheetnames:
-                # Normaliser les noms pour la comparaison
-                sheet_normalized = sheet_name.lower().replace('animateur', '').replace('professeur', '').strip()
-                horaire_normalized = horaire.lower().strip()
+            wb = open_workbook(excel_path)
 
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
+            # Chercher la feuille correspondant à l'horaire (index des feuilles du classeur)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if target_sheet is None:
                 raise ValueError(f"Feuille horaire '{horaire}' non trouvée dans {excel_filename}")
 
-            # Chercher la colonne "Classe" spécifiquement
-            classe_col = None
-            for col_idx in range(1, target_sheet.max_column + 1):
-                header_value = str(target_sheet.cell(row=1, column=col_idx).value or '').lower()
-                if 'classe' in header_value or 'class' in header_value:
-                    classe_col = col_idx
-                    break
-
-            # Chercher et supprimer la ligne de la classe
-            row_to_delete = None
-            for row_idx in range(2, target_sheet.max_row + 1):  # Commencer à la ligne 2 (après header)
-                for col_idx in range(1, target_sheet.max_column + 1):
-                    cell_value = str(target_sheet.cell(row=row_idx, column=col_idx).value or '').strip()
-                    if cell_value == classe_nom:
-                        row_to_delete = row_idx
-                        break
-                if row_to_delete:
-                    break
+            # Chercher la ligne de la classe à supprimer (index de la feuille)
+            class_index = get_class_index(target_sheet)
+            row_to_delete = class_index.find_row(classe_nom)
 
             if row_to_delete is None:
                 raise ValueError(f"Classe '{classe_nom}' non trouvée dans la feuille '{horaire}'")
@@ -3046,11 +2243,11 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
                 if eleves_value and eleves_value not in ['', 'nan', 'none']:
                     eleves_a_supprimer = [nom.strip() for nom in eleves_value.split(',') if nom.strip()]
 
-            # Supprimer la ligne
-            target_sheet.delete_rows(row_to_delete)
+            # Supprimer la ligne (l'index des classes reste à jour)
+            class_index.delete_rows(row_to_delete)
 
             # Sauvegarder le fichier
-            wb.save(excel_path)
+            save_workbook(wb, excel_path)
 
             # METTRE À JOUR LE MATRIX : retirer l'école, la classe et l'horaire des élèves supprimés
             if eleves_a_supprimer:
@@ -3079,7 +2276,7 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
             return
 
         try:
-            wb = load_workbook(matrix_path)
+            wb = open_workbook(matrix_path)
             ws = wb.active
 
             # Identifier les colonnes importantes
@@ -3132,7 +2329,7 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
                     updated_count += 1
 
             # Sauvegarder le fichier matrix
-            wb.save(matrix_path)
+            save_workbook(wb, matrix_path)
 
         except Exception as e:
             print(f"ERREUR lors de la mise a jour du matrix: {e}")
@@ -3281,96 +2478,88 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
             # Démarrer la suppression après un court délai
             app.after(10, perform_deletion)
 
-    def setup_classe_card_click(classe_card, classe_info, horaire, intervenant, type_intervenant, school_color, school_name, week_folder):
-        """Configure le clic sur une carte de classe"""
-        def on_click(event):
-            # Callback pour rafraîchir le dashboard
-            def refresh_dashboard_callback():
-                try:
-                    school_data = analyze_school_classes(week_folder)
-                    create_classes_dashboard(content, school_data, week_folder)
-                except Exception as e:
-                    print(f"Erreur lors du rafraîchissement du dashboard: {e}")
+    def open_classe_card(context):
+        """Ouvre le détail de la classe d'une carte du tableau de bord (clic)."""
+        week_folder = context['week_folder']
 
-            open_classe_details(classe_info, horaire, intervenant, type_intervenant, school_color, school_name, week_folder, refresh_dashboard_callback)
-
-        def on_right_click(event):
-            """Menu contextuel pour supprimer la classe"""
-            # Créer un menu contextuel
-            context_menu = ctk.CTkToplevel(app)
-            context_menu.title("")
-            context_menu.geometry("250x80")
-            context_menu.resizable(False, False)
-            context_menu.attributes("-topmost", True)
-            context_menu.overrideredirect(True)  # Pas de barre de titre
-
-            # Positionner le menu près du curseur
-            x, y = event.x_root, event.y_root
-            context_menu.geometry(f"+{x}+{y}")
-
-            # Variable pour suivre si le menu est encore valide
-            menu_destroyed = False
-
-            # Bouton de suppression
-            def safe_confirm_delete():
-                if not menu_destroyed and context_menu.winfo_exists():
-                    confirm_delete_class(context_menu, classe_info, horaire, school_name, week_folder)
-
-            delete_btn = ctk.CTkButton(
-                context_menu,
-                text="🗑️ Supprimer la classe",
-                fg_color="#dc2626",
-                hover_color="#b91c1c",
-                text_color="white",
-                command=safe_confirm_delete
-            )
-            delete_btn.pack(fill="both", expand=True, padx=10, pady=10)
-
-            # Fermer le menu si on clique ailleurs
-            def close_menu(event=None):
-                nonlocal menu_destroyed
-                if not menu_destroyed and context_menu.winfo_exists():
-                    menu_destroyed = True
-                    try:
-                        context_menu.destroy()
-                    except:
-                        pass  # Ignore les erreurs de destruction
-
-            # Gérer la fermeture propre
-            context_menu.bind("<FocusOut>", close_menu)
-
-            # Fermer aussi sur Escape ou clic ailleurs
-            def on_key_press(event):
-                if event.keysym == 'Escape':
-                    close_menu()
+        # Callback pour rafraîchir le dashboard
+        def refresh_dashboard_callback():
+            try:
+                school_data = analyze_school_classes(week_folder)
+                create_classes_dashboard(content, school_data, week_folder)
+            except Exception as e:
+                print(f"Erreur lors du rafraîchissement du dashboard: {e}")
+
+        open_classe_details(context['classe_info'], context['horaire'], context['intervenant'], context['type_intervenant'],
+                            context['school_color'], context['school_name'], week_folder, refresh_dashboard_callback)
+
+    def show_classe_card_menu(event, context):
+        """Menu contextuel pour supprimer la classe d'une carte du tableau de bord (clic droit)."""
+        classe_info = context['classe_info']
+        horaire = context['horaire']
+        school_name = context['school_name']
+        week_folder = context['week_folder']
+
+        # Créer un menu contextuel
+        context_menu = ctk.CTkToplevel(app)
+        context_menu.title("")
+        context_menu.geometry("250x80")
+        context_menu.resizable(False, False)
+        context_menu.attributes("-topmost", True)
+        context_menu.overrideredirect(True)  # Pas de barre de titre
+
+        # Positionner le menu près du curseur
+        x, y = event.x_root, event.y_root
+        context_menu.geometry(f"+{x}+{y}")
+
+        # Variable pour suivre si le menu est encore valide
+        menu_destroyed = False
+
+        # Bouton de suppression
+        def safe_confirm_delete():
+            if not menu_destroyed and context_menu.winfo_exists():
+                confirm_delete_class(context_menu, classe_info, horaire, school_name, week_folder)
+
+        delete_btn = ctk.CTkButton(
+            context_menu,
+            text="🗑️ Supprimer la classe",
+            fg_color="#dc2626",
+            hover_color="#b91c1c",
+            text_color="white",
+            command=safe_confirm_delete
+        )
+        delete_btn.pack(fill="both", expand=True, padx=10, pady=10)
 
-            context_menu.bind("<Key>", on_key_press)
-            context_menu.bind("<Button-1>", lambda e: close_menu() if not delete_btn.winfo_containing(e.x_root, e.y_root) else None)
+        # Fermer le menu si on clique ailleurs
+        def close_menu(event=None):
+            nonlocal menu_destroyed
+            if not menu_destroyed and context_menu.winfo_exists():
+                menu_destroyed = True
+                try:
+                    context_menu.destroy()
+                except:
+                    pass  # Ignore les erreurs de destruction
 
-            # Délai avant de donner le focus pour éviter les conflits
-            def focus_menu():
-                if not menu_destroyed and context_menu.winfo_exists():
-                    try:
-                        context_menu.focus_force()
-                    except:
-                        pass
+        # Gérer la fermeture propre
+        context_menu.bind("<FocusOut>", close_menu)
 
-            context_menu.after(10, focus_menu)
+        # Fermer aussi sur Escape ou clic ailleurs
+        def on_key_press(event):
+            if event.keysym == 'Escape':
+                close_menu()
 
-        classe_card.bind("<Button-1>", on_click)
-        classe_card.bind("<Button-3>", on_right_click)  # Clic droit
+        context_menu.bind("<Key>", on_key_press)
+        context_menu.bind("<Button-1>", lambda e: close_menu() if not delete_btn.winfo_containing(e.x_root, e.y_root) else None)
 
-        # Propager le clic aux widgets enfants
-        for child in classe_card.winfo_children():
-            bind_click_to_children(child, on_click)
-            # Propager aussi le clic droit
-            child.bind("<Button-3>", on_right_click)
+        # Délai avant de donner le focus pour éviter les conflits
+        def focus_menu():
+            if not menu_destroyed and context_menu.winfo_exists():
+                try:
+                    context_menu.focus_force()
+                except:
+                    pass
 
-    def bind_click_to_children(widget, click_func):
-        """Propage l'événement de clic à tous les enfants"""
-        widget.bind("<Button-1>", click_func)
-        for child in widget.winfo_children():
-            bind_click_to_children(child, click_func)
+        context_menu.after(10, focus_menu)
 
     # Callback pour changer le contenu du dashboard
     def show_loading_window_for_week_selection(parent_app):
@@ -3407,7 +2596,7 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
         )
         title_label.pack(pady=(20, 5))
 
-        # Texte principal
+        # Texte principal (étape en cours)
         text_label = ctk.CTkLabel(
             main_frame,
             text="Chargement des données de la semaine...",
@@ -3416,14 +2605,19 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
         )
         text_label.pack(pady=(0, 15))
 
-        # Petite icône de chargement fixe
-        loading_icon = ctk.CTkLabel(
+        # Barre de progression des étapes du chargement
+        progress_bar = ctk.CTkProgressBar(
             main_frame,
-            text="⏳",
-            font=("Arial", 24),
-            text_color="#3B82F6"
+            width=260,
+            mode="determinate",
+            progress_color="#3B82F6"
         )
-        loading_icon.pack(pady=(5, 0))
+        progress_bar.set(0)
+        progress_bar.pack(pady=(5, 0))
+
+        # Mis à jour par on_week_selected pendant le chargement
+        loading_popup.progress_label = text_label
+        loading_popup.progress_bar = progress_bar
 
         # La fenêtre sera fermée manuellement après le chargement complet
         # Pas de fermeture automatique ici
@@ -3609,147 +2803,108 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
 
         return loading_popup
 
+    # Chargement des semaines dans un thread de travail (un seul chargement à la fois)
+    week_pipeline = BackgroundPipeline(app)
+    week_loading = {'popup': None}
+
+    def close_week_loading_popup():
+        """Ferme la fenêtre de chargement de semaine affichée (s'il y en a une)."""
+        loading_popup = week_loading['popup']
+        week_loading['popup'] = None
+        try:
+            if loading_popup and loading_popup.winfo_exists():
+                loading_popup.destroy()
+        except:
+            pass
+
     def on_week_selected(week_label: str):
+        # Un chargement de semaine encore en cours est abandonné : son étape en cours se termine
+        # dans le thread de travail avant la première étape de la nouvelle semaine (taches_fond.py)
+        week_pipeline.cancel()
+        close_week_loading_popup()
+
+        # Étape 1 (thread Tk) : configuration initiale
+        try:
+            selected_week.set(week_label)
+            stop_matrix_watch()
+
+            # Changer la couleur des boutons
+            for btn_text, btn in week_buttons.items():
+                if btn_text == week_label:
+                    btn.configure(fg_color="#10b981", hover_color="#059669")
+                else:
+                    btn.configure(fg_color="#89B8E3", hover_color="#A1C9F1")
+
+            # Cacher le logo et afficher le header
+            logo_center.grid_remove()
+            header_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=(16, 8))
+            update_matrix_status()
+        except Exception as e:
+            print(f"Erreur lors de l'étape 1: {e}")
+            return
+
         # Afficher la fenêtre de chargement
         loading_popup = show_loading_window_for_week_selection(app)
+        week_loading['popup'] = loading_popup
 
-        # Forcer plusieurs mises à jour pour s'assurer que la fenêtre de chargement s'affiche immédiatement
-        loading_popup.update()
-        loading_popup.update_idletasks()
-        app.update()
-        app.update_idletasks()
+        week_num = week_label.split()[-1]
+        week_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"semaine_{week_num}")
+        matrix_path = _get_matrix_path_for_selected_week()
 
-        # Variable pour contrôler la boucle de mise à jour de l'animation
-        keep_animating = [True]  # Utiliser une liste pour permettre la modification dans les fonctions imbriquées
-        
-        def keep_animation_alive():
-            """Fonction récursive pour maintenir l'animation de la barre de progression"""
-            if keep_animating[0] and loading_popup and loading_popup.winfo_exists():
-                loading_popup.update()
-                app.update_idletasks()
-                app.after(50, keep_animation_alive)  # Mettre à jour toutes les 50ms
-        
-        # Démarrer la boucle d'animation
-        keep_animation_alive()
-        
-        # Démarrer le traitement après un très court délai pour permettre à la fenêtre de chargement de s'afficher
-        # On divise le traitement en étapes pour permettre à la barre de progression de rester animée
-        def step1_initial_setup():
-            """Étape 1 : Configuration initiale"""
+        # Étapes 2 et 3 (thread de travail) : lecture et analyse des fichiers, sans aucun widget
+        def read_matrix(results):
+            # Terminer une éventuelle transaction interrompue avant de lire les fichiers
+            if os.path.isdir(os.path.dirname(matrix_path)):
+                recover_week_transaction(os.path.dirname(matrix_path))
+            return analyze_matrix_file(matrix_path)
+
+        def sync_schools(results):
+            # Mettre à jour les fichiers Excel des écoles avec les élèves assignés dans matrix.xlsx
+            # (seulement s'ils ne sont pas déjà à jour)
+            return sync_school_files(week_folder)
+
+        def read_schools(results):
+            return analyze_school_classes(week_folder)
+
+        # Suivi dans le thread Tk
+        def on_progress(index, total, label):
+            if loading_popup.winfo_exists():
+                loading_popup.progress_label.configure(text=label)
+                loading_popup.progress_bar.set(index / total)
+
+        def on_result(name, result):
+            if name == 'matrix_stats':
+                update_header_counters(result)
+
+        def on_done(results):
+            # Étape 4 (thread Tk) : affichage du dashboard et surveillance du fichier matrix
             try:
-                selected_week.set(week_label)
-                stop_matrix_watch()
-                
-                # Changer la couleur des boutons
-                for btn_text, btn in week_buttons.items():
-                    if btn_text == week_label:
-                        btn.configure(fg_color="#10b981", hover_color="#059669")
-                    else:
-                        btn.configure(fg_color="#89B8E3", hover_color="#A1C9F1")
-                
-                # Cacher le logo et afficher le header
-                logo_center.grid_remove()
-                header_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=(16, 8))
-                update_matrix_status()
-                
-                # Passer à l'étape suivante
-                app.after(10, step2_analyze_data)
-            except Exception as e:
-                print(f"Erreur lors de l'étape 1: {e}")
-                keep_animating[0] = False
-                try:
-                    if loading_popup and loading_popup.winfo_exists():
-                        loading_popup.destroy()
-                except:
-                    pass
-        
-        def step2_analyze_data():
-            """Étape 2 : Analyser les données"""
-            try:
-                # Analyser le fichier matrix
-                matrix_path = _get_matrix_path_for_selected_week()
-                matrix_stats = analyze_matrix_file(matrix_path)
-                update_header_counters(matrix_stats)
-                
-                # Passer à l'étape suivante
-                app.after(10, step3_analyze_schools)
-            except Exception as e:
-                print(f"Erreur lors de l'étape 2: {e}")
-                keep_animating[0] = False
-                try:
-                    if loading_popup and loading_popup.winfo_exists():
-                        loading_popup.destroy()
-                except:
-                    pass
-        
-        def step3_analyze_schools():
-            """Étape 3 : Analyser les écoles"""
-            try:
-                # Analyser les données des écoles
-                week_num = week_label.split()[-1]
-                week_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"semaine_{week_num}")
-                school_data = analyze_school_classes(week_folder)
-                
-                # Passer à l'étape suivante
-                app.after(10, lambda: step4_create_dashboard(week_folder, school_data))
-            except Exception as e:
-                print(f"Erreur lors de l'étape 3: {e}")
-                keep_animating[0] = False
-                try:
-                    if loading_popup and loading_popup.winfo_exists():
-                        loading_popup.destroy()
-                except:
-                    pass
-        
-        def step4_create_dashboard(week_folder, school_data):
-            """Étape 4 : Créer le dashboard"""
-            try:
-                # Créer l'interface des classes
+                if loading_popup.winfo_exists():
+                    loading_popup.progress_label.configure(text="Affichage des classes...")
+                    loading_popup.progress_bar.set(1)
                 content.grid(row=1, column=0, sticky="nsew", padx=20, pady=(0, 20))
-                content.update_idletasks()
-                create_classes_dashboard(content, school_data, week_folder)
-                
-                # Passer à l'étape finale
-                app.after(10, step5_finalize)
-            except Exception as e:
-                print(f"Erreur lors de l'étape 4: {e}")
-                keep_animating[0] = False
-                try:
-                    if loading_popup and loading_popup.winfo_exists():
-                        loading_popup.destroy()
-                except:
-                    pass
-        
-        def step5_finalize():
-            """Étape 5 : Finalisation"""
-            try:
-                # Arrêter la boucle d'animation
-                keep_animating[0] = False
-                
-                # Forcer la mise à jour complète de l'interface
-                app.update_idletasks()
-                app.update()
-                
-                # Démarrer la surveillance du fichier matrix
+                render_classes_dashboard(content, results['school_data'], week_folder)
                 check_matrix_modifications()
-                
-                # Fermer la fenêtre de chargement
-                try:
-                    if loading_popup and loading_popup.winfo_exists():
-                        loading_popup.destroy()
-                except:
-                    pass
             except Exception as e:
-                print(f"Erreur lors de l'étape 5: {e}")
-                keep_animating[0] = False
-                try:
-                    if loading_popup and loading_popup.winfo_exists():
-                        loading_popup.destroy()
-                except:
-                    pass
-
-        # Démarrer le traitement après un très court délai (10ms) pour permettre à la fenêtre de chargement de s'afficher
-        app.after(10, step1_initial_setup)
+                print(f"Erreur lors de l'affichage de la semaine: {e}")
+            finally:
+                close_week_loading_popup()
+
+        def on_error(error):
+            print(f"Erreur lors du chargement de la semaine: {error}")
+            close_week_loading_popup()
+
+        week_pipeline.run(
+            [
+                ('matrix_stats', "Lecture du fichier matrix...", read_matrix),
+                ('school_files', "Mise à jour des fichiers des écoles...", sync_schools),
+                ('school_data', "Analyse des classes des écoles...", read_schools),
+            ],
+            on_progress=on_progress,
+            on_result=on_result,
+            on_done=on_done,
+            on_error=on_error
+        )
 
     # Création des 9 boutons de semaine
     for i in range(1, 10):
@@ -3774,6 +2929,17 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
     def on_app_closing():
         """Gère la fermeture propre de l'application."""
         stop_matrix_watch()
+        # Attendre la fin de l'étape en cours (synchronisation des écoles...) avant l'export et la fermeture
+        week_pipeline.shutdown(wait=True)
+
+        # Régénérer les fichiers Excel de la semaine depuis la base SQLite (si elle est activée)
+        week_label = selected_week.get()
+        if week_label:
+            try:
+                export_week_to_excel(os.path.dirname(_get_matrix_path_for_selected_week()))
+            except Exception as e:
+                print(f"Erreur lors de l'export Excel de la semaine: {e}")
+
         app.destroy()
 
     # Bouton déconnexion / quitter
@@ -3984,6 +3150,14 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
 
         week_num = week_label.split()[-1]
         week_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"semaine_{week_num}")
+
+        # Un changement de filtre ne modifie aucun fichier : réafficher les données déjà lues
+        dashboard = getattr(content, 'classes_dashboard', None)
+        if dashboard is not None and dashboard.exists() and dashboard.week_folder == week_folder \
+                and dashboard.school_data is not None:
+            render_classes_dashboard(content, dashboard.school_data, week_folder)
+            return
+
         school_data = analyze_school_classes(week_folder)
 
         # Créer l'interface des classes avec les filtres
@@ -4003,7 +3177,10 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
         if os.path.exists(matrix_path):
             try:
                 # Obtenir le timestamp de dernière modification
-                current_mtime = os.path.getmtime(matrix_path)
+                # (ou le compteur de modifications de la base SQLite si elle est activée)
+                current_mtime = get_week_generation(os.path.dirname(matrix_path))
+                if current_mtime is None:
+                    current_mtime = os.path.getmtime(matrix_path)
                 
                 # Vérifier si le fichier a été modifié
                 if matrix_path in matrix_last_modified:
@@ -4020,17 +3197,15 @@ def open_main_window(username: str, screen_width: int, screen_height: int) -> No
                         week_num = week_label.split()[-1]
                         week_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"semaine_{week_num}")
                         
-                        # 1) Analyser les assignations depuis matrix.xlsx
-                        matrix_assignments = analyze_matrix_assignments(matrix_path)
-                        
-                        # 2) Mettre à jour les fichiers Excel des écoles avec les élèves assignés
-                        update_school_files_with_assignments(week_folder, matrix_assignments)
+                        # 1) Mettre à jour les fichiers Excel des écoles avec les élèves assignés
+                        #    (seulement les fichiers dont les affectations ont changé)
+                        sync_school_files(week_folder)
                         
-                        # 3) Analyser à nouveau les données des écoles (avec les nouvelles données)
+                        # 2) Analyser à nouveau les données des écoles (avec les nouvelles données)
                         school_data = analyze_school_classes(week_folder)
                         
-                        # 4) Recréer complètement l'interface des classes
-                        create_classes_dashboard(content, school_data, week_folder)
+                        # 3) Réafficher l'interface des classes (sans nouvelle synchronisation)
+                        render_classes_dashboard(content, school_data, week_folder)
                         
                         print(f"Rafraichissement termine - Dashboard mis a jour avec les nouveaux nombres d'eleves")
                 else:
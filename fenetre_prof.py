@@ -6,6 +6,12 @@ try:
     from openpyxl import load_workbook
 except ImportError:
     load_workbook = None
+from stockage_semaine import (open_workbook, save_workbook, iter_workbook_rows, load_personnel_data,
+                              save_personnel_data)
+from schema_colonnes import SCHOOL_SCHEMA, resolve_column_indexes
+from index_horaires import clean_horaire_name, find_horaire_sheet
+from index_classes import get_class_index
+from recherche_differee import DebouncedSearch
 
 class PersonnelManager(ctk.CTkToplevel):
 
@@ -58,14 +64,15 @@ class PersonnelManager(ctk.CTkToplevel):
 
     # ---------- DATA & LOGIC ----------
     def _load_data(self):
-        if not os.path.exists(self.personnel_path):
-            self.data = {"professeurs": [], "animateurs": []}
-            return
         try:
-            with open(self.personnel_path, "r", encoding="utf-8") as f:
-                self.data = json.load(f)
+            # personnel.json, ou la base SQLite de la semaine si elle est activée
+            self.data = load_personnel_data(self.week_folder)
         except:
+            self.data = None
+
+        if self.data is None:
             self.data = {"professeurs": [], "animateurs": []}
+            return
 
         # Migration: convertir l'ancien format (liste de strings) vers le nouveau (liste de dicts)
         self._migrate_data_format()
@@ -94,8 +101,7 @@ class PersonnelManager(ctk.CTkToplevel):
             self.data[personnel_type] = migrated_list
 
     def _save_data(self):
-        with open(self.personnel_path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        save_personnel_data(self.week_folder, self.data)
 
     def _get_available_weeks(self):
         parent_dir = os.path.dirname(self.week_folder)
@@ -188,7 +194,7 @@ class PersonnelManager(ctk.CTkToplevel):
 
                     try:
                         # Ouvrir le fichier Excel
-                        wb = load_workbook(excel_path)
+                        wb = open_workbook(excel_path)
 
                         # Pour chaque feuille du fichier
                         for sheet_name in wb.sheetnames:
@@ -228,7 +234,7 @@ class PersonnelManager(ctk.CTkToplevel):
                                             sheet.cell(row=row_idx, column=intervenant_col, value="Non spécifié")
 
                         # Sauvegarder le fichier
-                        wb.save(excel_path)
+                        save_workbook(wb, excel_path)
                         print(f"✅ Fichier {filename} mis à jour pour {professor_name}")
 
                     except Exception as e:
@@ -273,18 +279,10 @@ class PersonnelManager(ctk.CTkToplevel):
 
         try:
             # Ouvrir le fichier Excel
-            wb = load_workbook(excel_path)
-
-            # Chercher la feuille correspondant à l'horaire
-            target_sheet = None
-            for sheet_name in wb.sheetnames:
-                # Normaliser les noms pour la comparaison
-                sheet_normalized = sheet_name.lower().replace('animateur', '').replace('professeur', '').strip()
-                horaire_normalized = horaire.lower().strip()
+            wb = open_workbook(excel_path)
 
-                if sheet_normalized == horaire_normalized or horaire_normalized in sheet_normalized:
-                    target_sheet = wb[sheet_name]
-                    break
+            # Chercher la feuille correspondant à l'horaire (index des feuilles du classeur)
+            target_sheet = find_horaire_sheet(wb, horaire)
 
             if target_sheet is None:
                 print(f"Feuille horaire '{horaire}' non trouvée dans {excel_filename}")
@@ -303,28 +301,14 @@ class PersonnelManager(ctk.CTkToplevel):
 
             # Si on a trouvé les colonnes nécessaires
             if intervenant_col and classe_col:
-                # Chercher la ligne de la classe spécifique
-                for row_idx in range(2, target_sheet.max_row + 1):
-                    # Vérifier si la ligne contient des données
-                    has_data = False
-                    for col_idx in range(1, target_sheet.max_column + 1):
-                        cell_value = str(target_sheet.cell(row=row_idx, column=col_idx).value or '').strip()
-                        if cell_value:
-                            has_data = True
-                            break
-
-                    if has_data:
-                        # Récupérer le nom de la classe
-                        current_classe_nom = str(target_sheet.cell(row=row_idx, column=classe_col).value or '').strip()
-
-                        # Si c'est la classe qu'on cherche
-                        if current_classe_nom == classe_nom:
-                            # Assigner le professeur
-                            target_sheet.cell(row=row_idx, column=intervenant_col, value=professor_name)
-                            break
+                # Chercher la ligne de la classe spécifique (index de la feuille)
+                classe_row = get_class_index(target_sheet).find_row(classe_nom)
+                if classe_row is not None:
+                    # Assigner le professeur
+                    target_sheet.cell(row=classe_row, column=intervenant_col, value=professor_name)
 
             # Sauvegarder le fichier
-            wb.save(excel_path)
+            save_workbook(wb, excel_path)
             print(f"✅ Classe '{classe_nom}' assignée à {professor_name} dans {excel_filename}")
 
         except Exception as e:
@@ -456,7 +440,8 @@ class PersonnelManager(ctk.CTkToplevel):
         ctk.CTkLabel(header_frame, text="🔍", font=("Inter", 14), text_color="#6B7280").grid(row=0, column=3, padx=(0, 5))
 
         self.search_var = ctk.StringVar()
-        self.search_var.trace_add("write", lambda *args: self._refresh_list())
+        # Frappes regroupées : la grille n'est reconstruite qu'après une courte pause de saisie
+        self.search_controller = DebouncedSearch(self, self.search_var, lambda request: self._refresh_list())
 
         self.search_entry = ctk.CTkEntry(
             header_frame,
@@ -1036,10 +1021,6 @@ class PersonnelManager(ctk.CTkToplevel):
     def _analyze_school_classes(self, week_folder):
         """Analyse les fichiers Excel d'écoles pour une semaine donnée (version adaptée pour professeurs)."""
         import os
-        try:
-            import pandas as pd
-        except ImportError:
-            return {}
 
         result = {
             'ecole_a': [],
@@ -1068,41 +1049,22 @@ class PersonnelManager(ctk.CTkToplevel):
                 return
 
             try:
-                # Lire toutes les feuilles du fichier
-                xl_file = pd.ExcelFile(excel_path)
-                sheet_names = xl_file.sheet_names
-
-                for sheet_name in sheet_names:
+                # Lecture seule ligne par ligne (tuples de valeurs, cache partagé : une seule lecture tant que le fichier ne change pas)
+                for sheet_name, headers, rows in iter_workbook_rows(excel_path):
                     try:
-                        df = pd.read_excel(excel_path, sheet_name=sheet_name)
-
-                        if df.empty:
-                            # La feuille est vide mais on garde l'horaire
-                            horaire = self._clean_horaire_name(sheet_name)
-                            result[school_key].append({
-                                'horaire': horaire or sheet_name,
-                                'classes': []
-                            })
-                            continue
-
-                        # Analyser et nettoyer le nom de la feuille
-                        horaire = self._clean_horaire_name(sheet_name)
-
-                        # Chercher les colonnes de classes
-                        classe_cols = []
-                        for col in df.columns:
-                            col_lower = str(col).lower()
-                            if any(keyword in col_lower for keyword in ['classe', 'groupe', 'section']):
-                                classe_cols.append(col)
+                        # Analyser et nettoyer le nom de la feuille (feuille vide : l'horaire est quand même gardé)
+                        horaire = clean_horaire_name(sheet_name)
+
+                        # Colonne des classes (schéma partagé des feuilles d'écoles)
+                        classe_col = resolve_column_indexes(headers, SCHOOL_SCHEMA)["Classe"]
 
                         classes_info = []
-                        for _, row in df.iterrows():
+                        for row in rows:
                             classe_nom = None
-                            for col in classe_cols:
-                                val = str(row.get(col, '')).strip()
+                            if classe_col is not None and classe_col < len(row) and row[classe_col] is not None:
+                                val = str(row[classe_col]).strip()
                                 if val and val.lower() not in ['', 'nan', 'none']:
                                     classe_nom = val
-                                    break
 
                             if classe_nom:
                                 classes_info.append({
@@ -1135,26 +1097,6 @@ class PersonnelManager(ctk.CTkToplevel):
 
         return result
 
-    def _clean_horaire_name(self, sheet_name):
-        """Nettoie le nom de la feuille pour extraire le nom d'horaire de manière cohérente."""
-        # Liste complète des mots à supprimer
-        words_to_remove = [
-            "animateur", "Animateur", "anim", "Anim",
-            "professeur", "Professeur", "prof", "Prof",
-            "Rôle", "rôle", "role", "Role"
-        ]
-
-        # Nettoyer le nom en supprimant tous les mots-clés d'intervenants
-        horaire = sheet_name
-        for word in words_to_remove:
-            horaire = horaire.replace(word, "")
-
-        # Nettoyer les espaces multiples et supprimer les espaces au début/fin
-        horaire = " ".join(horaire.split()).strip()
-
-        # Si le résultat est vide, utiliser le nom original
-        return horaire or sheet_name
-
     def _display_school_data_in_prof_menu(self, parent_frame, school_data, professor_name, menu, close_menu_func):
         """Affiche les données des écoles dans le menu d'assignation pour professeurs."""
         # Mapping pour les noms d'affichage et couleurs
@@ -0,0 +1,260 @@
+"""
+Colonnes d'affichage et filtres du tableau des élèves (Assignation des Niveaux).
+
+Les valeurs affichées (dates JJ/MM, indicateur CI, âge numérique...) sont calculées une
+seule fois par chargement des données, dans l'ordre alphabétique des élèves. Les filtres
+actifs sont ensuite évalués en un seul masque booléen sur ces colonnes, sans parcourir
+le DataFrame ligne par ligne ; la recherche par nom passe par l'index de n-grammes
+(index_recherche.py), sans distinction d'accents ni de casse.
+
+Quand des cellules du DataFrame sont modifiées sur place (niveau, classe...), seules
+les lignes concernées sont recalculées avec update_rows(). Un ajout ou une suppression
+d'élèves nécessite rebuild().
+"""
+import re
+from datetime import datetime
+from functools import lru_cache
+
+from index_recherche import NgramIndex
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = None
+    pd = None
+
+# Colonnes du tableau, dans l'ordre des colonnes du Treeview
+DISPLAY_COLUMNS = ("nom", "niveau", "age", "classe", "prof", "arrivee", "depart", "sep",
+                   "ci", "classe_ci", "prof_ci", "depart_ci", "arrivee_ci")
+
+_DATE_PATTERN = re.compile(r'(\d{1,2})/(\d{1,2})(?:/\d{4})?(?:\s+\d{1,2}:\d{1,2}(?::\d{1,2})?)?')
+_DATE_FORMATS = (
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y'
+)
+
+
+@lru_cache(maxsize=4096)
+def _format_date_text(date_clean):
+    # Si c'est déjà au format JJ/MM, le retourner tel quel
+    if len(date_clean) == 5 and date_clean[2] == '/':
+        return date_clean
+
+    # Chercher un pattern JJ/MM/YYYY ou JJ/MM/YYYY HH:MM:SS
+    match = _DATE_PATTERN.search(date_clean)
+    if match:
+        return f"{match.group(1).zfill(2)}/{match.group(2).zfill(2)}"
+
+    # Essayer différents formats courants
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(date_clean, fmt).strftime('%d/%m')
+        except ValueError:
+            continue
+
+    # Si rien ne marche, retourner la valeur originale nettoyée
+    return date_clean
+
+
+def format_date_jour_mois(date_str):
+    """Formate une date pour afficher seulement le jour et le mois (JJ/MM)."""
+    if date_str is None or pd.isna(date_str) or str(date_str).strip() == "":
+        return ""
+    return _format_date_text(str(date_str).strip())
+
+
+def _column(df, col):
+    """Valeurs d'une colonne (None partout si la colonne n'existe pas)."""
+    if not col or col not in df.columns:
+        return [None] * len(df)
+    return df[col].tolist()
+
+
+def _is_missing(value):
+    return value is None or (not isinstance(value, str) and pd.isna(value))
+
+
+def _texts(values):
+    return [("" if _is_missing(value) else str(value)) for value in values]
+
+
+def _dates(values):
+    # Peu de dates différentes dans une semaine : une mise en forme par valeur distincte
+    formatted = {}
+    result = []
+    for value in values:
+        if _is_missing(value):
+            result.append("")
+            continue
+        key = (type(value), value)
+        if key not in formatted:
+            formatted[key] = format_date_jour_mois(value)
+        result.append(formatted[key])
+    return result
+
+
+def display_columns(df, cols_map):
+    """
+    Colonnes d'affichage des lignes d'un DataFrame matrix.
+
+    Returns:
+        dict: colonne de DISPLAY_COLUMNS (plus "age_num") → liste de valeurs
+    """
+    noms = [str(value) for value in _column(df, cols_map["Stagiaire"])]
+    ages = _column(df, cols_map.get("Âge"))
+    departs_ci = _column(df, cols_map["Départ CI"])
+    return {
+        "nom": noms,
+        "niveau": _texts(_column(df, cols_map["Niveau"])),
+        # Valeur brute affichée telle quelle, version numérique pour le filtre par âge
+        "age": ["" if cols_map.get("Âge") is None else age for age in ages],
+        "classe": _texts(_column(df, cols_map["Classe"])),
+        "prof": _texts(_column(df, cols_map["Prof"])),
+        "arrivee": _dates(_column(df, cols_map["Arrivée"])),
+        "depart": _dates(_column(df, cols_map["Départ"])),
+        "sep": [""] * len(df),
+        # CI = "OUI" si la date de départ CI est renseignée
+        "ci": [("" if _is_missing(value) or str(value).strip() == "" else "OUI") for value in departs_ci],
+        "classe_ci": _texts(_column(df, cols_map["Classe CI"])),
+        "prof_ci": _texts(_column(df, cols_map["Prof CI"])),
+        "depart_ci": _dates(departs_ci),
+        "arrivee_ci": _dates(_column(df, cols_map["Arrivée CI"])),
+        "age_num": pd.to_numeric(pd.Series(ages, dtype=object), errors="coerce").astype(float).tolist(),
+    }
+
+
+class StudentFilterEngine:
+    """Valeurs d'affichage triées par nom et filtres vectorisés du tableau des élèves."""
+
+    def __init__(self, df, cols_map, search_index=None):
+        """
+        Args:
+            df: DataFrame matrix (modifié sur place par l'application)
+            cols_map (dict): Rôle de colonne → nom de colonne du DataFrame
+            search_index: NgramIndex des noms par étiquette de ligne (construit ici si absent)
+        """
+        self.df = df
+        self.cols_map = cols_map
+        if search_index is None:
+            search_index = NgramIndex.from_items(df.index, _column(df, cols_map["Stagiaire"]))
+        self.search_index = search_index
+        self.rebuild()
+
+    def rebuild(self):
+        """Recalcule toutes les colonnes d'affichage (chargement, ajout ou suppression d'élèves)."""
+        df_sorted = self.df.sort_values(by=self.cols_map["Stagiaire"])
+        self.frame = pd.DataFrame(display_columns(df_sorted, self.cols_map), index=df_sorted.index, dtype=object)
+        self.frame["age_num"] = self.frame["age_num"].astype(float)
+        self._reset_caches()
+
+    def _reset_caches(self):
+        self._assigned_count = None
+
+    def update_rows(self, labels):
+        """Recalcule les colonnes d'affichage des lignes modifiées sur place."""
+        labels = [label for label in labels if label in self.frame.index]
+        if not labels:
+            return
+        columns = display_columns(self.df.loc[labels], self.cols_map)
+        for name, values in columns.items():
+            self.frame.loc[labels, name] = pd.Series(values, index=labels, dtype=self.frame[name].dtype)
+        self._reset_caches()
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def assigned_count(self):
+        """Nombre d'élèves ayant un niveau (recalculé seulement après une modification)."""
+        if self._assigned_count is None:
+            self._assigned_count = int((self.frame["niveau"] != "").sum())
+        return self._assigned_count
+
+    def counts(self, mask):
+        """Compteurs du tableau pour un masque de filtres : total, avec / sans niveau, filtrés."""
+        total = len(self.frame)
+        return {
+            'total': total,
+            'assigned': self.assigned_count,
+            'unassigned': total - self.assigned_count,
+            'filtered': int(mask.sum()),
+        }
+
+    def mask(self, search="", levels=(), ages=(), ci_avec=False, ci_sans=False, no_level=False):
+        """
+        Masque booléen (dans l'ordre alphabétique) des élèves qui passent tous les filtres.
+
+        Args:
+            search (str): Texte recherché dans le nom (sans distinction d'accents ni de casse)
+            levels: Niveaux acceptés (tous si vide)
+            ages: Tranches d'âge (min, max) acceptées (toutes si vide)
+            ci_avec, ci_sans (bool): Élèves avec / sans cours intensif
+            no_level (bool): Seulement les élèves sans niveau
+        """
+        frame = self.frame
+        mask = np.ones(len(frame), dtype=bool)
+        if search.strip():
+            mask &= self._search_mask(search)
+        if levels:
+            mask &= frame["niveau"].isin(list(levels)).to_numpy(dtype=bool)
+        if ages:
+            age_num = frame["age_num"].to_numpy(dtype=float)
+            in_ages = np.zeros(len(frame), dtype=bool)
+            for low, high in ages:
+                in_ages |= (age_num >= low) & (age_num <= high)
+            mask &= in_ages
+        if ci_avec or ci_sans:
+            ci = frame["ci"].to_numpy(dtype=object)
+            ci_mask = np.zeros(len(frame), dtype=bool)
+            if ci_avec:
+                ci_mask |= ci == "OUI"
+            if ci_sans:
+                ci_mask |= ci != "OUI"
+            mask &= ci_mask
+        if no_level:
+            mask &= (frame["niveau"] == "").to_numpy(dtype=bool)
+        return mask
+
+    def _search_mask(self, search):
+        """Élèves dont le nom contient search, d'après l'index de n-grammes."""
+        result = np.zeros(len(self.frame), dtype=bool)
+        found = self.search_index.search(search)
+        if found:
+            positions = self.frame.index.get_indexer(list(found))
+            result[positions[positions >= 0]] = True
+        return result
+
+    def records(self, mask, limit=None):
+        """Valeurs d'affichage des lignes retenues (dicts par colonne), dans l'ordre alphabétique."""
+        frame = self.frame[mask]
+        if limit is not None:
+            frame = frame.head(limit)
+        return frame.to_dict('records')
+
+    def labels(self, mask=None):
+        """Étiquettes des lignes retenues, dans l'ordre alphabétique."""
+        index = self.frame.index if mask is None else self.frame.index[mask]
+        return index.tolist()
+
+    def rows(self, mask=None):
+        """Étiquette, valeurs (tuple pour le Treeview) et niveau des lignes retenues, dans l'ordre alphabétique."""
+        return self._rows(self.frame if mask is None else self.frame[mask])
+
+    def rows_for(self, labels):
+        """Comme rows(), pour des étiquettes données (fenêtre visible d'un tableau virtuel)."""
+        return self._rows(self.frame.loc[list(labels)])
+
+    def names(self, labels):
+        """Noms affichés des lignes données."""
+        return self.frame.loc[list(labels), "nom"].tolist()
+
+    @staticmethod
+    def _rows(frame):
+        values = zip(*(frame[name].tolist() for name in DISPLAY_COLUMNS))
+        return [(label, row, row[1]) for label, row in zip(frame.index, values)]
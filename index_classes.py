@@ -0,0 +1,137 @@
+"""
+Index des lignes de classes d'une feuille d'école (une feuille par horaire).
+
+Une seule lecture de la feuille donne :
+  - nom de classe → numéro de ligne (la première ligne l'emporte en cas de doublon) ;
+  - en-tête → numéro de colonne, et rôle du schéma partagé (SCHOOL_SCHEMA) → colonne.
+
+L'index est mémorisé par objet feuille : toutes les mises à jour faites sur un même
+classeur ouvert (transaction, base SQLite, cache de lecture) le réutilisent.
+Pour qu'il reste à jour, les ajouts, suppressions et renommages de classes passent par
+append_class(), set_class(), insert_rows(), delete_rows() et rename_class(). Une ligne qui ne
+correspond plus à son nom, ou un nombre de lignes modifié ailleurs, provoque une
+reconstruction.
+"""
+import weakref
+
+from schema_colonnes import SCHOOL_SCHEMA, resolve_column_indexes
+
+_indexes = weakref.WeakKeyDictionary()
+
+
+def _text(value):
+    return str(value or '').strip()
+
+
+class ClassRowIndex:
+    """Index nom de classe → ligne et en-tête → colonne d'une feuille (indices à partir de 1)."""
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.rebuild()
+
+    def rebuild(self):
+        """Relit la feuille en une seule passe."""
+        rows = self.sheet.iter_rows(values_only=True)
+        headers = next(rows, None)
+        self.headers = tuple(headers) if headers is not None else ()
+        self.header_columns = {}
+        for col_idx, header in enumerate(self.headers, start=1):
+            if _text(header):
+                self.header_columns.setdefault(_text(header), col_idx)
+        self.columns = {role: idx + 1 if idx is not None else None
+                        for role, idx in resolve_column_indexes(self.headers, SCHOOL_SCHEMA).items()}
+        # Colonne "Nom de la classe" (colonne 1 si l'en-tête n'est pas reconnu)
+        self.classe_col = self.columns["Classe"] or 1
+
+        self._rows = {}
+        self._has_duplicates = False
+        for row_idx, values in enumerate(rows, start=2):
+            name = _text(values[self.classe_col - 1]) if self.classe_col <= len(values) else ''
+            if name:
+                self._has_duplicates |= name in self._rows
+                self._rows.setdefault(name, row_idx)
+        self._max_row = self.sheet.max_row
+
+    def column(self, name):
+        """Colonne d'un rôle du schéma ("Niveau", "Rôle"...) ou d'un en-tête exact, sinon None."""
+        return self.columns.get(name) or self.header_columns.get(name)
+
+    def _is_current(self):
+        return self.sheet.max_row == self._max_row
+
+    def find_row(self, classe_nom):
+        """Ligne de la classe, ou None si elle n'existe pas dans la feuille."""
+        name = _text(classe_nom)
+        row_idx = self._rows.get(name)
+        if row_idx is not None and _text(self.sheet.cell(row=row_idx, column=self.classe_col).value) == name:
+            return row_idx
+        if row_idx is not None or not self._is_current():
+            self.rebuild()
+            return self._rows.get(name)
+        return None
+
+    def class_names(self):
+        """Noms des classes dans l'ordre des lignes."""
+        if not self._is_current():
+            self.rebuild()
+        return [name for name, _ in sorted(self._rows.items(), key=lambda item: item[1])]
+
+    def set_class(self, row_idx, classe_nom):
+        """Écrit le nom d'une classe sur une ligne (existante ou nouvelle) et l'ajoute à l'index."""
+        if not self._is_current():
+            self.rebuild()
+        self.sheet.cell(row=row_idx, column=self.classe_col, value=classe_nom)
+        self._rows.setdefault(_text(classe_nom), row_idx)
+        self._max_row = self.sheet.max_row
+        return row_idx
+
+    def append_class(self, classe_nom):
+        """Ajoute une ligne à la fin de la feuille pour une nouvelle classe et retourne son numéro."""
+        if not self._is_current():
+            self.rebuild()
+        return self.set_class(self.sheet.max_row + 1, classe_nom)
+
+    def rename_class(self, ancien_nom, nouveau_nom):
+        """Renomme une classe ; retourne sa ligne, ou None si elle n'existe pas."""
+        row_idx = self.find_row(ancien_nom)
+        if row_idx is None:
+            return None
+        self.sheet.cell(row=row_idx, column=self.classe_col, value=nouveau_nom)
+        del self._rows[_text(ancien_nom)]
+        self._rows.setdefault(_text(nouveau_nom), row_idx)
+        return row_idx
+
+    def _shift(self, start, delta):
+        self._rows = {name: row_idx + delta if row_idx >= start else row_idx
+                      for name, row_idx in self._rows.items()}
+
+    def delete_rows(self, row_idx, amount=1):
+        """Supprime des lignes de la feuille et décale les lignes suivantes dans l'index."""
+        if not self._is_current():
+            self.rebuild()
+        self.sheet.delete_rows(row_idx, amount)
+        if self._has_duplicates:
+            # Un doublon masqué par la ligne supprimée doit redevenir visible
+            self.rebuild()
+            return
+        self._rows = {name: row for name, row in self._rows.items() if not row_idx <= row < row_idx + amount}
+        self._shift(row_idx + amount, -amount)
+        self._max_row = self.sheet.max_row
+
+    def insert_rows(self, row_idx, amount=1):
+        """Insère des lignes vides dans la feuille et décale les lignes suivantes dans l'index."""
+        if not self._is_current():
+            self.rebuild()
+        self.sheet.insert_rows(row_idx, amount)
+        self._shift(row_idx, amount)
+        self._max_row = self.sheet.max_row
+
+
+def get_class_index(sheet):
+    """Index des classes de la feuille (construit au premier appel, puis réutilisé)."""
+    index = _indexes.get(sheet)
+    if index is None:
+        index = ClassRowIndex(sheet)
+        _indexes[sheet] = index
+    return index
@@ -0,0 +1,90 @@
+"""
+Index des élèves du fichier matrix : nom normalisé → lignes.
+
+Les noms sont comparés sans distinction de casse ni d'espaces multiples.
+L'index d'un DataFrame contient les étiquettes de lignes (utilisables directement
+avec df.loc[etiquettes, colonne]) et n'est reconstruit qu'au rechargement ou quand
+des lignes sont ajoutées ou supprimées. L'index d'une feuille Excel contient les
+numéros de lignes (à partir de 1) et est mémorisé par objet feuille.
+"""
+import weakref
+
+_sheet_indexes = weakref.WeakKeyDictionary()
+
+
+def normalize_student_name(name):
+    """Clé de recherche d'un nom d'élève (vide pour None ou NaN)."""
+    if name is None or (isinstance(name, float) and name != name):
+        return ""
+    return " ".join(str(name).split()).casefold()
+
+
+class StudentNameIndex:
+    """Nom d'élève normalisé → étiquettes (ou numéros) de ses lignes, dans l'ordre du fichier."""
+
+    def __init__(self, labels, names):
+        self._labels = {}
+        for label, name in zip(labels, names):
+            key = normalize_student_name(name)
+            if key:
+                self._labels.setdefault(key, []).append(label)
+
+    @classmethod
+    def from_dataframe(cls, df, name_col):
+        """Index des étiquettes de lignes d'un DataFrame d'après la colonne des noms."""
+        if not name_col or name_col not in df.columns:
+            return cls((), ())
+        return cls(df.index, df[name_col].tolist())
+
+    def __contains__(self, name):
+        return normalize_student_name(name) in self._labels
+
+    def __len__(self):
+        return len(self._labels)
+
+    def labels(self, name):
+        """Lignes de l'élève (liste vide s'il est absent)."""
+        return list(self._labels.get(normalize_student_name(name), ()))
+
+    def labels_for(self, names):
+        """Lignes de plusieurs élèves (sans doublons), pour une seule mise à jour df.loc."""
+        found = {}
+        for name in names:
+            for label in self._labels.get(normalize_student_name(name), ()):
+                found[label] = None
+        return list(found)
+
+    def labels_matching(self, names):
+        """
+        Comme labels_for(), avec une recherche partielle (un nom contenu dans l'autre)
+        pour les seuls noms absents de l'index.
+        """
+        found = dict.fromkeys(self.labels_for(names))
+        missing = {normalize_student_name(name) for name in names} - self._labels.keys() - {""}
+        if missing:
+            for key, labels in self._labels.items():
+                if any(key in target or target in key for target in missing):
+                    found.update(dict.fromkeys(labels))
+        return list(found)
+
+
+def get_sheet_student_index(ws, name_col):
+    """
+    Index nom → numéros de lignes d'une feuille matrix (lignes de données à partir de 2).
+
+    Args:
+        ws: Feuille (openpyxl, cache de lecture ou base SQLite)
+        name_col (int): Colonne des noms, à partir de 1
+
+    L'index est réutilisé tant que la feuille garde le même nombre de lignes.
+    """
+    cached = _sheet_indexes.get(ws)
+    signature = (name_col, ws.max_row)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    names = [row[name_col - 1] if len(row) >= name_col else None
+             for row in ws.iter_rows(min_row=2, values_only=True)]
+    index = StudentNameIndex(range(2, len(names) + 2), names)
+    _sheet_indexes[ws] = (signature, index)
+    return index
@@ -0,0 +1,101 @@
+"""
+Normalisation des noms d'horaires et index horaire → feuille des fichiers d'écoles.
+
+Chaque fichier d'école contient une feuille par horaire, dont le nom inclut le
+type d'intervenant ("9h à 12h20 Prof", "10h30 à 11h30 Animateur").
+clean_horaire_name() est l'unique nettoyage de ces noms ; find_horaire_sheet()
+retrouve la feuille d'un horaire grâce à un index construit une seule fois par
+liste de feuilles, puis réutilisé par toutes les mises à jour d'un même classeur.
+
+Recherche d'une feuille (ordre de priorité) :
+  1. même horaire normalisé (ex : "9h à 12h20" → "9h à 12h20 Prof") ;
+  2. mêmes nombres dans le même ordre (ex : "8h15 - 10h15" → "8h15 à 10h15 Professeur") ;
+  3. un horaire contenu dans l'autre.
+En cas d'égalité, la première feuille du classeur l'emporte.
+"""
+import re
+from functools import lru_cache
+
+# Mots-clés d'intervenants retirés des noms de feuilles (les plus longs d'abord)
+WORDS_TO_REMOVE = (
+    "animateur", "Animateur", "anim", "Anim",
+    "professeur", "Professeur", "prof", "Prof",
+    "Rôle", "rôle", "role", "Role",
+)
+
+_NUMBERS = re.compile(r"\d+")
+
+
+@lru_cache(maxsize=1024)
+def clean_horaire_name(sheet_name):
+    """Nettoie le nom de la feuille pour extraire le nom d'horaire de manière cohérente."""
+    # Nettoyer le nom en supprimant tous les mots-clés d'intervenants
+    horaire = sheet_name
+    for word in WORDS_TO_REMOVE:
+        horaire = horaire.replace(word, "")
+
+    # Nettoyer les espaces multiples et supprimer les espaces au début/fin
+    horaire = " ".join(horaire.split()).strip()
+
+    # Si le résultat est vide, utiliser le nom original
+    return horaire or sheet_name
+
+
+def normalize_horaire(horaire):
+    """Clé de comparaison d'un horaire ou d'un nom de feuille (nettoyé, en minuscules)."""
+    return clean_horaire_name(str(horaire or "")).lower().strip()
+
+
+class HoraireSheetIndex:
+    """Index horaire normalisé → nom de feuille d'un classeur."""
+
+    def __init__(self, sheet_names):
+        self.sheet_names = tuple(sheet_names)
+        self._keys = [(normalize_horaire(name), name) for name in self.sheet_names]
+        self._by_key = {}
+        self._by_numbers = {}
+        for key, name in self._keys:
+            self._by_key.setdefault(key, name)
+            numbers = tuple(_NUMBERS.findall(key))
+            if numbers:
+                self._by_numbers.setdefault(numbers, name)
+        self._found = {}
+
+    def find(self, horaire):
+        """Nom de la feuille de l'horaire, ou None si aucune feuille ne correspond."""
+        key = normalize_horaire(horaire)
+        if key in self._found:
+            return self._found[key]
+
+        name = None
+        if key:
+            name = self._by_key.get(key)
+            if name is None:
+                numbers = tuple(_NUMBERS.findall(key))
+                name = self._by_numbers.get(numbers) if numbers else None
+            if name is None:
+                name = next((sheet for sheet_key, sheet in self._keys
+                             if sheet_key and (key in sheet_key or sheet_key in key)), None)
+        self._found[key] = name
+        return name
+
+
+@lru_cache(maxsize=64)
+def _get_index(sheet_names):
+    return HoraireSheetIndex(sheet_names)
+
+
+def get_horaire_index(sheet_names):
+    """Index des feuilles (construit une fois par liste de feuilles, puis mémorisé)."""
+    return _get_index(tuple(sheet_names))
+
+
+def find_horaire_sheet_name(wb, horaire):
+    """Nom de la feuille de l'horaire dans le classeur (openpyxl, cache ou SQLite), ou None."""
+    return get_horaire_index(wb.sheetnames).find(horaire)
+
+
+def find_horaire_sheet(wb, horaire):
+    """Feuille de l'horaire dans le classeur, ou None."""
+    sheet_name = find_horaire_sheet_name(wb, horaire)
+    return wb[sheet_name] if sheet_name is not None else None
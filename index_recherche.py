@@ -0,0 +1,107 @@
+"""
+Index de recherche par sous-chaîne des noms d'élèves (n-grammes).
+
+Les noms sont normalisés (minuscules, accents retirés, espaces multiples réduits) :
+"Élodie" et "elodie" se retrouvent donc de la même façon. Chaque sous-chaîne de
+1 à 3 caractères d'un nom pointe vers les clés des élèves qui la contiennent
+(listes de postings). Une recherche de 3 caractères ou moins est une simple lecture
+de posting ; au-delà, les postings des trigrammes de la recherche sont intersectés
+(du plus court au plus long) puis les quelques candidats restants sont vérifiés.
+
+L'index est construit une fois au chargement du matrix, puis mis à jour avec add()
+et remove() quand des élèves sont ajoutés ou supprimés.
+"""
+import unicodedata
+from functools import lru_cache
+
+# Longueur maximale des n-grammes indexés
+TAILLE_NGRAMME = 3
+
+
+@lru_cache(maxsize=8192)
+def fold_text(text):
+    """Texte de comparaison : sans accents, en minuscules, espaces multiples réduits."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(without_accents.casefold().split())
+
+
+def _ngrams(text):
+    for size in range(1, TAILLE_NGRAMME + 1):
+        for start in range(len(text) - size + 1):
+            yield text[start:start + size]
+
+
+class NgramIndex:
+    """Clé → nom normalisé, et n-gramme → clés des noms qui le contiennent."""
+
+    def __init__(self):
+        self._texts = {}
+        self._postings = {}
+        self._last = None   # (recherche, résultat) de la dernière recherche
+
+    @classmethod
+    def from_items(cls, keys, texts):
+        """Index construit en une passe à partir des clés et des noms correspondants."""
+        index = cls()
+        for key, text in zip(keys, texts):
+            index.add(key, text)
+        return index
+
+    def add(self, key, text):
+        """Ajoute (ou remplace) le nom d'une clé."""
+        if key in self._texts:
+            self.remove(key)
+        folded = fold_text("" if text is None else text)
+        self._texts[key] = folded
+        for gram in set(_ngrams(folded)):
+            self._postings.setdefault(gram, set()).add(key)
+        self._last = None
+
+    def remove(self, key):
+        """Retire une clé de l'index (sans effet si elle est absente)."""
+        folded = self._texts.pop(key, None)
+        if folded is None:
+            return
+        for gram in set(_ngrams(folded)):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+        self._last = None
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __contains__(self, key):
+        return key in self._texts
+
+    def search(self, term):
+        """
+        Clés dont le nom contient term (sans distinction d'accents ni de casse).
+
+        Returns:
+            set: clés trouvées (toutes les clés si term est vide)
+        """
+        term = fold_text(term)
+        if not term:
+            return set(self._texts)
+
+        if self._last is not None and self._last[0] in term:
+            # Saisie qui s'allonge : les résultats sont parmi ceux de la recherche précédente
+            result = {key for key in self._last[1] if term in self._texts[key]}
+        elif len(term) <= TAILLE_NGRAMME:
+            result = set(self._postings.get(term, ()))
+        else:
+            postings = sorted((self._postings.get(term[i:i + TAILLE_NGRAMME], set())
+                               for i in range(len(term) - TAILLE_NGRAMME + 1)), key=len)
+            candidates = set(postings[0])
+            for keys in postings[1:]:
+                if not candidates:
+                    break
+                candidates &= keys
+            result = {key for key in candidates if term in self._texts[key]}
+
+        self._last = (term, result)
+        return set(result)
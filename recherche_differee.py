@@ -0,0 +1,117 @@
+"""
+Recherche différée (debounce) des champs de recherche en direct.
+
+Chaque frappe ne reconstruit plus la liste affichée : les frappes rapprochées sont
+regroupées et la recherche n'est lancée qu'après un court délai sans saisie.
+Chaque recherche lancée reçoit un SearchRequest ; une saisie plus récente l'annule,
+ce qui interrompt un affichage en plusieurs morceaux (run_in_chunks) encore en cours.
+La recherche elle-même passe par l'index de n-grammes des noms (index_recherche.py).
+"""
+try:
+    import tkinter
+except ImportError:
+    tkinter = None
+
+# Délai sans frappe avant de lancer la recherche (en millisecondes)
+DELAI_RECHERCHE_MS = 150
+
+# Nombre d'éléments affichés par morceau (run_in_chunks)
+TAILLE_MORCEAU = 40
+
+
+class SearchRequest:
+    """Une recherche lancée, annulée dès qu'une saisie plus récente arrive."""
+
+    def __init__(self, controller, term, generation):
+        self.term = term
+        self._controller = controller
+        self._generation = generation
+
+    @property
+    def cancelled(self):
+        return self._generation != self._controller._generation
+
+
+class DebouncedSearch:
+    """Relie une variable de recherche (StringVar) à une fonction de recherche différée."""
+
+    def __init__(self, widget, variable, on_search, delay_ms=DELAI_RECHERCHE_MS):
+        """
+        Args:
+            widget: Widget Tk utilisé pour after() / after_cancel()
+            variable: Variable du champ de recherche
+            on_search: Fonction appelée avec un SearchRequest (term = texte saisi, brut)
+            delay_ms (int): Délai sans frappe avant la recherche
+        """
+        self._widget = widget
+        self._variable = variable
+        self._on_search = on_search
+        self._delay_ms = delay_ms
+        self._job = None
+        self._generation = 0
+        self._trace = variable.trace_add("write", self._on_write)
+
+    def _on_write(self, *args):
+        # Toute nouvelle saisie annule la recherche en attente et celle en cours d'affichage
+        self._generation += 1
+        if self._job is not None:
+            self._widget.after_cancel(self._job)
+        self._job = self._widget.after(self._delay_ms, self._run)
+
+    def _run(self):
+        self._job = None
+        request = SearchRequest(self, self._variable.get(), self._generation)
+        try:
+            self._on_search(request)
+        except tkinter.TclError as e:
+            # Fenêtre fermée pendant le délai
+            print(f"Recherche annulée : {e}")
+            self.cancel()
+
+    def flush(self):
+        """Lance immédiatement la recherche (affichage initial, ou saisie en attente)."""
+        if self._job is not None:
+            self._widget.after_cancel(self._job)
+            self._job = None
+        self._generation += 1
+        self._run()
+
+    def cancel(self):
+        """Annule la recherche en attente et l'affichage en cours."""
+        self._generation += 1
+        if self._job is not None:
+            self._widget.after_cancel(self._job)
+            self._job = None
+
+    def close(self):
+        """Détache le contrôleur de la variable (fermeture de la fenêtre)."""
+        self.cancel()
+        try:
+            self._variable.trace_remove("write", self._trace)
+        except tkinter.TclError:
+            pass
+
+    def run_in_chunks(self, request, items, render_item, chunk_size=TAILLE_MORCEAU, on_done=None):
+        """
+        Affiche les éléments par morceaux, en rendant la main à Tk entre deux morceaux.
+
+        S'arrête dès que la recherche est annulée par une saisie plus récente.
+        """
+        items = list(items)
+
+        def render_chunk(start):
+            if request.cancelled:
+                return
+            try:
+                for item in items[start:start + chunk_size]:
+                    render_item(item)
+            except tkinter.TclError as e:
+                print(f"Affichage interrompu : {e}")
+                return
+            if start + chunk_size < len(items):
+                self._widget.after(1, render_chunk, start + chunk_size)
+            elif on_done is not None:
+                on_done()
+
+        render_chunk(0)
+
@@ -0,0 +1,174 @@
+"""
+Sauvegarde différée (write-behind) du DataFrame matrix.
+
+Les modifications marquent les données comme "non sauvegardées" ; un thread
+d'arrière-plan écrit la dernière version après un court délai d'inactivité.
+Plusieurs clics rapprochés ne provoquent donc qu'une seule écriture, et le
+thread Tk n'attend jamais la fin d'un to_excel().
+Avant de quitter, flush() attend la fin de l'écriture en cours puis écrit la
+dernière version : aucune modification n'est perdue.
+"""
+import threading
+import time
+
+# États exposés à l'interface
+ETAT_SAUVEGARDE = "saved"
+ETAT_NON_SAUVEGARDE = "unsaved"
+ETAT_EN_COURS = "saving"
+ETAT_ERREUR = "error"
+
+# Délai d'inactivité avant l'écriture (en secondes)
+DELAI_SAUVEGARDE = 1.0
+
+
+class WriteBehindSaver:
+    """Écrit en arrière-plan la dernière version d'un DataFrame modifié."""
+
+    def __init__(self, write_func, delay=DELAI_SAUVEGARDE):
+        """
+        Args:
+            write_func: Fonction appelée avec une copie du DataFrame (dans le thread de sauvegarde)
+            delay (float): Délai d'inactivité avant l'écriture, en secondes
+        """
+        self._write_func = write_func
+        self._delay = delay
+        self._cond = threading.Condition()
+        self._pending = None          # Dernière copie du DataFrame à écrire
+        self._pending_version = 0     # Numéro de la dernière modification
+        self._written_version = 0     # Numéro de la dernière modification écrite
+        self._last_change = 0.0
+        self._saving = False
+        self._flush_requested = False
+        self._closed = False
+        self._failures = 0
+        self.last_error = None
+        self.last_result = None       # Valeur retournée par la dernière écriture réussie
+
+        self._thread = threading.Thread(target=self._run, name="sauvegarde-matrix", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self, df):
+        """Signale une modification : une copie du DataFrame sera écrite après le délai."""
+        snapshot = df.copy()
+        with self._cond:
+            self._pending = snapshot
+            self._pending_version += 1
+            self._last_change = time.monotonic()
+            self._cond.notify_all()
+
+    @property
+    def state(self):
+        """État courant : saved, unsaved, saving ou error."""
+        with self._cond:
+            if self._saving:
+                return ETAT_EN_COURS
+            if self._pending is not None:
+                return ETAT_ERREUR if self.last_error is not None else ETAT_NON_SAUVEGARDE
+            return ETAT_SAUVEGARDE
+
+    def has_pending_changes(self):
+        """Indique si des modifications ne sont pas encore écrites sur le disque."""
+        with self._cond:
+            return self._pending is not None or self._saving
+
+    def flush(self, timeout=None):
+        """
+        Écrit immédiatement les modifications en attente et attend la fin de l'écriture.
+
+        Returns:
+            bool: True si toutes les modifications sont écrites, False en cas d'erreur ou de délai dépassé
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._pending is None and not self._saving:
+                return True
+            if not self._thread.is_alive():
+                return self._write_now_locked()
+
+            failures = self._failures
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending is not None or self._saving:
+                if self._failures > failures and not self._saving:
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def mark_saved(self, result=None):
+        """Signale que le DataFrame a été écrit par ailleurs (ex : dans une transaction)."""
+        with self._cond:
+            self.last_result = result
+
+    def close(self, timeout=None):
+        """Écrit les modifications en attente puis arrête le thread de sauvegarde."""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return flushed
+
+    def _write_now_locked(self):
+        """Écriture synchrone (thread arrêté), appelée avec le verrou détenu."""
+        snapshot, version = self._pending, self._pending_version
+        try:
+            self.last_result = self._write_func(snapshot)
+        except Exception as e:
+            print(f"❌ Erreur lors de la sauvegarde du fichier matrix: {e}")
+            self.last_error = e
+            return False
+        self._pending = None
+        self._written_version = version
+        self.last_error = None
+        return True
+
+    def _run(self):
+        """Boucle du thread : attend une modification, le délai d'inactivité, puis écrit."""
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+
+                # Regrouper les modifications rapprochées (sauf si flush() est demandé)
+                while not self._flush_requested and not self._closed:
+                    remaining = self._last_change + self._delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                snapshot, version = self._pending, self._pending_version
+                self._pending = None
+                self._saving = True
+                self._flush_requested = False
+
+            error = None
+            result = None
+            try:
+                result = self._write_func(snapshot)
+            except Exception as e:
+                error = e
+                print(f"❌ Erreur lors de la sauvegarde du fichier matrix: {e}")
+
+            with self._cond:
+                self._saving = False
+                if error is None:
+                    self._written_version = version
+                    self.last_error = None
+                    self.last_result = result
+                else:
+                    # Conserver la version non écrite (sauf si une plus récente est arrivée)
+                    if self._pending is None:
+                        self._pending = snapshot
+                        self._pending_version = version
+                    self._last_change = time.monotonic()
+                    self._failures += 1
+                    self.last_error = error
+                    if self._closed:
+                        self._cond.notify_all()
+                        return
+                self._cond.notify_all()
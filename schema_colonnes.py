@@ -0,0 +1,102 @@
+"""
+Schéma déclaratif des colonnes du fichier matrix et des feuilles d'écoles.
+
+Chaque rôle ("Niveau", "Classe"...) est décrit une seule fois par ses mots-clés ;
+tous les lecteurs utilisent la même résolution et désignent donc la même colonne.
+La résolution est mémorisée par signature d'en-têtes : relire un fichier dont
+les en-têtes n'ont pas changé ne refait aucune recherche par mots-clés.
+
+Règles de résolution (dans l'ordre du schéma) :
+  1. une colonne déjà attribuée à un rôle précédent n'est plus candidate
+     (ex : "Classe CI" est résolue avant "Classe", "Cours 2 du" avant "Cours 2") ;
+  2. correspondance exacte d'abord, puis partielle (mots-clés de plus de 2 lettres) ;
+  3. les colonnes exclues pour un rôle (doublons "Niveau.1", "Cours 1 du"...) sont ignorées.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# role : nom du rôle ; keywords : mots-clés (minuscules) ; exclude : mots interdits dans l'en-tête ;
+# no_digits : ignorer les en-têtes contenant un chiffre ; no_course : ignorer les colonnes "cours N", "X.N",
+# arrivée et départ
+ColumnRule = namedtuple("ColumnRule", "role keywords exclude no_digits no_course",
+                        defaults=((), False, False))
+
+# Fichier matrix.xlsx (ordre = priorité de résolution)
+MATRIX_SCHEMA = (
+    ColumnRule("Stagiaire", ("stagiaire", "nom", "name", "élève", "eleve")),
+    ColumnRule("Classe CI", ("classe ci", "classe_ci")),
+    ColumnRule("Prof CI", ("prof ci", "prof_ci", "professeur ci")),
+    ColumnRule("Départ CI", ("cours 2 du", "départ ci", "depart ci")),
+    ColumnRule("Arrivée CI", ("cours 2 au", "arrivée ci", "arrivee ci")),
+    ColumnRule("Départ", ("cours 1 du", "départ", "depart")),
+    ColumnRule("Arrivée", ("cours 1 au", "arrivée", "arrivee")),
+    ColumnRule("Cours 2", ("cours 2", "ci", "cours intensif", "intensif")),
+    ColumnRule("Niveau", ("niveau", "level", "niveau actuel"), no_digits=True),
+    ColumnRule("Ecole", ("ecole", "école", "school"), no_course=True),
+    ColumnRule("Classe", ("classe", "class", "groupe"), no_course=True),
+    ColumnRule("Horaire", ("horaire", "heure", "time"), no_course=True),
+    ColumnRule("Âge", ("âge", "age")),
+    ColumnRule("Prof", ("prof", "professeur", "enseignant")),
+)
+
+# Feuilles des fichiers d'écoles (une feuille par horaire)
+SCHOOL_SCHEMA = (
+    ColumnRule("Liste des élèves", ("liste des élèves", "liste", "élèves", "eleves", "noms")),
+    ColumnRule("Classe", ("nom de la classe", "classe", "groupe", "section")),
+    ColumnRule("Intervenant", ("intervenant", "professeur", "enseignant", "prof")),
+    ColumnRule("Rôle", ("rôle", "role", "animateur", "anim"), exclude=("intervenant", "prof")),
+    ColumnRule("Niveau", ("niveau", "level")),
+    ColumnRule("Effectif", ("effectif", "nombre", "élève", "eleve"), exclude=("liste",)),
+)
+
+_COURSE_COLUMN = re.compile(r"cours \d|\.\d+$|arrivée|départ")
+
+
+def _is_excluded(rule, header):
+    if any(word in header for word in rule.exclude):
+        return True
+    if rule.no_digits and any(char.isdigit() for char in header):
+        return True
+    if rule.no_course and _COURSE_COLUMN.search(header):
+        return True
+    return False
+
+
+@lru_cache(maxsize=256)
+def _resolve(schema, headers):
+    normalized = [str(header).lower().strip() if header is not None else "" for header in headers]
+    claimed = set()
+    indexes = {}
+    for rule in schema:
+        candidates = [idx for idx, header in enumerate(normalized)
+                      if header and idx not in claimed and not _is_excluded(rule, header)]
+        found = next((idx for idx in candidates if normalized[idx] in rule.keywords), None)
+        if found is None:
+            found = next((idx for idx in candidates
+                          if any(len(k) > 2 and k in normalized[idx] for k in rule.keywords)), None)
+        if found is not None:
+            claimed.add(found)
+        indexes[rule.role] = found
+    return indexes
+
+
+def resolve_column_indexes(headers, schema=MATRIX_SCHEMA):
+    """
+    Résout les rôles d'une ligne d'en-têtes (résultat mémorisé par signature d'en-têtes).
+
+    Args:
+        headers: En-têtes (tuple de valeurs de la première ligne, ou df.columns)
+        schema: MATRIX_SCHEMA ou SCHOOL_SCHEMA
+
+    Returns:
+        dict {rôle: index de la colonne (à partir de 0) ou None}
+    """
+    return dict(_resolve(schema, tuple(headers)))
+
+
+def resolve_columns(headers, schema=MATRIX_SCHEMA):
+    """Comme resolve_column_indexes(), mais retourne les en-têtes : {rôle: en-tête ou None}."""
+    headers = tuple(headers)
+    return {role: headers[idx] if idx is not None else None
+            for role, idx in _resolve(schema, headers).items()}
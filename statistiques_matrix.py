@@ -0,0 +1,88 @@
+"""
+Statistiques et assignations des élèves du fichier matrix, calculées par colonnes.
+
+Chaque colonne utile est convertie une seule fois en texte avec les méthodes
+vectorisées de pandas (astype(str), .str.strip(), .str.lower().isin()), avec le même
+résultat que str(valeur).strip() : une cellule vide devient donc "nan". Les compteurs
+sont obtenus par masques booléens et value_counts, sans boucle Python par ligne.
+"""
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+from schema_colonnes import MATRIX_SCHEMA, resolve_columns
+
+# Valeurs considérées comme vides (en minuscules)
+VALEURS_VIDES = frozenset(['', 'nan', 'none'])
+
+
+def empty_matrix_assignments():
+    """Résultat de analyze_matrix_assignments() pour un matrix absent ou illisible."""
+    return {
+        'eleves_assignes': [],
+        'total_eleves': 0,
+        'sans_classe': 0,
+        'sans_niveau': 0,
+        'avec_classe': 0,
+        'par_niveau': {}
+    }
+
+
+def _text_column(df, col):
+    """Colonne convertie en Series de textes nettoyés ("" si la colonne n'existe pas)."""
+    if not col:
+        return pd.Series('', index=df.index, dtype=object)
+    values = df[col]
+    if pd.api.types.is_datetime64_any_dtype(values):
+        # str(Timestamp) donne la date et l'heure, astype(str) seulement la date
+        values = values.astype(object)
+    texts = values.astype(str).str.strip()
+    # pandas >= 3 conserve les valeurs manquantes : même texte que str() ("nan", "None", "NaT")
+    missing = texts.isna()
+    if missing.any():
+        texts = texts.fillna(values[missing].map(str))
+    return texts
+
+
+def _is_empty(texts):
+    """Masque des valeurs vides ("", "nan", "none", sans distinction de casse)."""
+    return texts.str.lower().isin(VALEURS_VIDES)
+
+
+def compute_matrix_assignments(df):
+    """
+    Calcule les assignations et les statistiques d'un DataFrame matrix.
+
+    Returns:
+        dict: même format que analyze_matrix_assignments() dans fenetre_principale.py
+    """
+    columns = resolve_columns(df.columns, MATRIX_SCHEMA)
+    if not columns["Stagiaire"]:
+        return empty_matrix_assignments()
+
+    nom = _text_column(df, columns["Stagiaire"])
+    niveau = _text_column(df, columns["Niveau"])
+    ecole = _text_column(df, columns["Ecole"])
+    classe = _text_column(df, columns["Classe"])
+    horaire = _text_column(df, columns["Horaire"])
+
+    # Élèves ayant toutes les informations nécessaires pour être assignés
+    assigned = ~_is_empty(nom) & (ecole != '') & (classe != '') & (horaire != '')
+    keys = ('nom', 'niveau', 'ecole', 'classe', 'horaire')
+    eleves_assignes = [dict(zip(keys, values)) for values in zip(
+        *(column[assigned].tolist() for column in (nom, niveau, ecole, classe, horaire)))]
+
+    sans_classe = int(_is_empty(classe).sum())
+    niveau_vide = _is_empty(niveau)
+    # Ordre de première apparition, comme un comptage ligne par ligne
+    par_niveau = niveau[~niveau_vide].value_counts(sort=False)
+
+    return {
+        'eleves_assignes': eleves_assignes,
+        'total_eleves': len(df),
+        'sans_classe': sans_classe,
+        'sans_niveau': int(niveau_vide.sum()),
+        'avec_classe': len(df) - sans_classe,
+        'par_niveau': {key: int(count) for key, count in par_niveau.items()}
+    }
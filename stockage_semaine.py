@@ -0,0 +1,1228 @@
+"""
+Stockage SQLite optionnel d'une semaine (semaine_N/semaine.db).
+
+Quand l'option "stockage_sqlite" est activée dans user_preferences.json, la base
+SQLite devient la source de vérité de la semaine : élèves (matrix.xlsx), horaires et
+classes (fichiers des écoles), personnel (personnel.json) et affectations élève/classe.
+Les fichiers Excel ne sont plus que des sources d'import et des cibles d'export,
+régénérées à la demande avec export_week_to_excel().
+
+Les fonctions de ce module servent de point d'entrée unique pour les lectures et
+écritures : elles utilisent la base si elle est activée, sinon les fichiers Excel.
+"""
+import copy
+import datetime
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+try:
+    from openpyxl import load_workbook, Workbook
+except ImportError:
+    load_workbook = None
+    Workbook = None
+
+from cache_excel import (get_file_signature, invalidate_excel_cache, load_workbook_cached,
+                         read_excel_cached, read_workbook_values, save_dataframe,
+                         save_workbook as cache_save_workbook)
+from index_horaires import clean_horaire_name
+
+STORE_FILENAME = "semaine.db"
+MATRIX_FILENAME = "matrix.xlsx"
+PERSONNEL_FILENAME = "personnel.json"
+PREFERENCES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "user_preferences.json")
+
+# Fichiers d'écoles gérés par le stockage (même mapping que analyze_school_classes)
+SCHOOL_FILES = {
+    'ecole_a.xlsx': 'ecole_a',
+    'ecole_b.xlsx': 'ecole_b',
+    'ECOLE_C_cours_standard.xlsx': 'ecole_c_cs',
+    'ECOLE_C_cours_intensif.xlsx': 'ecole_c_ci',
+    'MORNING.xlsx': 'ecole_morning',
+    'ECOLE_PREMIUM_cours_standard.xlsx': 'ecole_premium_cs',
+    'ECOLE_PREMIUM_cours_intensifs.xlsx': 'ecole_premium_ci'
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS sources (
+    filename TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    size INTEGER,
+    dirty INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    nom TEXT,
+    nom_normalise TEXT,
+    niveau TEXT,
+    ecole TEXT,
+    classe TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_students_nom ON students(nom_normalise);
+CREATE INDEX IF NOT EXISTS idx_students_classe ON students(ecole, classe);
+CREATE TABLE IF NOT EXISTS horaires (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL,
+    school_key TEXT,
+    position INTEGER NOT NULL,
+    sheet_name TEXT NOT NULL,
+    horaire TEXT,
+    type_intervenant TEXT,
+    headers TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_horaires_file ON horaires(filename, position);
+CREATE TABLE IF NOT EXISTS classes (
+    id INTEGER PRIMARY KEY,
+    horaire_id INTEGER NOT NULL REFERENCES horaires(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    nom_classe TEXT,
+    niveau TEXT,
+    intervenant TEXT,
+    eleves TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_classes_horaire ON classes(horaire_id, position);
+CREATE INDEX IF NOT EXISTS idx_classes_nom ON classes(nom_classe);
+CREATE TABLE IF NOT EXISTS assignments (
+    class_id INTEGER NOT NULL REFERENCES classes(id) ON DELETE CASCADE,
+    eleve_nom TEXT NOT NULL,
+    eleve_nom_normalise TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_assignments_eleve ON assignments(eleve_nom_normalise);
+CREATE INDEX IF NOT EXISTS idx_assignments_class ON assignments(class_id);
+CREATE TABLE IF NOT EXISTS personnel (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    nom TEXT NOT NULL,
+    classes TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_personnel_type ON personnel(type, position);
+"""
+
+
+# ---------- Encodage des valeurs de cellules ----------
+
+def _encode_value(value):
+    """Convertit une valeur de cellule en valeur sérialisable en JSON."""
+    if value is None:
+        return None
+    if pd is not None and not isinstance(value, (list, tuple, dict)):
+        try:
+            if pd.isna(value):
+                return None
+        except (TypeError, ValueError):
+            pass
+    if isinstance(value, datetime.datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {"$t": value.isoformat()}
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    if hasattr(value, "item"):
+        # Types numpy (int64, float64, bool_)
+        return value.item()
+    return str(value)
+
+
+def _decode_value(value):
+    """Inverse de _encode_value()."""
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.datetime.fromisoformat(value["$dt"])
+        if "$d" in value:
+            return datetime.date.fromisoformat(value["$d"])
+        if "$t" in value:
+            return datetime.time.fromisoformat(value["$t"])
+    return value
+
+
+def _dump_row(values):
+    return json.dumps([_encode_value(v) for v in values], ensure_ascii=False)
+
+
+def _load_row(data):
+    return [_decode_value(v) for v in json.loads(data)]
+
+
+def _text(value):
+    """Texte nettoyé d'une cellule ('' si vide)."""
+    if value is None:
+        return ''
+    text = str(value).strip()
+    return '' if text.lower() in ['nan', 'none'] else text
+
+
+def _split_students(value):
+    """Découpe le contenu d'une cellule 'Liste des élèves'."""
+    text = _text(value)
+    if not text or text.lower() == 'liste des élèves...':
+        return []
+    return [nom.strip() for nom in re.split(r'[;,|\n\r]+', text) if nom.strip()]
+
+
+def _find_header(headers, keywords, excluded=()):
+    """Index de la première colonne dont l'en-tête contient un des mots-clés."""
+    for idx, header in enumerate(headers):
+        header_lower = str(header or '').lower()
+        if any(k in header_lower for k in keywords) and not any(e in header_lower for e in excluded):
+            return idx
+    return None
+
+
+def _trim_rows(rows):
+    """Supprime les lignes vides en fin de feuille."""
+    rows = [list(row) for row in rows]
+    while rows and all(v is None or v == '' for v in rows[-1]):
+        rows.pop()
+    return rows
+
+
+# ---------- Feuilles et classeurs adossés à la base ----------
+
+class StoreCell:
+    """Cellule d'une StoreSheet (même interface que openpyxl : .value, .row, .column)."""
+
+    __slots__ = ("_sheet", "row", "column")
+
+    def __init__(self, sheet, row, column):
+        self._sheet = sheet
+        self.row = row
+        self.column = column
+
+    @property
+    def value(self):
+        return self._sheet._get(self.row, self.column)
+
+    @value.setter
+    def value(self, new_value):
+        self._sheet._set(self.row, self.column, new_value)
+
+
+class StoreSheet:
+    """Feuille en mémoire reproduisant le sous-ensemble de l'API openpyxl utilisé par l'application."""
+
+    def __init__(self, title, rows=None):
+        self.title = title
+        self._rows = [list(row) for row in (rows or [])]
+
+    def _get(self, row, column):
+        if 1 <= row <= len(self._rows):
+            values = self._rows[row - 1]
+            if 1 <= column <= len(values):
+                return values[column - 1]
+        return None
+
+    def _set(self, row, column, value):
+        while len(self._rows) < row:
+            self._rows.append([])
+        values = self._rows[row - 1]
+        while len(values) < column:
+            values.append(None)
+        values[column - 1] = value
+
+    @property
+    def max_row(self):
+        return max(len(self._rows), 1)
+
+    @property
+    def max_column(self):
+        return max((len(row) for row in self._rows), default=0) or 1
+
+    def cell(self, row, column, value=None):
+        if value is not None:
+            self._set(row, column, value)
+        return StoreCell(self, row, column)
+
+    def append(self, values):
+        self._rows.append(list(values))
+
+    def delete_rows(self, idx, amount=1):
+        del self._rows[idx - 1:idx - 1 + amount]
+
+    def insert_rows(self, idx, amount=1):
+        for _ in range(amount):
+            self._rows.insert(idx - 1, [])
+
+    def insert_cols(self, idx, amount=1):
+        for values in self._rows:
+            if len(values) >= idx - 1:
+                values[idx - 1:idx - 1] = [None] * amount
+
+    def iter_rows(self, min_row=1, max_row=None, values_only=True):
+        width = self.max_column
+        last_row = len(self._rows) if max_row is None else min(max_row, len(self._rows))
+        for row_idx in range(max(min_row, 1) - 1, last_row):
+            values = self._rows[row_idx]
+            yield tuple(values) + (None,) * (width - len(values))
+
+    def rows_values(self):
+        """Toutes les lignes (largeur uniforme, sans lignes vides finales)."""
+        rows = _trim_rows(self._rows)
+        width = max((len(row) for row in rows), default=0)
+        return [row + [None] * (width - len(row)) for row in rows]
+
+
+class StoreWorkbook:
+    """Classeur adossé à la base SQLite (sheetnames, wb[nom], create_sheet, save...)."""
+
+    def __init__(self, store, filename, sheets, read_only=False):
+        self._store = store
+        self.filename = filename
+        self._sheets = list(sheets)
+        self.read_only = read_only
+
+    @property
+    def sheetnames(self):
+        return [sheet.title for sheet in self._sheets]
+
+    @property
+    def worksheets(self):
+        return list(self._sheets)
+
+    @property
+    def active(self):
+        return self._sheets[0] if self._sheets else None
+
+    def __getitem__(self, sheet_name):
+        for sheet in self._sheets:
+            if sheet.title == sheet_name:
+                return sheet
+        raise KeyError(f"Worksheet {sheet_name} does not exist.")
+
+    def __delitem__(self, sheet_name):
+        self._sheets.remove(self[sheet_name])
+
+    def __contains__(self, sheet_name):
+        return sheet_name in self.sheetnames
+
+    def create_sheet(self, title=None, index=None):
+        sheet = StoreSheet(title or f"Sheet{len(self._sheets) + 1}")
+        if index is None:
+            self._sheets.append(sheet)
+        else:
+            self._sheets.insert(index, sheet)
+        return sheet
+
+    def remove(self, sheet):
+        self._sheets.remove(sheet)
+
+    def save(self, file_path=None):
+        """Enregistre le classeur dans la base (une transaction)."""
+        if self.read_only:
+            raise IOError("Classeur ouvert en lecture seule")
+        self._store.write_workbook(self)
+
+    def close(self):
+        pass
+
+
+# ---------- Base de la semaine ----------
+
+class WeekStore:
+    """Base SQLite d'une semaine : import/export Excel et accès aux données."""
+
+    def __init__(self, week_folder):
+        self.week_folder = os.path.abspath(week_folder)
+        self.db_path = os.path.join(self.week_folder, STORE_FILENAME)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._wrote = False
+        self._source_signatures = None  # Signatures des fichiers lors de la dernière synchronisation
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+
+    # --- Transactions ---
+
+    @contextmanager
+    def transaction(self):
+        """Regroupe toutes les écritures dans une seule transaction SQLite (imbrication permise)."""
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._wrote = False
+            self._depth += 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._wrote:
+                        self._conn.execute(
+                            "INSERT INTO meta(key, value) VALUES('generation', '1') "
+                            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+                        )
+                    self._conn.execute("COMMIT")
+
+    def _mark_dirty(self, filename):
+        self._wrote = True
+        self._conn.execute(
+            "INSERT INTO sources(filename, dirty) VALUES(?, 1) "
+            "ON CONFLICT(filename) DO UPDATE SET dirty = 1",
+            (filename,)
+        )
+
+    def _record_source(self, filename):
+        """Mémorise la signature du fichier source (après import ou export)."""
+        signature = get_file_signature(os.path.join(self.week_folder, filename))
+        mtime_ns, size = signature if signature else (None, None)
+        self._conn.execute(
+            "INSERT INTO sources(filename, mtime_ns, size, dirty) VALUES(?, ?, ?, 0) "
+            "ON CONFLICT(filename) DO UPDATE SET mtime_ns = excluded.mtime_ns, size = excluded.size, dirty = 0",
+            (filename, mtime_ns, size)
+        )
+
+    def get_generation(self):
+        """Compteur incrémenté à chaque transaction qui modifie la base."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def mark_transaction(self, token):
+        """Enregistre (dans la transaction SQLite en cours) le jeton d'une transaction multi-fichiers."""
+        self._set_meta("transaction_token", token)
+
+    def has_committed(self, token):
+        """Indique si la transaction SQLite portant ce jeton a été validée."""
+        with self._lock:
+            return self._get_meta("transaction_token") == token
+
+    def _get_meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute(
+            "INSERT INTO meta(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value, ensure_ascii=False))
+        )
+
+    # --- Import depuis Excel ---
+
+    def _managed_files(self):
+        return [MATRIX_FILENAME] + list(SCHOOL_FILES.keys()) + [PERSONNEL_FILENAME]
+
+    def sync_from_excel(self):
+        """
+        Réimporte les fichiers modifiés en dehors de la base depuis le dernier import/export.
+        Si la base contient des modifications non exportées pour ce fichier, la base est conservée.
+
+        La base n'est interrogée que si la signature d'un fichier a changé depuis l'appel précédent.
+        """
+        with self._lock:
+            signatures = {filename: get_file_signature(os.path.join(self.week_folder, filename))
+                          for filename in self._managed_files()}
+            if signatures == self._source_signatures:
+                return
+            known = {row[0]: row[1:] for row in
+                     self._conn.execute("SELECT filename, mtime_ns, size, dirty FROM sources")}
+            for filename, signature in signatures.items():
+                if signature is None:
+                    continue
+                previous = known.get(filename)
+                if previous is not None and (previous[0], previous[1]) == signature:
+                    continue
+                if previous is not None and previous[2]:
+                    print(f"⚠️ {filename} modifié en dehors de l'application : la base SQLite "
+                          f"contient des modifications non exportées, le fichier est ignoré")
+                    continue
+                self.import_source(filename)
+            self._source_signatures = signatures
+
+    def import_source(self, filename):
+        """Importe (ou réimporte) un fichier Excel/JSON de la semaine dans la base."""
+        file_path = os.path.join(self.week_folder, filename)
+        if not os.path.exists(file_path):
+            return
+        with self.transaction():
+            if filename == PERSONNEL_FILENAME:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    self._write_personnel(json.load(f))
+            else:
+                sheets = [StoreSheet(name, [list(values) for values in rows])
+                          for name, rows in read_workbook_values(file_path).items()]
+                if filename == MATRIX_FILENAME:
+                    sheets = sheets[:1]
+                self._write_sheets(filename, sheets)
+            self._record_source(filename)
+            self._wrote = True
+
+    def import_all(self):
+        """Importe tous les fichiers de la semaine (création initiale de la base)."""
+        with self.transaction():
+            for filename in self._managed_files():
+                self.import_source(filename)
+
+    # --- Écriture des feuilles ---
+
+    def _write_sheets(self, filename, sheets):
+        if filename == MATRIX_FILENAME:
+            sheet = sheets[0] if sheets else StoreSheet("Sheet1")
+            rows = sheet.rows_values()
+            self._write_students(sheet.title, rows[0] if rows else [], rows[1:])
+        else:
+            self._write_school_sheets(filename, sheets)
+
+    def _write_students(self, title, headers, rows):
+        stagiaire_idx = _find_header(headers, ['stagiaire', 'nom', 'élève', 'eleve'])
+        niveau_idx = next((i for i, h in enumerate(headers)
+                           if ('niveau' in str(h or '').lower() or 'level' in str(h or '').lower())
+                           and not any(c.isdigit() for c in str(h))), None)
+        ecole_idx = _find_header(headers, ['ecole', 'école', 'school'])
+        classe_idx = _find_header(headers, ['classe', 'class', 'groupe'], excluded=[' ci', '_ci'])
+
+        def value_at(row, idx):
+            return _text(row[idx]) if idx is not None and idx < len(row) else ''
+
+        self._conn.execute("DELETE FROM students")
+        self._conn.executemany(
+            "INSERT INTO students(position, nom, nom_normalise, niveau, ecole, classe, data) "
+            "VALUES(?, ?, ?, ?, ?, ?, ?)",
+            [(position, value_at(row, stagiaire_idx), value_at(row, stagiaire_idx).lower(),
+              value_at(row, niveau_idx), value_at(row, ecole_idx), value_at(row, classe_idx), _dump_row(row))
+             for position, row in enumerate(rows)]
+        )
+        self._set_meta("matrix_sheet_title", title)
+        self._set_meta("matrix_headers", [_encode_value(h) for h in headers])
+        self._mark_dirty(MATRIX_FILENAME)
+
+    def _write_school_sheets(self, filename, sheets):
+        self._conn.execute("DELETE FROM horaires WHERE filename = ?", (filename,))
+        for position, sheet in enumerate(sheets):
+            rows = sheet.rows_values()
+            headers = rows[0] if rows else []
+            sheet_lower = sheet.title.lower()
+            cursor = self._conn.execute(
+                "INSERT INTO horaires(filename, school_key, position, sheet_name, horaire, type_intervenant, headers) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?)",
+                (filename, SCHOOL_FILES.get(filename), position, sheet.title, clean_horaire_name(sheet.title),
+                 "animateur" if "animateur" in sheet_lower else "professeur", _dump_row(headers))
+            )
+            horaire_id = cursor.lastrowid
+
+            classe_idx = _find_header(headers, ['classe', 'groupe', 'section'])
+            classe_idx = 0 if classe_idx is None else classe_idx
+            eleves_idx = _find_header(headers, ['liste', 'élèves', 'eleves'])
+            niveau_idx = _find_header(headers, ['niveau', 'level'])
+            intervenant_idx = _find_header(headers, ['intervenant', 'professeur', 'animateur', 'enseignant'])
+
+            for row_position, row in enumerate(rows[1:], start=2):
+                def value_at(idx):
+                    return row[idx] if idx is not None and idx < len(row) else None
+
+                cursor = self._conn.execute(
+                    "INSERT INTO classes(horaire_id, position, nom_classe, niveau, intervenant, eleves, data) "
+                    "VALUES(?, ?, ?, ?, ?, ?, ?)",
+                    (horaire_id, row_position, _text(value_at(classe_idx)), _text(value_at(niveau_idx)),
+                     _text(value_at(intervenant_idx)), _text(value_at(eleves_idx)), _dump_row(row))
+                )
+                eleves = _split_students(value_at(eleves_idx))
+                if eleves:
+                    self._conn.executemany(
+                        "INSERT INTO assignments(class_id, eleve_nom, eleve_nom_normalise) VALUES(?, ?, ?)",
+                        [(cursor.lastrowid, nom, nom.lower()) for nom in eleves]
+                    )
+        self._mark_dirty(filename)
+
+    def write_workbook(self, wb):
+        """Enregistre un StoreWorkbook modifié."""
+        with self.transaction():
+            self._write_sheets(wb.filename, wb.worksheets)
+
+    # --- Lecture ---
+
+    def _read_sheets(self, filename):
+        if filename == MATRIX_FILENAME:
+            headers = [_decode_value(h) for h in self._get_meta("matrix_headers", [])]
+            rows = [_load_row(data) for (data,) in
+                    self._conn.execute("SELECT data FROM students ORDER BY position")]
+            title = self._get_meta("matrix_sheet_title", "Sheet1")
+            return [StoreSheet(title, ([headers] if headers else []) + rows)]
+
+        sheets = []
+        for horaire_id, sheet_name, headers in self._conn.execute(
+                "SELECT id, sheet_name, headers FROM horaires WHERE filename = ? ORDER BY position", (filename,)).fetchall():
+            rows = [_load_row(headers)]
+            for position, data in self._conn.execute(
+                    "SELECT position, data FROM classes WHERE horaire_id = ? ORDER BY position", (horaire_id,)):
+                while len(rows) < position - 1:
+                    rows.append([])
+                rows.append(_load_row(data))
+            sheets.append(StoreSheet(sheet_name, rows))
+        return sheets
+
+    def has_source(self, filename):
+        with self._lock:
+            if filename == MATRIX_FILENAME:
+                return self._get_meta("matrix_headers") is not None
+            row = self._conn.execute("SELECT 1 FROM horaires WHERE filename = ? LIMIT 1", (filename,)).fetchone()
+            return row is not None
+
+    def open_workbook(self, filename, read_only=False):
+        """Retourne un StoreWorkbook (modifiable puis enregistrable avec save_workbook())."""
+        with self._lock:
+            return StoreWorkbook(self, filename, self._read_sheets(filename), read_only=read_only)
+
+    def read_dataframes(self, filename):
+        """Équivalent de pd.read_excel(fichier, sheet_name=None) depuis la base."""
+        with self._lock:
+            sheets = self._read_sheets(filename)
+        return {sheet.title: _sheet_to_dataframe(sheet) for sheet in sheets}
+
+    def save_matrix_dataframe(self, df):
+        """Remplace les élèves de la semaine par le contenu du DataFrame (une transaction)."""
+        rows = df.astype(object).where(pd.notna(df), None).values.tolist()
+        with self.transaction():
+            title = self._get_meta("matrix_sheet_title", "Sheet1")
+            self._write_students(title, list(df.columns), rows)
+
+    # --- Personnel ---
+
+    def _write_personnel(self, data):
+        self._conn.execute("DELETE FROM personnel")
+        for personnel_type in ["professeurs", "animateurs"]:
+            for position, item in enumerate(data.get(personnel_type, [])):
+                if isinstance(item, str):
+                    item = {"nom": item, "classes": []}
+                if not isinstance(item, dict) or "nom" not in item:
+                    continue
+                self._conn.execute(
+                    "INSERT INTO personnel(type, position, nom, classes) VALUES(?, ?, ?, ?)",
+                    (personnel_type, position, item["nom"], json.dumps(item.get("classes", []), ensure_ascii=False))
+                )
+        extra = {key: value for key, value in data.items() if key not in ("professeurs", "animateurs")}
+        self._set_meta("personnel_extra", extra)
+        self._wrote = True
+
+    def load_personnel(self):
+        """Retourne les données du personnel au format de personnel.json."""
+        with self._lock:
+            data = dict(self._get_meta("personnel_extra", {}))
+            data["professeurs"] = []
+            data["animateurs"] = []
+            for personnel_type, nom, classes in self._conn.execute(
+                    "SELECT type, nom, classes FROM personnel ORDER BY type, position"):
+                data.setdefault(personnel_type, []).append({"nom": nom, "classes": json.loads(classes)})
+        return data
+
+    def save_personnel(self, data):
+        """Enregistre le personnel dans la base puis réécrit personnel.json (fichier léger)."""
+        with self.transaction():
+            self._write_personnel(data)
+            self._export_personnel()
+
+    def _export_personnel(self):
+        personnel_path = os.path.join(self.week_folder, PERSONNEL_FILENAME)
+        with open(personnel_path, "w", encoding="utf-8") as f:
+            json.dump(self.load_personnel(), f, indent=4, ensure_ascii=False)
+        self._record_source(PERSONNEL_FILENAME)
+
+    # --- Export vers Excel ---
+
+    def export_to_excel(self, only_dirty=True):
+        """Régénère les fichiers Excel (et personnel.json) depuis la base."""
+        exported = []
+        with self.transaction():
+            query = "SELECT filename FROM sources" + (" WHERE dirty = 1" if only_dirty else "")
+            for (filename,) in self._conn.execute(query).fetchall():
+                if filename == PERSONNEL_FILENAME:
+                    self._export_personnel()
+                elif self.has_source(filename):
+                    _export_sheets(os.path.join(self.week_folder, filename), self._read_sheets(filename),
+                                   keep_other_sheets=(filename == MATRIX_FILENAME))
+                    self._record_source(filename)
+                else:
+                    continue
+                exported.append(filename)
+        return exported
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _sheet_to_dataframe(sheet):
+    """Construit un DataFrame comme pd.read_excel (première ligne = en-têtes)."""
+    rows = sheet.rows_values()
+    if not rows:
+        return pd.DataFrame()
+
+    columns = []
+    seen = {}
+    for idx, header in enumerate(rows[0]):
+        name = f"Unnamed: {idx}" if header is None else header
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+
+    df = pd.DataFrame(rows[1:], columns=columns).infer_objects()
+
+    # Colonnes entièrement vides : NaN comme pd.read_excel (et non None)
+    for col in df.columns[df.isna().all()]:
+        df[col] = float('nan')
+    return df
+
+
+def _export_sheets(file_path, sheets, keep_other_sheets=False):
+    """
+    Réécrit les valeurs des feuilles dans le fichier Excel en conservant sa mise en forme.
+
+    Args:
+        keep_other_sheets (bool): Conserver les feuilles absentes de la base
+            (feuilles annexes de matrix.xlsx, dont seule la première est importée)
+    """
+    if os.path.exists(file_path):
+        wb = load_workbook(file_path)
+    else:
+        wb = Workbook()
+        wb.remove(wb.active)
+
+    titles = [sheet.title for sheet in sheets]
+    if not keep_other_sheets:
+        for name in list(wb.sheetnames):
+            if name not in titles:
+                del wb[name]
+
+    for position, sheet in enumerate(sheets):
+        if sheet.title in wb.sheetnames:
+            ws = wb[sheet.title]
+        elif keep_other_sheets and wb.sheetnames:
+            # La feuille principale de matrix.xlsx est toujours la première
+            ws = wb.worksheets[0]
+            ws.title = sheet.title
+        else:
+            ws = wb.create_sheet(sheet.title, position)
+
+        rows = sheet.rows_values()
+        width = max(len(rows[0]) if rows else 0, ws.max_column)
+        for row_idx, values in enumerate(rows, start=1):
+            for col_idx in range(1, width + 1):
+                value = values[col_idx - 1] if col_idx <= len(values) else None
+                if ws.cell(row=row_idx, column=col_idx).value != value:
+                    ws.cell(row=row_idx, column=col_idx).value = value
+        if ws.max_row > len(rows):
+            ws.delete_rows(len(rows) + 1, ws.max_row - len(rows))
+
+    if not keep_other_sheets:
+        wb._sheets.sort(key=lambda ws: titles.index(ws.title))
+
+    wb.save(file_path)
+    wb.close()
+    invalidate_excel_cache(file_path)
+
+
+# ---------- Points d'entrée utilisés par l'application ----------
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+_store_preference = (None, False)  # (signature du fichier de préférences, option activée)
+
+
+def is_week_store_enabled():
+    """Indique si l'option 'stockage_sqlite' est activée (relue seulement si le fichier change)."""
+    global _store_preference
+    signature = (PREFERENCES_FILE, get_file_signature(PREFERENCES_FILE))
+    if signature != _store_preference[0]:
+        enabled = False
+        try:
+            with open(PREFERENCES_FILE, "r", encoding="utf-8") as f:
+                enabled = bool(json.load(f).get("stockage_sqlite", False))
+        except (OSError, ValueError, AttributeError):
+            pass
+        _store_preference = (signature, enabled)
+    return _store_preference[1]
+
+
+def get_week_store(week_folder):
+    """Retourne la base SQLite de la semaine (créée et importée au besoin), ou None si désactivée."""
+    if not week_folder or not is_week_store_enabled() or not os.path.isdir(week_folder):
+        return None
+
+    key = os.path.normcase(os.path.abspath(week_folder))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = WeekStore(week_folder)
+            _stores[key] = store
+    try:
+        store.sync_from_excel()
+    except Exception as e:
+        print(f"Erreur lors de la synchronisation de la base {store.db_path}: {e}")
+    return store
+
+
+def _store_for_file(file_path):
+    """Retourne (store, nom_fichier) si le fichier est géré par la base de sa semaine."""
+    filename = os.path.basename(file_path)
+    if filename != MATRIX_FILENAME and filename not in SCHOOL_FILES:
+        return None, filename
+    store = get_week_store(os.path.dirname(os.path.abspath(file_path)))
+    if store is None or not store.has_source(filename):
+        return None, filename
+    return store, filename
+
+
+# ---------- Transactions multi-fichiers (unité de travail) ----------
+
+# Journal des remplacements de fichiers en cours (reprise après un arrêt brutal)
+JOURNAL_FILENAME = ".transaction_en_cours.json"
+
+_local = threading.local()
+
+
+def _normalize_path(file_path):
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+class WeekTransaction:
+    """
+    Unité de travail d'une action touchant plusieurs fichiers de la semaine.
+
+    Chaque classeur est chargé au plus une fois (les fonctions appelées pendant la
+    transaction partagent le même objet) et les sauvegardes sont différées jusqu'au
+    commit : tous les fichiers sont alors écrits dans des fichiers temporaires puis
+    remplacés par renommage, ou rien n'est écrit en cas d'erreur.
+    """
+
+    def __init__(self, week_folder):
+        self.week_folder = os.path.abspath(week_folder)
+        self._workbooks = {}      # {chemin normalisé: classeur chargé}
+        self._pending = {}        # {chemin normalisé: (chemin, type, contenu)} à écrire au commit
+        self._personnel = None    # Données de personnel.json à écrire au commit
+        self._on_commit = []
+        self._on_rollback = []
+
+    def owns(self, file_path):
+        """Indique si le fichier appartient au dossier de la semaine de cette transaction."""
+        return _normalize_path(os.path.dirname(os.path.abspath(file_path))) == _normalize_path(self.week_folder)
+
+    # --- Accès pendant la transaction ---
+
+    def open_workbook(self, file_path):
+        """Retourne le classeur (chargé une seule fois pendant la transaction)."""
+        key = _normalize_path(file_path)
+        wb = self._workbooks.get(key)
+        if wb is None:
+            wb = _open_workbook_direct(file_path)
+            self._workbooks[key] = wb
+        return wb
+
+    def modified_workbook(self, file_path):
+        """Retourne le classeur s'il a été modifié pendant la transaction, sinon None."""
+        entry = self._pending.get(_normalize_path(file_path))
+        return entry[2] if entry and entry[1] == "workbook" else None
+
+    def modified_dataframe(self, file_path):
+        """Retourne le DataFrame s'il a été enregistré pendant la transaction, sinon None."""
+        entry = self._pending.get(_normalize_path(file_path))
+        return entry[2] if entry and entry[1] == "dataframe" else None
+
+    def save_workbook(self, wb, file_path):
+        """Enregistre le classeur au commit."""
+        key = _normalize_path(file_path)
+        self._workbooks[key] = wb
+        self._pending[key] = (file_path, "workbook", wb)
+
+    def save_dataframe(self, df, file_path, **kwargs):
+        """Enregistre le DataFrame (matrix) au commit."""
+        key = _normalize_path(file_path)
+        self._workbooks.pop(key, None)
+        self._pending[key] = (file_path, "dataframe", (df.copy(), kwargs))
+
+    def load_personnel(self):
+        """Données du personnel enregistrées pendant la transaction (None si aucune)."""
+        return copy.deepcopy(self._personnel) if self._personnel is not None else None
+
+    def save_personnel(self, data):
+        self._personnel = copy.deepcopy(data)
+
+    def on_commit(self, func):
+        """Fonction appelée après un commit réussi."""
+        self._on_commit.append(func)
+
+    def on_rollback(self, func):
+        """Fonction appelée si la transaction est annulée."""
+        self._on_rollback.append(func)
+
+    # --- Fin de transaction ---
+
+    def commit(self):
+        """Écrit tous les fichiers modifiés (base SQLite ou fichiers temporaires + renommage)."""
+        store = get_week_store(self.week_folder)
+
+        if store is not None:
+            # Les fichiers hors de la base sont écrits (fichiers temporaires + journal) dans la
+            # transaction SQLite : un échec annule aussi la base. Le journal porte le jeton de
+            # la transaction SQLite, pour que la reprise ne renomme que si la base a été validée.
+            prepared = None
+            try:
+                with store.transaction():
+                    file_writes = []
+                    for file_path, kind, content in self._pending.values():
+                        filename = os.path.basename(file_path)
+                        if isinstance(content, StoreWorkbook):
+                            content.save(file_path)
+                        elif kind == "dataframe" and store.has_source(filename):
+                            store.save_matrix_dataframe(content[0])
+                        else:
+                            file_writes.append((file_path, kind, content))
+                    if self._personnel is not None:
+                        store.save_personnel(self._personnel)
+                    if file_writes:
+                        token = uuid.uuid4().hex
+                        store.mark_transaction(token)
+                        prepared = _prepare_files(self.week_folder, file_writes, token)
+            except BaseException:
+                if prepared is not None:
+                    _discard_journal(*prepared)
+                raise
+            if prepared is not None:
+                _apply_journal(*prepared)
+        else:
+            file_writes = list(self._pending.values())
+            if self._personnel is not None:
+                file_writes.append((os.path.join(self.week_folder, PERSONNEL_FILENAME), "json", self._personnel))
+            if file_writes:
+                _replace_files_atomically(self.week_folder, file_writes)
+
+        for func in self._on_commit:
+            func()
+
+    def rollback(self):
+        """Abandonne toutes les modifications (aucun fichier n'a été écrit)."""
+        self._pending.clear()
+        self._workbooks.clear()
+        self._personnel = None
+        for func in self._on_rollback:
+            func()
+
+
+def _write_pending_file(target_path, kind, content):
+    """Écrit le contenu d'un fichier en attente à l'emplacement donné."""
+    if kind == "workbook":
+        content.save(target_path)
+    elif kind == "dataframe":
+        df, kwargs = content
+        df.to_excel(target_path, **kwargs)
+    else:
+        with open(target_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, indent=4, ensure_ascii=False)
+
+
+def _replace_files_atomically(week_folder, file_writes):
+    """
+    Écrit chaque fichier dans un fichier temporaire, puis les remplace tous par renommage.
+
+    Un journal liste les renommages à faire : si l'application s'arrête au milieu,
+    recover_week_transaction() termine les renommages au prochain démarrage.
+    """
+    _apply_journal(*_prepare_files(week_folder, file_writes))
+
+
+def _prepare_files(week_folder, file_writes, token=None):
+    """
+    Écrit les fichiers temporaires et le journal des renommages (sans rien remplacer).
+
+    Args:
+        token (str): Jeton de la transaction SQLite liée (None sans base)
+
+    Returns:
+        (chemin_du_journal, [(fichier_temporaire, fichier), ...])
+    """
+    temp_files = []
+    try:
+        for file_path, kind, content in file_writes:
+            # Garder l'extension : pandas et openpyxl choisissent le format d'après elle
+            base, extension = os.path.splitext(file_path)
+            temp_path = f"{base}.tmp{extension}"
+            _write_pending_file(temp_path, kind, content)
+            temp_files.append((temp_path, file_path))
+    except Exception:
+        for temp_path, _ in temp_files:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        raise
+
+    journal_path = os.path.join(week_folder, JOURNAL_FILENAME)
+    try:
+        with open(journal_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"token": token, "files": temp_files}, f, ensure_ascii=False)
+        os.replace(journal_path + ".tmp", journal_path)
+    except Exception:
+        _discard_journal(journal_path, temp_files)
+        raise
+    return journal_path, temp_files
+
+
+def _apply_journal(journal_path, temp_files):
+    """Effectue les renommages du journal puis le supprime."""
+    for temp_path, file_path in temp_files:
+        if os.path.exists(temp_path):
+            os.replace(temp_path, file_path)
+        invalidate_excel_cache(file_path)
+    os.remove(journal_path)
+
+
+def _discard_journal(journal_path, temp_files):
+    """Supprime les fichiers temporaires et le journal d'une transaction annulée."""
+    for path in [temp_path for temp_path, _ in temp_files] + [journal_path + ".tmp", journal_path]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def recover_week_transaction(week_folder):
+    """Termine une transaction interrompue (renommages restants du journal). Retourne True si reprise."""
+    journal_path = os.path.join(week_folder, JOURNAL_FILENAME)
+    if not os.path.exists(journal_path):
+        return False
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            journal = json.load(f)
+        # Ancien format : simple liste des renommages
+        if isinstance(journal, list):
+            journal = {"token": None, "files": journal}
+        temp_files = journal["files"]
+
+        # Transaction liée à la base SQLite : ne renommer que si la base a été validée
+        store = get_week_store(week_folder) if journal.get("token") else None
+        if store is not None and not store.has_committed(journal["token"]):
+            _discard_journal(journal_path, temp_files)
+            print(f"Transaction interrompue annulée dans {week_folder}")
+            return True
+        _apply_journal(journal_path, temp_files)
+        print(f"Transaction interrompue terminée dans {week_folder}")
+        return True
+    except Exception as e:
+        print(f"Erreur lors de la reprise de la transaction de {week_folder}: {e}")
+        return False
+
+
+def current_week_transaction(file_path):
+    """Retourne la transaction en cours (dans ce thread) qui gère ce fichier, ou None."""
+    for transaction in reversed(getattr(_local, "transactions", [])):
+        if transaction.owns(file_path):
+            return transaction
+    return None
+
+
+@contextmanager
+def week_transaction(week_folder):
+    """
+    Regroupe les écritures d'une action dans une seule transaction.
+
+    Les appels à open_workbook(), save_workbook(), write_matrix_dataframe() et
+    save_personnel_data() faits dans le bloc sont mis en commun et écrits à la fin,
+    tous ensemble ou pas du tout. Une transaction imbriquée rejoint la transaction
+    englobante de la même semaine.
+    """
+    existing = current_week_transaction(os.path.join(week_folder, MATRIX_FILENAME))
+    if existing is not None:
+        yield existing
+        return
+
+    recover_week_transaction(week_folder)
+    transaction = WeekTransaction(week_folder)
+    stack = _local.__dict__.setdefault("transactions", [])
+    stack.append(transaction)
+    try:
+        yield transaction
+    except BaseException:
+        stack.remove(transaction)
+        transaction.rollback()
+        raise
+    stack.remove(transaction)
+    try:
+        transaction.commit()
+    except BaseException:
+        transaction.rollback()
+        raise
+
+
+def _open_workbook_direct(file_path):
+    store, filename = _store_for_file(file_path)
+    if store is not None:
+        return store.open_workbook(filename)
+    if load_workbook is None:
+        raise ImportError("openpyxl n'est pas disponible")
+    return load_workbook(file_path)
+
+
+def _workbook_to_dataframes(wb):
+    """Convertit un classeur en {nom_feuille: DataFrame} comme pd.read_excel(sheet_name=None)."""
+    return {name: _sheet_to_dataframe(StoreSheet(name, wb[name].iter_rows(values_only=True)))
+            for name in wb.sheetnames}
+
+
+def open_workbook(file_path):
+    """Ouvre un classeur pour modification : base SQLite si activée, sinon openpyxl."""
+    transaction = current_week_transaction(file_path)
+    if transaction is not None:
+        return transaction.open_workbook(file_path)
+    return _open_workbook_direct(file_path)
+
+
+def save_workbook(wb, file_path):
+    """Sauvegarde un classeur (différée jusqu'au commit pendant une transaction)."""
+    transaction = current_week_transaction(file_path)
+    if transaction is not None:
+        transaction.save_workbook(wb, file_path)
+    else:
+        cache_save_workbook(wb, file_path)
+
+
+def open_workbook_readonly(file_path):
+    """Ouvre un classeur en lecture seule : base SQLite si activée, sinon cache Excel."""
+    transaction = current_week_transaction(file_path)
+    if transaction is not None and transaction.modified_workbook(file_path) is not None:
+        return transaction.modified_workbook(file_path)
+    store, filename = _store_for_file(file_path)
+    if store is not None:
+        return store.open_workbook(filename, read_only=True)
+    return load_workbook_cached(file_path)
+
+
+def read_excel_sheets(file_path, sheet_name=0):
+    """Équivalent de pd.read_excel() : base SQLite si activée, sinon cache Excel."""
+    transaction = current_week_transaction(file_path)
+    modified_wb = transaction.modified_workbook(file_path) if transaction is not None else None
+    modified_df = transaction.modified_dataframe(file_path) if transaction is not None else None
+
+    if modified_df is not None:
+        df = modified_df[0].copy()
+        return {modified_df[1].get("sheet_name", "Sheet1"): df} if sheet_name is None else df
+    if modified_wb is not None:
+        sheets = _workbook_to_dataframes(modified_wb)
+    else:
+        store, filename = _store_for_file(file_path)
+        if store is None:
+            return read_excel_cached(file_path, sheet_name=sheet_name)
+        sheets = store.read_dataframes(filename)
+
+    if sheet_name is None:
+        return sheets
+    if isinstance(sheet_name, int):
+        sheet_name = list(sheets.keys())[sheet_name]
+    return sheets[sheet_name]
+
+
+def iter_workbook_rows(file_path):
+    """
+    Parcourt les feuilles d'un classeur en lecture seule, sans DataFrame ni objets cellule.
+
+    Le fichier est lu une seule fois en mode read_only/values_only (cache partagé),
+    la base SQLite si elle est activée, ou le classeur modifié de la transaction en cours.
+    À réserver aux lectures : pour modifier un fichier, utiliser open_workbook().
+
+    Yields:
+        (nom_feuille, en_tetes, lignes) : en_tetes est le tuple de la première ligne
+        (vide si la feuille est vide), lignes un itérateur sur les tuples de valeurs suivants.
+    """
+    transaction = current_week_transaction(file_path)
+    modified_df = transaction.modified_dataframe(file_path) if transaction is not None else None
+    if modified_df is not None:
+        df, kwargs = modified_df
+        values = df.astype(object).where(df.notna(), None)
+        yield (kwargs.get("sheet_name", "Sheet1"), tuple(df.columns),
+               values.itertuples(index=False, name=None))
+        return
+
+    wb = open_workbook_readonly(file_path)
+    for sheet_name in wb.sheetnames:
+        rows = wb[sheet_name].iter_rows(values_only=True)
+        headers = next(rows, None)
+        yield sheet_name, tuple(headers) if headers is not None else (), rows
+
+
+def write_matrix_dataframe(df, file_path, **kwargs):
+    """Enregistre le DataFrame de matrix : base SQLite si activée, sinon fichier Excel."""
+    transaction = current_week_transaction(file_path)
+    if transaction is not None:
+        transaction.save_dataframe(df, file_path, **kwargs)
+        return
+    store, _ = _store_for_file(file_path)
+    if store is not None:
+        store.save_matrix_dataframe(df)
+    else:
+        save_dataframe(df, file_path, **kwargs)
+
+
+def reload_from_excel(file_path):
+    """Force la réimportation d'un fichier dans la base (ex : nouveau matrix.xlsx importé)."""
+    store = get_week_store(os.path.dirname(os.path.abspath(file_path)))
+    if store is not None:
+        store.import_source(os.path.basename(file_path))
+
+
+def load_personnel_data(week_folder):
+    """Charge personnel.json (ou la base SQLite si activée). Retourne None si absent."""
+    transaction = current_week_transaction(os.path.join(week_folder, PERSONNEL_FILENAME))
+    if transaction is not None and transaction.load_personnel() is not None:
+        return transaction.load_personnel()
+    store = get_week_store(week_folder)
+    if store is not None:
+        return store.load_personnel()
+    personnel_path = os.path.join(week_folder, PERSONNEL_FILENAME)
+    if not os.path.exists(personnel_path):
+        return None
+    with open(personnel_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_personnel_data(week_folder, data):
+    """Enregistre le personnel dans la base SQLite (si activée) et dans personnel.json."""
+    transaction = current_week_transaction(os.path.join(week_folder, PERSONNEL_FILENAME))
+    if transaction is not None:
+        transaction.save_personnel(data)
+        return
+    store = get_week_store(week_folder)
+    if store is not None:
+        store.save_personnel(data)
+        return
+    with open(os.path.join(week_folder, PERSONNEL_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+def get_week_generation(week_folder):
+    """Compteur de modifications de la base (None si la base est désactivée)."""
+    store = get_week_store(week_folder)
+    return store.get_generation() if store is not None else None
+
+
+def export_week_to_excel(week_folder, only_dirty=True):
+    """Régénère les fichiers Excel de la semaine depuis la base. Retourne la liste des fichiers écrits."""
+    store = get_week_store(week_folder)
+    if store is None:
+        return []
+    return store.export_to_excel(only_dirty=only_dirty)
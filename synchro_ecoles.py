@@ -0,0 +1,257 @@
+"""
+Synchronisation des élèves assignés (matrix.xlsx) vers les fichiers Excel des écoles.
+
+Les élèves assignés à une classe dans matrix.xlsx sont ajoutés à la liste des élèves de
+cette classe dans le fichier de leur école. Cette synchronisation n'est plus refaite à
+chaque affichage du tableau de bord :
+
+- is_up_to_date() compare la signature de la semaine (matrix.xlsx, fichiers des écoles,
+  compteur de modifications de la base SQLite) à celle de la dernière synchronisation :
+  tant que rien n'a changé, il n'y a ni lecture du matrix ni ouverture des classeurs ;
+- cette signature est prise avant la lecture du matrix (source_signature()) et transmise
+  à sync() : un matrix.xlsx réécrit par un autre processus pendant la synchronisation
+  n'est donc jamais considéré comme synchronisé ;
+- sync() calcule une empreinte des affectations de chaque école et n'ouvre que les
+  classeurs dont l'empreinte ou le fichier a changé depuis leur dernière synchronisation ;
+- dans un classeur ouvert, seules les cellules dont la liste d'élèves change sont
+  écrites, et le classeur n'est enregistré que si au moins une feuille a changé.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from cache_excel import get_file_signature
+from index_classes import get_class_index
+from index_horaires import find_horaire_sheet
+from stockage_semaine import (MATRIX_FILENAME, current_week_transaction, get_week_generation, open_workbook,
+                              save_workbook)
+
+# École (clé des affectations du matrix) → fichier Excel de l'école
+FICHIERS_ECOLES = {
+    'A': 'ecole_a.xlsx',
+    'B': 'ecole_b.xlsx',
+    'C/CS': 'ECOLE_C_cours_standard.xlsx',
+    'C/CI': 'ECOLE_C_cours_intensif.xlsx',
+    'Morning': 'MORNING.xlsx',
+    'Premium/CS': 'ECOLE_PREMIUM_cours_standard.xlsx',
+    'Premium/CI': 'ECOLE_PREMIUM_cours_intensifs.xlsx'
+}
+
+
+def group_assignments(eleves_assignes):
+    """
+    Groupe les élèves assignés par école, horaire et classe.
+
+    Returns:
+        dict: {ecole: {horaire: {classe: [noms]}}}
+    """
+    grouped = {}
+    for eleve in eleves_assignes:
+        classes = grouped.setdefault(eleve['ecole'], {}).setdefault(eleve['horaire'], {})
+        classes.setdefault(eleve['classe'], []).append(eleve['nom'])
+    return grouped
+
+
+def assignments_hash(horaires_data):
+    """Empreinte des affectations d'une école (indépendante de l'ordre des élèves)."""
+    canonical = {str(horaire): {str(classe): sorted(str(nom) for nom in noms) for classe, noms in classes.items()}
+                 for horaire, classes in horaires_data.items()}
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def merge_students(current_value, eleves):
+    """
+    Liste d'élèves d'une cellule après ajout des élèves assignés (sans doublons, triée).
+
+    Returns:
+        str: nouveau texte de la cellule, ou None si aucun élève n'est à ajouter
+    """
+    current_value = str(current_value or '').strip()
+    existing_eleves = []
+    if current_value and current_value not in ['', 'nan', 'none']:
+        existing_eleves = [e.strip() for e in current_value.split(',') if e.strip()]
+
+    # Ajouter seulement les élèves qui ne sont pas déjà présents (éviter les doublons)
+    new_eleves = [eleve for eleve in eleves if eleve not in existing_eleves]
+    if not new_eleves:
+        return None
+
+    # Trier les élèves par ordre alphabétique pour une meilleure présentation
+    return ', '.join(sorted(existing_eleves + new_eleves))
+
+
+def find_students_column(sheet, classe_col):
+    """Colonne de la liste des élèves d'une feuille d'horaire (None si introuvable)."""
+    headers = [str(sheet.cell(row=1, column=col_idx).value or '').lower()
+               for col_idx in range(1, sheet.max_column + 1)]
+
+    # D'abord chercher "liste des élèves" ou "élèves"
+    for col_idx, header in enumerate(headers, start=1):
+        if 'élèves' in header or 'eleves' in header:
+            return col_idx
+
+    # Si pas trouvé, chercher "noms" ou "stagiaire"
+    for col_idx, header in enumerate(headers, start=1):
+        if 'nom' in header or 'stagiaire' in header:
+            return col_idx
+
+    # Si toujours pas trouvé, utiliser la colonne à droite de la classe (si elle existe)
+    if classe_col and classe_col + 1 <= sheet.max_column:
+        return classe_col + 1
+    return None
+
+
+def apply_school_assignments(wb, horaires_data, excel_filename=""):
+    """
+    Ajoute les élèves assignés dans les feuilles d'horaires d'un classeur d'école.
+
+    Returns:
+        list: titres des feuilles modifiées
+    """
+    changed_sheets = []
+    for horaire, classes_data in horaires_data.items():
+        # Chercher la feuille correspondant à cet horaire (index des feuilles du classeur)
+        target_sheet = find_horaire_sheet(wb, horaire)
+        if target_sheet is None:
+            print(f"Feuille horaire '{horaire}' non trouvée dans {excel_filename}")
+            continue
+
+        # Index des classes de la feuille (une seule lecture pour toutes les classes de l'horaire)
+        class_index = get_class_index(target_sheet)
+        eleves_col = find_students_column(target_sheet, class_index.classe_col)
+        if eleves_col is None:
+            print(f"Aucune colonne appropriée trouvée pour les élèves dans {excel_filename} - {horaire}")
+            continue
+
+        sheet_changed = False
+        for classe_nom, eleves in classes_data.items():
+            classe_row = class_index.find_row(classe_nom)
+            if classe_row is None:
+                continue
+            eleves_text = merge_students(target_sheet.cell(row=classe_row, column=eleves_col).value, eleves)
+            if eleves_text is not None:
+                target_sheet.cell(row=classe_row, column=eleves_col, value=eleves_text)
+                sheet_changed = True
+
+        if sheet_changed:
+            changed_sheets.append(target_sheet.title)
+    return changed_sheets
+
+
+class SchoolFileSync:
+    """Synchronisation matrix → fichiers des écoles, refaite seulement quand une source a changé."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._weeks = {}    # dossier de la semaine → signature lors de la dernière synchronisation
+        self._files = {}    # fichier d'école → (empreinte des affectations, signature du fichier, compteur de la base)
+
+    @staticmethod
+    def source_signature(week_folder):
+        """
+        Signature de la semaine : matrix.xlsx, fichiers des écoles (dans l'ordre de
+        FICHIERS_ECOLES) et compteur de modifications de la base SQLite.
+
+        À prendre avant de lire matrix.xlsx, puis à transmettre à sync().
+        """
+        week_folder = os.path.abspath(week_folder)
+        paths = [os.path.join(week_folder, MATRIX_FILENAME)]
+        paths += [os.path.join(week_folder, filename) for filename in FICHIERS_ECOLES.values()]
+        return tuple(get_file_signature(path) for path in paths) + (get_week_generation(week_folder),)
+
+    def is_up_to_date(self, week_folder, source=None):
+        """
+        Vrai si ni matrix.xlsx ni les fichiers des écoles n'ont changé depuis la dernière synchronisation.
+
+        Args:
+            week_folder (str): Dossier de la semaine
+            source (tuple): Signature déjà prise avec source_signature() (prise maintenant si None)
+        """
+        week_folder = os.path.abspath(week_folder)
+        if source is None:
+            source = self.source_signature(week_folder)
+        with self._lock:
+            return self._weeks.get(week_folder) == source
+
+    def sync(self, week_folder, matrix_assignments, source=None):
+        """
+        Ajoute les élèves assignés du matrix dans les fichiers des écoles qui en ont besoin.
+
+        Args:
+            week_folder (str): Dossier de la semaine
+            matrix_assignments (dict): Résultat de analyze_matrix_assignments()
+            source (tuple): Signature prise avec source_signature() avant la lecture du matrix
+                (prise au début de sync() si None)
+
+        Les fichiers enregistrés sont les seuls signés à nouveau ; les autres gardent la
+        signature de source, et le compteur de la base est celui de source pour tous.
+        Si matrix.xlsx a changé pendant la synchronisation, la semaine n'est pas marquée
+        à jour.
+
+        Returns:
+            list: fichiers d'écoles enregistrés
+        """
+        week_folder = os.path.abspath(week_folder)
+        if source is None:
+            source = self.source_signature(week_folder)
+        generation = source[-1]
+        signatures = dict(zip(FICHIERS_ECOLES.values(), source[1:-1]))
+        grouped = group_assignments(matrix_assignments['eleves_assignes'])
+        written = []
+        incomplete = False     # Fichier en erreur ou enregistrement différé (transaction)
+        with self._lock:
+            for ecole_key, horaires_data in grouped.items():
+                excel_filename = FICHIERS_ECOLES.get(ecole_key)
+                if excel_filename is None:
+                    continue
+                excel_path = os.path.join(week_folder, excel_filename)
+                if not os.path.exists(excel_path):
+                    continue
+
+                digest = assignments_hash(horaires_data)
+                if self._files.get(excel_path) == (digest, signatures[excel_filename], generation):
+                    continue
+
+                try:
+                    wb = open_workbook(excel_path)
+                    saved = False
+                    if apply_school_assignments(wb, horaires_data, excel_filename):
+                        save_workbook(wb, excel_path)
+                        written.append(excel_filename)
+                        saved = True
+                except Exception as e:
+                    print(f"Erreur lors de la mise à jour de {excel_filename}: {e}")
+                    self._files.pop(excel_path, None)
+                    incomplete = True
+                    continue
+
+                if current_week_transaction(excel_path) is not None:
+                    # Enregistrement différé jusqu'au commit : rien n'est encore sur le disque
+                    self._files.pop(excel_path, None)
+                    incomplete = True
+                    continue
+                if saved:
+                    # Seul un fichier enregistré par cette synchronisation est signé à nouveau
+                    signatures[excel_filename] = get_file_signature(excel_path)
+                self._files[excel_path] = (digest, signatures[excel_filename], generation)
+
+            matrix_path = os.path.join(week_folder, MATRIX_FILENAME)
+            if incomplete or get_file_signature(matrix_path) != source[0]:
+                # matrix.xlsx réécrit pendant la synchronisation (autre processus) : à refaire
+                self._weeks.pop(week_folder, None)
+            else:
+                self._weeks[week_folder] = (source[0],) + tuple(signatures.values()) + (generation,)
+        return written
+
+    def invalidate(self, week_folder=None):
+        """Oublie les synchronisations mémorisées (toutes, ou celles d'une semaine)."""
+        with self._lock:
+            if week_folder is None:
+                self._weeks.clear()
+                self._files.clear()
+                return
+            week_folder = os.path.abspath(week_folder)
+            self._weeks.pop(week_folder, None)
+            for path in [p for p in self._files if os.path.dirname(p) == week_folder]:
+                del self._files[path]
@@ -0,0 +1,77 @@
+"""
+Mise à jour incrémentale d'un ttk.Treeview à partir d'une liste de lignes.
+
+Chaque ligne est identifiée par une clé stable (l'étiquette de la ligne du DataFrame),
+utilisée comme identifiant d'élément (iid) du Treeview. apply() compare les nouvelles
+lignes aux lignes affichées et ne fait que les opérations nécessaires : suppression des
+lignes disparues, insertion des nouvelles, mise à jour des valeurs modifiées et
+déplacement des lignes dont la position a changé. La sélection et la position de
+défilement des lignes conservées ne sont donc pas perdues.
+"""
+
+
+class TreeviewSync:
+    """Carte clé de ligne → élément affiché d'un Treeview, et mise à jour par différence."""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._items = {}   # iid → (valeurs, tags) affichés
+        self._order = []   # iids dans l'ordre d'affichage
+
+    @staticmethod
+    def item_id(key):
+        """Identifiant de l'élément du Treeview d'une ligne."""
+        return str(key)
+
+    def apply(self, rows):
+        """
+        Affiche les lignes données, dans cet ordre.
+
+        Args:
+            rows: Itérable de (clé, valeurs, tags)
+
+        Returns:
+            dict: nombre d'éléments insérés, supprimés, mis à jour et déplacés
+        """
+        tree = self.tree
+        new_rows = [(self.item_id(key), tuple(values), tuple(tags)) for key, values, tags in rows]
+        new_iids = [iid for iid, _, _ in new_rows]
+        new_set = set(new_iids)
+        stats = {'inserted': 0, 'deleted': 0, 'updated': 0, 'moved': 0}
+
+        # 1. Supprimer les lignes qui ne sont plus affichées
+        removed = [iid for iid in self._order if iid not in new_set]
+        if removed:
+            tree.delete(*removed)
+            for iid in removed:
+                del self._items[iid]
+            stats['deleted'] = len(removed)
+        kept = [iid for iid in self._order if iid in new_set]
+
+        # 2. Déplacer les lignes conservées si leur ordre relatif a changé
+        kept_new_order = [iid for iid in new_iids if iid in self._items]
+        if kept != kept_new_order:
+            for position, iid in enumerate(kept_new_order):
+                tree.move(iid, "", position)
+            stats['moved'] = sum(1 for old, new in zip(kept, kept_new_order) if old != new)
+
+        # 3. Insérer les nouvelles lignes à leur place et mettre à jour les valeurs modifiées
+        for position, (iid, values, tags) in enumerate(new_rows):
+            displayed = self._items.get(iid)
+            if displayed is None:
+                tree.insert("", position, iid=iid, values=values, tags=tags)
+                stats['inserted'] += 1
+            elif displayed != (values, tags):
+                tree.item(iid, values=values, tags=tags)
+                stats['updated'] += 1
+            self._items[iid] = (values, tags)
+
+        self._order = new_iids
+        return stats
+
+    def clear(self):
+        """Vide le Treeview et la carte des éléments."""
+        if self._order:
+            self.tree.delete(*self._order)
+        self._items.clear()
+        self._order = []
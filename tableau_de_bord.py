@@ -0,0 +1,778 @@
+"""
+Tableau de bord des classes (écoles → horaires → cartes de classes) à widgets réutilisés.
+
+Le tableau de bord n'est plus détruit puis recréé à chaque rafraîchissement (changement
+de semaine, filtre d'école, ajout de classe...). Les sections d'écoles, les sections
+d'horaires et les cartes de classes créées restent en place : render() les reconfigure
+avec les nouvelles données (textes, couleurs, position dans la grille) et masque celles
+qui ne servent plus, qui sont gardées en réserve (WidgetPool) pour le prochain affichage.
+
+Les widgets sont attribués par clé (école, horaire, nom de classe) et retiennent les
+valeurs qu'ils affichent : après l'ajout d'une classe ou le déplacement de deux élèves,
+un rafraîchissement ne reconfigure que les cartes et en-têtes dont l'affichage a changé.
+Les sections d'écoles et d'horaires gardent aussi une copie de leurs données : une école
+ou un horaire dont les données n'ont pas changé est sauté en entier, sans parcourir ses
+cartes.
+
+L'affichage est progressif : les écoles visibles (à la position de défilement restaurée)
+sont construites tout de suite, les autres reçoivent d'abord un cadre de chargement de
+hauteur estimée et sont construites une par une avec after_idle(), ou dès qu'elles
+apparaissent à l'écran si l'utilisateur fait défiler le tableau de bord avant.
+
+Les événements (survol, clic, clic droit, boutons ➕ / ➖) sont liés une seule fois à la
+création d'un widget : ils lisent le contexte courant de la carte ou de l'horaire, qui
+change à chaque render().
+"""
+import copy
+import tkinter
+
+import customtkinter as ctk
+
+# Écoles du tableau de bord, dans l'ordre d'affichage :
+# nom du filtre → (clé des données, nom affiché, couleur, couleur de fond)
+ECOLES_TABLEAU = {
+    'A': ('ecole_a', 'A', '#3b82f6', '#eff6ff'),
+    'B': ('ecole_b', 'B', '#10b981', '#f0fdf4'),
+    'C/CS': ('ecole_c_cs', 'C/CS', '#f59e0b', '#fffbeb'),
+    'C/CI': ('ecole_c_ci', 'C/CI', '#8b5cf6', '#f3e8ff'),
+    'Morning': ('ecole_morning', 'Morning', '#ef4444', '#fef2f2'),
+    'Premium/CS': ('ecole_premium_cs', 'Premium/CS', '#06b6d4', '#ecfeff'),
+    'Premium/CI': ('ecole_premium_ci', 'Premium/CI', '#f97316', '#fff7ed')
+}
+
+# Hauteurs estimées (en pixels) pour placer les écoles avant de les construire
+HAUTEUR_EN_TETE_ECOLE = 50
+HAUTEUR_EN_TETE_HORAIRE = 60
+HAUTEUR_LIGNE_CARTES = 115
+HAUTEUR_SANS_CLASSES = 50
+
+# Hauteur visible du tableau de bord avant son premier affichage
+HAUTEUR_VUE_DEFAUT = 600
+
+
+def calculate_optimal_layout(total_items, min_per_row=2, max_per_row=4):
+    """
+    Calcule la disposition optimale pour un nombre d'items.
+
+    Returns:
+        int: Nombre d'items par ligne optimal
+    """
+    if total_items <= min_per_row:
+        return total_items
+    elif total_items <= max_per_row:
+        return min_per_row
+    else:
+        # Calculer pour avoir des lignes équilibrées
+        rows = (total_items + max_per_row - 1) // max_per_row
+        return min((total_items + rows - 1) // rows, max_per_row)
+
+
+def extract_start_hour(horaire_str):
+    """Extrait l'heure de début pour le tri (ex: '8h15-9h15' -> 8.25)"""
+    try:
+        start = horaire_str.split('-')[0].strip()
+        if 'h' in start:
+            parts = start.split('h')
+            hours = int(parts[0])
+            minutes = int(parts[1]) if len(parts) > 1 and parts[1] else 0
+            return hours + minutes / 60.0
+        return 0
+    except (ValueError, AttributeError):
+        return 0
+
+
+def soften_color(color, factor=0.6):
+    """Éclaircit une couleur hexadécimale (#rrggbb)."""
+    if color.startswith('#'):
+        r = int(color[1:3], 16)
+        g = int(color[3:5], 16)
+        b = int(color[5:7], 16)
+        r = int(r + (255 - r) * (1 - factor))
+        g = int(g + (255 - g) * (1 - factor))
+        b = int(b + (255 - b) * (1 - factor))
+        return f"#{r:02x}{g:02x}{b:02x}"
+    return color
+
+
+def configure_columns(container, count, previous_count):
+    """Donne un poids aux count premières colonnes de la grille et retire celui des colonnes en trop."""
+    for col in range(count):
+        container.grid_columnconfigure(col, weight=1)
+    for col in range(count, previous_count):
+        container.grid_columnconfigure(col, weight=0)
+    return count
+
+
+def estimate_horaire_height(horaire_info):
+    """Hauteur estimée du cadre d'un horaire (en-tête et lignes de cartes)."""
+    total_classes = len(horaire_info.get('classes', []))
+    if not total_classes:
+        return HAUTEUR_EN_TETE_HORAIRE + HAUTEUR_SANS_CLASSES
+    classes_per_row = calculate_optimal_layout(total_classes, min_per_row=2, max_per_row=4)
+    rows = (total_classes + classes_per_row - 1) // classes_per_row
+    return HAUTEUR_EN_TETE_HORAIRE + rows * HAUTEUR_LIGNE_CARTES
+
+
+def estimate_school_height(school_info):
+    """Hauteur estimée de la section d'une école, sans construire ses widgets."""
+    if not school_info:
+        return HAUTEUR_EN_TETE_ECOLE + HAUTEUR_SANS_CLASSES
+    horaires_per_row = calculate_optimal_layout(len(school_info), min_per_row=2, max_per_row=3)
+    heights = [estimate_horaire_height(horaire_info)
+               for horaire_info in sorted(school_info, key=lambda x: extract_start_hour(x.get('horaire', '')))]
+    return HAUTEUR_EN_TETE_ECOLE + sum(max(heights[start:start + horaires_per_row])
+                                       for start in range(0, len(heights), horaires_per_row))
+
+
+def data_snapshot(week_folder, data):
+    """
+    Copie des données affichées par une section, comparée à celles du prochain affichage.
+
+    La copie est profonde : les listes d'élèves peuvent être modifiées sur place entre deux affichages.
+    """
+    return week_folder, copy.deepcopy(data)
+
+
+def viewport_first_order(heights, top, bottom):
+    """
+    Ordre de construction de sections empilées verticalement.
+
+    Args:
+        heights: Hauteurs des sections, de haut en bas
+        top, bottom: Zone visible (en pixels depuis le haut du tableau de bord)
+
+    Returns:
+        tuple: (indices des sections visibles, indices des autres sections de la plus proche à la plus éloignée)
+    """
+    distances = []
+    start = 0
+    for height in heights:
+        end = start + height
+        if end >= top and start <= bottom:
+            distances.append(0)
+        else:
+            distances.append(top - end if end < top else start - bottom)
+        start = end
+    order = sorted(range(len(heights)), key=lambda i: (distances[i], i))
+    visible = [i for i in order if distances[i] == 0]
+    return visible, order[len(visible):]
+
+
+class WidgetPool:
+    """
+    Réserve de widgets d'un même parent, attribués par clé d'un affichage à l'autre.
+
+    assign() reprend pour chaque clé le widget qui l'affichait déjà : un widget dont les
+    données n'ont pas changé n'a donc rien à reconfigurer. Les nouvelles clés prennent les
+    widgets libérés (ou de nouveaux widgets), et les widgets restants sont masqués
+    (hide()) sans être détruits.
+    """
+
+    def __init__(self, factory):
+        """
+        Args:
+            factory: Fonction sans argument qui crée un nouveau widget (avec une méthode hide())
+        """
+        self._factory = factory
+        self._items = []
+        self._by_key = {}
+
+    def assign(self, keys):
+        """
+        Widgets à utiliser pour les clés données, dans le même ordre.
+
+        Une clé répétée (deux classes de même nom) reçoit un widget par occurrence.
+        """
+        unique_keys = []
+        occurrences = {}
+        for key in keys:
+            count = occurrences.get(key, 0)
+            occurrences[key] = count + 1
+            unique_keys.append((key, count))
+
+        items = [self._by_key.get(key) for key in unique_keys]
+        taken = {id(item) for item in items if item is not None}
+        spare = [item for item in self._items if id(item) not in taken]
+        spare.reverse()
+
+        for position, item in enumerate(items):
+            if item is None:
+                if spare:
+                    item = spare.pop()
+                else:
+                    item = self._factory()
+                    self._items.append(item)
+                items[position] = item
+
+        for item in spare:
+            item.hide()
+        self._by_key = dict(zip(unique_keys, items))
+        return items
+
+    def __len__(self):
+        return len(self._items)
+
+
+class ClassCard:
+    """Carte d'une classe : nom, niveau et intervenants, nombre d'élèves."""
+
+    def __init__(self, parent, dashboard):
+        self.dashboard = dashboard
+        self.context = None
+        self.hover_color = "white"
+        self._shown = None      # Valeurs affichées (nom, détails, couleurs, nombre d'élèves)
+        self._grid = None       # Position dans la grille (None si masquée)
+
+        # Frame de la classe - TAILLE FIXE UNIFORME
+        self.frame = ctk.CTkFrame(
+            parent,
+            fg_color="white",
+            corner_radius=6,
+            border_width=1,
+            border_color="#e5e7eb",
+            width=160,
+            height=110
+        )
+        self.frame.grid_propagate(False)
+        # Curseur pointeur pour indiquer que la carte est cliquable
+        self.frame.configure(cursor="hand2")
+
+        self.name_label = ctk.CTkLabel(self.frame, text="", font=("Arial", 11, "bold"), text_color="#374151")
+        self.name_label.pack(padx=8, pady=(5, 2))
+
+        # Niveau et intervenant (affiché seulement si la classe a un niveau)
+        self.details_label = ctk.CTkLabel(self.frame, text="", font=("Arial", 9), text_color="#6b7280")
+
+        # Nombre d'élèves avec indicateur circulaire
+        self.eleves_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.eleves_frame.pack(padx=8, pady=(0, 5))
+
+        self.circle_frame = ctk.CTkFrame(self.eleves_frame, fg_color="white", corner_radius=12, width=24, height=24)
+        self.circle_frame.pack(side="left")
+        self.circle_frame.pack_propagate(False)
+
+        self.count_label = ctk.CTkLabel(self.circle_frame, text="", font=("Arial", 10, "bold"), text_color="white")
+        self.count_label.pack(expand=True)
+
+        self.text_label = ctk.CTkLabel(self.eleves_frame, text="", font=("Arial", 9), text_color="#6b7280")
+        self.text_label.pack(side="left", padx=(5, 0))
+
+        # Survol et clics liés une seule fois, sur la carte et tous ses éléments
+        for widget in (self.frame, self.name_label, self.details_label, self.eleves_frame,
+                       self.circle_frame, self.count_label, self.text_label):
+            widget.bind("<Enter>", self._on_enter)
+            widget.bind("<Leave>", self._on_leave)
+            widget.bind("<Button-1>", self._on_click)
+            widget.bind("<Button-3>", self._on_right_click)
+
+    def update(self, context, details_text):
+        """
+        Affiche une classe dans la carte (sans rien reconfigurer si l'affichage ne change pas).
+
+        Args:
+            context (dict): Classe affichée (classe_info, horaire, école, couleurs...)
+            details_text (str): Niveau et intervenants ("" pour ne rien afficher)
+
+        Returns:
+            bool: True si la carte a été reconfigurée
+        """
+        # Le contexte (lu par les clics) est toujours remplacé, l'affichage seulement s'il change
+        self.context = context
+        classe_info = context['classe_info']
+        nb_eleves = classe_info.get('nb_eleves', 0)
+        shown = (classe_info.get('nom_classe', 'Classe inconnue'), details_text,
+                 context['school_color'], context['school_bg'], nb_eleves)
+        if shown == self._shown:
+            return False
+
+        previous_details = self._shown[1] if self._shown else ""
+        self.hover_color = context['school_bg']
+        self.frame.configure(fg_color="white")
+        self.name_label.configure(text=shown[0])
+        if details_text:
+            self.details_label.configure(text=details_text)
+            if not previous_details:
+                self.details_label.pack(padx=8, pady=(0, 3), before=self.eleves_frame)
+        elif previous_details:
+            self.details_label.pack_forget()
+        self.circle_frame.configure(fg_color=context['school_color'])
+        self.count_label.configure(text=str(nb_eleves))
+        self.text_label.configure(text="élèves" if nb_eleves > 1 else "élève")
+        self._shown = shown
+        return True
+
+    def show(self, row, column, padx):
+        grid = (row, column, padx)
+        if grid != self._grid:
+            self.frame.grid(row=row, column=column, padx=padx, pady=(0, 5), sticky="nsew")
+            self._grid = grid
+
+    def hide(self):
+        if self._grid is not None:
+            self.frame.grid_remove()
+            self._grid = None
+
+    def _on_enter(self, event):
+        self.frame.configure(fg_color=self.hover_color)
+
+    def _on_leave(self, event):
+        self.frame.configure(fg_color="white")
+
+    def _on_click(self, event):
+        if self.context is not None:
+            self.dashboard.on_class_click(self.context)
+
+    def _on_right_click(self, event):
+        if self.context is not None:
+            self.dashboard.on_class_menu(event, self.context)
+
+
+class HoraireSection:
+    """Cadre d'un horaire : en-tête (intervenant, horaire, boutons ➕ / ➖) et cartes des classes."""
+
+    def __init__(self, parent, school):
+        self.school = school
+        self.context = None
+        self._columns = 0
+        self._header = None     # (icône, texte) affichés
+        self._has_classes = None
+        self._grid = None
+        self._data = None       # Copie des données affichées (data_snapshot)
+
+        self.frame = ctk.CTkFrame(parent, fg_color="#f8fafc", corner_radius=8, border_width=1, border_color="#e5e7eb")
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        header = ctk.CTkFrame(self.frame, fg_color="white", corner_radius=8)
+        header.grid(row=0, column=0, sticky="ew", padx=8, pady=(8, 5))
+        header.grid_columnconfigure(1, weight=1)
+
+        # Icône selon le type d'intervenant
+        self.icon_label = ctk.CTkLabel(header, text="", font=("Arial", 14), text_color=school.color)
+        self.icon_label.grid(row=0, column=0, padx=(5, 8), pady=5)
+
+        self.horaire_label = ctk.CTkLabel(header, text="", font=("Arial", 11, "bold"), text_color="#374151", anchor="w")
+        self.horaire_label.grid(row=0, column=1, sticky="w", pady=5)
+
+        # Boutons pour ajouter une classe / supprimer toutes les classes de l'horaire
+        action_buttons_frame = ctk.CTkFrame(header, fg_color="transparent")
+        action_buttons_frame.grid(row=0, column=2, padx=(10, 5), pady=5)
+        for text, command, padx in (("➕", self._on_add, (0, 3)), ("➖", self._on_delete_all, 0)):
+            button = ctk.CTkButton(
+                action_buttons_frame,
+                text=text,
+                font=("Arial", 10),
+                width=15,
+                height=15,
+                fg_color=soften_color(school.color, 0.5),
+                hover_color=soften_color(school.color, 0.3),
+                text_color="white",
+                corner_radius=12,
+                command=command
+            )
+            button.pack(side="left", padx=padx)
+
+        self.classes_container = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.no_classes_label = ctk.CTkLabel(
+            self.frame,
+            text="👥 Aucune classe pour cet horaire",
+            font=("Arial", 10, "italic"),
+            text_color="#9ca3af"
+        )
+        # Cartes attribuées par nom de classe
+        self.cards = WidgetPool(lambda: ClassCard(self.classes_container, school.dashboard))
+
+    def update(self, horaire_info):
+        """
+        Affiche un horaire et ses classes : seules les cartes dont l'affichage change sont reconfigurées.
+
+        Un horaire dont les données n'ont pas changé depuis le dernier affichage est sauté.
+
+        Returns:
+            int: nombre de cartes reconfigurées
+        """
+        school = self.school
+        dashboard = school.dashboard
+        if self._data == (dashboard.week_folder, horaire_info):
+            return 0
+
+        horaire = horaire_info.get('horaire', 'Horaire inconnu')
+        type_intervenant = horaire_info.get('type_intervenant', 'professeur')
+        classes = horaire_info.get('classes', [])
+        self.context = {
+            'horaire': horaire,
+            'school_key': school.school_key,
+            'school_name': school.display_name,
+            'school_color': school.color,
+            'week_folder': dashboard.week_folder,
+        }
+
+        header = ("👨‍🏫" if type_intervenant == "professeur" else "🎭", f"Horaire : {horaire}")
+        if header != self._header:
+            self.icon_label.configure(text=header[0])
+            self.horaire_label.configure(text=header[1])
+            self._header = header
+
+        has_classes = bool(classes)
+        if has_classes != self._has_classes:
+            if has_classes:
+                self.no_classes_label.grid_remove()
+                self.classes_container.grid(row=1, column=0, sticky="nsew", padx=8, pady=(0, 8))
+            else:
+                self.classes_container.grid_remove()
+                self.no_classes_label.grid(row=1, column=0, padx=10, pady=15)
+            self._has_classes = has_classes
+
+        changed = 0
+        cards = self.cards.assign(classe_info.get('nom_classe', 'Classe inconnue') for classe_info in classes)
+        if classes:
+            classes_per_row = calculate_optimal_layout(len(classes), min_per_row=2, max_per_row=4)
+            if classes_per_row != self._columns:
+                self._columns = configure_columns(self.classes_container, classes_per_row, self._columns)
+
+            for position, (card, classe_info) in enumerate(zip(cards, classes)):
+                classe_row, classe_col = divmod(position, classes_per_row)
+                context = dict(self.context,
+                               classe_info=classe_info,
+                               intervenant=classe_info.get('intervenant', 'Non spécifié'),
+                               type_intervenant=type_intervenant,
+                               school_bg=school.background)
+                changed += card.update(context, dashboard.class_details(context))
+                card.show(classe_row, classe_col, (0, 5) if classe_col < classes_per_row - 1 else 0)
+        self._data = data_snapshot(dashboard.week_folder, horaire_info)
+        return changed
+
+    def show(self, row, column, padx):
+        grid = (row, column, padx)
+        if grid != self._grid:
+            self.frame.grid(row=row, column=column, sticky="nsew", padx=padx, pady=(0, 5))
+            self._grid = grid
+
+    def hide(self):
+        if self._grid is not None:
+            self.frame.grid_remove()
+            self._grid = None
+
+    def _on_add(self):
+        if self.context is not None:
+            self.school.dashboard.on_add_class(self.context)
+
+    def _on_delete_all(self):
+        if self.context is not None:
+            self.school.dashboard.on_delete_all(self.context)
+
+
+class SchoolSection:
+    """Section d'une école : en-tête (nom, statistiques, boutons) et cadres des horaires."""
+
+    def __init__(self, dashboard, school_key, display_name, color, background):
+        self.dashboard = dashboard
+        self.school_key = school_key
+        self.display_name = display_name
+        self.color = color
+        self.background = background
+        self._columns = 0
+        self._stats = None
+        self._has_horaires = None
+        self._row = None
+        self._data = None       # Copie des données affichées (data_snapshot)
+        self.materialized = False   # Faux tant que seul le cadre de chargement est affiché
+
+        self.frame = ctk.CTkFrame(dashboard.main_scrollable, fg_color="white", corner_radius=10,
+                                  border_width=2, border_color=color)
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_rowconfigure(1, weight=1)
+
+        header = ctk.CTkFrame(self.frame, fg_color=background, corner_radius=10)
+        header.grid(row=0, column=0, sticky="ew", padx=10, pady=(2, 2))
+        header.grid_columnconfigure(1, weight=1)
+
+        ctk.CTkLabel(header, text="🏫", font=("Arial", 16), text_color=color).grid(row=0, column=0, padx=(3, 5), pady=1)
+        ctk.CTkLabel(header, text=f"École {display_name}", font=("Arial", 14, "bold"),
+                     text_color=color).grid(row=0, column=1, sticky="w", pady=1)
+
+        # Statistiques
+        stats_frame = ctk.CTkFrame(header, fg_color="transparent")
+        stats_frame.grid(row=0, column=2, sticky="e", padx=(10, 5))
+        self.stats_label = ctk.CTkLabel(stats_frame, text="", font=("Arial", 11), text_color=color)
+        self.stats_label.pack()
+
+        # Boutons d'action
+        buttons_frame = ctk.CTkFrame(header, fg_color="transparent")
+        buttons_frame.grid(row=0, column=3, sticky="e", padx=(5, 0))
+        for text in ("👨‍🏫 Profs", "🎭 Anims", "👥 Élèves", "📄 Listes"):
+            button = ctk.CTkButton(
+                buttons_frame,
+                text=text,
+                font=("Arial", 9, "bold"),
+                height=24,
+                width=70,
+                fg_color=soften_color(color, 0.5),
+                hover_color=soften_color(color, 0.3),
+                text_color="white",
+                command=lambda: None
+            )
+            button.pack(side="left", padx=(0, 2))
+
+        # Conteneur pour les horaires - TOUJOURS AFFICHÉ
+        self.horaires_container = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.horaires_container.grid(row=1, column=0, sticky="nsew", padx=10, pady=(2, 10))
+        self.no_horaires_label = ctk.CTkLabel(
+            self.horaires_container,
+            text="📅 Aucun horaire configuré pour cette école",
+            font=("Arial", 11, "italic"),
+            text_color="#9ca3af"
+        )
+        # Cadre de chargement (hauteur estimée) affiché avant la construction des horaires
+        self.placeholder = ctk.CTkLabel(
+            self.horaires_container,
+            text="⏳ Chargement des classes...",
+            font=("Arial", 11, "italic"),
+            text_color="#9ca3af"
+        )
+        # Cadres d'horaires attribués par horaire
+        self.horaires = WidgetPool(lambda: HoraireSection(self.horaires_container, self))
+
+    def place(self, row):
+        """Place la section à la ligne row du tableau de bord."""
+        if row != self._row:
+            self.frame.grid(row=row, column=0, sticky="ew", pady=(4, 4), padx=5)
+            self._row = row
+
+    def show_placeholder(self, school_info, row):
+        """Affiche seulement l'en-tête et un cadre de chargement de la hauteur estimée de l'école."""
+        self.place(row)
+        self._show_stats(school_info)
+        self.placeholder.configure(height=estimate_school_height(school_info) - HAUTEUR_EN_TETE_ECOLE)
+        self.placeholder.grid(row=0, column=0, columnspan=3, sticky="ew")
+
+    def _show_stats(self, school_info):
+        total_eleves = sum(len(horaire.get('classes', [])) for horaire in school_info)
+        total_classes = sum(len(horaire.get('classes', [])) for horaire in school_info)
+        stats = f"👥 {total_eleves} élèves • 📚 {total_classes} classes"
+        if stats != self._stats:
+            self.stats_label.configure(text=stats)
+            self._stats = stats
+
+    def update(self, school_info, row):
+        """
+        Affiche les horaires de l'école (triés par heure de début) à la ligne row du tableau de bord.
+
+        Une école dont les données n'ont pas changé depuis le dernier affichage est seulement replacée.
+
+        Returns:
+            int: nombre de cartes de classes reconfigurées
+        """
+        self.place(row)
+        if not self.materialized:
+            self.placeholder.grid_remove()
+            self.materialized = True
+        elif self._data == (self.dashboard.week_folder, school_info):
+            return 0
+
+        self._show_stats(school_info)
+
+        has_horaires = bool(school_info)
+        if has_horaires != self._has_horaires:
+            if has_horaires:
+                self.no_horaires_label.grid_remove()
+            else:
+                self.no_horaires_label.grid(row=0, column=0, pady=20)
+            self._has_horaires = has_horaires
+
+        sorted_school_info = sorted(school_info, key=lambda x: extract_start_hour(x.get('horaire', '')))
+        sections = self.horaires.assign(horaire_info.get('horaire', 'Horaire inconnu') for horaire_info in sorted_school_info)
+        horaires_per_row = calculate_optimal_layout(len(school_info), min_per_row=2, max_per_row=3) if school_info else 1
+        if horaires_per_row != self._columns:
+            self._columns = configure_columns(self.horaires_container, horaires_per_row, self._columns)
+
+        changed = 0
+        for position, (section, horaire_info) in enumerate(zip(sections, sorted_school_info)):
+            horaire_row, horaire_col = divmod(position, horaires_per_row)
+            changed += section.update(horaire_info)
+            section.show(horaire_row, horaire_col, (0, 5) if horaire_col < horaires_per_row - 1 else 0)
+        self._data = data_snapshot(self.dashboard.week_folder, school_info)
+        return changed
+
+    def hide(self):
+        if self._row is not None:
+            self.frame.grid_remove()
+            self._row = None
+
+
+class ClassesDashboard:
+    """Tableau de bord des classes d'une semaine, créé une fois puis réaffiché avec render()."""
+
+    def __init__(self, parent_frame, on_class_click, on_class_menu, on_add_class, on_delete_all, describe_class):
+        """
+        Args:
+            parent_frame: Frame qui accueille le tableau de bord
+            on_class_click: Fonction(contexte de classe) appelée au clic sur une carte
+            on_class_menu: Fonction(événement, contexte de classe) appelée au clic droit sur une carte
+            on_add_class: Fonction(contexte d'horaire) du bouton ➕
+            on_delete_all: Fonction(contexte d'horaire) du bouton ➖
+            describe_class: Fonction(contexte de classe) → texte des intervenants d'une classe avec niveau,
+                sans lecture de fichier (appelée pour chaque carte dans le thread Tk)
+        """
+        self.on_class_click = on_class_click
+        self.on_class_menu = on_class_menu
+        self.on_add_class = on_add_class
+        self.on_delete_all = on_delete_all
+        self.describe_class = describe_class
+        self.week_folder = None
+        self.school_data = None     # Données affichées (réaffichage après un changement de filtre)
+        self.sections = {}
+        self.no_data_frame = None
+        self._pending = []      # Écoles à afficher progressivement : (section, données, ligne)
+        self._job = None
+
+        parent_frame.grid_columnconfigure(0, weight=1)
+        parent_frame.grid_rowconfigure(0, weight=1)
+
+        # Frame principal avec scroll
+        self.main_scrollable = ctk.CTkScrollableFrame(parent_frame, fg_color="#f8fafc", corner_radius=0)
+        self.main_scrollable.grid(row=0, column=0, sticky="nsew", padx=10, pady=5)
+        self.main_scrollable.grid_columnconfigure(0, weight=1)
+
+    def exists(self):
+        """Faux si le tableau de bord a été détruit (fenêtre fermée, contenu remplacé)."""
+        try:
+            return bool(self.main_scrollable.winfo_exists())
+        except tkinter.TclError:
+            return False
+
+    def class_details(self, context):
+        """Texte niveau + intervenants d'une carte ("" si la classe n'a pas de niveau), calculé depuis le contexte seul."""
+        niveau = context['classe_info'].get('niveau', '')
+        if not niveau:
+            return ""
+        return f"📚 {niveau}\n{self.describe_class(context)}"
+
+    def render(self, school_data, visible_schools, week_folder, scroll_fraction=0.0):
+        """
+        Affiche les écoles visibles en réutilisant les widgets existants.
+
+        Les écoles, horaires et classes sont retrouvés par clé (nom du filtre, horaire,
+        nom de classe) : seuls les widgets dont l'affichage change sont reconfigurés.
+        Seules les écoles visibles à la position scroll_fraction sont affichées tout de
+        suite ; les autres le sont ensuite une par une (after_idle) ou dès qu'elles
+        apparaissent à l'écran (materialize_visible).
+
+        Args:
+            school_data (dict): Horaires et classes par clé d'école (analyze_school_classes)
+            visible_schools: Noms des écoles cochées dans les filtres
+            week_folder (str): Dossier de la semaine affichée
+            scroll_fraction (float): Position de défilement qui sera restaurée (0 = en haut)
+
+        Returns:
+            int: nombre de cartes de classes reconfigurées immédiatement
+        """
+        self.week_folder = week_folder
+        self.school_data = school_data
+        self._cancel_pending()
+        visible_schools = set(visible_schools)
+
+        shown = []   # (section, données de l'école, ligne), de haut en bas
+        for school_name, (school_key, display_name, school_color, school_bg) in ECOLES_TABLEAU.items():
+            section = self.sections.get(school_name)
+            if school_name not in visible_schools:
+                if section is not None:
+                    section.hide()
+                continue
+            if section is None:
+                section = SchoolSection(self, school_key, display_name, school_color, school_bg)
+                self.sections[school_name] = section
+            shown.append((section, school_data.get(school_key, []), len(shown)))
+
+        # Message si aucune école n'est affichée (toutes filtrées)
+        if not shown:
+            self._show_no_data()
+        elif self.no_data_frame is not None:
+            self.no_data_frame.grid_remove()
+
+        # Écoles visibles d'abord, les autres de la plus proche à la plus éloignée
+        heights = [estimate_school_height(school_info) for _, school_info, _ in shown]
+        top = scroll_fraction * sum(heights)
+        visible, others = viewport_first_order(heights, top, top + self._viewport_height())
+
+        changed = 0
+        for index in visible:
+            section, school_info, row = shown[index]
+            changed += section.update(school_info, row)
+        for index in others:
+            section, school_info, row = shown[index]
+            if section.materialized:
+                section.place(row)
+            else:
+                section.show_placeholder(school_info, row)
+        self._pending = [shown[index] for index in others]
+
+        if self._pending:
+            # Calculer la disposition de la partie visible avant de rendre la main
+            self.main_scrollable.update_idletasks()
+            self._job = self.main_scrollable.after_idle(self._render_next)
+        return changed
+
+    def _viewport_height(self):
+        canvas = getattr(self.main_scrollable, '_parent_canvas', None)
+        height = canvas.winfo_height() if canvas is not None else 0
+        return height if height > 1 else HAUTEUR_VUE_DEFAUT
+
+    def _render_next(self):
+        """Affiche l'école suivante en attente, puis rend la main à Tk avant la suivante."""
+        self._job = None
+        if not self._pending:
+            return
+        section, school_info, row = self._pending.pop(0)
+        try:
+            section.update(school_info, row)
+        except tkinter.TclError as e:
+            # Tableau de bord détruit pendant l'affichage
+            print(f"Affichage du tableau de bord interrompu : {e}")
+            self._pending = []
+            return
+        if self._pending:
+            self._job = self.main_scrollable.after_idle(self._render_next)
+
+    def materialize_visible(self):
+        """Affiche tout de suite les écoles en attente qui sont entrées dans la zone visible (défilement)."""
+        if not self._pending:
+            return
+        canvas = getattr(self.main_scrollable, '_parent_canvas', None)
+        if canvas is None:
+            return
+        try:
+            top = canvas.canvasy(0)
+            bottom = top + canvas.winfo_height()
+            remaining = []
+            for section, school_info, row in self._pending:
+                start = section.frame.winfo_y()
+                if start <= bottom and start + section.frame.winfo_height() >= top:
+                    section.update(school_info, row)
+                else:
+                    remaining.append((section, school_info, row))
+            self._pending = remaining
+        except tkinter.TclError as e:
+            print(f"Affichage du tableau de bord interrompu : {e}")
+            self._pending = []
+
+    def _cancel_pending(self):
+        if self._job is not None:
+            try:
+                self.main_scrollable.after_cancel(self._job)
+            except tkinter.TclError:
+                pass
+            self._job = None
+        self._pending = []
+
+    def _show_no_data(self):
+        if self.no_data_frame is None:
+            self.no_data_frame = ctk.CTkFrame(self.main_scrollable, fg_color="white", corner_radius=15,
+                                              border_width=2, border_color="#e5e7eb")
+            ctk.CTkLabel(
+                self.no_data_frame,
+                text="🔍 Aucune école sélectionnée\n\nActivez au moins un filtre d'école pour afficher les données.",
+                font=("Arial", 13),
+                text_color="#6b7280",
+                justify="center"
+            ).pack(pady=30, padx=20)
+        self.no_data_frame.grid(row=0, column=0, sticky="ew", pady=20, padx=10)
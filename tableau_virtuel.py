@@ -0,0 +1,217 @@
+"""
+Tableau virtuel : un ttk.Treeview qui n'affiche que la fenêtre visible d'une longue liste.
+
+Au-delà de SEUIL_TABLEAU_VIRTUEL lignes, le Treeview ne contient plus un élément par
+élève. Il ne contient que les lignes visibles plus une petite marge, et la barre de
+défilement déplace cette fenêtre dans la liste filtrée. La mémoire et le coût d'affichage
+dépendent alors de la hauteur du tableau, pas du nombre d'élèves.
+En dessous du seuil, toutes les lignes sont affichées et le défilement reste celui du Treeview.
+
+La sélection est conservée par clé de ligne (étiquette du DataFrame), y compris pour
+les lignes sorties de la fenêtre. Le clic, Ctrl+clic et Maj+clic (plage de lignes,
+même hors de la fenêtre) fonctionnent dans les deux modes.
+"""
+from synchro_tableau import TreeviewSync
+
+# Nombre de lignes à partir duquel seules les lignes visibles sont créées
+SEUIL_TABLEAU_VIRTUEL = 1500
+
+# Lignes créées en plus des lignes visibles
+MARGE_LIGNES = 10
+
+# Lignes parcourues par cran de molette
+LIGNES_PAR_CRAN = 3
+
+
+class VirtualTable:
+    """Affichage par fenêtre d'une liste de lignes dans un Treeview, avec sélection par clé."""
+
+    def __init__(self, tree, scrollbar, fetch_rows, row_height, on_selection_change=None,
+                 threshold=SEUIL_TABLEAU_VIRTUEL, margin=MARGE_LIGNES):
+        """
+        Args:
+            tree: ttk.Treeview à remplir
+            scrollbar: Barre de défilement verticale associée
+            fetch_rows: Fonction clés → liste de (clé, valeurs, tags), appelée pour la fenêtre seulement
+            row_height (int): Hauteur d'une ligne du Treeview, en pixels
+            on_selection_change: Fonction appelée quand la sélection change
+            threshold (int): Nombre de lignes à partir duquel le tableau est virtuel
+            margin (int): Lignes créées en plus des lignes visibles
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_rows = fetch_rows
+        self.row_height = max(1, int(row_height))
+        self.on_selection_change = on_selection_change
+        self.threshold = threshold
+        self.margin = margin
+
+        self.sync = TreeviewSync(tree)
+        self.keys = []
+        self._positions = {}
+        self._by_iid = {}          # iid → clé des lignes actuellement créées
+        self._selected = set()
+        self._anchor = None
+        self.first = 0
+        self.virtual = False
+
+        tree.bind("<<TreeviewSelect>>", self._on_tree_select, add="+")
+        tree.bind("<Button-1>", self._on_click, add="+")
+        tree.bind("<Shift-Button-1>", self._on_shift_click, add="+")
+        tree.bind("<MouseWheel>", self._on_wheel, add="+")
+        tree.bind("<Button-4>", lambda event: self._on_wheel(event, -1), add="+")
+        tree.bind("<Button-5>", lambda event: self._on_wheel(event, 1), add="+")
+        tree.bind("<Down>", lambda event: self._on_arrow(1), add="+")
+        tree.bind("<Up>", lambda event: self._on_arrow(-1), add="+")
+        tree.bind("<Configure>", lambda event: self.render(), add="+")
+
+    # --- Données ---
+
+    def set_rows(self, keys):
+        """Remplace la liste des lignes (clés dans l'ordre d'affichage) et affiche la fenêtre courante."""
+        self.keys = list(keys)
+        self._positions = {key: position for position, key in enumerate(self.keys)}
+        # Les lignes filtrées ne restent pas sélectionnées (comme des éléments supprimés)
+        self._selected = {key for key in self._selected if key in self._positions}
+
+        virtual = len(self.keys) > self.threshold
+        if virtual != self.virtual:
+            self.virtual = virtual
+            if virtual:
+                self.tree.configure(yscrollcommand="")
+                self.scrollbar.configure(command=self.yview)
+            else:
+                self.tree.configure(yscrollcommand=self.scrollbar.set)
+                self.scrollbar.configure(command=self.tree.yview)
+        self.render()
+
+    def __len__(self):
+        return len(self.keys)
+
+    # --- Fenêtre affichée ---
+
+    def visible_count(self):
+        """Nombre de lignes visibles dans la hauteur actuelle du Treeview."""
+        height = self.tree.winfo_height()
+        if height <= 1:
+            # Pas encore affiché : hauteur demandée au Treeview (en lignes)
+            return max(1, int(self.tree.cget("height")))
+        return max(1, height // self.row_height)
+
+    def window(self):
+        """Positions (début, fin) des lignes créées dans le Treeview."""
+        if not self.virtual:
+            return 0, len(self.keys)
+        return self.first, min(len(self.keys), self.first + self.visible_count() + self.margin)
+
+    def _max_first(self):
+        return max(0, len(self.keys) - self.visible_count() + 1)
+
+    def render(self):
+        """Crée (par différence) les lignes de la fenêtre et y reporte la sélection."""
+        self.first = min(self.first, self._max_first()) if self.virtual else 0
+        start, stop = self.window()
+        window_keys = self.keys[start:stop]
+        self.sync.apply(self.fetch_rows(window_keys))
+        self._by_iid = {self.sync.item_id(key): key for key in window_keys}
+
+        selected_iids = [self.sync.item_id(key) for key in window_keys if key in self._selected]
+        if set(self.tree.selection()) != set(selected_iids):
+            self.tree.selection_set(selected_iids)
+
+        if self.virtual:
+            self.tree.yview_moveto(0)
+            total = max(1, len(self.keys))
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible_count()) / total))
+
+    def scroll_to(self, first):
+        """Place la ligne first en haut du tableau (mode virtuel)."""
+        first = max(0, min(int(first), self._max_first()))
+        if first != self.first:
+            self.first = first
+            self.render()
+
+    def yview(self, *args):
+        """Commande de la barre de défilement en mode virtuel (moveto / scroll)."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.keys))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                amount *= self.visible_count()
+            self.scroll_to(self.first + amount)
+
+    # --- Événements ---
+
+    def _on_wheel(self, event, direction=None):
+        if not self.virtual:
+            return None
+        if direction is None:
+            direction = -1 if event.delta > 0 else 1
+        self.scroll_to(self.first + direction * LIGNES_PAR_CRAN)
+        return "break"
+
+    def _on_arrow(self, direction):
+        # Au bord de la fenêtre, décaler d'une ligne avant le déplacement du focus par le Treeview
+        if not self.virtual:
+            return
+        key = self._by_iid.get(self.tree.focus())
+        if key is None:
+            return
+        position = self._positions[key]
+        if direction > 0 and position >= self.first + self.visible_count() - 2:
+            self.scroll_to(self.first + 1)
+        elif direction < 0 and position <= self.first:
+            self.scroll_to(self.first - 1)
+
+    def _on_click(self, event):
+        iid = self.tree.identify_row(event.y)
+        if iid in self._by_iid:
+            self._anchor = self._by_iid[iid]
+
+    def _on_shift_click(self, event):
+        # Plage entre la dernière ligne cliquée et celle-ci, même si la première n'est plus créée
+        iid = self.tree.identify_row(event.y)
+        key = self._by_iid.get(iid)
+        if not self.virtual or key is None or self._anchor not in self._positions:
+            return None
+        low, high = sorted((self._positions[self._anchor], self._positions[key]))
+        self._selected = set(self.keys[low:high + 1])
+        self.tree.focus(iid)
+        self.render()
+        self._notify()
+        return "break"
+
+    def _on_tree_select(self, event=None):
+        # Les lignes hors fenêtre gardent leur état ; celles de la fenêtre suivent le Treeview
+        window_keys = set(self._by_iid.values())
+        selected_now = {self._by_iid[iid] for iid in self.tree.selection() if iid in self._by_iid}
+        self._selected = (self._selected - window_keys) | selected_now
+        self._notify()
+
+    def _notify(self):
+        if self.on_selection_change is not None:
+            self.on_selection_change()
+
+    # --- Sélection ---
+
+    @property
+    def selected_count(self):
+        return len(self._selected)
+
+    def selected_keys(self):
+        """Clés des lignes sélectionnées, dans l'ordre d'affichage."""
+        return sorted(self._selected, key=self._positions.__getitem__)
+
+    def key_of(self, iid):
+        """Clé de la ligne d'un élément du Treeview (None si l'élément n'est pas une ligne créée)."""
+        return self._by_iid.get(iid)
+
+    def clear_selection(self):
+        """Vide la sélection (lignes créées et hors fenêtre)."""
+        self._selected = set()
+        if self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+        self._notify()
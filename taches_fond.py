@@ -0,0 +1,165 @@
+"""
+Chaîne de traitements exécutée dans un thread de travail, suivie depuis le thread Tk.
+
+Les lectures et analyses de fichiers Excel (chargement d'une semaine...) ne s'exécutent
+plus dans le thread Tk : run() les confie, dans l'ordre, à un thread de travail
+(ThreadPoolExecutor à un seul thread) et renvoie un PipelineRun. Le thread Tk
+interroge régulièrement (after) l'avancement : il affiche la progression, reçoit le
+résultat de chaque étape terminée et ne fait que le travail sur les widgets.
+Aucun widget n'est manipulé depuis le thread de travail.
+
+Lancer une nouvelle chaîne annule la précédente : l'étape en cours se termine dans le
+thread de travail, mais les étapes suivantes ne sont pas exécutées et aucun résultat
+de la chaîne annulée n'est plus transmis au thread Tk. Le thread de travail étant
+unique, la première étape de la nouvelle chaîne ne commence qu'une fois l'étape en
+cours de la chaîne annulée terminée (ses écritures de fichiers comprises).
+
+À la fermeture de l'application, shutdown() attend de même la fin de l'étape en cours
+avant de rendre la main : l'export de la semaine et la destruction de la fenêtre ne
+se font jamais pendant une écriture du thread de travail.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tkinter
+except ImportError:
+    tkinter = None
+
+# Intervalle entre deux vérifications de l'avancement (en millisecondes)
+DELAI_SCRUTATION_MS = 50
+
+
+class PipelineRun:
+    """Une exécution de la chaîne : avancement, résultats et annulation."""
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.results = {}
+        self.completed = 0          # Nombre d'étapes terminées (écrit par le thread de travail)
+        self.future = None
+        self._cancelled = threading.Event()
+        self._job = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _work(self):
+        # Exécuté dans le thread de travail
+        for name, label, function in self.steps:
+            if self.cancelled:
+                return self.results
+            self.results[name] = function(self.results)
+            self.completed += 1
+        return self.results
+
+
+class BackgroundPipeline:
+    """Exécute des chaînes d'étapes dans un thread de travail, une seule à la fois."""
+
+    def __init__(self, widget, poll_ms=DELAI_SCRUTATION_MS):
+        """
+        Args:
+            widget: Widget Tk utilisé pour after() / after_cancel()
+            poll_ms (int): Intervalle entre deux vérifications de l'avancement
+        """
+        self._widget = widget
+        self._poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chargement")
+        self._current = None
+
+    def run(self, steps, on_progress=None, on_result=None, on_done=None, on_error=None):
+        """
+        Annule la chaîne en cours et lance steps dans le thread de travail.
+
+        Args:
+            steps: Liste de (nom, libellé, fonction) ; chaque fonction reçoit le dict des
+                résultats des étapes précédentes (par nom) et s'exécute dans le thread de travail
+            on_progress: Fonction(index, total, libellé) appelée au début de chaque étape
+            on_result: Fonction(nom, résultat) appelée à la fin de chaque étape
+            on_done: Fonction(résultats) appelée quand toutes les étapes sont terminées
+            on_error: Fonction(exception) appelée si une étape échoue
+
+        Les fonctions on_* sont appelées dans le thread Tk.
+
+        Returns:
+            PipelineRun: exécution lancée
+        """
+        self.cancel()
+        run = PipelineRun(steps)
+        self._current = run
+        total = len(run.steps)
+        reported = [0]
+
+        def poll():
+            run._job = None
+            if run.cancelled:
+                return
+            try:
+                # Résultats des étapes terminées depuis la dernière vérification, dans l'ordre
+                while reported[0] < run.completed:
+                    name = run.steps[reported[0]][0]
+                    reported[0] += 1
+                    if on_result is not None:
+                        on_result(name, run.results[name])
+                    if run.cancelled:
+                        return
+                    if on_progress is not None and reported[0] < total:
+                        on_progress(reported[0], total, run.steps[reported[0]][1])
+
+                if run.future.done():
+                    if self._current is run:
+                        self._current = None
+                    error = run.future.exception()
+                    if error is not None:
+                        if on_error is not None:
+                            on_error(error)
+                    elif on_done is not None:
+                        on_done(run.results)
+                    return
+            except tkinter.TclError as e:
+                # Fenêtre fermée pendant le chargement
+                print(f"Chargement interrompu : {e}")
+                run.cancel()
+                return
+            run._job = self._widget.after(self._poll_ms, poll)
+
+        if on_progress is not None and total:
+            on_progress(0, total, run.steps[0][1])
+        run.future = self._executor.submit(run._work)
+        run._job = self._widget.after(self._poll_ms, poll)
+        return run
+
+    def cancel(self):
+        """Annule la chaîne en cours (sans effet s'il n'y en a pas)."""
+        run = self._current
+        self._current = None
+        if run is None:
+            return
+        run.cancel()
+        if run._job is not None:
+            try:
+                self._widget.after_cancel(run._job)
+            except tkinter.TclError:
+                pass
+            run._job = None
+
+    @property
+    def busy(self):
+        """Vrai pendant l'exécution d'une chaîne."""
+        return self._current is not None
+
+    def shutdown(self, wait=True):
+        """
+        Annule la chaîne en cours et arrête le thread de travail (fermeture de l'application).
+
+        Args:
+            wait (bool): Attendre la fin de l'étape en cours (écritures de fichiers comprises)
+                avant de rendre la main ; les étapes suivantes ne sont pas exécutées
+        """
+        self.cancel()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Test du cache partagé des classeurs Excel (cache_excel.py)
+"""
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from openpyxl import Workbook
+
+import cache_excel
+from cache_excel import (load_workbook_cached, read_excel_cached, save_workbook,
+                         invalidate_excel_cache, read_workbook_values, get_available_engines,
+                         get_excel_engine, set_excel_engine, get_sidecar_path)
+
+
+def create_school_file(filepath, classes):
+    """Crée un fichier d'école minimal avec une feuille horaire."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "9h à 12h20 Prof"
+    ws.append(["Nom de la classe", "Niveau", "Intervenant", "Rôle", "Liste des élèves"])
+    for classe in classes:
+        ws.append([classe, "A1", "Marie", "", "Dupont Jean, Martin Léa"])
+    wb.save(filepath)
+
+
+def test_cache_returns_same_workbook_until_invalidated():
+    """Une relecture d'un fichier inchangé ne doit pas relire le disque."""
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "ecole_a.xlsx")
+        create_school_file(filepath, ["Classe 1"])
+
+        wb1 = load_workbook_cached(filepath)
+        wb2 = load_workbook_cached(filepath)
+        assert wb1 is wb2
+
+        sheet = wb1["9h à 12h20 Prof"]
+        assert sheet.max_row == 2
+        assert sheet.cell(row=2, column=1).value == "Classe 1"
+        assert sheet.cell(row=10, column=10).value is None
+
+        # Écriture via save_workbook : le cache doit être invalidé
+        from openpyxl import load_workbook
+        wb = load_workbook(filepath)
+        wb["9h à 12h20 Prof"].append(["Classe 2"])
+        save_workbook(wb, filepath)
+
+        wb3 = load_workbook_cached(filepath)
+        assert wb3 is not wb1
+        assert wb3["9h à 12h20 Prof"].max_row == 3
+
+
+def test_read_excel_cached_returns_independent_copies():
+    """Les DataFrames retournés peuvent être modifiés sans corrompre le cache."""
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "ecole_b.xlsx")
+        create_school_file(filepath, ["Classe 1", "Classe 2"])
+
+        sheets = read_excel_cached(filepath, sheet_name=None)
+        df = sheets["9h à 12h20 Prof"]
+        assert len(df) == 2
+        df.loc[0, "Niveau"] = "B2"
+
+        df_again = read_excel_cached(filepath, sheet_name=0)
+        assert df_again.loc[0, "Niveau"] == "A1"
+
+
+def test_lru_eviction_respects_memory_bound():
+    """Le cache évince les entrées les plus anciennes au-delà de la limite mémoire."""
+    original_limit = cache_excel.MAX_CACHE_BYTES
+    invalidate_excel_cache()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i in range(3):
+                filepath = os.path.join(tmp, f"ecole_{i}.xlsx")
+                create_school_file(filepath, [f"Classe {n}" for n in range(20)])
+                paths.append(filepath)
+
+            load_workbook_cached(paths[0])
+            single_entry_size = cache_excel._cache_bytes
+            cache_excel.MAX_CACHE_BYTES = single_entry_size * 2
+
+            first = load_workbook_cached(paths[0])
+            load_workbook_cached(paths[1])
+            load_workbook_cached(paths[2])
+
+            assert cache_excel._cache_bytes <= cache_excel.MAX_CACHE_BYTES
+            assert load_workbook_cached(paths[0]) is not first
+    finally:
+        cache_excel.MAX_CACHE_BYTES = original_limit
+        invalidate_excel_cache()
+
+
+def test_all_engines_return_the_same_values():
+    """Chaque moteur installé lit les mêmes valeurs (entiers, cellules et lignes vides)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "ecole_c.xlsx")
+        create_school_file(filepath, ["Classe 1"])
+        from openpyxl import load_workbook
+        wb = load_workbook(filepath)
+        ws = wb["9h à 12h20 Prof"]
+        ws.append([])
+        ws.append(["Classe 3", 12, None, 2.5])
+        wb.save(filepath)
+
+        expected = read_workbook_values(filepath, engine="openpyxl")
+        assert expected["9h à 12h20 Prof"][3] == ("Classe 3", 12, None, 2.5, None)
+        try:
+            for engine in get_available_engines():
+                set_excel_engine(engine)
+                sheet = load_workbook_cached(filepath)["9h à 12h20 Prof"]
+                assert list(sheet.iter_rows()) == expected["9h à 12h20 Prof"]
+        finally:
+            set_excel_engine(None)
+
+
+def test_set_excel_engine_rejects_missing_engine():
+    """Un moteur non installé ne peut pas être imposé ; None rétablit le choix automatique."""
+    try:
+        set_excel_engine("moteur_inexistant")
+        assert False, "ValueError attendue"
+    except ValueError:
+        pass
+    set_excel_engine("openpyxl")
+    try:
+        assert get_excel_engine() == "openpyxl"
+    finally:
+        set_excel_engine(None)
+    assert get_excel_engine() == get_available_engines()[0]
+
+
+_original_key_file = cache_excel.SIDECAR_KEY_FILE
+
+
+def use_temporary_sidecar_key(tmp):
+    """Clé de signature des fichiers compagnons dans un dossier temporaire."""
+    cache_excel.SIDECAR_KEY_FILE = os.path.join(tmp, "cle_cache.key")
+    cache_excel._sidecar_key = None
+
+
+def restore_sidecar_key():
+    cache_excel.SIDECAR_KEY_FILE = _original_key_file
+    cache_excel._sidecar_key = None
+
+
+def test_matrix_sidecar_is_reused_until_content_changes():
+    """Le fichier compagnon évite de relire le xlsx tant que son contenu est identique."""
+    original_read = cache_excel.read_excel_file
+    reads = []
+
+    def counting_read(path, *args, **kwargs):
+        reads.append(path)
+        return original_read(path, *args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix_path = os.path.join(tmp, "matrix.xlsx")
+        wb = Workbook()
+        wb.active.append(["stagiaire", "Niveau"])
+        wb.active.append(["Dupont Jean", "A1"])
+        wb.save(matrix_path)
+
+        cache_excel.read_excel_file = counting_read
+        use_temporary_sidecar_key(tmp)
+        try:
+            invalidate_excel_cache()
+            assert read_excel_cached(matrix_path).loc[0, "Niveau"] == "A1"
+            assert os.path.exists(get_sidecar_path(matrix_path))
+
+            # Nouveau processus (cache mémoire vide) : lecture depuis le fichier compagnon
+            invalidate_excel_cache()
+            assert read_excel_cached(matrix_path).loc[0, "stagiaire"] == "Dupont Jean"
+            assert len(reads) == 1
+
+            wb.active["B2"] = "B2"
+            save_workbook(wb, matrix_path)
+            assert read_excel_cached(matrix_path).loc[0, "Niveau"] == "B2"
+            assert len(reads) == 2
+        finally:
+            cache_excel.read_excel_file = original_read
+            restore_sidecar_key()
+            invalidate_excel_cache()
+
+
+def test_forged_sidecar_is_not_unpickled():
+    """Un fichier compagnon déposé par un tiers (signature invalide) n'est jamais désérialisé."""
+    loaded = []
+
+    class Payload:
+        def __reduce__(self):
+            return (loaded.append, ("exécuté",))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix_path = os.path.join(tmp, "matrix.xlsx")
+        wb = Workbook()
+        wb.active.append(["stagiaire", "Niveau"])
+        wb.active.append(["Dupont Jean", "A1"])
+        wb.save(matrix_path)
+
+        # Fichier compagnon signé avec une autre clé
+        use_temporary_sidecar_key(tmp)
+        cache_excel._sidecar_key = b"x" * 32
+        header = cache_excel._sidecar_header(cache_excel.get_content_hash(matrix_path), get_excel_engine())
+        with open(get_sidecar_path(matrix_path), "wb") as f:
+            cache_excel._dump_sidecar(f, header, Payload())
+        cache_excel._sidecar_key = None
+        try:
+            invalidate_excel_cache()
+            assert read_excel_cached(matrix_path).loc[0, "Niveau"] == "A1"
+            assert loaded == []
+        finally:
+            restore_sidecar_key()
+            invalidate_excel_cache()
+
+
+if __name__ == "__main__":
+    test_cache_returns_same_workbook_until_invalidated()
+    test_read_excel_cached_returns_independent_copies()
+    test_lru_eviction_respects_memory_bound()
+    test_all_engines_return_the_same_values()
+    test_set_excel_engine_rejects_missing_engine()
+    test_matrix_sidecar_is_reused_until_content_changes()
+    test_forged_sidecar_is_not_unpickled()
+    print("Tests du cache Excel terminés !")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test de l'écriture cellule par cellule du fichier matrix (ecriture_matrix.py)
+"""
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+
+from ecriture_matrix import MatrixPatchWriter, apply_matrix_cell_patches, diff_matrix_dataframes
+
+
+def create_matrix_file(filepath):
+    """Crée un matrix avec mise en forme et une feuille supplémentaire."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Matrix"
+    ws.append(["stagiaire", "Niveau", "Ecole", "Classe"])
+    ws.append(["Dupont Jean", "A1", None, None])
+    ws.append(["Martin Léa", None, None, None])
+    ws.append(["Durand Paul", "B1", "A", "Classe 1"])
+    ws["A1"].font = Font(bold=True)
+    ws.column_dimensions["A"].width = 32
+    wb.create_sheet("Notes")["A1"] = "Ne pas supprimer"
+    wb.save(filepath)
+
+
+def test_diff_detects_changed_cells_deleted_and_appended_rows():
+    """Le calcul des différences ne retient que les cellules modifiées."""
+    old_df = pd.DataFrame({"stagiaire": ["A", "B", "C"], "Niveau": ["A1", None, "B1"]})
+    new_df = old_df.copy()
+    new_df.loc[1, "Niveau"] = "A2"
+    new_df = new_df[new_df["stagiaire"] != "A"]
+    new_df = pd.concat([new_df, pd.DataFrame([{"stagiaire": "D", "Niveau": None}], index=[3])])
+
+    patches, deleted_rows, appended_rows = diff_matrix_dataframes(old_df, new_df)
+    assert patches == {(1, 1): "A2"}
+    assert deleted_rows == [0]
+    assert appended_rows[0][0] == "D"
+
+
+def test_patch_writer_keeps_formatting_and_extra_sheets():
+    """Les modifications sont appliquées sans perdre la mise en forme ni les autres feuilles."""
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix_path = os.path.join(tmp, "matrix.xlsx")
+        create_matrix_file(matrix_path)
+
+        df = pd.read_excel(matrix_path)
+        writer = MatrixPatchWriter(matrix_path, df)
+
+        df["Classe"] = df["Classe"].astype(object)
+        df.loc[1, "Niveau"] = "A2"
+        df.loc[1, "Classe"] = "Classe 2"
+        df = df[df["stagiaire"] != "Dupont Jean"]
+        df = pd.concat([df, pd.DataFrame([{"stagiaire": "Petit Zoé", "Niveau": "B2"}], index=[3])])
+
+        # 2 cellules modifiées + 1 ligne supprimée + 1 ligne ajoutée (4 colonnes)
+        assert writer.write(df) == 7
+
+        wb = load_workbook(matrix_path)
+        assert wb.sheetnames == ["Matrix", "Notes"]
+        ws = wb["Matrix"]
+        assert ws["A1"].font.bold
+        assert ws.column_dimensions["A"].width == 32
+
+        reread = pd.read_excel(matrix_path)
+        assert list(reread["stagiaire"]) == ["Martin Léa", "Durand Paul", "Petit Zoé"]
+        assert list(reread["Niveau"]) == ["A2", "B1", "B2"]
+        assert reread.loc[0, "Classe"] == "Classe 2"
+
+        # Aucune modification : le fichier n'est pas réécrit
+        mtime = os.stat(matrix_path).st_mtime_ns
+        assert writer.write(df) == 0
+        assert os.stat(matrix_path).st_mtime_ns == mtime
+
+
+def test_apply_matrix_cell_patches_skips_save_without_changes():
+    """Sans cellule à modifier, le fichier n'est pas réécrit."""
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix_path = os.path.join(tmp, "matrix.xlsx")
+        create_matrix_file(matrix_path)
+        mtime = os.stat(matrix_path).st_mtime_ns
+
+        assert apply_matrix_cell_patches(matrix_path, {}) == 0
+        assert os.stat(matrix_path).st_mtime_ns == mtime
+
+        assert apply_matrix_cell_patches(matrix_path, {(3, 4): "Classe 3"}, "Matrix") == 1
+        assert load_workbook(matrix_path)["Matrix"].cell(row=3, column=4).value == "Classe 3"
+
+
+if __name__ == "__main__":
+    test_diff_detects_changed_cells_deleted_and_appended_rows()
+    test_patch_writer_keeps_formatting_and_extra_sheets()
+    test_apply_matrix_cell_patches_skips_save_without_changes()
+    print("Tests de l'écriture du matrix terminés !")
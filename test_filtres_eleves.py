@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test du moteur de filtres du tableau des élèves (filtres_eleves.py)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+import pandas as pd
+
+from filtres_eleves import StudentFilterEngine, format_date_jour_mois
+from schema_colonnes import MATRIX_SCHEMA, resolve_columns
+
+
+def make_matrix():
+    df = pd.DataFrame({
+        "stagiaire": ["Martin Léa", "DUPONT Jean", "Petit Louise", "Bernard Paul"],
+        "Niveau": ["A1", np.nan, "B2", "A1"],
+        "Classe": ["Classe 1", np.nan, "Classe 2", np.nan],
+        "Prof": ["Marie", np.nan, np.nan, np.nan],
+        "Age": [9, 14, np.nan, 25],
+        "Cours 1 du": ["01/07/2025", "2025-07-02", np.nan, "3/7"],
+        "Cours 1 au": ["15/07/2025 00:00:00", "16/07/2025", np.nan, np.nan],
+        "Cours 2 du": [np.nan, "08/07/2025", "  ", "09/07/2025"],
+        "Cours 2 au": [np.nan, "12/07/2025", np.nan, np.nan],
+        "Classe CI": [np.nan, "CI 1", np.nan, np.nan],
+        "Prof CI": [np.nan, "Paul", np.nan, np.nan],
+    })
+    return df, resolve_columns(df.columns, MATRIX_SCHEMA)
+
+
+def names(engine, **filters):
+    return [values[0] for _, values, _ in engine.rows(engine.mask(**filters))]
+
+
+def test_display_values_sorted_by_name():
+    """Lignes triées par nom, dates en JJ/MM et CI calculé une seule fois."""
+    df, cols_map = make_matrix()
+    engine = StudentFilterEngine(df, cols_map)
+    rows = engine.rows()
+    assert [values[0] for _, values, _ in rows] == ["Bernard Paul", "DUPONT Jean", "Martin Léa", "Petit Louise"]
+    label, values, niveau = rows[1]
+    assert label == 1
+    assert niveau == ""
+    assert values == ("DUPONT Jean", "", 14, "", "", "16/07", "02/07", "", "OUI", "CI 1", "Paul", "08/07", "12/07")
+    assert rows[3][1][8] == ""  # Date CI vide (espaces) : pas de CI
+    assert format_date_jour_mois("3/7") == "03/07" and format_date_jour_mois(np.nan) == ""
+
+
+def test_filters_combined_in_one_mask():
+    """Recherche, niveaux, âges, CI et « sans niveau » combinés."""
+    df, cols_map = make_matrix()
+    engine = StudentFilterEngine(df, cols_map)
+    assert names(engine, search="du") == ["DUPONT Jean"]
+    assert names(engine, levels=["A1"]) == ["Bernard Paul", "Martin Léa"]
+    assert names(engine, ages=[(8, 11), (12, 25)]) == ["Bernard Paul", "DUPONT Jean", "Martin Léa"]
+    assert names(engine, ci_avec=True) == ["Bernard Paul", "DUPONT Jean"]
+    assert names(engine, ci_sans=True) == ["Martin Léa", "Petit Louise"]
+    assert names(engine, no_level=True) == ["DUPONT Jean"]
+    assert names(engine, levels=["A1"], ci_avec=True, search="paul") == ["Bernard Paul"]
+    assert int(engine.mask(ages=[(3, 7)]).sum()) == 0
+
+
+def test_update_rows_after_in_place_edit():
+    """Seules les lignes modifiées sur place sont recalculées."""
+    df, cols_map = make_matrix()
+    engine = StudentFilterEngine(df, cols_map)
+    df.loc[[1], "Niveau"] = "B1"
+    engine.update_rows([1])
+    assert names(engine, levels=["B1"]) == ["DUPONT Jean"]
+    assert names(engine, no_level=True) == []
+
+
+def test_counts_follow_mask_and_edits():
+    """Compteurs du tableau : nombre d'élèves avec niveau mis en cache jusqu'à la prochaine modification."""
+    df, cols_map = make_matrix()
+    engine = StudentFilterEngine(df, cols_map)
+    assert engine.counts(engine.mask(levels=["A1"])) == {'total': 4, 'assigned': 3, 'unassigned': 1, 'filtered': 2}
+    df.loc[[1], "Niveau"] = "B1"
+    engine.update_rows([1])
+    assert engine.counts(engine.mask()) == {'total': 4, 'assigned': 4, 'unassigned': 0, 'filtered': 4}
+
+
+def test_search_narrows_from_previous_result():
+    """Une saisie qui s'allonge donne le même résultat qu'une recherche complète."""
+    df, cols_map = make_matrix()
+    engine = StudentFilterEngine(df, cols_map)
+    for term in ["u", "du", "dup", "d", "pa", "pau", "paul"]:
+        assert names(engine, search=term) == [nom for nom in sorted(df["stagiaire"]) if term in nom.lower()]
+
+
+if __name__ == "__main__":
+    test_display_values_sorted_by_name()
+    test_filters_combined_in_one_mask()
+    test_update_rows_after_in_place_edit()
+    test_counts_follow_mask_and_edits()
+    test_search_narrows_from_previous_result()
+    print("Tests du moteur de filtres terminés !")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test de l'index des lignes de classes d'une feuille d'école (index_classes.py)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from openpyxl import Workbook
+
+from index_classes import get_class_index
+
+
+def create_sheet(nb_classes=5):
+    """Feuille d'horaire avec les en-têtes des fichiers d'écoles."""
+    ws = Workbook().active
+    ws.title = "9h à 12h20 Prof"
+    ws.append(["Nom de la classe", "Niveau", "Intervenant", "Rôle", "Liste des élèves"])
+    for n in range(1, nb_classes + 1):
+        ws.append([f"Classe {n}", "A1", f"Prof {n}", "", ""])
+    return ws
+
+
+def test_rows_and_columns_are_indexed_once():
+    """Une seule lecture donne la ligne de chaque classe et la colonne de chaque rôle."""
+    ws = create_sheet()
+    index = get_class_index(ws)
+    assert get_class_index(ws) is index
+    assert index.find_row("Classe 3") == 4
+    assert index.find_row(" Classe 5 ") == 6
+    assert index.find_row("Classe 9") is None
+    assert index.column("Niveau") == 2
+    assert index.column("Rôle") == 4
+    assert index.column("Liste des élèves") == 5
+    assert index.class_names() == [f"Classe {n}" for n in range(1, 6)]
+
+
+def test_index_follows_row_changes():
+    """Ajouts, suppressions, insertions et renommages gardent les lignes à jour."""
+    ws = create_sheet()
+    index = get_class_index(ws)
+
+    index.delete_rows(index.find_row("Classe 2"))
+    assert index.find_row("Classe 2") is None
+    assert index.find_row("Classe 3") == 3
+    assert ws.cell(row=3, column=1).value == "Classe 3"
+
+    index.insert_rows(2)
+    assert index.find_row("Classe 1") == 3
+    assert index.find_row("Classe 5") == 6
+
+    assert index.append_class("Classe 6") == 7
+    assert index.find_row("Classe 6") == 7
+    assert index.rename_class("Classe 6", "Classe 7") == 7
+    assert index.find_row("Classe 6") is None
+    assert ws.cell(row=7, column=1).value == "Classe 7"
+
+
+def test_direct_sheet_changes_are_detected():
+    """Une modification faite sans passer par l'index provoque une reconstruction."""
+    ws = create_sheet()
+    index = get_class_index(ws)
+    ws.delete_rows(2)
+    assert index.find_row("Classe 2") == 2
+    ws.append(["Classe 8"])
+    assert index.find_row("Classe 8") == ws.max_row
+
+
+if __name__ == "__main__":
+    test_rows_and_columns_are_indexed_once()
+    test_index_follows_row_changes()
+    test_direct_sheet_changes_are_detected()
+    print("Tests de l'index des classes terminés !")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test de l'index des noms d'élèves du matrix (index_eleves.py)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+import pandas as pd
+from openpyxl import Workbook
+
+from index_eleves import StudentNameIndex, get_sheet_student_index, normalize_student_name
+
+
+def test_dataframe_index_updates_with_loc():
+    """Les étiquettes de l'index permettent une seule mise à jour df.loc pour plusieurs élèves."""
+    df = pd.DataFrame({"stagiaire": ["Dupont Jean", "Martin  Léa", None, "dupont jean"],
+                       "Niveau": [None, None, None, None]}, index=[10, 11, 12, 13])
+    index = StudentNameIndex.from_dataframe(df, "stagiaire")
+
+    assert normalize_student_name(" MARTIN Léa ") == "martin léa"
+    assert index.labels("Dupont Jean") == [10, 13]
+    assert "martin léa" in index
+    assert index.labels("Inconnu") == []
+
+    df.loc[index.labels_for(["Martin Léa", "Dupont Jean", "Martin Léa"]), "Niveau"] = "A1"
+    assert df["Niveau"].tolist() == ["A1", "A1", None, "A1"]
+
+
+def test_sheet_index_with_partial_fallback():
+    """Les noms exacts sont trouvés par l'index ; les autres par recherche partielle."""
+    ws = Workbook().active
+    ws.append(["stagiaire", "Classe"])
+    for name in ["Dupont Jean", "Martin Léa", None, "Bernard Paul"]:
+        ws.append([name, None])
+
+    index = get_sheet_student_index(ws, 1)
+    assert get_sheet_student_index(ws, 1) is index
+    assert index.labels("martin léa") == [3]
+    assert sorted(index.labels_matching(["Dupont Jean", "Bernard"])) == [2, 5]
+
+    ws.append(["Petit Louise", None])
+    assert get_sheet_student_index(ws, 1).labels("Petit Louise") == [6]
+
+
+if __name__ == "__main__":
+    test_dataframe_index_updates_with_loc()
+    test_sheet_index_with_partial_fallback()
+    print("Tests de l'index des élèves terminés !")
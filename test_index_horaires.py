@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test de la normalisation des horaires et de l'index horaire → feuille (index_horaires.py)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from openpyxl import Workbook
+
+from index_horaires import clean_horaire_name, find_horaire_sheet, find_horaire_sheet_name, get_horaire_index
+
+
+SHEETS = ["08h15 à 10h15 Professeur", "10h30 à 11h30 Animateur", "9h à 12h20 Prof", "9h à 12h20 Rôle"]
+
+
+def test_clean_horaire_name():
+    """Les mots-clés d'intervenants sont retirés ; un nom vide garde le nom d'origine."""
+    assert clean_horaire_name("9h à 12h20 Prof") == "9h à 12h20"
+    assert clean_horaire_name("10h30  à 11h30 Animateur") == "10h30 à 11h30"
+    assert clean_horaire_name("Professeur") == "Professeur"
+
+
+def test_find_horaire_sheet_name():
+    """Même horaire, puis mêmes nombres, puis horaire partiel ; la première feuille l'emporte."""
+    index = get_horaire_index(SHEETS)
+    assert index.find("9h à 12h20") == "9h à 12h20 Prof"
+    assert index.find("10h30 à 11h30 Animateur") == "10h30 à 11h30 Animateur"
+    assert index.find("08h15 - 10h15") == "08h15 à 10h15 Professeur"
+    assert index.find("10h30") == "10h30 à 11h30 Animateur"
+    assert index.find("14h à 16h") is None
+    assert index.find("") is None
+
+
+def test_index_is_built_once_per_sheet_list():
+    """L'index est réutilisé tant que les feuilles du classeur ne changent pas."""
+    wb = Workbook()
+    wb.active.title = SHEETS[0]
+    for name in SHEETS[1:]:
+        wb.create_sheet(name)
+
+    assert get_horaire_index(wb.sheetnames) is get_horaire_index(list(SHEETS))
+    assert find_horaire_sheet(wb, "9h à 12h20").title == "9h à 12h20 Prof"
+
+    wb.create_sheet("14h à 16h Prof")
+    assert get_horaire_index(wb.sheetnames) is not get_horaire_index(SHEETS)
+    assert find_horaire_sheet_name(wb, "14h à 16h") == "14h à 16h Prof"
+
+
+if __name__ == "__main__":
+    test_clean_horaire_name()
+    test_find_horaire_sheet_name()
+    test_index_is_built_once_per_sheet_list()
+    print("Tests de l'index des horaires terminés !")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test de l'index de recherche des noms d'élèves (index_recherche.py)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from index_recherche import NgramIndex, fold_text
+
+NAMES = ["Élodie Martin", "DUPONT Jean", "Dupuis  Anne", "François Léa", "Noémie Durand"]
+
+
+def full_scan(term):
+    return {i for i, name in enumerate(NAMES) if fold_text(term) in fold_text(name)}
+
+
+def test_accents_and_case_are_ignored():
+    """"Élodie" et "elodie" trouvent le même élève, dans les deux sens."""
+    index = NgramIndex.from_items(range(len(NAMES)), NAMES)
+    assert index.search("elodie") == index.search("ÉLODIE") == {0}
+    assert index.search("francois") == {3}
+    assert index.search("lea") == {3}
+    assert index.search("dupuis anne") == {2}  # Espaces multiples réduits
+    assert index.search("") == set(range(len(NAMES)))
+
+
+def test_same_result_as_substring_scan():
+    """Postings (1 à 3 caractères), intersections de trigrammes et saisie qui s'allonge."""
+    index = NgramIndex.from_items(range(len(NAMES)), NAMES)
+    for term in ["d", "du", "dup", "dupo", "dupont j", "u", "ur", "rand", "xyz", "e", "ie", "mie d"]:
+        assert index.search(term) == full_scan(term), term
+
+
+def test_add_and_remove():
+    """Les ajouts et suppressions d'élèves mettent l'index à jour sans le reconstruire."""
+    index = NgramIndex.from_items(range(len(NAMES)), NAMES)
+    assert index.search("dup") == {1, 2}
+    index.remove(1)
+    assert index.search("dup") == {2} and 1 not in index
+    index.add(10, "Dupré Hélène")
+    assert index.search("dup") == {2, 10}
+    assert index.search("helene") == {10}
+    assert len(index) == len(NAMES)
+
+
+if __name__ == "__main__":
+    test_accents_and_case_are_ignored()
+    test_same_result_as_substring_scan()
+    test_add_and_remove()
+    print("Tests de l'index de recherche terminés !")
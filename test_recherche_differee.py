@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test de la recherche différée des champs de recherche (recherche_differee.py)
+"""
+import os
+import sys
+import time
+import tkinter
+sys.path.append(os.path.dirname(__file__))
+
+from recherche_differee import DebouncedSearch
+
+
+def wait(interp, seconds):
+    """Laisse passer le délai puis traite les événements Tcl (sans affichage)."""
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        interp.update()
+        time.sleep(0.005)
+
+
+def test_keystrokes_are_coalesced():
+    """Plusieurs frappes rapprochées ne lancent qu'une recherche, avec le dernier texte."""
+    interp = tkinter.Tcl()
+    variable = tkinter.StringVar(master=interp)
+    terms = []
+    DebouncedSearch(interp, variable, lambda request: terms.append(request.term), delay_ms=30)
+
+    for text in ["d", "du", "dup"]:
+        variable.set(text)
+    wait(interp, 0.1)
+    assert terms == ["dup"]
+
+
+def test_newer_input_cancels_chunked_rendering():
+    """Une nouvelle saisie interrompt l'affichage par morceaux de la recherche précédente."""
+    interp = tkinter.Tcl()
+    variable = tkinter.StringVar(master=interp)
+    rendered = []
+
+    def on_search(request):
+        search.run_in_chunks(request, range(100), lambda item: rendered.append((request.term, item)), chunk_size=10)
+
+    search = DebouncedSearch(interp, variable, on_search, delay_ms=10)
+    search.flush()
+    assert len(rendered) == 10  # Premier morceau affiché immédiatement
+
+    variable.set("a")
+    wait(interp, 0.1)
+    first = [item for term, item in rendered if term == ""]
+    assert len(first) < 100
+    assert [item for term, item in rendered if term == "a"] == list(range(100))
+
+
+if __name__ == "__main__":
+    test_keystrokes_are_coalesced()
+    test_newer_input_cancels_chunked_rendering()
+    print("Tests de la recherche différée terminés !")
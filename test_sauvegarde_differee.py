@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test de la sauvegarde différée du fichier matrix (sauvegarde_differee.py)
+"""
+import os
+import sys
+import threading
+sys.path.append(os.path.dirname(__file__))
+
+import pandas as pd
+
+from sauvegarde_differee import WriteBehindSaver, ETAT_SAUVEGARDE, ETAT_NON_SAUVEGARDE
+
+
+def test_rapid_edits_are_coalesced_into_one_write():
+    """Plusieurs modifications rapprochées ne donnent qu'une écriture de la dernière version."""
+    writes = []
+    saver = WriteBehindSaver(lambda df: writes.append(df), delay=60)
+    df = pd.DataFrame({"stagiaire": ["Dupont Jean", "Martin Léa"], "Niveau": ["", ""]})
+
+    for niveau in ["A1", "A2", "B1"]:
+        df.loc[0, "Niveau"] = niveau
+        saver.mark_dirty(df)
+    assert saver.state == ETAT_NON_SAUVEGARDE
+
+    # La copie est indépendante du DataFrame de l'interface
+    df.loc[0, "Niveau"] = "B2"
+
+    assert saver.close()
+    assert len(writes) == 1
+    assert writes[0].loc[0, "Niveau"] == "B1"
+    assert saver.state == ETAT_SAUVEGARDE
+
+
+def test_edit_during_flush_is_not_lost():
+    """Une modification faite pendant une écriture est écrite à la fermeture."""
+    writes = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_write(df):
+        started.set()
+        release.wait(5)
+        writes.append(df.loc[0, "Niveau"])
+
+    saver = WriteBehindSaver(slow_write, delay=0)
+    df = pd.DataFrame({"stagiaire": ["Dupont Jean"], "Niveau": ["A1"]})
+    saver.mark_dirty(df)
+    assert started.wait(5)
+
+    df.loc[0, "Niveau"] = "A2"
+    saver.mark_dirty(df)
+    release.set()
+
+    assert saver.close(timeout=5)
+    assert writes == ["A1", "A2"]
+
+
+def test_failed_write_is_kept_for_retry():
+    """En cas d'erreur, la modification reste en attente et flush() le signale."""
+    attempts = []
+
+    def failing_write(df):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise PermissionError("fichier verrouillé")
+
+    saver = WriteBehindSaver(failing_write, delay=60)
+    saver.mark_dirty(pd.DataFrame({"Niveau": ["A1"]}))
+
+    assert not saver.flush(timeout=5)
+    assert saver.has_pending_changes()
+    assert saver.close(timeout=5)
+    assert len(attempts) == 2
+
+
+if __name__ == "__main__":
+    test_rapid_edits_are_coalesced_into_one_write()
+    test_edit_during_flush_is_not_lost()
+    test_failed_write_is_kept_for_retry()
+    print("Tests de la sauvegarde différée terminés !")
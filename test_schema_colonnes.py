@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test du schéma partagé des colonnes du matrix et des feuilles d'écoles (schema_colonnes.py)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from schema_colonnes import MATRIX_SCHEMA, SCHOOL_SCHEMA, resolve_columns, resolve_column_indexes
+
+
+MATRIX_HEADERS = ("stagiaire", "Niveau", "Ecole", "Horaire", "Cours 1 du", "Cours 1 au", "Classe CI",
+                  "Classe", "Age", "Cours 2", "Cours 2 du", "Cours 2 au", "Prof CI", "Prof", "Niveau.1")
+
+
+def test_matrix_roles_do_not_steal_specific_columns():
+    """Les colonnes spécifiques (CI, Cours N, doublons) ne sont pas prises pour les colonnes générales."""
+    columns = resolve_columns(MATRIX_HEADERS, MATRIX_SCHEMA)
+    assert columns["Stagiaire"] == "stagiaire"
+    assert columns["Niveau"] == "Niveau"
+    assert columns["Classe"] == "Classe"
+    assert columns["Classe CI"] == "Classe CI"
+    assert columns["Prof"] == "Prof"
+    assert columns["Prof CI"] == "Prof CI"
+    assert columns["Cours 2"] == "Cours 2"
+    assert columns["Départ"] == "Cours 1 du"
+    assert columns["Arrivée CI"] == "Cours 2 au"
+    assert columns["Âge"] == "Age"
+
+
+def test_missing_columns_and_school_sheets():
+    """Un rôle absent vaut None ; les feuilles d'écoles utilisent leur propre schéma."""
+    columns = resolve_columns(("Nom", "Classe CI"), MATRIX_SCHEMA)
+    assert columns["Stagiaire"] == "Nom"
+    assert columns["Classe"] is None
+
+    indexes = resolve_column_indexes(("Nom de la classe", "Niveau", "Intervenant", "Rôle", "Liste des élèves"),
+                                     SCHOOL_SCHEMA)
+    assert indexes == {"Liste des élèves": 4, "Classe": 0, "Intervenant": 2, "Rôle": 3, "Niveau": 1,
+                       "Effectif": None}
+
+
+def test_resolution_is_memoized_per_header_signature():
+    """La même signature d'en-têtes n'est résolue qu'une fois et le résultat reste modifiable sans effet."""
+    first = resolve_column_indexes(MATRIX_HEADERS, MATRIX_SCHEMA)
+    first["Niveau"] = None
+    assert resolve_column_indexes(list(MATRIX_HEADERS), MATRIX_SCHEMA)["Niveau"] == 1
+
+    from schema_colonnes import _resolve
+    hits = _resolve.cache_info().hits
+    resolve_columns(MATRIX_HEADERS, MATRIX_SCHEMA)
+    assert _resolve.cache_info().hits == hits + 1
+
+
+if __name__ == "__main__":
+    test_matrix_roles_do_not_steal_specific_columns()
+    test_missing_columns_and_school_sheets()
+    test_resolution_is_memoized_per_header_signature()
+    print("Tests du schéma des colonnes terminés !")
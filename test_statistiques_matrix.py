@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test du calcul par colonnes des assignations du matrix (statistiques_matrix.py)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+import pandas as pd
+
+from statistiques_matrix import compute_matrix_assignments
+from benchmark_statistiques_matrix import compute_matrix_assignments_iterrows
+
+
+def test_same_result_as_row_by_row_analysis():
+    """Même résultat que l'ancien parcours ligne par ligne, y compris pour les cellules vides."""
+    # Cellules vides lues comme NaN, comme avec pd.read_excel()
+    df = pd.DataFrame({
+        "stagiaire": ["Dupont Jean", "Martin Léa", np.nan, "none", "Petit Louise", 12],
+        "Niveau": ["A1", np.nan, "B2", " A1 ", "NaN", 3],
+        "Ecole": ["A", "B", "A", "A", np.nan, "C/CS"],
+        "Horaire": ["9h à 12h20", "9h à 12h20", np.nan, "10h30", "9h", "14h"],
+        "Classe": ["Classe 1", np.nan, "Classe 2", "Classe 3", "Classe 4", "Classe 5"],
+        "Classe CI": [np.nan, "CI 1", np.nan, np.nan, np.nan, np.nan],
+    })
+    result = compute_matrix_assignments(df)
+    assert result == compute_matrix_assignments_iterrows(df)
+    assert result['par_niveau'] == {"A1": 2, "B2": 1, "3": 1}
+    assert result['sans_classe'] == 1
+    assert [eleve['nom'] for eleve in result['eleves_assignes']] == ["Dupont Jean", "Martin Léa", "Petit Louise", "12"]
+
+
+def test_missing_columns():
+    """Sans colonne stagiaire le résultat est vide ; sans colonne horaire aucun élève n'est assigné."""
+    assert compute_matrix_assignments(pd.DataFrame({"Niveau": ["A1"]}))['total_eleves'] == 0
+
+    df = pd.DataFrame({"stagiaire": ["Dupont Jean"], "Ecole": ["A"], "Classe": ["Classe 1"]})
+    result = compute_matrix_assignments(df)
+    assert result == compute_matrix_assignments_iterrows(df)
+    assert result['eleves_assignes'] == [] and result['sans_niveau'] == 1
+
+
+if __name__ == "__main__":
+    test_same_result_as_row_by_row_analysis()
+    test_missing_columns()
+    print("Tests des statistiques du matrix terminés !")
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Test du stockage SQLite optionnel d'une semaine (stockage_semaine.py)
+"""
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from openpyxl import Workbook, load_workbook
+
+import stockage_semaine
+from stockage_semaine import (open_workbook, save_workbook, read_excel_sheets, week_transaction,
+                              get_week_generation, export_week_to_excel, load_personnel_data,
+                              save_personnel_data, recover_week_transaction, iter_workbook_rows)
+
+
+def create_week_folder(tmp):
+    """Crée une semaine minimale : matrix.xlsx, ecole_a.xlsx et personnel.json."""
+    week_folder = os.path.join(tmp, "semaine_1")
+    os.makedirs(week_folder)
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Matrix"
+    ws.append(["stagiaire", "Niveau", "Ecole", "Classe", "Classe CI"])
+    ws.append(["Dupont Jean", "A1", None, None, None])
+    ws.append(["Martin Léa", "B2", None, None, None])
+    wb.save(os.path.join(week_folder, "matrix.xlsx"))
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "9h à 12h20 Prof"
+    ws.append(["Nom de la classe", "Niveau", "Intervenant", "Rôle", "Liste des élèves"])
+    ws.append(["Classe 1", "A1", "Marie", "", ""])
+    wb.save(os.path.join(week_folder, "ecole_a.xlsx"))
+
+    with open(os.path.join(week_folder, "personnel.json"), "w", encoding="utf-8") as f:
+        json.dump({"professeurs": [{"nom": "Marie", "classes": ["Classe 1"]}], "animateurs": []}, f)
+
+    return week_folder
+
+
+def test_week_store_round_trip():
+    """Les écritures passent par la base puis sont réexportées vers les fichiers Excel."""
+    original_preferences = stockage_semaine.PREFERENCES_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        preferences_path = os.path.join(tmp, "user_preferences.json")
+        with open(preferences_path, "w", encoding="utf-8") as f:
+            json.dump({"stockage_sqlite": True}, f)
+        stockage_semaine.PREFERENCES_FILE = preferences_path
+
+        try:
+            week_folder = create_week_folder(tmp)
+            matrix_path = os.path.join(week_folder, "matrix.xlsx")
+            school_path = os.path.join(week_folder, "ecole_a.xlsx")
+
+            df = read_excel_sheets(matrix_path)
+            assert list(df["stagiaire"]) == ["Dupont Jean", "Martin Léa"]
+            assert load_personnel_data(week_folder)["professeurs"][0]["nom"] == "Marie"
+
+            generation = get_week_generation(week_folder)
+            with week_transaction(week_folder):
+                df["Ecole"] = df["Ecole"].astype(object)
+                df["Classe"] = df["Classe"].astype(object)
+                df.loc[0, "Ecole"] = "A"
+                df.loc[0, "Classe"] = "Classe 1"
+                stockage_semaine.write_matrix_dataframe(df, matrix_path, index=False)
+
+                wb = open_workbook(school_path)
+                wb["9h à 12h20 Prof"].cell(row=2, column=5, value="Dupont Jean")
+                wb.save(school_path)
+            assert get_week_generation(week_folder) > generation
+
+            # Le fichier Excel n'est pas encore réécrit : la base fait foi
+            assert load_workbook(school_path)["9h à 12h20 Prof"].cell(row=2, column=5).value is None
+            assert read_excel_sheets(matrix_path).loc[0, "Classe"] == "Classe 1"
+
+            exported = export_week_to_excel(week_folder)
+            assert set(os.path.basename(p) for p in exported) == {"matrix.xlsx", "ecole_a.xlsx"}
+            assert load_workbook(school_path)["9h à 12h20 Prof"].cell(row=2, column=5).value == "Dupont Jean"
+            assert load_workbook(matrix_path)["Matrix"].cell(row=2, column=4).value == "Classe 1"
+        finally:
+            stockage_semaine.PREFERENCES_FILE = original_preferences
+            for store in stockage_semaine._stores.values():
+                store.close()
+            stockage_semaine._stores.clear()
+
+
+def test_transaction_loads_and_saves_each_file_once():
+    """Dans une transaction, chaque classeur est chargé une fois et tout est écrit au commit."""
+    original_load_workbook = stockage_semaine.load_workbook
+    loads = []
+
+    def counting_load_workbook(path, *args, **kwargs):
+        loads.append(os.path.basename(path))
+        return original_load_workbook(path, *args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        week_folder = create_week_folder(tmp)
+        school_path = os.path.join(week_folder, "ecole_a.xlsx")
+        stockage_semaine.load_workbook = counting_load_workbook
+        try:
+            with week_transaction(week_folder):
+                wb = open_workbook(school_path)
+                wb["9h à 12h20 Prof"].cell(row=2, column=5, value="Dupont Jean")
+                save_workbook(wb, school_path)
+
+                wb_again = open_workbook(school_path)
+                assert wb_again is wb
+                wb_again["9h à 12h20 Prof"].cell(row=2, column=2, value="A2")
+                save_workbook(wb_again, school_path)
+
+                data = load_personnel_data(week_folder)
+                data["professeurs"][0]["classes"] = []
+                save_personnel_data(week_folder, data)
+
+                # Rien n'est écrit avant le commit, mais les lectures voient les modifications
+                assert load_workbook(school_path)["9h à 12h20 Prof"].cell(row=2, column=5).value is None
+                assert read_excel_sheets(school_path).loc[0, "Niveau"] == "A2"
+        finally:
+            stockage_semaine.load_workbook = original_load_workbook
+
+        assert loads == ["ecole_a.xlsx"]
+        ws = load_workbook(school_path)["9h à 12h20 Prof"]
+        assert ws.cell(row=2, column=5).value == "Dupont Jean"
+        assert ws.cell(row=2, column=2).value == "A2"
+        assert load_personnel_data(week_folder)["professeurs"][0]["classes"] == []
+        assert not [name for name in os.listdir(week_folder) if ".tmp" in name or name.startswith(".transaction")]
+
+
+def test_transaction_rolls_back_on_error():
+    """Une erreur dans la transaction n'écrit aucun fichier."""
+    with tempfile.TemporaryDirectory() as tmp:
+        week_folder = create_week_folder(tmp)
+        school_path = os.path.join(week_folder, "ecole_a.xlsx")
+        try:
+            with week_transaction(week_folder):
+                wb = open_workbook(school_path)
+                wb["9h à 12h20 Prof"].cell(row=2, column=5, value="Dupont Jean")
+                save_workbook(wb, school_path)
+                save_personnel_data(week_folder, {"professeurs": [], "animateurs": []})
+                raise ValueError("erreur simulée")
+        except ValueError:
+            pass
+
+        assert load_workbook(school_path)["9h à 12h20 Prof"].cell(row=2, column=5).value is None
+        assert load_personnel_data(week_folder)["professeurs"][0]["nom"] == "Marie"
+
+
+def test_interrupted_transaction_is_completed():
+    """Les renommages restants du journal sont effectués à la reprise."""
+    with tempfile.TemporaryDirectory() as tmp:
+        week_folder = create_week_folder(tmp)
+        personnel_path = os.path.join(week_folder, "personnel.json")
+        temp_path = os.path.join(week_folder, "personnel.tmp.json")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"professeurs": [], "animateurs": []}, f)
+        with open(os.path.join(week_folder, stockage_semaine.JOURNAL_FILENAME), "w", encoding="utf-8") as f:
+            json.dump([[temp_path, personnel_path]], f)
+
+        assert recover_week_transaction(week_folder)
+        assert load_personnel_data(week_folder)["professeurs"] == []
+        assert not os.path.exists(temp_path)
+        assert not recover_week_transaction(week_folder)
+
+
+def enable_week_store(tmp):
+    """Active la base SQLite (préférences temporaires) ; retourne la fonction de remise à zéro."""
+    original_preferences = stockage_semaine.PREFERENCES_FILE
+    preferences_path = os.path.join(tmp, "user_preferences.json")
+    with open(preferences_path, "w", encoding="utf-8") as f:
+        json.dump({"stockage_sqlite": True}, f)
+    stockage_semaine.PREFERENCES_FILE = preferences_path
+
+    def restore():
+        stockage_semaine.PREFERENCES_FILE = original_preferences
+        for store in stockage_semaine._stores.values():
+            store.close()
+        stockage_semaine._stores.clear()
+    return restore
+
+
+def test_store_rolled_back_when_file_write_fails():
+    """Base activée : si l'écriture d'un fichier hors base échoue, la base SQLite est annulée."""
+    original_write = stockage_semaine._write_pending_file
+
+    def failing_write(target_path, kind, content):
+        raise OSError("disque plein")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = enable_week_store(tmp)
+        try:
+            week_folder = create_week_folder(tmp)
+            matrix_path = os.path.join(week_folder, "matrix.xlsx")
+            extra_path = os.path.join(week_folder, "annexe.xlsx")
+            Workbook().save(extra_path)
+            generation = get_week_generation(week_folder)
+
+            stockage_semaine._write_pending_file = failing_write
+            try:
+                with week_transaction(week_folder):
+                    df = read_excel_sheets(matrix_path)
+                    df["Classe"] = df["Classe"].astype(object)
+                    df.loc[0, "Classe"] = "Classe 1"
+                    stockage_semaine.write_matrix_dataframe(df, matrix_path, index=False)
+                    save_workbook(open_workbook(extra_path), extra_path)
+                raise AssertionError("l'erreur d'écriture doit remonter")
+            except OSError:
+                pass
+            finally:
+                stockage_semaine._write_pending_file = original_write
+
+            assert get_week_generation(week_folder) == generation
+            assert read_excel_sheets(matrix_path).loc[0, "Classe"] != "Classe 1"
+            assert not [name for name in os.listdir(week_folder) if ".tmp" in name or name.startswith(".transaction")]
+        finally:
+            restore()
+
+
+def test_interrupted_transaction_not_committed_in_store():
+    """Base activée : un journal dont la transaction SQLite n'a pas été validée est abandonné."""
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = enable_week_store(tmp)
+        try:
+            week_folder = create_week_folder(tmp)
+            personnel_path = os.path.join(week_folder, "personnel.json")
+            temp_path = os.path.join(week_folder, "personnel.tmp.json")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"professeurs": [], "animateurs": []}, f)
+            with open(os.path.join(week_folder, stockage_semaine.JOURNAL_FILENAME), "w", encoding="utf-8") as f:
+                json.dump({"token": "jeton-non-valide", "files": [[temp_path, personnel_path]]}, f)
+
+            assert recover_week_transaction(week_folder)
+            assert not os.path.exists(temp_path)
+            with open(personnel_path, "r", encoding="utf-8") as f:
+                assert json.load(f)["professeurs"][0]["nom"] == "Marie"
+        finally:
+            restore()
+
+
+def test_store_preference_read_once():
+    """L'option stockage_sqlite n'est relue que si user_preferences.json change."""
+    original_open = open
+    reads = []
+
+    def counting_open(path, *args, **kwargs):
+        if path == stockage_semaine.PREFERENCES_FILE:
+            reads.append(path)
+        return original_open(path, *args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = enable_week_store(tmp)
+        stockage_semaine.open = counting_open
+        try:
+            assert stockage_semaine.is_week_store_enabled()
+            assert stockage_semaine.is_week_store_enabled()
+            assert len(reads) == 1
+
+            with original_open(stockage_semaine.PREFERENCES_FILE, "w", encoding="utf-8") as f:
+                json.dump({"stockage_sqlite": False, "autre": 1}, f)
+            assert not stockage_semaine.is_week_store_enabled()
+            assert len(reads) == 2
+        finally:
+            del stockage_semaine.open
+            restore()
+
+
+def test_iter_workbook_rows_reads_values_and_pending_changes():
+    """Les lignes sont lues en tuples de valeurs, y compris les modifications d'une transaction."""
+    with tempfile.TemporaryDirectory() as tmp:
+        week_folder = create_week_folder(tmp)
+        school_path = os.path.join(week_folder, "ecole_a.xlsx")
+
+        sheets = [(name, headers, list(rows)) for name, headers, rows in iter_workbook_rows(school_path)]
+        assert sheets == [("9h à 12h20 Prof",
+                           ("Nom de la classe", "Niveau", "Intervenant", "Rôle", "Liste des élèves"),
+                           [("Classe 1", "A1", "Marie", None, None)])]
+
+        with week_transaction(week_folder):
+            wb = open_workbook(school_path)
+            wb["9h à 12h20 Prof"].cell(row=2, column=5, value="Dupont Jean")
+            save_workbook(wb, school_path)
+
+            _, _, rows = next(iter_workbook_rows(school_path))
+            assert list(rows)[0][4] == "Dupont Jean"
+
+
+if __name__ == "__main__":
+    test_week_store_round_trip()
+    test_transaction_loads_and_saves_each_file_once()
+    test_transaction_rolls_back_on_error()
+    test_interrupted_transaction_is_completed()
+    test_store_rolled_back_when_file_write_fails()
+    test_interrupted_transaction_not_committed_in_store()
+    test_store_preference_read_once()
+    test_iter_workbook_rows_reads_values_and_pending_changes()
+    print("Tests du stockage SQLite terminés !")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test de la synchronisation matrix → fichiers des écoles (synchro_ecoles.py)
+"""
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from statistiques_matrix import compute_matrix_assignments
+from synchro_ecoles import SchoolFileSync, apply_school_assignments, assignments_hash, merge_students
+
+
+def create_school_file(path, horaire, classes):
+    """Crée un fichier d'école avec une feuille d'horaire (Classe / Liste des élèves)."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = horaire
+    ws.append(["Classe", "Liste des élèves"])
+    for classe in classes:
+        ws.append([classe, None])
+    wb.save(path)
+
+
+def assignment(ecole, horaire, classe, nom):
+    return {'ecole': ecole, 'horaire': horaire, 'classe': classe, 'nom': nom}
+
+
+def test_merge_students():
+    """Les élèves sont ajoutés sans doublons et triés ; rien n'est écrit s'il n'y a pas de nouvel élève."""
+    assert merge_students(None, ["Zoé", "Anna"]) == "Anna, Zoé"
+    assert merge_students("Anna, Zoé", ["Bob"]) == "Anna, Bob, Zoé"
+    assert merge_students("Anna, Zoé", ["Zoé"]) is None
+    assert assignments_hash({"9h": {"A1": ["Zoé", "Anna"]}}) == assignments_hash({"9h": {"A1": ["Anna", "Zoé"]}})
+
+
+def test_apply_only_changed_sheets():
+    """Seules les feuilles dont une liste d'élèves change sont signalées."""
+    wb = Workbook()
+    first = wb.active
+    first.title = "9h à 12h"
+    first.append(["Classe", "Liste des élèves"])
+    first.append(["A1", "Anna"])
+    second = wb.create_sheet("14h à 16h")
+    second.append(["Classe", "Liste des élèves"])
+    second.append(["B1", None])
+
+    changed = apply_school_assignments(wb, {"9h à 12h": {"A1": ["Anna"]}, "14h à 16h": {"B1": ["Bob"]}})
+    assert changed == ["14h à 16h"]
+    assert first.cell(row=2, column=2).value == "Anna"
+    assert second.cell(row=2, column=2).value == "Bob"
+
+
+def test_sync_writes_only_when_needed():
+    """Une deuxième synchronisation sans changement n'ouvre ni n'écrit aucun fichier."""
+    with tempfile.TemporaryDirectory() as week_folder:
+        ecole_a = os.path.join(week_folder, "ecole_a.xlsx")
+        ecole_b = os.path.join(week_folder, "ecole_b.xlsx")
+        create_school_file(ecole_a, "9h à 12h", ["A1", "A2"])
+        create_school_file(ecole_b, "9h à 12h", ["B1"])
+
+        sync = SchoolFileSync()
+        assignments = {'eleves_assignes': [
+            assignment('A', "9h à 12h", "A1", "Anna"),
+            assignment('B', "9h à 12h", "B1", "Bob"),
+        ]}
+        assert sorted(sync.sync(week_folder, assignments)) == ["ecole_a.xlsx", "ecole_b.xlsx"]
+        assert load_workbook(ecole_a)["9h à 12h"].cell(row=2, column=2).value == "Anna"
+
+        # Mêmes affectations : aucun fichier réécrit
+        mtime_a = os.stat(ecole_a).st_mtime_ns
+        assert sync.sync(week_folder, assignments) == []
+        assert os.stat(ecole_a).st_mtime_ns == mtime_a
+
+        # Nouvel élève à l'école A : seul ecole_a.xlsx est réécrit
+        mtime_b = os.stat(ecole_b).st_mtime_ns
+        assignments['eleves_assignes'].append(assignment('A', "9h à 12h", "A2", "Chloé"))
+        assert sync.sync(week_folder, assignments) == ["ecole_a.xlsx"]
+        assert os.stat(ecole_b).st_mtime_ns == mtime_b
+        assert load_workbook(ecole_a)["9h à 12h"].cell(row=3, column=2).value == "Chloé"
+
+
+def test_is_up_to_date_follows_files():
+    """La semaine n'est plus à jour dès que matrix.xlsx ou un fichier d'école change."""
+    with tempfile.TemporaryDirectory() as week_folder:
+        ecole_a = os.path.join(week_folder, "ecole_a.xlsx")
+        create_school_file(ecole_a, "9h à 12h", ["A1"])
+        sync = SchoolFileSync()
+        assert not sync.is_up_to_date(week_folder)
+
+        sync.sync(week_folder, {'eleves_assignes': [assignment('A', "9h à 12h", "A1", "Anna")]})
+        assert sync.is_up_to_date(week_folder)
+
+        # Modification du matrix (nouveau fichier) : à resynchroniser
+        Workbook().save(os.path.join(week_folder, "matrix.xlsx"))
+        assert not sync.is_up_to_date(week_folder)
+
+        sync.invalidate(week_folder)
+        assert not sync.is_up_to_date(week_folder)
+
+
+def create_matrix_file(path, rows):
+    """Crée un matrix.xlsx (Stagiaire / Niveau / Ecole / Classe / Horaire)."""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Stagiaire", "Niveau", "Ecole", "Classe", "Horaire"])
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def test_matrix_changed_during_sync():
+    """Un matrix réécrit entre sa lecture et la synchronisation n'est pas marqué comme synchronisé."""
+    with tempfile.TemporaryDirectory() as week_folder:
+        matrix_path = os.path.join(week_folder, "matrix.xlsx")
+        create_school_file(os.path.join(week_folder, "ecole_a.xlsx"), "9h à 12h", ["A1", "A2"])
+        create_matrix_file(matrix_path, [["Anna", "B1", "A", "A1", "9h à 12h"]])
+        sync = SchoolFileSync()
+
+        # Signature prise avant la lecture du matrix, comme sync_school_files()
+        source = sync.source_signature(week_folder)
+        assignments = compute_matrix_assignments(pd.read_excel(matrix_path))
+
+        # L'autre application réécrit le matrix avant la fin de la synchronisation
+        create_matrix_file(matrix_path, [["Anna", "B1", "A", "A1", "9h à 12h"], ["Bob", "B2", "A", "A2", "9h à 12h"]])
+        os.utime(matrix_path, ns=(source[0][0] + 10 ** 9, source[0][0] + 10 ** 9))
+
+        assert sync.sync(week_folder, assignments, source) == ["ecole_a.xlsx"]
+        assert not sync.is_up_to_date(week_folder)
+
+        # La synchronisation suivante lit le nouveau matrix et ajoute Bob
+        source = sync.source_signature(week_folder)
+        assignments = compute_matrix_assignments(pd.read_excel(matrix_path))
+        assert sync.sync(week_folder, assignments, source) == ["ecole_a.xlsx"]
+        assert sync.is_up_to_date(week_folder)
+        assert load_workbook(os.path.join(week_folder, "ecole_a.xlsx"))["9h à 12h"].cell(row=3, column=2).value == "Bob"
+
+
+def test_store_changed_during_sync():
+    """Le compteur de la base est celui d'avant la lecture du matrix : une modification pendant la synchronisation reste à appliquer."""
+    with tempfile.TemporaryDirectory() as week_folder:
+        create_school_file(os.path.join(week_folder, "ecole_a.xlsx"), "9h à 12h", ["A1"])
+        sync = SchoolFileSync()
+        assignments = {'eleves_assignes': [assignment('A', "9h à 12h", "A1", "Anna")]}
+
+        # Signature prise avec un autre compteur que le compteur actuel (base modifiée entre-temps)
+        source = sync.source_signature(week_folder)[:-1] + (41,)
+        assert sync.sync(week_folder, assignments, source) == ["ecole_a.xlsx"]
+        assert not sync.is_up_to_date(week_folder)
+
+
+if __name__ == "__main__":
+    test_merge_students()
+    test_apply_only_changed_sheets()
+    test_sync_writes_only_when_needed()
+    test_is_up_to_date_follows_files()
+    test_matrix_changed_during_sync()
+    test_store_changed_during_sync()
+    print("Tests de la synchronisation des écoles terminés !")
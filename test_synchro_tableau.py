@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test de la mise à jour incrémentale du tableau (synchro_tableau.py)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from synchro_tableau import TreeviewSync
+
+
+class ListTree:
+    """Treeview minimal en mémoire (mêmes méthodes que ttk.Treeview) qui compte les appels."""
+
+    def __init__(self):
+        self.children = []
+        self.values = {}
+        self.calls = []
+
+    def insert(self, parent, index, iid, values, tags):
+        self.calls.append(("insert", iid))
+        self.children.insert(len(self.children) if index == "end" else index, iid)
+        self.values[iid] = (values, tags)
+
+    def delete(self, *iids):
+        self.calls.append(("delete",) + iids)
+        for iid in iids:
+            self.children.remove(iid)
+            del self.values[iid]
+
+    def item(self, iid, values, tags):
+        self.calls.append(("item", iid))
+        self.values[iid] = (values, tags)
+
+    def move(self, iid, parent, index):
+        self.calls.append(("move", iid))
+        self.children.remove(iid)
+        self.children.insert(index, iid)
+
+    def get_children(self):
+        return tuple(self.children)
+
+
+def rows(*names, levels=None):
+    levels = levels or {}
+    return [(label, (name, levels.get(name, "")), (levels.get(name, ""),)) for label, name in names]
+
+
+def test_only_changed_rows_are_touched():
+    """Assigner un niveau à 2 élèves ne met à jour que ces 2 lignes."""
+    tree = ListTree()
+    sync = TreeviewSync(tree)
+    students = [(0, "Dupont"), (1, "Martin"), (2, "Petit"), (3, "Bernard")]
+    sync.apply(rows(*students))
+    tree.calls.clear()
+
+    stats = sync.apply(rows(*students, levels={"Martin": "A1", "Petit": "A1"}))
+    assert stats == {'inserted': 0, 'deleted': 0, 'updated': 2, 'moved': 0}
+    assert tree.calls == [("item", "1"), ("item", "2")]
+    assert tree.values["1"] == (("Martin", "A1"), ("A1",))
+
+
+def test_filter_inserts_and_deletes_in_place():
+    """Filtrer puis enlever le filtre garde l'ordre et les éléments conservés."""
+    tree = ListTree()
+    sync = TreeviewSync(tree)
+    students = [(3, "Bernard"), (0, "Dupont"), (1, "Martin"), (2, "Petit")]
+    sync.apply(rows(*students))
+
+    stats = sync.apply(rows(students[1], students[3]))
+    assert stats['deleted'] == 2 and tree.get_children() == ("0", "2")
+
+    stats = sync.apply(rows(*students))
+    assert stats['inserted'] == 2 and stats['updated'] == 0
+    assert tree.get_children() == ("3", "0", "1", "2")
+
+
+def test_reordered_rows_are_moved():
+    """Un changement d'ordre déplace les éléments au lieu de tout recréer."""
+    tree = ListTree()
+    sync = TreeviewSync(tree)
+    sync.apply(rows((0, "A"), (1, "B"), (2, "C")))
+    stats = sync.apply(rows((2, "C"), (0, "A"), (1, "B"), (4, "D")))
+    assert tree.get_children() == ("2", "0", "1", "4")
+    assert stats['inserted'] == 1 and stats['deleted'] == 0
+
+
+if __name__ == "__main__":
+    test_only_changed_rows_are_touched()
+    test_filter_inserts_and_deletes_in_place()
+    test_reordered_rows_are_moved()
+    print("Tests de la synchronisation du tableau terminés !")
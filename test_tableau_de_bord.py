@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test de la réutilisation des widgets du tableau de bord des classes (tableau_de_bord.py)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from tableau_de_bord import (HAUTEUR_EN_TETE_ECOLE, HAUTEUR_EN_TETE_HORAIRE, HAUTEUR_LIGNE_CARTES, HoraireSection,
+                             WidgetPool, calculate_optimal_layout, configure_columns, estimate_school_height,
+                             extract_start_hour, viewport_first_order)
+
+
+class FakeCard:
+    """Widget minimal : compte ses masquages."""
+
+    created = 0
+
+    def __init__(self):
+        FakeCard.created += 1
+        self.hidden = 0
+
+    def hide(self):
+        self.hidden += 1
+
+
+class FakeContainer:
+    def __init__(self):
+        self.weights = {}
+
+    def grid_columnconfigure(self, col, weight):
+        self.weights[col] = weight
+
+
+class FakeWidget(FakeContainer):
+    """Label ou cadre minimal : accepte configure() et grid()."""
+
+    def configure(self, **kwargs):
+        pass
+
+    def grid(self, **kwargs):
+        pass
+
+    def grid_remove(self):
+        pass
+
+
+class FakeClassCard(FakeCard):
+    """Carte minimale : compte les mises à jour."""
+
+    updates = 0
+
+    def update(self, context, details_text):
+        FakeClassCard.updates += 1
+        return True
+
+    def show(self, row, column, padx):
+        pass
+
+
+class FakeSchool:
+    def __init__(self):
+        self.school_key = 'ecole_a'
+        self.display_name = 'A'
+        self.color = '#3b82f6'
+        self.background = '#eff6ff'
+        self.dashboard = self
+        self.week_folder = 'semaine_1'
+
+    def class_details(self, context):
+        return context['classe_info'].get('niveau', '')
+
+
+def make_horaire_section():
+    """HoraireSection sans Tk : widgets remplacés par des objets minimaux."""
+    section = HoraireSection.__new__(HoraireSection)
+    section.school = FakeSchool()
+    section.context = None
+    section._columns = 0
+    section._header = None
+    section._has_classes = None
+    section._grid = None
+    section._data = None
+    section.icon_label = section.horaire_label = FakeWidget()
+    section.classes_container = section.no_classes_label = FakeWidget()
+    section.cards = WidgetPool(FakeClassCard)
+    return section
+
+
+def test_pool_reuses_widgets():
+    """Un réaffichage reprend le widget de chaque clé et ne crée que ceux qui manquent."""
+    FakeCard.created = 0
+    pool = WidgetPool(FakeCard)
+
+    first = pool.assign(["A1", "A2", "A3", "A4", "A5"])
+    assert FakeCard.created == 5
+
+    # Moins de classes : chaque classe garde sa carte, les autres sont masquées
+    second = pool.assign(["A2", "A5", "A1"])
+    assert second == [first[1], first[4], first[0]]
+    assert [card.hidden for card in first] == [0, 0, 1, 1, 0]
+
+    # Une classe ajoutée reprend une carte libre, sans création
+    third = pool.assign(["A1", "A2", "B7", "A5"])
+    assert third[0] is first[0] and third[1] is first[1] and third[3] is first[4]
+    assert third[2] in (first[2], first[3])
+    assert FakeCard.created == 5
+
+    # Plus de classes que de cartes : seules les cartes manquantes sont créées
+    fourth = pool.assign(["A1", "A2", "B7", "A5", "C1", "C2", "C3"])
+    assert fourth[:4] == third
+    assert FakeCard.created == 7
+    assert len(pool) == 7
+
+
+def test_pool_duplicate_keys():
+    """Deux classes de même nom ont chacune leur carte, conservée d'un affichage à l'autre."""
+    pool = WidgetPool(FakeCard)
+    first = pool.assign(["A1", "A1", "A2"])
+    assert len({id(card) for card in first}) == 3
+    assert pool.assign(["A2", "A1", "A1"]) == [first[2], first[0], first[1]]
+
+
+def test_layout_helpers():
+    """Disposition des cartes, colonnes de la grille et tri des horaires."""
+    assert calculate_optimal_layout(1) == 1
+    assert calculate_optimal_layout(3) == 2
+    assert calculate_optimal_layout(5) == 3
+    assert calculate_optimal_layout(9) == 3
+    assert calculate_optimal_layout(4, min_per_row=2, max_per_row=3) == 2
+
+    container = FakeContainer()
+    assert configure_columns(container, 4, 0) == 4
+    assert configure_columns(container, 2, 4) == 2
+    assert container.weights == {0: 1, 1: 1, 2: 0, 3: 0}
+
+    horaires = ["14h-15h30", "8h15-9h15", "inconnu", "10h30-12h"]
+    assert sorted(horaires, key=extract_start_hour) == ["inconnu", "8h15-9h15", "10h30-12h", "14h-15h30"]
+    assert extract_start_hour("8h15-9h15") == 8.25
+
+def test_viewport_first_order():
+    """Les écoles visibles sont construites d'abord, puis les plus proches de la zone visible."""
+    heights = [300, 300, 300, 300, 300]
+    assert viewport_first_order(heights, 0, 600) == ([0, 1, 2], [3, 4])
+    # Position de défilement restaurée au milieu du tableau de bord
+    visible, others = viewport_first_order(heights, 700, 1000)
+    assert visible == [2, 3]
+    assert others == [1, 4, 0]
+
+
+def test_estimate_school_height():
+    """Hauteur estimée d'une école d'après ses horaires et le nombre de cartes par ligne."""
+    def horaire(name, count):
+        return {'horaire': name, 'classes': [{'nom_classe': f"C{i}"} for i in range(count)]}
+
+    # 2 horaires sur une ligne : la hauteur est celle du plus haut (5 classes → 2 lignes de cartes)
+    school_info = [horaire("9h-10h", 5), horaire("8h-9h", 1)]
+    assert estimate_school_height(school_info) == HAUTEUR_EN_TETE_ECOLE + HAUTEUR_EN_TETE_HORAIRE + 2 * HAUTEUR_LIGNE_CARTES
+    assert estimate_school_height([]) < estimate_school_height(school_info)
+
+
+def test_unchanged_horaire_skipped():
+    """Un horaire dont les données n'ont pas changé est sauté sans parcourir ses cartes."""
+    FakeClassCard.updates = 0
+    section = make_horaire_section()
+    horaire_info = {'horaire': "9h-10h", 'classes': [
+        {'nom_classe': "A1", 'niveau': "B1", 'eleves': [{'nom': "Anna"}]},
+        {'nom_classe': "A2", 'niveau': "B2", 'eleves': []},
+    ]}
+    assert section.update(horaire_info) == 2
+    assert FakeClassCard.updates == 2
+
+    # Mêmes données (nouvel objet ou même objet) : aucune carte visitée
+    assert section.update(dict(horaire_info)) == 0
+    assert section.update(horaire_info) == 0
+    assert FakeClassCard.updates == 2
+
+    # Données modifiées sur place : l'horaire est réaffiché
+    horaire_info['classes'][1]['eleves'].append({'nom': "Bob"})
+    assert section.update(horaire_info) == 2
+
+    # Autre semaine : réaffiché même avec les mêmes données
+    section.school.week_folder = 'semaine_2'
+    assert section.update(horaire_info) == 2
+    assert FakeClassCard.updates == 6
+
+
+if __name__ == "__main__":
+    test_pool_reuses_widgets()
+    test_pool_duplicate_keys()
+    test_layout_helpers()
+    test_viewport_first_order()
+    test_estimate_school_height()
+    test_unchanged_horaire_skipped()
+    print("Tests du tableau de bord terminés !")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test du tableau virtuel des élèves (tableau_virtuel.py)
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from tableau_virtuel import VirtualTable
+
+
+class WindowTree:
+    """Treeview minimal en mémoire : hauteur fixe, éléments, sélection et focus."""
+
+    def __init__(self, height_px):
+        self.height_px = height_px
+        self.children = []
+        self.values = {}
+        self.selected = ()
+        self.focused = ""
+        self.bindings = {}
+        self.options = {}
+
+    def bind(self, sequence, func, add=None):
+        self.bindings[sequence] = func
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    def cget(self, option):
+        return 10
+
+    def winfo_height(self):
+        return self.height_px
+
+    def insert(self, parent, index, iid, values, tags):
+        self.children.insert(index, iid)
+        self.values[iid] = values
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.children.remove(iid)
+            del self.values[iid]
+        self.selected = tuple(iid for iid in self.selected if iid not in iids)
+
+    def item(self, iid, values, tags):
+        self.values[iid] = values
+
+    def move(self, iid, parent, index):
+        self.children.remove(iid)
+        self.children.insert(index, iid)
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, iids):
+        self.selected = tuple(iids)
+
+    def selection_remove(self, iids):
+        self.selected = tuple(iid for iid in self.selected if iid not in iids)
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def focus(self, iid=None):
+        if iid is None:
+            return self.focused
+        self.focused = iid
+
+    def identify_row(self, y):
+        return self.children[y // 10]
+
+
+class Scrollbar:
+    def __init__(self):
+        self.position = None
+        self.options = {}
+
+    def set(self, first, last):
+        self.position = (first, last)
+
+    def configure(self, **options):
+        self.options.update(options)
+
+
+class Event:
+    def __init__(self, y=0, delta=0):
+        self.y = y
+        self.delta = delta
+
+
+def make_table(nb_rows, threshold=50):
+    tree = WindowTree(height_px=100)  # 10 lignes visibles de 10 px
+    fetched = []
+
+    def fetch_rows(keys):
+        fetched.append(len(keys))
+        return [(key, (f"Élève {key}",), ()) for key in keys]
+
+    table = VirtualTable(tree, Scrollbar(), fetch_rows, row_height=10, threshold=threshold, margin=5)
+    table.set_rows(range(nb_rows))
+    return table, tree, fetched
+
+
+def test_only_visible_window_is_created():
+    """Au-delà du seuil, seules les lignes visibles et la marge sont créées."""
+    table, tree, fetched = make_table(10000)
+    assert table.virtual
+    assert tree.children == [str(key) for key in range(15)]
+    assert fetched == [15]
+
+    table.yview("moveto", 0.5)
+    assert tree.children[0] == "5000" and len(tree.children) == 15
+    table.yview("scroll", 1, "pages")
+    assert tree.children[0] == "5010"
+    tree.bindings["<MouseWheel>"](Event(delta=120))
+    assert tree.children[0] == "5007"
+
+
+def test_small_lists_are_fully_created():
+    """En dessous du seuil, toutes les lignes sont créées (défilement du Treeview)."""
+    table, tree, _ = make_table(30)
+    assert not table.virtual and len(tree.children) == 30
+
+
+def test_selection_survives_scrolling():
+    """Les lignes sélectionnées restent sélectionnées hors de la fenêtre, Maj+clic compris."""
+    table, tree, _ = make_table(1000)
+    tree.bindings["<Button-1>"](Event(y=20))  # Clic sur la ligne 2
+    tree.selection_set(["2"])
+    tree.bindings["<<TreeviewSelect>>"]()
+
+    table.scroll_to(500)
+    assert tree.selection() == ()
+    assert table.selected_keys() == [2]
+
+    tree.bindings["<Shift-Button-1>"](Event(y=30))  # Maj+clic sur la ligne 503
+    assert table.selected_count == 502
+    assert table.selected_keys()[0] == 2 and table.selected_keys()[-1] == 503
+
+    # Les lignes filtrées sortent de la sélection
+    table.set_rows(range(0, 1000, 2))
+    assert table.selected_count == 251
+
+
+if __name__ == "__main__":
+    test_only_visible_window_is_created()
+    test_small_lists_are_fully_created()
+    test_selection_survives_scrolling()
+    print("Tests du tableau virtuel terminés !")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test de la chaîne de traitements en arrière-plan (taches_fond.py)
+"""
+import os
+import sys
+import threading
+import time
+import tkinter
+sys.path.append(os.path.dirname(__file__))
+
+from taches_fond import BackgroundPipeline
+
+
+def wait_until(interp, condition, timeout=2.0):
+    """Traite les événements Tcl (sans affichage) jusqu'à ce que condition() soit vraie."""
+    end = time.monotonic() + timeout
+    while time.monotonic() < end and not condition():
+        interp.update()
+        time.sleep(0.005)
+    return condition()
+
+
+def test_steps_run_in_worker_thread():
+    """Les étapes s'exécutent hors du thread Tk ; progression et résultats arrivent dans le thread Tk."""
+    interp = tkinter.Tcl()
+    pipeline = BackgroundPipeline(interp, poll_ms=5)
+    tk_thread = threading.get_ident()
+    events = []
+    done = []
+
+    def read(results):
+        assert threading.get_ident() != tk_thread
+        return 3
+
+    def double(results):
+        return results['count'] * 2
+
+    def on_progress(index, total, label):
+        assert threading.get_ident() == tk_thread
+        events.append(("progress", index, total, label))
+
+    pipeline.run(
+        [('count', "Lecture", read), ('double', "Calcul", double)],
+        on_progress=on_progress,
+        on_result=lambda name, result: events.append(("result", name, result)),
+        on_done=done.append
+    )
+    assert wait_until(interp, lambda: done)
+    assert done[0] == {'count': 3, 'double': 6}
+    assert events == [
+        ("progress", 0, 2, "Lecture"),
+        ("result", "count", 3),
+        ("progress", 1, 2, "Calcul"),
+        ("result", "double", 6),
+    ]
+    assert not pipeline.busy
+    pipeline.shutdown()
+
+
+def test_new_run_cancels_previous():
+    """Une nouvelle chaîne (autre semaine) annule la précédente : ses étapes suivantes ne s'exécutent pas."""
+    interp = tkinter.Tcl()
+    pipeline = BackgroundPipeline(interp, poll_ms=5)
+    release = threading.Event()
+    executed = []
+    done = []
+
+    def slow(results):
+        release.wait(1.0)
+        executed.append("semaine 1 - lecture")
+
+    def never(results):
+        executed.append("semaine 1 - analyse")
+
+    first = pipeline.run([('a', "Lecture", slow), ('b', "Analyse", never)],
+                         on_done=lambda results: done.append("semaine 1"))
+    second = pipeline.run([('a', "Lecture", lambda results: executed.append("semaine 2"))],
+                          on_done=lambda results: done.append("semaine 2"))
+    release.set()
+
+    assert wait_until(interp, lambda: done)
+    assert first.cancelled and not second.cancelled
+    assert done == ["semaine 2"]
+    assert executed == ["semaine 1 - lecture", "semaine 2"]
+    pipeline.shutdown()
+
+
+def test_errors_reach_tk_thread():
+    """Une étape en erreur arrête la chaîne et l'exception est transmise à on_error."""
+    interp = tkinter.Tcl()
+    pipeline = BackgroundPipeline(interp, poll_ms=5)
+    errors = []
+
+    def broken(results):
+        raise ValueError("fichier illisible")
+
+    pipeline.run([('a', "Lecture", broken), ('b', "Analyse", lambda results: 1)],
+                 on_done=lambda results: errors.append("terminé"), on_error=errors.append)
+    assert wait_until(interp, lambda: errors)
+    assert isinstance(errors[0], ValueError)
+    pipeline.shutdown()
+
+
+def test_shutdown_waits_for_running_step():
+    """La fermeture attend la fin de l'étape en cours ; les étapes suivantes ne sont pas exécutées."""
+    interp = tkinter.Tcl()
+    pipeline = BackgroundPipeline(interp, poll_ms=5)
+    started = threading.Event()
+    executed = []
+
+    def write(results):
+        started.set()
+        time.sleep(0.1)
+        executed.append("écriture")
+
+    pipeline.run([('a', "Écriture", write), ('b', "Analyse", lambda results: executed.append("analyse"))])
+    assert started.wait(1.0)
+    pipeline.shutdown()
+    assert executed == ["écriture"]
+
+
+def test_new_run_starts_after_cancelled_step():
+    """La nouvelle chaîne ne commence qu'après l'étape en cours de la chaîne annulée."""
+    interp = tkinter.Tcl()
+    pipeline = BackgroundPipeline(interp, poll_ms=5)
+    started = threading.Event()
+    events = []
+    done = []
+
+    def write(results):
+        started.set()
+        time.sleep(0.1)
+        events.append("semaine 1 - fin de l'écriture")
+
+    pipeline.run([('a', "Écriture", write)])
+    assert started.wait(1.0)
+    pipeline.run([('a', "Lecture", lambda results: events.append("semaine 2 - lecture"))], on_done=done.append)
+    assert wait_until(interp, lambda: done)
+    assert events == ["semaine 1 - fin de l'écriture", "semaine 2 - lecture"]
+    pipeline.shutdown()
+
+
+if __name__ == "__main__":
+    test_steps_run_in_worker_thread()
+    test_new_run_cancels_previous()
+    test_errors_reach_tk_thread()
+    test_shutdown_waits_for_running_step()
+    test_new_run_starts_after_cancelled_step()
+    print("Tests de la chaîne en arrière-plan terminés !")